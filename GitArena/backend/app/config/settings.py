@@ -19,7 +19,40 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-4"  # Default to GPT-4
-    
+    AI_PROMPT_TOKEN_BUDGET: int = 6000  # Max estimated tokens per prompt (see ai/prompt_builder.py)
+
+    # AI batch analysis (generate_ai_insights.py)
+    AI_BATCH_CONCURRENCY: int = 4
+    AI_BATCH_CHECKPOINT_PATH: str = "ai_batch_checkpoint.json"
+
+    # Embeddings / semantic search (ai/semantic_search.py)
+    EMBEDDING_BACKEND: str = "auto"  # auto, openai, hashing
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_BATCH_SIZE: int = 100
+    EMBEDDING_HASHING_DIM: int = 256
+    EMBEDDING_INDEX_DIR: str = "data/embeddings"
+    EMBEDDING_INDEX_PULL_REQUESTS: bool = True
+    EMBEDDING_IVF_MIN_VECTORS: int = 20000  # Spaces above this get IVF partitioning
+    EMBEDDING_IVF_NPROBE: int = 8
+
+    # Analytics dashboard bundle (/analytics/bundle)
+    ANALYTICS_BUNDLE_WORKERS: int = 4
+    # Memory-mapped commit column snapshots per space (analytics/snapshots.py)
+    ANALYTICS_SNAPSHOTS_ENABLED: bool = True
+    ANALYTICS_SNAPSHOT_DIR: str = "data/analytics"
+    # PR bottleneck rules depend on the clock: re-evaluate on read when older than this (analytics/bottlenecks.py)
+    BOTTLENECK_EVALUATION_INTERVAL_SECONDS: int = 900
+
+    # GitHub content proxy cache, keyed by commit SHA (github/cache.py)
+    GITHUB_CACHE_DIR: str = "data/github_cache"
+    GITHUB_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024
+    GITHUB_CACHE_DISK_BYTES: int = 1024 * 1024 * 1024
+    GITHUB_HEAD_TTL_SECONDS: int = 30
+    GITHUB_HEAD_CACHE_ENTRIES: int = 10000
+
+    # Membership/scope cache (shared/scope.py); 0 disables the cross-request cache
+    SCOPE_CACHE_TTL_SECONDS: int = 60
+
     # URLs
     FRONTEND_URL: str = "http://localhost:3000"
     BACKEND_URL: str = "http://localhost:8000"
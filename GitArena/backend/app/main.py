@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config.settings import settings
 from app.shared.exceptions import GitArenaException
 from app.shared.middleware import exception_handler, generic_exception_handler
+from app.shared.responses import FastJSONResponse
 from app.modules.users.controller import router as users_router
 from app.modules.users.auth_controller import router as auth_router
 from app.modules.github.controller import router as github_router
@@ -24,7 +25,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="GitArena API",
     description="GitArena - GitHub Analytics and AI Platform",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # CORS middleware
@@ -34,6 +36,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Exception handlers
@@ -0,0 +1,246 @@
+"""
+Batch runner for repository team analysis.
+
+Runs `AIService.analyze_repository_team` over many repositories with a
+bounded pool of workers, skips repositories that had no new commits or PRs
+since their latest `team_analysis`, and checkpoints progress to a JSON file
+so an interrupted run can be resumed.
+"""
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.modules.ai.service import AIService
+from app.shared.models import AIFeedback, Commit, PullRequest, Repository
+
+logger = logging.getLogger(__name__)
+
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Normalize DB timestamps (some are stored tz-aware) for comparison"""
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@dataclass
+class BatchRunResult:
+    """Summary of a batch run"""
+    analyzed: List[int] = field(default_factory=list)
+    skipped: List[int] = field(default_factory=list)
+    failed: Dict[int, str] = field(default_factory=dict)
+    resumed: List[int] = field(default_factory=list)
+    developers_analyzed: int = 0
+
+
+class BatchCheckpoint:
+    """
+    JSON checkpoint of a running batch.
+    Written atomically (tmp file + rename) after every finished repository.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pending: List[int] = []
+        self.completed: List[int] = []
+        self.failed: Dict[str, str] = {}
+        self.started_at: Optional[str] = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> "BatchCheckpoint":
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.pending = [int(r) for r in data.get("pending", [])]
+        self.completed = [int(r) for r in data.get("completed", [])]
+        self.failed = {str(k): v for k, v in data.get("failed", {}).items()}
+        self.started_at = data.get("started_at")
+        return self
+
+    def start(self, repository_ids: List[int]):
+        self.pending = list(repository_ids)
+        self.completed = []
+        self.failed = {}
+        self.started_at = datetime.utcnow().isoformat()
+        self.save()
+
+    def mark_completed(self, repository_id: int):
+        if repository_id not in self.completed:
+            self.completed.append(repository_id)
+        self.failed.pop(str(repository_id), None)
+        self.save()
+
+    def mark_failed(self, repository_id: int, error: str):
+        self.failed[str(repository_id)] = error
+        self.save()
+
+    def remaining(self) -> List[int]:
+        done = set(self.completed)
+        return [r for r in self.pending if r not in done]
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "started_at": self.started_at,
+                "pending": self.pending,
+                "completed": self.completed,
+                "failed": self.failed
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if self.exists():
+            os.remove(self.path)
+
+
+class TeamAnalysisBatchRunner:
+    """Incremental, concurrent runner for `analyze_repository_team`"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        concurrency: int = None,
+        checkpoint_path: str = None,
+        on_result: Callable[[Repository, dict], None] = None
+    ):
+        self.session_factory = session_factory
+        self.concurrency = max(1, concurrency or settings.AI_BATCH_CONCURRENCY)
+        self.checkpoint = BatchCheckpoint(checkpoint_path or settings.AI_BATCH_CHECKPOINT_PATH)
+        self.on_result = on_result
+
+    def find_stale_repositories(self, db: Session, force: bool = False) -> tuple[list[int], list[int]]:
+        """
+        Split repositories into (to_analyze, up_to_date).
+        A repository is up to date when its latest commit/PR activity is not
+        newer than its latest team_analysis row.
+        Uses one grouped query per table instead of per-repository lookups.
+        """
+        repo_ids = [row.id for row in db.query(Repository.id).order_by(Repository.id).all()]
+        if force:
+            return repo_ids, []
+
+        latest_commit = dict(
+            db.query(Commit.repository_id, func.max(Commit.committed_date))
+            .group_by(Commit.repository_id).all()
+        )
+        latest_pr = {
+            row.repository_id: max(
+                (_as_naive_utc(d) for d in (row.created, row.merged, row.closed) if d),
+                default=None
+            )
+            for row in db.query(
+                PullRequest.repository_id,
+                func.max(PullRequest.created_at).label("created"),
+                func.max(PullRequest.merged_at).label("merged"),
+                func.max(PullRequest.closed_at).label("closed")
+            ).group_by(PullRequest.repository_id).all()
+        }
+        latest_analysis = dict(
+            db.query(AIFeedback.repository_id, func.max(AIFeedback.created_at))
+            .filter(AIFeedback.feedback_type == "team_analysis")
+            .group_by(AIFeedback.repository_id).all()
+        )
+
+        to_analyze, up_to_date = [], []
+        for repo_id in repo_ids:
+            activity = [
+                d for d in (_as_naive_utc(latest_commit.get(repo_id)), latest_pr.get(repo_id)) if d
+            ]
+            last_activity = max(activity) if activity else None
+            last_analysis = _as_naive_utc(latest_analysis.get(repo_id))
+
+            if last_activity is None:
+                # Nothing to analyze at all
+                up_to_date.append(repo_id)
+            elif last_analysis is not None and last_activity <= last_analysis:
+                up_to_date.append(repo_id)
+            else:
+                to_analyze.append(repo_id)
+
+        return to_analyze, up_to_date
+
+    async def run(self, force: bool = False, resume: bool = True) -> BatchRunResult:
+        """Run the batch, resuming from the checkpoint file when one exists"""
+        result = BatchRunResult()
+
+        if resume and self.checkpoint.exists():
+            self.checkpoint.load()
+            result.resumed = list(self.checkpoint.completed)
+            queue_ids = self.checkpoint.remaining()
+            logger.info(
+                f"Resuming batch started at {self.checkpoint.started_at}: "
+                f"{len(result.resumed)} done, {len(queue_ids)} remaining"
+            )
+        else:
+            db = self.session_factory()
+            try:
+                queue_ids, result.skipped = self.find_stale_repositories(db, force=force)
+            finally:
+                db.close()
+            self.checkpoint.start(queue_ids)
+            logger.info(f"Batch started: {len(queue_ids)} to analyze, {len(result.skipped)} up to date")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for repo_id in queue_ids:
+            queue.put_nowait(repo_id)
+
+        workers = [
+            asyncio.create_task(self._worker(queue, result))
+            for _ in range(min(self.concurrency, len(queue_ids)))
+        ]
+        if workers:
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        if not result.failed:
+            # Clean finish, next run starts from a fresh staleness check
+            self.checkpoint.clear()
+
+        return result
+
+    async def _worker(self, queue: asyncio.Queue, result: BatchRunResult):
+        while True:
+            repo_id = await queue.get()
+            try:
+                await self._analyze_one(repo_id, result)
+            finally:
+                queue.task_done()
+
+    async def _analyze_one(self, repo_id: int, result: BatchRunResult):
+        # Each worker gets its own session - a Session must not be shared
+        # between concurrently running coroutines.
+        db = self.session_factory()
+        try:
+            analysis = await AIService(db).analyze_repository_team(repo_id)
+            if analysis.get("error"):
+                raise RuntimeError(analysis["error"])
+
+            result.analyzed.append(repo_id)
+            result.developers_analyzed += len(analysis.get("developer_stats", {}))
+            self.checkpoint.mark_completed(repo_id)
+
+            if self.on_result:
+                repo = db.query(Repository).filter(Repository.id == repo_id).first()
+                self.on_result(repo, analysis)
+        except Exception as e:
+            logger.error(f"Team analysis failed for repository {repo_id}: {e}")
+            result.failed[repo_id] = str(e)
+            self.checkpoint.mark_failed(repo_id, str(e))
+        finally:
+            db.close()
@@ -3,6 +3,11 @@ from sqlalchemy.orm import Session
 from app.shared.database import get_db
 from app.modules.ai.service import AIService
 from app.modules.ai.dto import AIFeedbackRequest, AIFeedbackResponse
+from app.modules.ai.streaming import sse_response
+from app.shared.exceptions import NotFoundException, BadRequestException
+from app.shared.permissions import PermissionDenied, is_team_member
+from app.shared.models import Repository
+from app.shared.responses import stream_json_array
 from app.modules.users.controller import get_current_user
 from app.modules.users.dto import UserResponse
 
@@ -20,6 +25,21 @@ async def get_code_review(
     return await service.generate_code_review(request.content, request.context)
 
 
+@router.post("/code-review/stream")
+async def stream_code_review(
+    request: AIFeedbackRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream AI code review as Server-Sent Events
+    Emits `token` events while the model generates and a final `result` event
+    with the same shape as /code-review. The full review is saved to ai_feedback
+    """
+    service = AIService(db)
+    return sse_response(service.stream_code_review(current_user.id, request.content, request.context))
+
+
 @router.get("/insights")
 async def get_insights(
     user_id: int = Query(None),
@@ -33,6 +53,38 @@ async def get_insights(
     return await service.generate_insights(target_user_id, project_id)
 
 
+@router.get("/search")
+async def semantic_search(
+    q: str = Query(..., min_length=1),
+    project_id: int = Query(None),
+    repository_id: int = Query(None),
+    type: str = Query(None, pattern="^(commit|pull_request)$"),
+    k: int = Query(10, ge=1, le=50),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Semantic search over commit messages and PRs
+    Returns the top-k most similar items in a project (space) or repository
+    """
+    if not project_id and not repository_id:
+        raise BadRequestException("project_id or repository_id is required")
+    if project_id and not is_team_member(db, project_id, current_user):
+        raise PermissionDenied("You are not a member of this project")
+    if repository_id:
+        repo = db.query(Repository).filter(Repository.id == repository_id).first()
+        if not repo:
+            raise NotFoundException("Repository not found")
+        # Unlinked repositories are visible to their owner only
+        allowed = is_team_member(db, repo.space_id, current_user) if repo.space_id else repo.user_id == current_user.id
+        if not allowed:
+            raise PermissionDenied("You don't have access to this repository")
+    
+    service = AIService(db)
+    results = await service.semantic_search(q, space_id=project_id, repository_id=repository_id, k=k, kind=type)
+    return {"query": q, "results": results}
+
+
 @router.get("/repository/{repository_id}/team-analysis")
 async def get_repository_team_analysis(
     repository_id: int,
@@ -48,24 +100,63 @@ async def get_repository_team_analysis(
     return await service.analyze_repository_team(repository_id)
 
 
+@router.get("/repository/{repository_id}/team-analysis/stream")
+async def stream_repository_team_analysis(
+    repository_id: int,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the team analysis as Server-Sent Events
+    Emits `stats` (developer statistics) immediately, `token` events while the
+    model generates, and a final `result` event with the same payload as
+    /team-analysis. Only the final result is saved to ai_feedback
+    """
+    service = AIService(db)
+    # Collect stats before streaming so a missing repository is a plain 404
+    team = service.collect_team_stats(repository_id)
+    if not team:
+        raise NotFoundException("Repository not found")
+    return sse_response(service.stream_repository_team_analysis(team))
+
+
 @router.get("/feedback/history")
 async def get_feedback_history(
     repository_id: int = Query(None),
     user_id: int = Query(None),
     limit: int = Query(10, ge=1, le=100),
+    cursor: str = Query(None, description="next_cursor from the previous page"),
+    include_content: bool = Query(False, description="Include the full analysis content"),
     current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Get history of all AI feedback/analyses
     Can filter by repository_id and user_id
-    Returns all saved analyses from ai_feedback table with performance metrics
+    Returns saved analyses from ai_feedback table with performance metrics,
+    newest first, paginated with `cursor` / `next_cursor`.
+    The (large) `content` JSON is only returned with include_content=true
     """
     from app.shared.models import AIFeedback, User, Repository
-    from sqlalchemy import desc
+    from app.shared.pagination import apply_keyset, fetch_page
+    from sqlalchemy.orm import joinedload, load_only
+    import json
+    
+    columns = [
+        AIFeedback.id, AIFeedback.user_id, AIFeedback.repository_id, AIFeedback.feedback_type,
+        AIFeedback.meta_data, AIFeedback.code_quality_score, AIFeedback.code_volume,
+        AIFeedback.effort_score, AIFeedback.velocity_score, AIFeedback.consistency_score,
+        AIFeedback.improvement_areas, AIFeedback.strengths, AIFeedback.created_at
+    ]
+    if include_content:
+        columns.append(AIFeedback.content)
     
     # Include both team_analysis and auto_analysis
-    query = db.query(AIFeedback).filter(
+    query = db.query(AIFeedback).options(
+        load_only(*columns),
+        joinedload(AIFeedback.user).load_only(User.id, User.username, User.email, User.name),
+        joinedload(AIFeedback.repository).load_only(Repository.id, Repository.name)
+    ).filter(
         AIFeedback.feedback_type.in_(['team_analysis', 'auto_analysis'])
     )
     
@@ -75,15 +166,17 @@ async def get_feedback_history(
     if user_id:
         query = query.filter(AIFeedback.user_id == user_id)
     
-    feedbacks = query.order_by(desc(AIFeedback.created_at)).limit(limit).all()
+    feedbacks, next_cursor = fetch_page(
+        apply_keyset(query, AIFeedback.created_at, AIFeedback.id, cursor), limit
+    )
     
     # Format results
     results = []
     for feedback in feedbacks:
-        user = db.query(User).filter(User.id == feedback.user_id).first()
-        repo = db.query(Repository).filter(Repository.id == feedback.repository_id).first()
+        user = feedback.user
+        repo = feedback.repository
         
-        results.append({
+        item = {
             "id": feedback.id,
             "user": {
                 "id": user.id if user else None,
@@ -96,7 +189,6 @@ async def get_feedback_history(
                 "name": repo.name if repo else None
             },
             "feedback_type": feedback.feedback_type,
-            "content": feedback.content,
             "meta_data": feedback.meta_data,
             # New performance metrics
             "metrics": {
@@ -109,12 +201,19 @@ async def get_feedback_history(
             "improvement_areas": feedback.improvement_areas or [],
             "strengths": feedback.strengths or [],
             "created_at": feedback.created_at.isoformat() if feedback.created_at else None
-        })
+        }
+        if include_content:
+            # Stored as JSON text; return it parsed when possible
+            try:
+                item["content"] = json.loads(feedback.content) if feedback.content else None
+            except ValueError:
+                item["content"] = feedback.content
+        results.append(item)
     
-    return {
+    return stream_json_array(results, key="analyses", envelope={
         "total": len(results),
-        "analyses": results
-    }
+        "next_cursor": next_cursor
+    })
 
 
 @router.post("/repository/{repository_id}/auto-analyze")
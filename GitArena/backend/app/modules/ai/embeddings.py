@@ -0,0 +1,99 @@
+"""
+Pluggable text embedding backends.
+
+Every backend returns L2-normalised float32 rows, so cosine similarity is a
+plain dot product in the vector index. Pick the backend with
+EMBEDDING_BACKEND: "openai", "hashing" or "auto" (OpenAI when an API key is
+configured, otherwise the local hashing embedder).
+"""
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+from app.config.settings import settings
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class Embedder:
+    """Base class for embedding backends"""
+    name: str = "base"
+    dim: int = 0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class HashingEmbedder(Embedder):
+    """
+    Deterministic local embedder (signed feature hashing of words and word
+    bigrams). No network and no model download - used in tests and as a
+    fallback when OpenAI is not configured.
+    """
+    name = "hashing"
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str) -> List[str]:
+        words = _TOKEN_RE.findall((text or "").lower())
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                bucket = int.from_bytes(digest[:4], "little") % self.dim
+                sign = 1.0 if digest[4] & 1 else -1.0
+                vectors[row, bucket] += sign
+        return _normalize(vectors)
+
+
+class OpenAIEmbedder(Embedder):
+    """OpenAI embeddings API, called in batches"""
+    name = "openai"
+
+    # Output sizes of the OpenAI embedding models
+    MODEL_DIMS = {
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+        "text-embedding-ada-002": 1536,
+    }
+
+    def __init__(self, model: str = None, batch_size: int = None):
+        self.model = model or settings.EMBEDDING_MODEL
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.dim = self.MODEL_DIMS.get(self.model, 1536)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        rows = []
+        for start in range(0, len(texts), self.batch_size):
+            # The API rejects empty strings
+            batch = [t or " " for t in texts[start:start + self.batch_size]]
+            response = await client.embeddings.create(model=self.model, input=batch)
+            rows.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+        if not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return _normalize(np.asarray(rows, dtype=np.float32))
+
+
+def get_embedder() -> Embedder:
+    """Return the configured embedding backend"""
+    backend = settings.EMBEDDING_BACKEND
+    if backend == "auto":
+        backend = "openai" if settings.OPENAI_API_KEY else "hashing"
+    if backend == "openai":
+        return OpenAIEmbedder()
+    return HashingEmbedder(settings.EMBEDDING_HASHING_DIM)
@@ -0,0 +1,187 @@
+"""
+Token-budgeted prompt construction for AI calls.
+
+Prompt size drives both latency and cost, so every AI call builds its prompt
+through these helpers: content is estimated in tokens and, when over budget,
+summarised (top files by churn, truncated hunks, aggregated developer stats)
+instead of being sent raw.
+"""
+import json
+import math
+from typing import Callable, Dict, List, Optional
+
+# Rough average for English text and code with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n... [truncated]"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer dependency)"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, marker: str = TRUNCATION_MARKER) -> str:
+    """Cut text to roughly max_tokens, keeping the head"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    max_chars = max(0, max_tokens * CHARS_PER_TOKEN - len(marker))
+    return text[:max_chars] + marker
+
+
+def _truncate_patch(patch: str, max_lines: int) -> str:
+    lines = patch.splitlines()
+    if len(lines) <= max_lines:
+        return patch
+    return "\n".join(lines[:max_lines]) + f"\n... [{len(lines) - max_lines} more lines]"
+
+
+def summarize_diff(files: List[dict], max_tokens: int, top_n: int = 10, max_hunk_lines: int = 40) -> str:
+    """
+    Summarise commit `diff_data` (GitHub file entries) within max_tokens.
+    Keeps the top-N files by churn with truncated patches and aggregates the
+    rest. Hunks are shortened further until the summary fits.
+    """
+    files = [f for f in (files or []) if isinstance(f, dict)]
+    if not files:
+        return ""
+
+    def churn(f: dict) -> int:
+        return (f.get("additions") or 0) + (f.get("deletions") or 0)
+
+    ranked = sorted(files, key=churn, reverse=True)
+    top, rest = ranked[:top_n], ranked[top_n:]
+
+    def render(hunk_lines: int) -> str:
+        parts = []
+        for f in top:
+            header = f"{f.get('filename', 'unknown')} ({f.get('status', 'modified')}, +{f.get('additions') or 0}/-{f.get('deletions') or 0})"
+            patch = f.get("patch") or ""
+            if patch and hunk_lines > 0:
+                parts.append(f"{header}\n{_truncate_patch(patch, hunk_lines)}")
+            else:
+                parts.append(header)
+        if rest:
+            parts.append(
+                f"... and {len(rest)} more files "
+                f"(+{sum(f.get('additions') or 0 for f in rest)}/-{sum(f.get('deletions') or 0 for f in rest)})"
+            )
+        return "\n\n".join(parts)
+
+    hunk_lines = max_hunk_lines
+    summary = render(hunk_lines)
+    while estimate_tokens(summary) > max_tokens and hunk_lines > 0:
+        hunk_lines //= 2
+        summary = render(hunk_lines)
+
+    return truncate_to_tokens(summary, max_tokens)
+
+
+def _parse_unified_diff(code: str) -> List[dict]:
+    """Split a unified diff into diff_data-like file entries"""
+    files: List[dict] = []
+    current: Optional[dict] = None
+    patch_lines: List[str] = []
+
+    def flush():
+        if current is not None:
+            current["patch"] = "\n".join(patch_lines)
+            files.append(current)
+
+    for line in code.splitlines():
+        if line.startswith("diff --git "):
+            flush()
+            current = {"filename": line.split(" b/", 1)[-1], "status": "modified", "additions": 0, "deletions": 0}
+            patch_lines = []
+        elif current is None and line.startswith("--- "):
+            # Plain `diff -u` output without the git header
+            current = {"filename": line[4:].strip(), "status": "modified", "additions": 0, "deletions": 0}
+            patch_lines = []
+        elif current is not None:
+            if line.startswith("+++ ") or line.startswith("--- "):
+                continue
+            if line.startswith("+"):
+                current["additions"] += 1
+            elif line.startswith("-"):
+                current["deletions"] += 1
+            patch_lines.append(line)
+    flush()
+    return files
+
+
+def looks_like_diff(code: str) -> bool:
+    head = code.lstrip()[:2000]
+    return head.startswith("diff --git ") or ("\n@@ " in head and "--- " in head)
+
+
+def summarize_code(code: str, max_tokens: int) -> str:
+    """
+    Fit code submitted for review into max_tokens.
+    Unified diffs are summarised per file by churn; other code keeps its
+    beginning and end, which usually carry imports/signatures and the latest edits.
+    """
+    if estimate_tokens(code) <= max_tokens:
+        return code
+
+    if looks_like_diff(code):
+        files = _parse_unified_diff(code)
+        if files:
+            return summarize_diff(files, max_tokens)
+
+    marker = "\n\n... [middle of the file omitted] ...\n\n"
+    keep_chars = max(0, max_tokens * CHARS_PER_TOKEN - len(marker))
+    head_chars = keep_chars * 2 // 3
+    return code[:head_chars] + marker + code[len(code) - (keep_chars - head_chars):]
+
+
+def summarize_developer_stats(
+    developer_stats: Dict[str, dict],
+    max_tokens: int,
+    format_developer: Callable[[str, dict], str],
+    sort_key: str = "performance_score"
+) -> str:
+    """
+    Render per-developer stats, most relevant first, within max_tokens.
+    Developers that do not fit are folded into one aggregated line.
+    """
+    ranked = sorted(developer_stats.items(), key=lambda item: item[1].get(sort_key) or 0, reverse=True)
+
+    lines: List[str] = []
+    used = 0
+    shown = 0
+    # Reserve room for the aggregate line
+    reserve = 40
+    for email, stats in ranked:
+        text = format_developer(email, stats)
+        tokens = estimate_tokens(text)
+        if used + tokens > max_tokens - reserve and shown > 0:
+            break
+        lines.append(text)
+        used += tokens
+        shown += 1
+
+    others = [stats for _, stats in ranked[shown:]]
+    if others:
+        totals = {
+            key: sum(s.get(key) or 0 for s in others)
+            for key in ("commits", "prs_created", "prs_merged", "reviews_given", "additions", "deletions")
+        }
+        lines.append(
+            f"\nOther {len(others)} developers (aggregated):\n"
+            f"  - Commits: {totals['commits']}\n"
+            f"  - PRs Created: {totals['prs_created']}, Merged: {totals['prs_merged']}\n"
+            f"  - Reviews Given: {totals['reviews_given']}\n"
+            f"  - Code Changes: +{totals['additions']} / -{totals['deletions']}\n"
+        )
+
+    return "".join(lines)
+
+
+def summarize_activity_data(activity_data: dict, max_tokens: int) -> str:
+    """JSON-render webhook/activity payloads, summarising any file lists"""
+    data = dict(activity_data or {})
+    for key in ("diff_data", "files"):
+        if isinstance(data.get(key), list):
+            data[key] = summarize_diff(data[key], max_tokens // 2)
+    return truncate_to_tokens(json.dumps(data, indent=2, default=str), max_tokens)
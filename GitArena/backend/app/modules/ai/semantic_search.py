@@ -0,0 +1,189 @@
+"""
+Semantic search over commits and pull requests.
+
+Texts are embedded in batches at ingest time and appended to a per-space
+VectorIndex under EMBEDDING_INDEX_DIR. Repositories that are not linked to a
+space yet are indexed under their own `repo_<id>` directory, which is searched
+together with the space index once the repository joins a space. When a
+repository moves, its vectors are copied into the index of its new space;
+the rows left behind are filtered out by scope at search time.
+"""
+import logging
+import os
+from typing import Iterable, List, Optional, Set
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.modules.ai.embeddings import Embedder, get_embedder
+from app.modules.ai.vector_index import KIND_COMMIT, KIND_NAMES, KIND_PULL_REQUEST, VectorIndex
+from app.shared.models import Commit, PullRequest, Repository
+
+logger = logging.getLogger(__name__)
+
+# Long commit bodies add little signal and cost embedding tokens
+MAX_TEXT_CHARS = 2000
+# Vectors copied per append when a repository moves to another index
+MOVE_BATCH_SIZE = 10000
+
+
+def commit_text(commit: Commit) -> str:
+    return (commit.message or "")[:MAX_TEXT_CHARS]
+
+
+def pull_request_text(pr: PullRequest) -> str:
+    return f"{pr.title or ''}\n{pr.description or ''}"[:MAX_TEXT_CHARS]
+
+
+class SemanticSearchService:
+    def __init__(self, db: Session, embedder: Embedder = None):
+        self.db = db
+        self.embedder = embedder or get_embedder()
+
+    @staticmethod
+    def index_key(repo: Repository) -> str:
+        return f"space_{repo.space_id}" if repo.space_id else f"repo_{repo.id}"
+
+    def _index(self, key: str) -> VectorIndex:
+        return VectorIndex(
+            os.path.join(settings.EMBEDDING_INDEX_DIR, key),
+            dim=self.embedder.dim,
+            backend=self.embedder.name,
+            ivf_min_vectors=settings.EMBEDDING_IVF_MIN_VECTORS,
+            ivf_nprobe=settings.EMBEDDING_IVF_NPROBE
+        )
+
+    async def _add(self, repo: Repository, kind: int, rows: List[tuple]) -> int:
+        """rows: (id, text). Only rows not yet in the index are embedded"""
+        if not rows:
+            return 0
+        index = self._index(self.index_key(repo))
+        known = index.contains([row_id for row_id, _ in rows], kind)
+        rows = [row for row, is_known in zip(rows, known) if not is_known]
+        if not rows:
+            return 0
+
+        added = 0
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            vectors = await self.embedder.embed([text for _, text in batch])
+            added += index.add(
+                [row_id for row_id, _ in batch],
+                [kind] * len(batch),
+                [repo.id] * len(batch),
+                vectors
+            )
+        return added
+
+    async def index_commits(self, repo: Repository, commits: Iterable[Commit]) -> int:
+        return await self._add(repo, KIND_COMMIT, [(c.id, commit_text(c)) for c in commits])
+
+    async def index_pull_requests(self, repo: Repository, prs: Iterable[PullRequest]) -> int:
+        return await self._add(repo, KIND_PULL_REQUEST, [(pr.id, pull_request_text(pr)) for pr in prs])
+
+    async def index_repository(self, repo: Repository) -> int:
+        """Backfill: embed every commit (and PR) of the repository not indexed yet"""
+        added = await self.index_commits(
+            repo, self.db.query(Commit).filter(Commit.repository_id == repo.id).all()
+        )
+        if settings.EMBEDDING_INDEX_PULL_REQUESTS:
+            added += await self.index_pull_requests(
+                repo, self.db.query(PullRequest).filter(PullRequest.repository_id == repo.id).all()
+            )
+        return added
+
+    def move_repository(self, repo: Repository, old_space_id: Optional[int]) -> int:
+        """Copy the repository's vectors from the index of its previous space into its current one"""
+        old_key = f"space_{old_space_id}" if old_space_id else f"repo_{repo.id}"
+        new_key = self.index_key(repo)
+        if old_key == new_key or not os.path.exists(os.path.join(settings.EMBEDDING_INDEX_DIR, old_key, "meta.json")):
+            return 0
+        ids, kinds, vectors = self._index(old_key).repository_rows(repo.id)
+        target = self._index(new_key)
+        added = 0
+        for start in range(0, len(ids), MOVE_BATCH_SIZE):
+            batch = slice(start, start + MOVE_BATCH_SIZE)
+            added += target.add(ids[batch], kinds[batch], np.full(len(ids[batch]), repo.id), vectors[batch])
+        return added
+
+    async def search(
+        self,
+        query: str,
+        space_id: int = None,
+        repository_id: int = None,
+        k: int = 10,
+        kind: Optional[int] = None
+    ) -> List[dict]:
+        """Top-k commits/PRs most similar to the query within a space or repository"""
+        if repository_id:
+            repos = self.db.query(Repository).filter(Repository.id == repository_id).all()
+        else:
+            repos = self.db.query(Repository).filter(Repository.space_id == space_id).all()
+        # A space index keeps the vectors of repositories that moved to another
+        # space, so hits are always restricted to the repositories in scope
+        repo_filter = [repo.id for repo in repos]
+        if not repo_filter:
+            return []
+
+        keys = {self.index_key(repo) for repo in repos} | {f"repo_{repo.id}" for repo in repos}
+        if space_id:
+            keys.add(f"space_{space_id}")
+
+        indexes = [
+            self._index(key) for key in sorted(keys)
+            if os.path.exists(os.path.join(settings.EMBEDDING_INDEX_DIR, key, "meta.json"))
+        ]
+        if not indexes:
+            return []
+
+        query_vector = (await self.embedder.embed([query]))[0]
+        hits = []
+        for index in indexes:
+            hits.extend(index.search(query_vector, k=k, kind=kind, repository_ids=repo_filter))
+        hits.sort(key=lambda hit: -hit[2])
+        return self._hydrate(hits[:k], set(repo_filter))
+
+    def _hydrate(self, hits: List[tuple], repository_ids: Set[int]) -> List[dict]:
+        commit_ids = [row_id for row_id, kind, _ in hits if kind == KIND_COMMIT]
+        pr_ids = [row_id for row_id, kind, _ in hits if kind == KIND_PULL_REQUEST]
+        commits = {
+            c.id: c for c in self.db.query(Commit).filter(Commit.id.in_(commit_ids)).all()
+        } if commit_ids else {}
+        prs = {
+            pr.id: pr for pr in self.db.query(PullRequest).filter(PullRequest.id.in_(pr_ids)).all()
+        } if pr_ids else {}
+
+        results = []
+        for row_id, kind, score in hits:
+            if kind == KIND_COMMIT and row_id in commits:
+                c = commits[row_id]
+                if c.repository_id not in repository_ids:
+                    continue
+                results.append({
+                    "type": KIND_NAMES[kind],
+                    "id": c.id,
+                    "score": round(score, 4),
+                    "sha": c.sha,
+                    "message": c.message,
+                    "author_name": c.author_name,
+                    "repository_id": c.repository_id,
+                    "date": c.committed_date.isoformat() if c.committed_date else None
+                })
+            elif kind == KIND_PULL_REQUEST and row_id in prs:
+                pr = prs[row_id]
+                if pr.repository_id not in repository_ids:
+                    continue
+                results.append({
+                    "type": KIND_NAMES[kind],
+                    "id": pr.id,
+                    "score": round(score, 4),
+                    "number": pr.number,
+                    "title": pr.title,
+                    "author": pr.author,
+                    "state": pr.state,
+                    "repository_id": pr.repository_id,
+                    "date": pr.created_at.isoformat() if pr.created_at else None
+                })
+        return results
@@ -1,11 +1,44 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from app.modules.ai.repository import AIRepository
 from app.modules.ai.dto import AIFeedbackResponse
+from app.modules.ai.prompt_builder import (
+    estimate_tokens,
+    summarize_activity_data,
+    summarize_code,
+    summarize_developer_stats,
+    truncate_to_tokens,
+)
 from app.config.settings import settings
 from typing import Optional
 
 
 class AIService:
+    TEAM_ANALYSIS_SYSTEM_PROMPT = "You are an expert engineering manager and data analyst specializing in developer performance analytics. Provide deep, actionable insights based on quantitative data. Be specific, constructive, and data-driven. Use professional language and focus on growth opportunities."
+    CODE_REVIEW_SYSTEM_PROMPT = "You are an expert senior software engineer and security auditor."
+    TEAM_ANALYSIS_INSTRUCTIONS = """
+
+Analyze this team's performance with deep insights and provide:
+
+1. **Overall Team Health Assessment**: Evaluate the team's productivity, collaboration quality, and development velocity. Consider the distribution of work and engagement levels.
+
+2. **Top Performer Analysis**: Identify why the top performer excels. Analyze their contribution patterns, collaboration style, code quality indicators, and leadership in code reviews.
+
+3. **Specific Improvement Suggestions**: For EACH developer listed above, provide 2-3 concrete, actionable recommendations tailored to their specific metrics and patterns. Be constructive and specific.
+
+4. **Team Collaboration Insights**: Analyze code review patterns, PR collaboration, knowledge sharing, and team dynamics. Identify strengths and areas for improvement.
+
+Return ONLY valid JSON with this exact structure (use Hebrew for descriptions if helpful):
+{
+  "team_health": "Comprehensive team health assessment (3-4 sentences)",
+  "top_performer_analysis": "Detailed analysis of why the top performer excels (3-4 sentences with specific metrics)",
+  "improvement_suggestions": {
+    "developer_email_1": "Specific actionable suggestions (2-3 concrete points)",
+    "developer_email_2": "Specific actionable suggestions (2-3 concrete points)"
+  },
+  "collaboration_insights": "Team dynamics and collaboration analysis (3-4 sentences)"
+}
+"""
+
     def __init__(self, db: Session):
         self.db = db
         self.repository = AIRepository(db)
@@ -119,7 +152,10 @@ class AIService:
         
         # 2. Prepare context for AI (if key exists)
         activity_summary = f"User has {len(commits)} commits. Most active file: {most_common_file[0][0] if most_common_file else 'N/A'}"
-        recent_messages = "\n".join([c.message for c in commits[:10]])
+        recent_messages = truncate_to_tokens(
+            "\n".join([c.message for c in commits[:10]]),
+            settings.AI_PROMPT_TOKEN_BUDGET // 2
+        )
         
         prompt = f"""
 Analyze this developer's activity and provide 3-4 professional, data-driven insights.
@@ -175,26 +211,13 @@ Return ONLY a JSON list of objects with this format:
             )
 
         client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        prompt = f"""
-Review the following code and provide constructive feedback.
-Context: {context if context else 'No additional context provided.'}
-
-Code:
-```
-{code}
-```
-
-Focus on: code quality, performance, security, and best practices.
-Keep it concise.
-"""
 
         try:
             response = await client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are an expert senior software engineer and security auditor."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": self.CODE_REVIEW_SYSTEM_PROMPT},
+                    {"role": "user", "content": self._code_review_prompt(code, context)}
                 ],
                 temperature=0.2
             )
@@ -211,11 +234,24 @@ Keep it concise.
     
     async def generate_embeddings(self, text: str) -> list:
         """
-        Generate embeddings for text
-        Placeholder implementation for Sprint 1
+        Generate an embedding for text with the configured backend
+        (see EMBEDDING_BACKEND)
         """
-        # TODO: Integrate with OpenAI embeddings API
-        return []
+        from app.modules.ai.embeddings import get_embedder
+        
+        vectors = await get_embedder().embed([text])
+        return vectors[0].tolist()
+    
+    async def semantic_search(self, query: str, space_id: int = None, repository_id: int = None,
+                              k: int = 10, kind: Optional[str] = None) -> list:
+        """Find the commits/PRs most similar to a free-text query"""
+        from app.modules.ai.semantic_search import SemanticSearchService
+        from app.modules.ai.vector_index import KIND_NAMES
+        
+        kind_code = {name: code for code, name in KIND_NAMES.items()}.get(kind) if kind else None
+        return await SemanticSearchService(self.db).search(
+            query, space_id=space_id, repository_id=repository_id, k=k, kind=kind_code
+        )
     
     def store_feedback(self, user_id: int, feedback_type: str, content: str, **kwargs):
         """Store AI feedback in database"""
@@ -313,7 +349,7 @@ Recent Stats (30 days):
 - Reviews: {recent_reviews}
 
 Current Activity Details:
-{json.dumps(activity_data, indent=2)}
+{summarize_activity_data(activity_data, settings.AI_PROMPT_TOKEN_BUDGET // 2)}
 """
                 
                 prompt = f"""{activity_summary}
@@ -420,16 +456,160 @@ Return ONLY the insight text, no JSON or formatting."""
         Returns analysis with best performer, insights, and improvement points
         Saves results to ai_feedback table
         """
-        from datetime import datetime, timedelta
-        from app.shared.models import Commit, PullRequest, Review, User, Repository, AIFeedback
-        from sqlalchemy import func
         import json
         from openai import AsyncOpenAI
         
+        team = self.collect_team_stats(repository_id)
+        if not team:
+            return {"error": "Repository not found"}
+        
+        ai_insights = {}
+        if settings.OPENAI_API_KEY and team["developer_stats"]:
+            try:
+                client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+                
+                response = await client.chat.completions.create(
+                    model="gpt-4",  # שודרג ל-GPT-4!
+                    messages=self._team_analysis_messages(team),
+                    temperature=0.3
+                )
+                
+                ai_insights = self._parse_json_content(response.choices[0].message.content)
+                
+            except Exception as e:
+                print(f"AI Analysis Error: {e}")
+                ai_insights = self._fallback_team_insights()
+        else:
+            ai_insights = self._missing_team_insights()
+        
+        return self._save_team_analysis(team, ai_insights)
+
+    def _stream_session(self) -> Session:
+        """
+        A session of its own for writes made while a response streams: the
+        request's session has been closed by get_db's teardown by then
+        """
+        return sessionmaker(autocommit=False, autoflush=False, bind=self.db.get_bind())()
+
+    async def stream_repository_team_analysis(self, team: dict):
+        """
+        Streaming variant of analyze_repository_team.
+        Yields SSE events: `stats` right away, `token` for every completion
+        chunk while the model generates, then `result` with the same payload
+        analyze_repository_team returns. Only the final payload is persisted.
+        `team` is the output of collect_team_stats.
+        """
+        from openai import AsyncOpenAI
+        from app.modules.ai.streaming import sse_event
+        
+        yield sse_event("stats", {
+            "repository_id": team["repository_id"],
+            "repository_name": team["repository"].name,
+            "developer_stats": team["developer_stats"],
+            "best_performer": team["best_performer"]
+        })
+        
+        if settings.OPENAI_API_KEY and team["developer_stats"]:
+            chunks = []
+            try:
+                client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+                stream = await client.chat.completions.create(
+                    model="gpt-4",
+                    messages=self._team_analysis_messages(team),
+                    temperature=0.3,
+                    stream=True
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        chunks.append(delta)
+                        yield sse_event("token", {"content": delta})
+                
+                ai_insights = self._parse_json_content("".join(chunks))
+            except Exception as e:
+                print(f"AI Analysis Error: {e}")
+                yield sse_event("error", {"message": str(e)})
+                ai_insights = self._fallback_team_insights()
+        else:
+            ai_insights = self._missing_team_insights()
+        
+        db = self._stream_session()
+        try:
+            result = AIService(db)._save_team_analysis(team, ai_insights)
+        finally:
+            db.close()
+        yield sse_event("result", result)
+
+    async def stream_code_review(self, user_id: int, code: str, context: Optional[str] = None):
+        """
+        Streaming variant of generate_code_review.
+        Yields `token` events while the model generates and a final `result`
+        event shaped like AIFeedbackResponse; the full review is then stored
+        as a code_review feedback entry.
+        """
+        from openai import AsyncOpenAI
+        from app.modules.ai.streaming import sse_event
+        
+        if not settings.OPENAI_API_KEY:
+            yield sse_event("result", AIFeedbackResponse(
+                feedback="OpenAI API key missing. Please configure it in settings.",
+                confidence=0.0
+            ).model_dump())
+            return
+        
+        chunks = []
+        try:
+            client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            stream = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": self.CODE_REVIEW_SYSTEM_PROMPT},
+                    {"role": "user", "content": self._code_review_prompt(code, context)}
+                ],
+                temperature=0.2,
+                stream=True
+            )
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    chunks.append(delta)
+                    yield sse_event("token", {"content": delta})
+        except Exception as e:
+            yield sse_event("result", AIFeedbackResponse(
+                feedback=f"Failed to generate review: {str(e)}",
+                confidence=0.0
+            ).model_dump())
+            return
+        
+        feedback = "".join(chunks)
+        db = self._stream_session()
+        try:
+            AIService(db).store_feedback(
+                user_id=user_id,
+                feedback_type="code_review",
+                content=feedback,
+                meta_data={"context": context}
+            )
+        except Exception as e:
+            db.rollback()
+            print(f"Error saving feedback: {e}")
+        finally:
+            db.close()
+        
+        yield sse_event("result", AIFeedbackResponse(feedback=feedback, confidence=0.9).model_dump())
+
+    def collect_team_stats(self, repository_id: int) -> Optional[dict]:
+        """
+        Aggregate the last 90 days of commits, PRs and reviews per developer.
+        Returns None if the repository does not exist.
+        """
+        from datetime import datetime, timedelta
+        from app.shared.models import Commit, PullRequest, Review, Repository
+        
         # Get repository
         repository = self.db.query(Repository).filter(Repository.id == repository_id).first()
         if not repository:
-            return {"error": "Repository not found"}
+            return None
         
         # Analyze activity from the last 90 days
         ninety_days_ago = datetime.utcnow() - timedelta(days=90)
@@ -517,95 +697,109 @@ Return ONLY the insight text, no JSON or formatting."""
         # Find best performer
         best_performer = max(developer_stats.values(), key=lambda x: x["performance_score"]) if developer_stats else None
         
-        # Generate AI insights using OpenAI
-        analysis_data = {
-            "repository": repository.name,
-            "period": "Last 90 days",
-            "total_developers": len(developer_stats),
-            "best_performer": best_performer,
-            "all_stats": developer_stats
+        return {
+            "repository_id": repository_id,
+            "repository": repository,
+            "developer_stats": developer_stats,
+            "best_performer": best_performer
         }
+
+    def _team_analysis_messages(self, team: dict) -> list:
+        """Build the chat messages for the team analysis completion"""
+        repository = team["repository"]
+        developer_stats = team["developer_stats"]
+        
+        def format_developer(email: str, stats: dict) -> str:
+            return (
+                f"\n{stats['name']} ({email}):\n"
+                f"  - Commits: {stats['commits']}\n"
+                f"  - PRs Created: {stats['prs_created']}, Merged: {stats['prs_merged']}\n"
+                f"  - Reviews Given: {stats['reviews_given']}, Approved: {stats['reviews_approved']}\n"
+                f"  - Code Changes: +{stats['additions']} / -{stats['deletions']}\n"
+                f"  - Performance Score: {stats['performance_score']}\n"
+            )
         
-        ai_insights = {}
-        if settings.OPENAI_API_KEY and developer_stats:
-            try:
-                client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-                
-                # Create summary for AI
-                summary = f"""
+        header = f"""
 Repository: {repository.name}
 Period: Last 90 days
 Number of Developers: {len(developer_stats)}
 
 Developer Statistics:
 """
-                for email, stats in developer_stats.items():
-                    summary += f"\n{stats['name']} ({email}):\n"
-                    summary += f"  - Commits: {stats['commits']}\n"
-                    summary += f"  - PRs Created: {stats['prs_created']}, Merged: {stats['prs_merged']}\n"
-                    summary += f"  - Reviews Given: {stats['reviews_given']}, Approved: {stats['reviews_approved']}\n"
-                    summary += f"  - Code Changes: +{stats['additions']} / -{stats['deletions']}\n"
-                    summary += f"  - Performance Score: {stats['performance_score']}\n"
-                
-                prompt = f"""{summary}
+        instructions = self.TEAM_ANALYSIS_INSTRUCTIONS
+        # Large teams: top developers in full, the rest aggregated
+        stats_budget = settings.AI_PROMPT_TOKEN_BUDGET - estimate_tokens(
+            header + instructions + self.TEAM_ANALYSIS_SYSTEM_PROMPT
+        )
+        summary = header + summarize_developer_stats(developer_stats, stats_budget, format_developer)
+        
+        prompt = summary + instructions
+        return [
+            {"role": "system", "content": self.TEAM_ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
 
-Analyze this team's performance with deep insights and provide:
+    def _code_review_prompt(self, code: str, context: Optional[str] = None) -> str:
+        """Build the review prompt; oversized code/diffs are summarised to fit the token budget"""
+        budget = settings.AI_PROMPT_TOKEN_BUDGET
+        context = truncate_to_tokens(context, budget // 10) if context else 'No additional context provided.'
+        template = """
+Review the following code and provide constructive feedback.
+Context: {context}
 
-1. **Overall Team Health Assessment**: Evaluate the team's productivity, collaboration quality, and development velocity. Consider the distribution of work and engagement levels.
+Code:
+```
+{code}
+```
 
-2. **Top Performer Analysis**: Identify why the top performer excels. Analyze their contribution patterns, collaboration style, code quality indicators, and leadership in code reviews.
+Focus on: code quality, performance, security, and best practices.
+Keep it concise.
+"""
+        overhead = estimate_tokens(template + context + self.CODE_REVIEW_SYSTEM_PROMPT)
+        return template.format(context=context, code=summarize_code(code, budget - overhead))
 
-3. **Specific Improvement Suggestions**: For EACH developer listed above, provide 2-3 concrete, actionable recommendations tailored to their specific metrics and patterns. Be constructive and specific.
+    @staticmethod
+    def _parse_json_content(content: str):
+        """Parse a JSON completion, tolerating a ```json fence"""
+        import json
+        
+        content = content.strip()
+        if content.startswith("```json"):
+            content = content.replace("```json", "").replace("```", "").strip()
+        return json.loads(content)
 
-4. **Team Collaboration Insights**: Analyze code review patterns, PR collaboration, knowledge sharing, and team dynamics. Identify strengths and areas for improvement.
+    @staticmethod
+    def _fallback_team_insights() -> dict:
+        return {
+            "team_health": "Analysis in progress",
+            "top_performer_analysis": "Data being processed",
+            "improvement_suggestions": {},
+            "collaboration_insights": "Check back soon for insights"
+        }
 
-Return ONLY valid JSON with this exact structure (use Hebrew for descriptions if helpful):
-{{
-  "team_health": "Comprehensive team health assessment (3-4 sentences)",
-  "top_performer_analysis": "Detailed analysis of why the top performer excels (3-4 sentences with specific metrics)",
-  "improvement_suggestions": {{
-    "developer_email_1": "Specific actionable suggestions (2-3 concrete points)",
-    "developer_email_2": "Specific actionable suggestions (2-3 concrete points)"
-  }},
-  "collaboration_insights": "Team dynamics and collaboration analysis (3-4 sentences)"
-}}
-"""
-                
-                response = await client.chat.completions.create(
-                    model="gpt-4",  # שודרג ל-GPT-4!
-                    messages=[
-                        {"role": "system", "content": "You are an expert engineering manager and data analyst specializing in developer performance analytics. Provide deep, actionable insights based on quantitative data. Be specific, constructive, and data-driven. Use professional language and focus on growth opportunities."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.3
-                )
-                
-                content = response.choices[0].message.content
-                if content.startswith("```json"):
-                    content = content.replace("```json", "").replace("```", "").strip()
-                
-                ai_insights = json.loads(content)
-                
-            except Exception as e:
-                print(f"AI Analysis Error: {e}")
-                ai_insights = {
-                    "team_health": "Analysis in progress",
-                    "top_performer_analysis": "Data being processed",
-                    "improvement_suggestions": {},
-                    "collaboration_insights": "Check back soon for insights"
-                }
-        else:
-            ai_insights = {
-                "team_health": "OpenAI API key not configured or no developer data available",
-                "top_performer_analysis": "N/A",
-                "improvement_suggestions": {},
-                "collaboration_insights": "N/A"
-            }
+    @staticmethod
+    def _missing_team_insights() -> dict:
+        return {
+            "team_health": "OpenAI API key not configured or no developer data available",
+            "top_performer_analysis": "N/A",
+            "improvement_suggestions": {},
+            "collaboration_insights": "N/A"
+        }
+
+    def _save_team_analysis(self, team: dict, ai_insights: dict) -> dict:
+        """Build the final team analysis payload and save it per developer to ai_feedback"""
+        from datetime import datetime
+        from app.shared.models import User, AIFeedback
+        import json
+        
+        repository_id = team["repository_id"]
+        developer_stats = team["developer_stats"]
+        best_performer = team["best_performer"]
         
         # Prepare final result
         result = {
             "repository_id": repository_id,
-            "repository_name": repository.name,
+            "repository_name": team["repository"].name,
             "analysis_period": "90 days",
             "analyzed_at": datetime.utcnow().isoformat(),
             "developer_stats": developer_stats,
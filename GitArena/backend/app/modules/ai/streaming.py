@@ -0,0 +1,26 @@
+"""
+Server-Sent Events helpers for streamed AI responses
+"""
+import json
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+
+def sse_event(event: str, data) -> str:
+    """Format a single SSE message with a JSON payload"""
+    payload = json.dumps(data, default=str, ensure_ascii=False)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    """Wrap an async iterator of SSE messages in a non-buffered streaming response"""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # Disable proxy (nginx) buffering so tokens reach the client immediately
+            "X-Accel-Buffering": "no"
+        }
+    )
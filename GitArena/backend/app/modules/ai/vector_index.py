@@ -0,0 +1,339 @@
+"""
+Memory-mapped float32 vector index (one directory per space).
+
+Layout of an index directory:
+    gen_<n>/          vectors.f32   raw float32 rows (count x dim), appended at ingest
+                      ids.i64       source row id per vector (commit id / pull request id)
+                      kinds.u8      source kind per vector (see KIND_*)
+                      repos.i32     repository id per vector (for per-repository filtering)
+    gen_<n>/ivf_<m>/  centroids.f32 / lists.i32   optional IVF partitioning
+    meta.json         {"dim", "backend", "generation", "count",
+                       "ivf_generation", "ivf_count", "ivf_nlist", "ivf_assigned"}
+
+`count` in meta.json is the number of committed rows; it is written last
+(atomically), so a reader never sees a half-appended row. Files named by a
+published meta.json are only ever appended to: re-training the IVF lists
+writes a new ivf_<m> directory, and an index reset (the embedding backend
+changed) starts a new gen_<n>, before meta.json switches to them. A reader
+that loaded the previous meta keeps reading consistent files; superseded
+directories are deleted once unused for GENERATION_GRACE_SECONDS. Writers
+(API workers, scripts/backfill_embeddings.py) are serialised with a file
+lock across processes. Vectors are L2-normalised by the embedders, so
+scores are cosine similarities.
+"""
+import json
+import os
+import re
+import shutil
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.shared.file_lock import FileLock
+
+KIND_COMMIT = 0
+KIND_PULL_REQUEST = 1
+KIND_NAMES = {KIND_COMMIT: "commit", KIND_PULL_REQUEST: "pull_request"}
+
+# Searches read the files right after loading meta.json; a superseded
+# generation is kept this long for readers that are still between the two
+GENERATION_GRACE_SECONDS = 300
+GENERATION_PATTERN = re.compile(r"^gen_(\d+)$")
+IVF_PATTERN = re.compile(r"^ivf_(\d+)$")
+
+
+def _kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on normalised rows, returns normalised centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=k)
+        empty = counts == 0
+        # Re-seed empty clusters with random rows
+        sums[empty] = data[rng.choice(len(data), size=int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class VectorIndex:
+    """Append-only, memory-mapped vector index with optional IVF search"""
+
+    def __init__(
+        self,
+        directory: str,
+        dim: int,
+        backend: str,
+        ivf_min_vectors: int = 20000,
+        ivf_nprobe: int = 8
+    ):
+        self.directory = directory
+        self.dim = dim
+        self.backend = backend
+        self.ivf_min_vectors = ivf_min_vectors
+        self.ivf_nprobe = ivf_nprobe
+        self.meta = self._load_meta()
+
+    # ---- files -------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _data_path(self, name: str) -> str:
+        return self._path(os.path.join(self.meta["generation"], name))
+
+    def _ivf_path(self, name: str) -> str:
+        return self._data_path(os.path.join(self.meta["ivf_generation"], name))
+
+    def _empty_meta(self) -> dict:
+        return {"dim": self.dim, "backend": self.backend, "generation": None, "count": 0, "ivf_count": 0}
+
+    def _read_meta(self) -> Optional[dict]:
+        path = self._path("meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _load_meta(self) -> dict:
+        """The committed meta; an index built by another embedding backend reads as empty"""
+        meta = self._read_meta()
+        # Embedding backend/model changed: vectors are not comparable anymore
+        if meta and meta.get("dim") == self.dim and meta.get("backend") == self.backend:
+            return meta
+        return self._empty_meta()
+
+    def _write_meta(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    @staticmethod
+    def _new_generation(parent: str, prefix: str, pattern) -> str:
+        """Create the next numbered <prefix>_<n> directory under parent"""
+        existing = os.listdir(parent) if os.path.isdir(parent) else []
+        numbers = [int(match.group(1)) for name in existing for match in [pattern.match(name)] if match]
+        name = f"{prefix}_{max(numbers, default=0) + 1}"
+        os.makedirs(os.path.join(parent, name))
+        return name
+
+    @staticmethod
+    def _retire(path: str):
+        """Start the grace period of a directory that meta.json no longer points to"""
+        if os.path.isdir(path):
+            os.utime(path)
+
+    def _prune(self):
+        """Delete generations and IVF trainings unused for the grace period"""
+        cutoff = time.time() - GENERATION_GRACE_SECONDS
+        for parent, pattern, current in (
+            (self.directory, GENERATION_PATTERN, self.meta["generation"]),
+            (self._data_path(""), IVF_PATTERN, self.meta.get("ivf_generation")),
+        ):
+            for name in os.listdir(parent):
+                path = os.path.join(parent, name)
+                if pattern.match(name) and name != current and os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def _truncate_to_count(self, count: int):
+        """Drop rows left behind by an interrupted append"""
+        columns = [
+            ("vectors.f32", np.float32, self.dim, count),
+            ("ids.i64", np.int64, 1, count),
+            ("kinds.u8", np.uint8, 1, count),
+            ("repos.i32", np.int32, 1, count),
+        ]
+        if self.meta.get("ivf_count"):
+            lists = os.path.join(self.meta["ivf_generation"], "lists.i32")
+            columns.append((lists, np.int32, 1, self.meta["ivf_assigned"]))
+        for name, dtype, width, rows in columns:
+            path = self._data_path(name)
+            size = rows * width * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _memmap(self, path: str, dtype, shape) -> np.ndarray:
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    def _columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        count = self.count
+        return (
+            self._memmap(self._data_path("ids.i64"), np.int64, (count,)),
+            self._memmap(self._data_path("kinds.u8"), np.uint8, (count,)),
+            self._memmap(self._data_path("repos.i32"), np.int32, (count,)),
+        )
+
+    def repository_rows(self, repository_id: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(ids, kinds, vectors) of one repository's rows, e.g. to copy them into another index"""
+        if self.count == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.uint8), np.zeros((0, self.dim), np.float32)
+        ids, kinds, repos = self._columns()
+        rows = np.flatnonzero(repos == repository_id)
+        vectors = self._memmap(self._data_path("vectors.f32"), np.float32, (self.count, self.dim))
+        return np.asarray(ids[rows]), np.asarray(kinds[rows]), np.asarray(vectors[rows])
+
+    # ---- writes ------------------------------------------------------------
+
+    def contains(self, ids: List[int], kind: int) -> np.ndarray:
+        """Boolean mask of which ids (of the given kind) are already indexed"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if self.count == 0 or len(ids) == 0:
+            return np.zeros(len(ids), dtype=bool)
+        indexed_ids, kinds, _ = self._columns()
+        return np.isin(ids, indexed_ids[kinds == kind])
+
+    def add(self, ids: List[int], kinds: List[int], repo_ids: List[int], vectors: np.ndarray) -> int:
+        """Append vectors; rows whose (id, kind) is already indexed are skipped"""
+        if len(ids) == 0:
+            return 0
+        with FileLock(self.directory):
+            published = self._read_meta()
+            self.meta = self._load_meta()
+            if self.meta["generation"] is None:
+                # First rows, or a reset: start a generation next to the published one
+                self.meta["generation"] = self._new_generation(self.directory, "gen", GENERATION_PATTERN)
+            ids = np.asarray(ids, dtype=np.int64)
+            kinds = np.asarray(kinds, dtype=np.uint8)
+            repo_ids = np.asarray(repo_ids, dtype=np.int32)
+            vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+
+            keep = np.ones(len(ids), dtype=bool)
+            for kind in np.unique(kinds):
+                selected = kinds == kind
+                keep[selected] &= ~self.contains(ids[selected], int(kind))
+            if not keep.any():
+                return 0
+            ids, kinds, repo_ids, vectors = ids[keep], kinds[keep], repo_ids[keep], vectors[keep]
+
+            self._truncate_to_count(self.count)
+            for name, column in (
+                ("vectors.f32", vectors),
+                ("ids.i64", ids),
+                ("kinds.u8", kinds),
+                ("repos.i32", repo_ids),
+            ):
+                with open(self._data_path(name), "ab") as f:
+                    f.write(column.tobytes())
+
+            if self.meta.get("ivf_count"):
+                self._assign_to_lists(vectors)
+
+            self.meta["count"] += len(ids)
+            if self.meta.get("ivf_count"):
+                self.meta["ivf_assigned"] = self.meta["count"]
+            self._write_meta()
+            if published and published.get("generation") != self.meta["generation"]:
+                self._retire(self._path(published["generation"]))
+
+            if self._needs_ivf_rebuild():
+                self.build_ivf()
+            self._prune()
+            return len(ids)
+
+    # ---- IVF ---------------------------------------------------------------
+
+    def _needs_ivf_rebuild(self) -> bool:
+        if self.count < self.ivf_min_vectors:
+            return False
+        built = self.meta.get("ivf_count", 0)
+        # Re-train once the index doubled since the last training
+        return built == 0 or self.count >= 2 * built
+
+    def _centroids(self) -> np.ndarray:
+        nlist = self.meta["ivf_nlist"]
+        return np.fromfile(self._ivf_path("centroids.f32"), dtype=np.float32).reshape(nlist, self.dim)
+
+    def _assign_to_lists(self, vectors: np.ndarray):
+        assign = np.argmax(vectors @ self._centroids().T, axis=1).astype(np.int32)
+        with open(self._ivf_path("lists.i32"), "ab") as f:
+            f.write(assign.tobytes())
+
+    def build_ivf(self, sample_size: int = 50000):
+        """
+        Train IVF centroids (k-means on a sample) and assign every row to a list,
+        into a new ivf_<m> directory (called by writers, under the lock)
+        """
+        count = self.count
+        vectors = self._memmap(self._data_path("vectors.f32"), np.float32, (count, self.dim))
+        nlist = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(count, size=min(count, sample_size), replace=False))
+        centroids = _kmeans(np.asarray(vectors[sample_rows]), nlist)
+
+        lists = np.empty(count, dtype=np.int32)
+        for start in range(0, count, 65536):
+            chunk = np.asarray(vectors[start:start + 65536])
+            lists[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+
+        previous = self.meta.get("ivf_generation")
+        generation = self._new_generation(self._data_path(""), "ivf", IVF_PATTERN)
+        centroids.tofile(self._data_path(os.path.join(generation, "centroids.f32")))
+        lists.tofile(self._data_path(os.path.join(generation, "lists.i32")))
+        self.meta.update({
+            "ivf_generation": generation, "ivf_count": count, "ivf_nlist": nlist, "ivf_assigned": count
+        })
+        self._write_meta()
+        if previous:
+            self._retire(self._data_path(previous))
+
+    # ---- search ------------------------------------------------------------
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        kind: Optional[int] = None,
+        repository_ids: Optional[List[int]] = None
+    ) -> List[Tuple[int, int, float]]:
+        """Top-k (id, kind, score) by cosine similarity"""
+        count = self.count
+        if count == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        vectors = self._memmap(self._data_path("vectors.f32"), np.float32, (count, self.dim))
+        ids, kinds, repos = self._columns()
+
+        mask = np.ones(count, dtype=bool)
+        if kind is not None:
+            mask &= kinds == kind
+        if repository_ids is not None:
+            mask &= np.isin(repos, np.asarray(repository_ids, dtype=np.int32))
+
+        if self.meta.get("ivf_count") and self.meta.get("ivf_assigned") == count:
+            # Only score rows in the nprobe closest lists
+            centroid_scores = self._centroids() @ query
+            nprobe = min(self.ivf_nprobe, len(centroid_scores))
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+            lists = self._memmap(self._ivf_path("lists.i32"), np.int32, (count,))
+            mask &= np.isin(lists, probes)
+
+        rows = np.flatnonzero(mask)
+        if len(rows) == 0:
+            return []
+        if len(rows) == count:
+            scores = np.asarray(vectors @ query)
+        else:
+            scores = np.asarray(vectors[rows]) @ query
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        result_rows = rows[top]
+        return [
+            (int(ids[r]), int(kinds[r]), float(scores[i]))
+            for r, i in zip(result_rows, top)
+        ]
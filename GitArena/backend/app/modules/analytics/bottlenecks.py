@@ -0,0 +1,226 @@
+"""
+Pull request bottleneck detection.
+
+Review aggregates on pull_requests (review_count, first_review_at,
+last_activity_at) are maintained at ingest from the reviews table. The rules
+are evaluated for every open PR of a set of repositories in one query, and
+the result is persisted in bottleneck_alerts with state transitions:
+
+    (none)   -> open       a rule starts matching
+    open     -> resolved   it stops matching, or the PR was closed / merged
+    resolved -> open       it matches again (opened_at restarts)
+
+The endpoint reads open alerts. Rules depend on the clock (a PR becomes stale
+by ageing), so besides ingest a scope is re-evaluated on read when it was
+last evaluated more than BOTTLENECK_EVALUATION_INTERVAL_SECONDS ago. An
+evaluation that opens, resolves or reopens alerts bumps the data versions of
+their repositories, and the endpoint's ETag runs the due evaluation first
+(analytics/conditional.py), so a clock-driven change is never hidden by a 304.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, case, func, not_, or_
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.shared.models import BottleneckAlert, PullRequest, Repository, Review
+from app.shared.versions import bump_versions
+
+STALE_DAYS = 7          # open this long without a review
+IDLE_DAYS = 3           # no activity for this long
+CHURN_REVIEWS = 5       # more reviews than this while still open
+
+# rule -> (severity, title prefix, alert id prefix)
+RULES = {
+    "stuck_pr": ("high", "Stale PR", "stale"),
+    "inactive_pr": ("medium", "Inactive PR", "idle"),
+    "high_churn": ("medium", "High Churn", "churn"),
+}
+SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+_evaluated: Dict[int, float] = {}
+_evaluated_lock = threading.Lock()
+
+
+def clear_evaluation_cache():
+    with _evaluated_lock:
+        _evaluated.clear()
+
+
+def _activity_column():
+    return func.coalesce(PullRequest.last_activity_at, PullRequest.updated_at, PullRequest.created_at)
+
+
+class BottleneckService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- ingest --------------------------------------------------------------
+
+    def record_pull_requests(self, repo: Repository, prs: Iterable[PullRequest]) -> int:
+        """Refresh review aggregates of ingested PRs and re-evaluate their repository"""
+        self.refresh_review_aggregates([pr.id for pr in prs])
+        return self.evaluate([repo.id])
+
+    def refresh_review_aggregates(self, pr_ids: List[int]):
+        """review_count / first_review_at / last_activity_at from the reviews table"""
+        if not pr_ids:
+            return
+        reviews = {
+            pr_id: (count, first_at, last_at)
+            for pr_id, count, first_at, last_at in self.db.query(
+                Review.pull_request_id,
+                func.count(Review.id),
+                func.min(Review.submitted_at),
+                func.max(Review.submitted_at)
+            ).filter(Review.pull_request_id.in_(pr_ids)).group_by(Review.pull_request_id).all()
+        }
+        updates = []
+        for pr_id, updated_at, created_at in self.db.query(
+            PullRequest.id, PullRequest.updated_at, PullRequest.created_at
+        ).filter(PullRequest.id.in_(pr_ids)).all():
+            count, first_at, last_at = reviews.get(pr_id, (0, None, None))
+            activity = [value for value in (updated_at, created_at, last_at) if value is not None]
+            updates.append({
+                "id": pr_id,
+                "review_count": count,
+                "first_review_at": first_at,
+                "last_activity_at": max(activity) if activity else None,
+            })
+        self.db.bulk_update_mappings(PullRequest, updates)
+        self.db.commit()
+
+    # ---- evaluation ----------------------------------------------------------
+
+    def evaluate(self, repo_ids: List[int], now: Optional[datetime] = None) -> int:
+        """Apply the rules to the open PRs of the repositories; returns the number of open alerts"""
+        if not repo_ids:
+            return 0
+        now = now or datetime.utcnow()
+        activity = _activity_column()
+        review_count = func.coalesce(PullRequest.review_count, 0)
+        stale = and_(PullRequest.created_at < now - timedelta(days=STALE_DAYS), review_count == 0)
+        idle = activity < now - timedelta(days=IDLE_DAYS)
+        churn = review_count > CHURN_REVIEWS
+
+        # A stale PR only raises the high-severity alert
+        matched: Dict[tuple, dict] = {}
+        for pr_id, repository_id, created_at, last_activity, reviews, first_review_at, is_stale, is_idle, is_churn in self.db.query(
+            PullRequest.id,
+            PullRequest.repository_id,
+            PullRequest.created_at,
+            activity,
+            review_count,
+            PullRequest.first_review_at,
+            case((stale, 1), else_=0),
+            case((and_(not_(stale), idle), 1), else_=0),
+            case((and_(not_(stale), churn), 1), else_=0)
+        ).filter(
+            PullRequest.repository_id.in_(repo_ids),
+            PullRequest.state == "open",
+            or_(stale, idle, churn)
+        ).all():
+            details = {
+                "review_count": int(reviews),
+                "first_review_hours": round((first_review_at - created_at).total_seconds() / 3600, 1)
+                if first_review_at and created_at else None,
+            }
+            for rule, hit in (("stuck_pr", is_stale), ("inactive_pr", is_idle), ("high_churn", is_churn)):
+                if hit:
+                    matched[(pr_id, rule)] = {"repository_id": repository_id, "details": details}
+
+        matched_prs = list({pr_id for pr_id, _ in matched})
+        condition = BottleneckAlert.state == "open"
+        if matched_prs:
+            condition = or_(condition, BottleneckAlert.pull_request_id.in_(matched_prs))
+        existing = {
+            (alert.pull_request_id, alert.rule): alert
+            for alert in self.db.query(BottleneckAlert).filter(
+                BottleneckAlert.repository_id.in_(repo_ids), condition
+            ).all()
+        }
+
+        changed = {hit["repository_id"] for key, hit in matched.items() if key not in existing}
+        for key, alert in existing.items():
+            hit = matched.pop(key, None)
+            if hit is None:
+                if alert.state == "open":
+                    alert.state, alert.resolved_at = "resolved", now
+                    changed.add(alert.repository_id)
+            else:
+                if alert.state != "open":
+                    alert.state, alert.opened_at, alert.resolved_at = "open", now, None
+                    changed.add(alert.repository_id)
+                alert.details = hit["details"]
+            alert.evaluated_at = now
+        for (pr_id, rule), hit in matched.items():
+            self.db.add(BottleneckAlert(
+                pull_request_id=pr_id,
+                repository_id=hit["repository_id"],
+                rule=rule,
+                severity=RULES[rule][0],
+                state="open",
+                opened_at=now,
+                evaluated_at=now,
+                details=hit["details"]
+            ))
+        self.db.commit()
+        if changed:
+            bump_versions(self.db, self.db.query(Repository).filter(Repository.id.in_(changed)).all())
+
+        with _evaluated_lock:
+            for repo_id in repo_ids:
+                _evaluated[repo_id] = time.monotonic()
+        return sum(1 for alert in existing.values() if alert.state == "open") + len(matched)
+
+    def evaluate_if_due(self, repo_ids: List[int]):
+        """Re-evaluate repositories not evaluated within the configured interval"""
+        deadline = time.monotonic() - settings.BOTTLENECK_EVALUATION_INTERVAL_SECONDS
+        with _evaluated_lock:
+            due = [repo_id for repo_id in repo_ids if _evaluated.get(repo_id, float("-inf")) < deadline]
+        if due:
+            self.evaluate(due)
+
+    # ---- read ----------------------------------------------------------------
+
+    def open_alerts(self, repo_ids: List[int], now: Optional[datetime] = None) -> List[dict]:
+        """Open alerts of the repositories, high severity first, oldest PR first"""
+        now = now or datetime.utcnow()
+        rows = self.db.query(
+            BottleneckAlert, PullRequest.number, PullRequest.title, PullRequest.created_at,
+            _activity_column(), Repository.name, Repository.full_name
+        ).join(
+            PullRequest, PullRequest.id == BottleneckAlert.pull_request_id
+        ).join(
+            Repository, Repository.id == BottleneckAlert.repository_id
+        ).filter(
+            BottleneckAlert.repository_id.in_(repo_ids),
+            BottleneckAlert.state == "open"
+        ).all()
+
+        alerts = []
+        for alert, number, title, created_at, last_activity, repo_name, full_name in rows:
+            severity, label, prefix = RULES[alert.rule]
+            details = alert.details or {}
+            if alert.rule == "stuck_pr":
+                description = f"Open for {(now - created_at).days} days with no reviews."
+            elif alert.rule == "inactive_pr":
+                description = f"No activity for {(now - last_activity).days} days."
+            else:
+                description = f"Has {details.get('review_count', 0)} reviews but is still open."
+            alerts.append({
+                "id": f"{prefix}-{alert.pull_request_id}",
+                "type": alert.rule,
+                "severity": alert.severity,
+                "title": f"{label}: {title}",
+                "description": description,
+                "repository": repo_name,
+                "url": f"https://github.com/{full_name}/pull/{number}",
+                "created_at": created_at,
+                "metadata": {**details, "opened_at": alert.opened_at.isoformat()}
+            })
+        alerts.sort(key=lambda a: (SEVERITY_ORDER.get(a["severity"], 2), a["created_at"]))
+        return alerts
@@ -0,0 +1,145 @@
+"""
+Team capacity from weekly commit load.
+
+Git identities of a commit frame are resolved to contributors once per
+distinct (author name, email) pair - registered users by email, then
+username, then full name, in a single users query - and every commit gets a
+contributor code. A contributor x week load matrix is then one bincount, and
+velocity, trend and status come from that matrix instead of a count per
+contributor.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.modules.analytics.engine import CommitFrame, UNKNOWN_AUTHOR, safe_ratio
+from app.shared.models import User
+
+WEEKS = 12
+RECENT_WEEKS = 4
+OVERLOADED_RATIO = 1.5      # recent load vs team average
+UNDERUTILIZED_RATIO = 0.5
+MIN_OVERLOADED_VELOCITY = 0.5  # commits per day
+TREND_THRESHOLD = 0.1       # weekly slope, as a share of the member's mean weekly load
+
+
+@dataclass
+class Contributor:
+    key: str
+    user_id: Optional[int]
+    username: str
+    avatar_url: Optional[str]
+
+
+def resolve_contributors(db: Session, frame: CommitFrame):
+    """
+    (codes, contributors): the contributor code of every commit in the frame.
+    A registered user's git identities are merged; other authors are keyed by
+    email, else name.
+    """
+    if not len(frame):
+        return np.zeros(0, dtype=np.int64), []
+    pairs, inverse = np.unique(
+        frame.author.astype(np.int64) * max(len(frame.emails), 1) + frame.email, return_inverse=True
+    )
+    pair_names = [frame.author_names[p // max(len(frame.emails), 1)] for p in pairs.tolist()]
+    pair_emails = [frame.emails[p % max(len(frame.emails), 1)] for p in pairs.tolist()]
+
+    names = {n for n in pair_names if n and n != UNKNOWN_AUTHOR}
+    emails = {e for e in pair_emails if e}
+    users = db.query(User).filter(or_(
+        User.email.in_(emails), User.username.in_(names), User.name.in_(names)
+    )).all() if names or emails else []
+    by_email = {u.email: u for u in users if u.email}
+    by_username = {u.username: u for u in users if u.username}
+    by_name = {u.name: u for u in users if u.name}
+
+    contributors: List[Contributor] = []
+    index: Dict[str, int] = {}
+    pair_codes = np.empty(len(pairs), dtype=np.int64)
+    for i, (name, email) in enumerate(zip(pair_names, pair_emails)):
+        user = by_email.get(email) or by_username.get(name) or by_name.get(name)
+        key = f"user:{user.id}" if user else (f"email:{email}" if email else f"name:{name}")
+        if key not in index:
+            index[key] = len(contributors)
+            contributors.append(Contributor(
+                key=key,
+                user_id=user.id if user else None,
+                username=(user.username if user else None) or name,
+                avatar_url=user.avatar_url if user else f"https://ui-avatars.com/api/?name={name}&background=random"
+            ))
+        pair_codes[i] = index[key]
+    return pair_codes[inverse.ravel()], contributors
+
+
+def weekly_load(frame: CommitFrame, codes: np.ndarray, count: int, end: datetime, weeks: int = WEEKS) -> np.ndarray:
+    """contributors x weeks commit counts; the last column is the week ending at `end`"""
+    age_days = (np.datetime64(end, "s") - frame.timestamp).astype("timedelta64[s]").astype(np.int64) // 86400
+    week = weeks - 1 - age_days // 7
+    keep = (week >= 0) & (week < weeks) & (age_days >= 0)
+    flat = codes[keep] * weeks + week[keep]
+    return np.bincount(flat, minlength=count * weeks).reshape(count, weeks)
+
+
+def trend_slopes(load: np.ndarray) -> np.ndarray:
+    """Least-squares slope of every row (commits per week, per week)"""
+    x = np.arange(load.shape[1], dtype=np.float64)
+    x -= x.mean()
+    centered = load - load.mean(axis=1, keepdims=True)
+    return centered @ x / float((x ** 2).sum())
+
+
+def capacity_report(db: Session, frame: CommitFrame, end: datetime = None, weeks: int = WEEKS) -> dict:
+    """Velocity, weekly load series, trend and status per active contributor"""
+    end = end or datetime.utcnow()
+    codes, contributors = resolve_contributors(db, frame)
+    load = weekly_load(frame, codes, len(contributors), end, weeks).astype(np.float64)
+
+    recent = load[:, -RECENT_WEEKS:]
+    velocity = recent.sum(axis=1) / (RECENT_WEEKS * 7.0)
+    active = velocity > 0
+    if not active.any():
+        return {"weeks": [], "members": [], "total_velocity": 0.0, "average_velocity": 0.0}
+
+    # Each week's load relative to the average active member that week
+    team_weekly = load[active].mean(axis=0)
+    relative = safe_ratio(recent, np.broadcast_to(team_weekly[-RECENT_WEEKS:], recent.shape))
+    recent_ratio = relative.mean(axis=1)
+    heavy_weeks = (relative > OVERLOADED_RATIO).sum(axis=1)
+    slope = safe_ratio(trend_slopes(load), load.mean(axis=1))
+
+    week_starts = [(end - timedelta(days=7 * (weeks - i))).date().isoformat() for i in range(weeks)]
+    members = []
+    for i in np.flatnonzero(active).tolist():
+        trend = "rising" if slope[i] > TREND_THRESHOLD else ("falling" if slope[i] < -TREND_THRESHOLD else "steady")
+        status = "Optimal"
+        # Sustained or still growing load, not a single busy stretch
+        if recent_ratio[i] > OVERLOADED_RATIO and velocity[i] > MIN_OVERLOADED_VELOCITY and (
+            trend != "falling" or heavy_weeks[i] >= RECENT_WEEKS - 1
+        ):
+            status = "Overloaded"
+        elif recent_ratio[i] < UNDERUTILIZED_RATIO and trend != "rising":
+            status = "Underutilized"
+        contributor = contributors[i]
+        members.append({
+            "user_id": contributor.user_id,
+            "username": contributor.username,
+            "avatar_url": contributor.avatar_url,
+            "velocity": round(float(velocity[i]), 2),
+            "status": status,
+            "trend": trend,
+            "weekly_load": load[i].astype(int).tolist()
+        })
+    members.sort(key=lambda m: m["velocity"], reverse=True)
+
+    total_velocity = float(velocity.sum())
+    return {
+        "weeks": week_starts,
+        "members": members,
+        "total_velocity": total_velocity,
+        "average_velocity": total_velocity / len(members)
+    }
@@ -0,0 +1,202 @@
+"""
+File co-change collaboration graph.
+
+Each space keeps an author x file incidence matrix (commits per author
+identity and file, from commit_files) cached in-process. After a sync only
+rows past the cached watermark are added; a repository joining or leaving the
+space, or deleted rows, rebuild it - the same watermark and probe rules as
+the commit column snapshots: commit_files rows are only counted once the
+cheap probe (snapshots.change_marker) has moved.
+
+Team edges are one sparse product: with U the member x file 0/1 matrix,
+U @ U.T holds, for every pair of members, the number of files both changed.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.modules.analytics.engine import factorize
+from app.modules.analytics.snapshots import change_marker
+from app.shared.models import Commit, CommitFile, Repository
+
+# Spaces whose incidence matrix is kept per process
+CACHE_SPACES = 64
+MAX_STRENGTH = 10
+
+
+@dataclass
+class Incidence:
+    """Author identity x file commit counts of one space"""
+    probe: list                       # snapshots.change_marker over commit_files
+    watermark: Dict[str, List[int]]   # repository id -> [max commit_files id, row count]
+    identities: List[str]             # author email, else author name
+    identity_names: List[str]         # latest author name seen per identity
+    paths: List[str]                  # "<repository id>:<path>"
+    matrix: sparse.csr_matrix
+
+
+@dataclass
+class Member:
+    id: int
+    names: Sequence[str]
+    emails: Sequence[str]
+
+
+_cache: "OrderedDict[int, Incidence]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def clear_incidence_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _repo_ids(db: Session, space_id: int) -> List[int]:
+    return [row.id for row in db.query(Repository.id).filter(Repository.space_id == space_id).all()]
+
+
+def _db_watermark(db: Session, repo_ids: List[int]) -> Dict[str, List[int]]:
+    watermark = {str(repo_id): [0, 0] for repo_id in repo_ids}
+    if repo_ids:
+        for repo_id, max_id, count in db.query(
+            CommitFile.repository_id, func.max(CommitFile.id), func.count(CommitFile.id)
+        ).filter(CommitFile.repository_id.in_(repo_ids)).group_by(CommitFile.repository_id).all():
+            watermark[str(repo_id)] = [int(max_id), int(count)]
+    return watermark
+
+
+def _rows(db: Session, condition) -> List[tuple]:
+    return db.query(
+        CommitFile.repository_id, CommitFile.path, Commit.author_email, Commit.author_name
+    ).join(Commit, Commit.id == CommitFile.commit_id).filter(condition).order_by(CommitFile.id).all()
+
+
+def _extend(incidence: Optional[Incidence], rows: List[tuple], watermark: Dict[str, List[int]],
+            probe: list) -> Incidence:
+    """Incidence with rows added (a new one when incidence is None)"""
+    if incidence is None:
+        incidence = Incidence(probe=[], watermark={}, identities=[], identity_names=[], paths=[],
+                              matrix=sparse.csr_matrix((0, 0), dtype=np.int64))
+    if rows:
+        repos, paths, emails, names = zip(*rows)
+    else:
+        repos = paths = emails = names = ()
+    identity, identities = factorize([e or n or "" for e, n in zip(emails, names)], incidence.identities)
+    path, path_labels = factorize([f"{r}:{p}" for r, p in zip(repos, paths)], incidence.paths)
+
+    identity_names = incidence.identity_names + [""] * (len(identities) - len(incidence.identity_names))
+    for code, name in zip(identity.tolist(), names):
+        if name:
+            identity_names[code] = name
+
+    shape = (len(identities), len(path_labels))
+    matrix = incidence.matrix.copy()
+    matrix.resize(shape)
+    if rows:
+        matrix = matrix + sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int64), (identity, path)), shape=shape
+        )
+    return Incidence(probe=probe, watermark=watermark, identities=identities, identity_names=identity_names,
+                     paths=path_labels, matrix=matrix.tocsr())
+
+
+def space_incidence(db: Session, space_id: int) -> Incidence:
+    """The space's incidence matrix, brought up to the current commit_files watermark"""
+    repo_ids = _repo_ids(db, space_id)
+    # Read before the watermark, so a cached probe never runs ahead of the rows
+    probe = change_marker(db, CommitFile, repo_ids)
+    with _cache_lock:
+        cached = _cache.get(space_id)
+    if cached and cached.probe == probe:
+        return cached
+
+    watermark = _db_watermark(db, repo_ids)
+    incidence = None
+    if cached and cached.watermark == watermark:
+        incidence = replace(cached, probe=probe)
+    elif cached and set(cached.watermark) == set(watermark):
+        conditions = []
+        for repo_id, (max_id, count) in watermark.items():
+            stored_max, stored_count = cached.watermark[repo_id]
+            if max_id < stored_max or count < stored_count:
+                conditions = None
+                break
+            if count > stored_count:
+                conditions.append(and_(CommitFile.repository_id == int(repo_id), CommitFile.id > stored_max))
+        if conditions is not None:
+            rows = _rows(db, or_(*conditions)) if conditions else []
+            new_counts: Dict[str, int] = {}
+            for row in rows:
+                new_counts[str(row[0])] = new_counts.get(str(row[0]), 0) + 1
+            # Appended rows must account for every new file row, otherwise history changed
+            if all(new_counts.get(r, 0) == count - cached.watermark[r][1] for r, (_, count) in watermark.items()):
+                incidence = _extend(cached, rows, watermark, probe)
+    if incidence is None:
+        rows = _rows(db, CommitFile.repository_id.in_(repo_ids)) if repo_ids else []
+        incidence = _extend(None, rows, watermark, probe)
+
+    with _cache_lock:
+        _cache[space_id] = incidence
+        _cache.move_to_end(space_id)
+        while len(_cache) > CACHE_SPACES:
+            _cache.popitem(last=False)
+    return incidence
+
+
+def _member_map(incidence: Incidence, members: List[Member]) -> sparse.csr_matrix:
+    """members x identities 0/1 matrix: an identity belongs to a member by email or author name"""
+    rows, cols = [], []
+    for row, member in enumerate(members):
+        emails = {e.lower() for e in member.emails if e}
+        names = {n for n in member.names if n}
+        for code, (label, name) in enumerate(zip(incidence.identities, incidence.identity_names)):
+            if label.lower() in emails or label in names or name in names:
+                rows.append(row)
+                cols.append(code)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int64), (rows, cols)),
+        shape=(len(members), len(incidence.identities))
+    )
+
+
+def co_change_edges(db: Session, space_ids: List[int], members: List[Member]) -> List[Tuple[int, int, int]]:
+    """(member id, member id, shared files) for every pair of members who changed the same files"""
+    if not members:
+        return []
+    blocks = []
+    for space_id in sorted(set(space_ids)):
+        incidence = space_incidence(db, space_id)
+        blocks.append(_member_map(incidence, members) @ incidence.matrix)
+    if not blocks:
+        return []
+
+    touched = sparse.hstack(blocks).tocsr()
+    touched.data = np.ones_like(touched.data)
+    shared = sparse.triu(touched @ touched.T, k=1).tocoo()
+    return [
+        (members[i].id, members[j].id, int(weight))
+        for i, j, weight in zip(shared.row.tolist(), shared.col.tolist(), shared.data.tolist())
+        if weight > 0
+    ]
+
+
+class CollaborationService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record_commits(self, repo: Repository, commits: list) -> int:
+        """Fold a sync's commit_files rows into the cached matrix of the repository's space"""
+        if repo.space_id is None or not commits:
+            return 0
+        return len(space_incidence(self.db, repo.space_id).paths)
+
+
+def edge_strength(weight: int, max_weight: int) -> int:
+    """Shared files scaled to 1..MAX_STRENGTH relative to the strongest pair"""
+    return 1 + round((MAX_STRENGTH - 1) * weight / max_weight) if max_weight else 1
@@ -0,0 +1,107 @@
+"""
+Conditional GET (ETag / 304) for polled dashboard endpoints.
+
+The ETag of a response hashes the data versions it depends on
+(shared/versions.py) with the path, the query parameters, the user and the
+current UTC day (windows such as "last 7 days" move at midnight). The
+dependency runs before the endpoint: when If-None-Match matches, the request
+ends with a bodiless 304 after the auth lookup and one data_versions read;
+otherwise the ETag is set on the response.
+
+Which versions an endpoint depends on:
+
+    scope_etag       the spaces in the user's scope (project_id narrows it to one)
+    space_etag       the {space_id} path parameter
+    repository_etag  the {repo_id} path parameter
+    global_etag      the global row (endpoints that read across all data)
+    bottleneck_etag  scope_etag, after re-evaluating the scope's due bottleneck
+                     rules: alerts change with the clock, and a state change
+                     bumps the versions the ETag is computed from
+
+Responses are `Cache-Control: private, no-cache`, so browsers revalidate
+every poll with If-None-Match on their own.
+"""
+from datetime import datetime
+from typing import Callable, List, Optional, Set
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+
+from app.modules.analytics.bottlenecks import BottleneckService
+from app.modules.users.controller import get_current_user
+from app.modules.users.dto import UserResponse
+from app.shared.database import get_db
+from app.shared.scope import get_user_scope
+from app.shared.versions import GLOBAL, REPOSITORY, SPACE, Key, get_versions, make_etag
+
+CACHE_CONTROL = "private, no-cache"
+USER_SCOPE = "user"
+
+
+def _if_none_match(request: Request) -> Set[str]:
+    header = request.headers.get("if-none-match")
+    return {tag.strip() for tag in header.split(",")} if header else set()
+
+
+def _evaluate_due_bottlenecks(db: Session, user_id: int, space_ids: List[int]):
+    BottleneckService(db).evaluate_if_due(get_user_scope(db, user_id).repos_for(space_ids))
+
+
+class ConditionalGet:
+    def __init__(self, scope: str, before: Optional[Callable[[Session, int, List[int]], None]] = None):
+        """`before(db, user_id, space_ids)` brings derived data up to date before the versions are read"""
+        if scope not in (USER_SCOPE, SPACE, REPOSITORY, GLOBAL):
+            raise ValueError(f"Unknown version scope: {scope}")
+        self.scope = scope
+        self.before = before
+
+    def _keys(self, request: Request, db: Session, user_id: int) -> List[Key]:
+        if self.scope == GLOBAL:
+            return [(GLOBAL, 0)]
+        if self.scope == REPOSITORY:
+            return [(REPOSITORY, int(request.path_params["repo_id"]))]
+        if self.scope == SPACE:
+            return [(SPACE, int(request.path_params["space_id"]))]
+        # Same resolution as AnalyticsService.resolve_scope
+        user_scope = get_user_scope(db, user_id)
+        try:
+            project_id = int(request.query_params.get("project_id") or 0)
+        except ValueError:
+            project_id = 0
+        if project_id:
+            space_ids = [project_id] if user_scope.is_member(project_id) else []
+        else:
+            space_ids = sorted(user_scope.space_ids)
+        return [(SPACE, space_id) for space_id in space_ids]
+
+    def __call__(
+        self,
+        request: Request,
+        response: Response,
+        current_user: UserResponse = Depends(get_current_user),
+        db: Session = Depends(get_db)
+    ) -> str:
+        keys = self._keys(request, db, current_user.id)
+        if self.before is not None:
+            self.before(db, current_user.id, [scope_id for scope, scope_id in keys if scope == SPACE])
+        versions = get_versions(db, keys)
+        etag = make_etag(
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            current_user.id,
+            datetime.utcnow().date().isoformat(),
+            [(key, versions[key]) for key in keys]
+        )
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        tags = _if_none_match(request)
+        if etag in tags or "*" in tags:
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return etag
+
+
+scope_etag = ConditionalGet(USER_SCOPE)
+space_etag = ConditionalGet(SPACE)
+repository_etag = ConditionalGet(REPOSITORY)
+global_etag = ConditionalGet(GLOBAL)
+bottleneck_etag = ConditionalGet(USER_SCOPE, before=_evaluate_due_bottlenecks)
@@ -1,11 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 from app.shared.database import get_db
 from app.modules.analytics.service import AnalyticsService
+from app.modules.analytics.conditional import CACHE_CONTROL, bottleneck_etag, global_etag, scope_etag
+from app.modules.analytics.quests import QUEST_METRICS, QuestProgressService
 from app.modules.analytics.dto import (
     DashboardStats, 
     QuestCreate, 
     QuestResponse, 
+    QuestProgressResponse,
     DoraMetricsResponse, 
     BurnoutMetricsResponse,
     TeamCapacityResponse,
@@ -16,12 +19,14 @@ from app.modules.analytics.dto import (
 from app.modules.users.controller import get_current_user
 from app.modules.users.dto import UserResponse
 from app.shared.models import Quest
+from app.shared.responses import FastJSONResponse
+from app.shared.versions import bump_versions
 from typing import List, Optional
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
 
-@router.get("/dashboard", response_model=DashboardStats)
+@router.get("/dashboard", response_model=DashboardStats, dependencies=[Depends(global_etag)])
 async def get_dashboard_stats(
     current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -31,7 +36,7 @@ async def get_dashboard_stats(
     return service.get_dashboard_stats()
 
 
-@router.get("/collaboration", response_model=dict)
+@router.get("/collaboration", response_model=dict, dependencies=[Depends(scope_etag)])
 async def get_team_collaboration(
     project_id: int = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -46,7 +51,24 @@ async def get_team_collaboration(
     return service.get_team_collaboration(current_user.id, project_id)
 
 
-@router.get("/manager-stats", response_model=dict)
+@router.get("/bundle", response_model=dict, dependencies=[Depends(bottleneck_etag)])
+def get_dashboard_bundle(
+    widgets: Optional[str] = Query(None, description="Comma-separated widget names, default all"),
+    project_id: Optional[int] = None,
+    period: str = "all-time",
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get several manager dashboard widgets in one request
+    (manager-stats, dora, burnout, capacity, knowledge-base, bottlenecks, leaderboard, collaboration)
+    """
+    service = AnalyticsService(db)
+    names = [w.strip() for w in widgets.split(",") if w.strip()] if widgets else list(service.BUNDLE_WIDGETS)
+    return service.get_dashboard_bundle(current_user.id, names, project_id, period)
+
+
+@router.get("/manager-stats", response_model=dict, dependencies=[Depends(scope_etag)])
 async def get_manager_stats(
     project_id: int = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -59,19 +81,31 @@ async def get_manager_stats(
     return service.get_manager_stats(current_user.id, project_id)
 
 
-@router.get("/manager/activity", response_model=list)
+@router.get("/manager/activity", response_model=list, dependencies=[Depends(scope_etag)])
 async def get_manager_activity_log(
+    response: Response,
     type: str = None,
     dateRange: str = "7days",
+    project_id: int = None,
+    cursor: str = None,
+    limit: int = Query(100, ge=1, le=500),
     current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get global activity log for manager"""
+    """
+    Get global activity log for manager, newest first
+    The cursor for the next page is returned in the X-Next-Cursor header
+    """
     service = AnalyticsService(db)
-    return service.get_manager_activity_log(current_user.id, {"type": type, "dateRange": dateRange})
+    items, next_cursor = service.get_manager_activity_log(
+        current_user.id, {"type": type, "dateRange": dateRange}, project_id=project_id, cursor=cursor, limit=limit
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
-@router.get("/manager/team", response_model=list)
+@router.get("/manager/team", response_model=list, dependencies=[Depends(scope_etag)])
 async def get_manager_team_members(
     project_id: int = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -86,15 +120,20 @@ async def get_manager_team_members(
 async def get_manager_analytics_report(
     timeRange: str = "30days",
     project_id: int = None,
+    etag: str = Depends(scope_etag),
     current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get global analytics deep dive for manager"""
     service = AnalyticsService(db)
-    return service.get_manager_deep_dive_analytics(current_user.id, timeRange, project_id)
+    # Returned as-is: the all-time trend skips jsonable_encoder
+    return FastJSONResponse(
+        service.get_manager_deep_dive_analytics(current_user.id, timeRange, project_id),
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
 
 
-@router.get("/team-stats", response_model=dict)
+@router.get("/team-stats", response_model=dict, dependencies=[Depends(scope_etag)])
 async def get_team_stats(
     project_id: int = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -117,6 +156,10 @@ async def create_quest(
     db: Session = Depends(get_db)
 ):
     """Create a new team quest"""
+    if quest_in.metric not in QUEST_METRICS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(QUEST_METRICS)}")
+    if quest_in.starts_at and quest_in.ends_at and quest_in.ends_at <= quest_in.starts_at:
+        raise HTTPException(status_code=400, detail="ends_at must be after starts_at")
     # Allow all authenticated users to create quests
     db_quest = Quest(
         **quest_in.model_dump(),
@@ -125,10 +168,11 @@ async def create_quest(
     db.add(db_quest)
     db.commit()
     db.refresh(db_quest)
+    bump_versions(db, space_ids=[project_id])
     return db_quest
 
 
-@router.get("/quests", response_model=List[QuestResponse])
+@router.get("/quests", response_model=List[QuestResponse], dependencies=[Depends(global_etag)])
 async def get_quests(
     project_id: Optional[int] = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -141,6 +185,24 @@ async def get_quests(
     return query.all()
 
 
+@router.get("/quests/{quest_id}/progress", response_model=QuestProgressResponse, dependencies=[Depends(scope_etag)])
+def get_quest_progress(
+    quest_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Quest leaders: every team member's progress toward the target within the quest window"""
+    db_quest = db.query(Quest).filter(Quest.id == quest_id).first()
+    if not db_quest:
+        raise HTTPException(status_code=404, detail="Quest not found")
+    if db_quest.project_id is not None:
+        scope = AnalyticsService(db).resolve_scope(current_user.id, db_quest.project_id)
+        if not scope.space_ids:
+            raise HTTPException(status_code=404, detail="Quest not found")
+    return QuestProgressService(db).quest_progress(db_quest, leaders=limit)
+
+
 @router.delete("/quests/{quest_id}")
 async def delete_quest(
     quest_id: int,
@@ -155,13 +217,15 @@ async def delete_quest(
     if not db_quest:
         raise HTTPException(status_code=404, detail="Quest not found")
         
+    project_id = db_quest.project_id
     db.delete(db_quest)
     db.commit()
+    bump_versions(db, space_ids=[project_id])
     return {"status": "success"}
 
 
 # Leaderboard Endpoint
-@router.get("/leaderboard")
+@router.get("/leaderboard", dependencies=[Depends(scope_etag)])
 async def get_leaderboard(
     project_id: Optional[int] = None,
     period: str = "all-time",
@@ -173,7 +237,7 @@ async def get_leaderboard(
     return service.get_leaderboard(current_user.id, project_id, period)
 
 
-@router.get("/bottlenecks")
+@router.get("/bottlenecks", dependencies=[Depends(bottleneck_etag)])
 async def get_bottlenecks(
     project_id: Optional[int] = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -184,7 +248,7 @@ async def get_bottlenecks(
     return service.get_bottlenecks(current_user.id, project_id)
 
 
-@router.get("/knowledge-base")
+@router.get("/knowledge-base", dependencies=[Depends(scope_etag)])
 async def get_knowledge_base_metrics(
     project_id: Optional[int] = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -195,7 +259,7 @@ async def get_knowledge_base_metrics(
     return service.get_knowledge_base_metrics(current_user.id, project_id)
 
 
-@router.get("/capacity")
+@router.get("/capacity", dependencies=[Depends(scope_etag)])
 async def get_team_capacity(
     project_id: Optional[int] = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -206,7 +270,7 @@ async def get_team_capacity(
     return service.get_team_capacity(current_user.id, project_id)
 
 
-@router.get("/dora", response_model=DoraMetricsResponse)
+@router.get("/dora", response_model=DoraMetricsResponse, dependencies=[Depends(scope_etag)])
 async def get_dora_metrics(
     project_id: Optional[int] = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -217,7 +281,7 @@ async def get_dora_metrics(
     return service.get_dora_metrics(current_user.id, project_id)
 
 
-@router.get("/burnout", response_model=BurnoutMetricsResponse)
+@router.get("/burnout", response_model=BurnoutMetricsResponse, dependencies=[Depends(scope_etag)])
 async def get_burnout_metrics(
     project_id: Optional[int] = None,
     current_user: UserResponse = Depends(get_current_user),
@@ -0,0 +1,183 @@
+"""
+Per-repository documentation index.
+
+Documentation health was recomputed from every commit of the last 90 days on
+each request. The index is maintained at ingest instead, from the commit
+flags set by github/classifier.py:
+
+    repository_doc_index   latest touch per doc category, presence flags
+    doc_commits_daily      doc / total commit counts per (repository, day)
+
+so get_knowledge_base_metrics answers with two indexed lookups however much
+history exists. Daily buckets touched by an ingest are recounted from
+`commits`, which keeps updates idempotent; rebuild() recomputes everything
+(backfill_commit_flags.py runs it after re-classifying).
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Date, case, func
+from sqlalchemy.orm import Session
+
+from app.modules.analytics.engine import FLAG_CONTRIBUTING, FLAG_DOCS, FLAG_LICENSE, FLAG_README, has_flag
+from app.shared.models import Commit, DocCommitDaily, Repository, RepositoryDocIndex
+
+# Index column prefix -> commit flag ("<prefix>_touched_at", "has_<prefix>")
+DOC_CATEGORIES = (
+    ("docs", FLAG_DOCS),
+    ("readme", FLAG_README),
+    ("contributing", FLAG_CONTRIBUTING),
+    ("license", FLAG_LICENSE),
+)
+PRESENCE_CATEGORIES = ("readme", "contributing", "license")
+
+
+def _day_column():
+    return func.date(Commit.committed_date, type_=Date)
+
+
+def _latest(current: Optional[datetime], candidate: Optional[datetime]) -> Optional[datetime]:
+    if candidate is None:
+        return current
+    return candidate if current is None or candidate > current else current
+
+
+class DocIndexService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- ingest --------------------------------------------------------------
+
+    def record_commits(self, repo: Repository, commits: Iterable[Commit]) -> int:
+        """Fold newly stored commits into the index of their repository"""
+        commits = [c for c in commits if c.committed_date is not None]
+        if not commits:
+            return 0
+
+        entry = self.db.query(RepositoryDocIndex).filter(RepositoryDocIndex.repository_id == repo.id).first()
+        if entry is None:
+            entry = RepositoryDocIndex(repository_id=repo.id)
+            self.db.add(entry)
+        for commit in commits:
+            for category, flag in DOC_CATEGORIES:
+                if (commit.flags or 0) & flag:
+                    column = f"{category}_touched_at"
+                    setattr(entry, column, _latest(getattr(entry, column), commit.committed_date))
+                    if category in PRESENCE_CATEGORIES:
+                        setattr(entry, f"has_{category}", True)
+
+        self._recount_days(repo.id, {c.committed_date.date() for c in commits})
+        self.db.commit()
+        return len(commits)
+
+    def _recount_days(self, repository_id: int, days: set):
+        """Recompute the daily buckets of the given days from `commits` (caller commits)"""
+        start = datetime.combine(min(days), datetime.min.time())
+        end = datetime.combine(max(days), datetime.min.time()) + timedelta(days=1)
+        counts = {
+            day: (int(doc_commits or 0), int(total))
+            for day, doc_commits, total in self.db.query(
+                _day_column(),
+                func.sum(case((has_flag(FLAG_DOCS), 1), else_=0)),
+                func.count(Commit.id)
+            ).filter(
+                Commit.repository_id == repository_id,
+                Commit.committed_date >= start,
+                Commit.committed_date < end
+            ).group_by(_day_column()).all()
+            if day in days
+        }
+
+        existing = {
+            row.day: row
+            for row in self.db.query(DocCommitDaily).filter(
+                DocCommitDaily.repository_id == repository_id,
+                DocCommitDaily.day.in_(list(days))
+            ).all()
+        }
+        for day in days:
+            doc_commits, total = counts.get(day, (0, 0))
+            row = existing.get(day)
+            if row is None:
+                self.db.add(DocCommitDaily(repository_id=repository_id, day=day,
+                                           doc_commits=doc_commits, total_commits=total))
+            else:
+                row.doc_commits, row.total_commits = doc_commits, total
+
+    def rebuild(self, repo_ids: List[int] = None) -> int:
+        """Recompute the index from `commits` (all repositories when repo_ids is None)"""
+        if repo_ids is None:
+            repo_ids = [row.id for row in self.db.query(Repository.id).all()]
+        if not repo_ids:
+            return 0
+
+        self.db.query(DocCommitDaily).filter(
+            DocCommitDaily.repository_id.in_(repo_ids)
+        ).delete(synchronize_session=False)
+        self.db.query(RepositoryDocIndex).filter(
+            RepositoryDocIndex.repository_id.in_(repo_ids)
+        ).delete(synchronize_session=False)
+
+        dated = Commit.committed_date.isnot(None)
+        self.db.bulk_insert_mappings(DocCommitDaily, [
+            {"repository_id": repo_id, "day": day, "doc_commits": int(doc_commits or 0), "total_commits": int(total)}
+            for repo_id, day, doc_commits, total in self.db.query(
+                Commit.repository_id,
+                _day_column(),
+                func.sum(case((has_flag(FLAG_DOCS), 1), else_=0)),
+                func.count(Commit.id)
+            ).filter(Commit.repository_id.in_(repo_ids), dated).group_by(Commit.repository_id, _day_column()).all()
+        ])
+
+        touched = [
+            func.max(case((has_flag(flag), Commit.committed_date), else_=None))
+            for _, flag in DOC_CATEGORIES
+        ]
+        entries = []
+        for repo_id, *latest in self.db.query(Commit.repository_id, *touched).filter(
+            Commit.repository_id.in_(repo_ids), dated
+        ).group_by(Commit.repository_id).all():
+            entry = {"repository_id": repo_id}
+            for (category, _), value in zip(DOC_CATEGORIES, latest):
+                entry[f"{category}_touched_at"] = value
+                if category in PRESENCE_CATEGORIES:
+                    entry[f"has_{category}"] = value is not None
+            entries.append(entry)
+        self.db.bulk_insert_mappings(RepositoryDocIndex, entries)
+        self.db.commit()
+        return len(entries)
+
+    # ---- read ----------------------------------------------------------------
+
+    def summary(self, repo_ids: List[int], since: date, recent_since: date) -> Dict:
+        """
+        Documentation index of a set of repositories: latest doc touch, presence
+        flags, and doc / total commits since `since` (doc commits also since
+        `recent_since`).
+        """
+        presence = [
+            func.max(case((getattr(RepositoryDocIndex, f"has_{category}"), 1), else_=0))
+            for category in PRESENCE_CATEGORIES
+        ]
+        last_update, *found = self.db.query(
+            func.max(RepositoryDocIndex.docs_touched_at), *presence
+        ).filter(RepositoryDocIndex.repository_id.in_(repo_ids)).one()
+
+        doc_commits, total_commits, recent_doc_commits = self.db.query(
+            func.sum(DocCommitDaily.doc_commits),
+            func.sum(DocCommitDaily.total_commits),
+            func.sum(case((DocCommitDaily.day >= recent_since, DocCommitDaily.doc_commits), else_=0))
+        ).filter(
+            DocCommitDaily.repository_id.in_(repo_ids),
+            DocCommitDaily.day >= since
+        ).one()
+
+        summary = {
+            "last_update": last_update,
+            "doc_commits": int(doc_commits or 0),
+            "total_commits": int(total_commits or 0),
+            "recent_doc_commits": int(recent_doc_commits or 0),
+        }
+        for category, value in zip(PRESENCE_CATEGORIES, found):
+            summary[f"has_{category}"] = bool(value)
+        return summary
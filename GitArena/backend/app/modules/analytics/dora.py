@@ -0,0 +1,240 @@
+"""
+DORA metrics from daily aggregates.
+
+Raw inputs are stored at ingest (github/service.py):
+    pull_requests.first_commit_at   earliest authored commit of a merged PR
+    pull_request_commits            the PR's commit list
+    deployments.state               latest GitHub deployment status
+
+and folded into `dora_daily`, one row per (repository, day):
+    deployments / failed_deployments   by deployment creation day
+    merged_prs / lead_time_seconds     by merge day, first commit -> merge
+    restored_incidents / restore_seconds
+                                       by recovery day: first failed deployment
+                                       -> next successful one, per environment
+    fix_commits                        commits flagged FIX (change failure
+                                       fallback when a repository has no
+                                       deployments)
+
+Every ingest recounts the days it touches from the source tables, so the
+aggregates stay correct when a row is seen twice or a deployment changes
+state. The endpoint sums a window of daily rows and derives rolling series
+with the columnar engine.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import Date, func
+from sqlalchemy.orm import Session
+
+from app.modules.analytics.engine import FLAG_FIX, has_flag, rolling_sum, safe_ratio
+from app.shared.models import Commit, Deployment, DoraDaily, PullRequest, Repository
+
+FAILED_DEPLOYMENT_STATES = {"failure", "error"}
+SUCCESSFUL_DEPLOYMENT_STATES = {"success", "inactive"}  # inactive: superseded by a newer deployment
+FINISHED_DEPLOYMENT_STATES = FAILED_DEPLOYMENT_STATES | SUCCESSFUL_DEPLOYMENT_STATES
+
+WINDOW_DAYS = 30
+LEAD_TIME_ROLLING_DAYS = 7
+
+COUNTERS = (
+    "deployments", "failed_deployments", "merged_prs", "lead_time_seconds",
+    "restored_incidents", "restore_seconds", "fix_commits",
+)
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+class DoraService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- ingest --------------------------------------------------------------
+
+    def record_commits(self, repo: Repository, commits: Iterable[Commit]) -> int:
+        days = {_utc_naive(c.committed_date).date() for c in commits if c.committed_date}
+        return self.refresh_days(repo.id, days)
+
+    def record_pull_requests(self, repo: Repository, prs: Iterable[PullRequest]) -> int:
+        days = {_utc_naive(pr.merged_at).date() for pr in prs if pr.merged_at}
+        return self.refresh_days(repo.id, days)
+
+    def record_deployments(self, repo: Repository, deployments: Iterable[Deployment]) -> int:
+        """
+        A status change can move a restore to a later success, so every
+        deployment day from the earliest ingested one on is recounted.
+        """
+        created = [_utc_naive(d.created_at) for d in deployments if d.created_at]
+        if not created:
+            return 0
+        start = _day_start(min(created).date())
+        days = {
+            _utc_naive(created_at).date()
+            for (created_at,) in self.db.query(Deployment.created_at).filter(
+                Deployment.repository_id == repo.id,
+                Deployment.created_at >= start
+            ).all()
+        }
+        return self.refresh_days(repo.id, days)
+
+    def refresh_days(self, repository_id: int, days: set) -> int:
+        """Recount the given days of a repository from the source tables"""
+        if not days:
+            return 0
+        counters = self._count(repository_id, min(days), max(days))
+
+        existing = {
+            row.day: row
+            for row in self.db.query(DoraDaily).filter(
+                DoraDaily.repository_id == repository_id,
+                DoraDaily.day.in_(list(days))
+            ).all()
+        }
+        for day in days:
+            values = counters.get(day, {})
+            row = existing.get(day)
+            if row is None:
+                row = DoraDaily(repository_id=repository_id, day=day)
+                self.db.add(row)
+            for name in COUNTERS:
+                setattr(row, name, values.get(name, 0))
+        self.db.commit()
+        return len(days)
+
+    def _count(self, repository_id: int, first_day: date, last_day: date) -> Dict[date, Dict[str, float]]:
+        start, end = _day_start(first_day), _day_start(last_day) + timedelta(days=1)
+        counters: Dict[date, Dict[str, float]] = {}
+
+        def add(day: date, name: str, value: float = 1):
+            bucket = counters.setdefault(day, {})
+            bucket[name] = bucket.get(name, 0) + value
+
+        # Deployments: the restore walk needs earlier failures, so the
+        # repository's deployments are read from the start (a few per day at most)
+        open_failures: Dict[str, datetime] = {}
+        for created_at, state, environment in self.db.query(
+            Deployment.created_at, Deployment.state, Deployment.environment
+        ).filter(
+            Deployment.repository_id == repository_id,
+            Deployment.created_at < end
+        ).order_by(Deployment.created_at, Deployment.id).all():
+            created_at = _utc_naive(created_at)
+            counted = created_at >= start
+            if counted:
+                add(created_at.date(), "deployments")
+            if state in FAILED_DEPLOYMENT_STATES:
+                open_failures.setdefault(environment, created_at)
+                if counted:
+                    add(created_at.date(), "failed_deployments")
+            elif state in SUCCESSFUL_DEPLOYMENT_STATES and environment in open_failures:
+                failed_at = open_failures.pop(environment)
+                if counted:
+                    add(created_at.date(), "restored_incidents")
+                    add(created_at.date(), "restore_seconds", (created_at - failed_at).total_seconds())
+
+        for merged_at, first_commit_at, created_at in self.db.query(
+            PullRequest.merged_at, PullRequest.first_commit_at, PullRequest.created_at
+        ).filter(
+            PullRequest.repository_id == repository_id,
+            PullRequest.merged_at >= start,
+            PullRequest.merged_at < end
+        ).all():
+            merged_at = _utc_naive(merged_at)
+            started_at = _utc_naive(first_commit_at or created_at) or merged_at
+            add(merged_at.date(), "merged_prs")
+            add(merged_at.date(), "lead_time_seconds", max((merged_at - started_at).total_seconds(), 0.0))
+
+        day = func.date(Commit.committed_date, type_=Date)
+        for commit_day, count in self.db.query(day, func.count(Commit.id)).filter(
+            Commit.repository_id == repository_id,
+            Commit.committed_date >= start,
+            Commit.committed_date < end,
+            has_flag(FLAG_FIX)
+        ).group_by(day).all():
+            add(commit_day, "fix_commits", count)
+
+        return counters
+
+    def rebuild(self, repo_ids: List[int] = None) -> int:
+        """Recompute the aggregates of the given repositories (all when None)"""
+        if repo_ids is None:
+            repo_ids = [row.id for row in self.db.query(Repository.id).all()]
+        rebuilt = 0
+        for repository_id in repo_ids:
+            self.db.query(DoraDaily).filter(DoraDaily.repository_id == repository_id).delete(synchronize_session=False)
+            days = {_utc_naive(d).date() for (d,) in self.db.query(Deployment.created_at).filter(
+                Deployment.repository_id == repository_id, Deployment.created_at.isnot(None))}
+            days |= {_utc_naive(d).date() for (d,) in self.db.query(PullRequest.merged_at).filter(
+                PullRequest.repository_id == repository_id, PullRequest.merged_at.isnot(None))}
+            days |= {_utc_naive(d).date() for (d,) in self.db.query(Commit.committed_date).filter(
+                Commit.repository_id == repository_id, Commit.committed_date.isnot(None), has_flag(FLAG_FIX))}
+            rebuilt += self.refresh_days(repository_id, days)
+        self.db.commit()
+        return rebuilt
+
+    # ---- read ----------------------------------------------------------------
+
+    def metrics(self, repo_ids: List[int], window_days: int = WINDOW_DAYS) -> dict:
+        """DORA metrics over the last `window_days` days (today included)"""
+        today = datetime.utcnow().date()
+        history_days = window_days + LEAD_TIME_ROLLING_DAYS - 1
+        first_day = today - timedelta(days=history_days - 1)
+
+        columns = {name: np.zeros(history_days, dtype=np.float64) for name in COUNTERS}
+        for day, *sums in self.db.query(
+            DoraDaily.day, *[func.sum(getattr(DoraDaily, name)) for name in COUNTERS]
+        ).filter(
+            DoraDaily.repository_id.in_(repo_ids),
+            DoraDaily.day >= first_day,
+            DoraDaily.day <= today
+        ).group_by(DoraDaily.day).all():
+            offset = (day - first_day).days
+            for name, value in zip(COUNTERS, sums):
+                columns[name][offset] = value or 0
+
+        window = {name: values[-window_days:] for name, values in columns.items()}
+        days = [first_day + timedelta(days=i) for i in range(history_days)][-window_days:]
+
+        # Merged PRs stand in for deployments in repositories that do not deploy through GitHub
+        deployments = int(window["deployments"].sum())
+        uses_deployments = deployments > 0
+        if uses_deployments:
+            releases, failures = window["deployments"], int(window["failed_deployments"].sum())
+        else:
+            releases, failures = window["merged_prs"], int(window["fix_commits"].sum())
+        release_count = int(releases.sum())
+
+        merged = window["merged_prs"].sum()
+        lead_time_hours = float(window["lead_time_seconds"].sum() / merged / 3600.0) if merged else 0.0
+        rolling_lead = safe_ratio(
+            rolling_sum(columns["lead_time_seconds"], LEAD_TIME_ROLLING_DAYS),
+            rolling_sum(columns["merged_prs"], LEAD_TIME_ROLLING_DAYS)
+        )[-window_days:] / 3600.0
+
+        restored = window["restored_incidents"].sum()
+        mttr_minutes = float(window["restore_seconds"].sum() / restored / 60.0) if restored else 0.0
+        failure_rate = failures / release_count * 100 if release_count else 0.0
+
+        return {
+            "deploymentFrequency": release_count / float(window_days),
+            "deploymentsHistory": [
+                {"day": day.isoformat(), "count": int(count)} for day, count in zip(days, releases) if count
+            ],
+            "leadTime": lead_time_hours,
+            "leadTimeHistory": [
+                {"date": day.isoformat(), "hours": round(float(hours), 1)}
+                for day, hours, prs in zip(days, rolling_lead, window["merged_prs"]) if prs
+            ],
+            "failureRate": round(min(failure_rate, 100), 1),
+            "mttr": round(mttr_minutes),
+            "deploymentSource": "deployments" if uses_deployments else "prs",
+        }
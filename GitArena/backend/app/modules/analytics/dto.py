@@ -18,6 +18,8 @@ class QuestBase(BaseModel):
     target: int
     metric: str
     reward: Optional[str] = None
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
 
 
 class QuestCreate(QuestBase):
@@ -33,6 +35,28 @@ class QuestResponse(QuestBase):
         from_attributes = True
 
 
+class QuestMemberProgress(BaseModel):
+    user_id: int
+    username: Optional[str] = None
+    avatar_url: Optional[str] = None
+    progress: int
+    percent: float
+    completed: bool
+
+
+class QuestProgressResponse(BaseModel):
+    quest_id: int
+    title: str
+    metric: str
+    target: int
+    starts_at: Optional[datetime] = None
+    ends_at: Optional[datetime] = None
+    active: bool
+    members_count: int
+    completed_count: int
+    leaders: List[QuestMemberProgress]
+
+
 class LeaderboardEntry(BaseModel):
     """Individual leaderboard entry"""
     rank: int
@@ -90,11 +114,13 @@ class KnowledgeBaseMetrics(BaseModel):
 
 
 class MemberLoad(BaseModel):
-    user_id: Optional[str] = None
+    user_id: Optional[int] = None
     username: Optional[str] = None
     avatar_url: Optional[str] = None
-    velocity: float # Daily commit average
+    velocity: float # Daily commit average, last 4 weeks
     status: str # "Overloaded", "Optimal", "Underutilized"
+    trend: Optional[str] = None # "rising", "steady", "falling"
+    weekly_load: List[int] = [] # Commits per week, oldest first
 
 class TeamCapacityResponse(BaseModel):
     total_capacity_score: int
@@ -103,6 +129,7 @@ class TeamCapacityResponse(BaseModel):
     predicted_sprint_output: int # Estimated commits for next 2 weeks
     sprint_risk: str # "Low", "Medium", "High"
     member_loads: List[MemberLoad]
+    weeks: List[str] = [] # Start day of each weekly_load bucket
 
 # New DTOs for Dora and Burnout
 
@@ -113,6 +140,7 @@ class DoraData(BaseModel):
     mttr: float
     deploymentsHistory: List[Dict[str, Any]]
     leadTimeHistory: List[Dict[str, Any]]
+    deploymentSource: Optional[str] = None  # "deployments", or "prs" when merged PRs stand in
     
     # Vitality Metrics
     totalCommits: Optional[int] = 0
@@ -0,0 +1,251 @@
+"""
+Columnar (NumPy) engine for commit-level analytics.
+
+Only the columns a metric needs are loaded - timestamp, author identity,
+additions, deletions, repository and message flags - into flat arrays, and
+histograms, ratios, group-bys and rolling windows are computed vectorized
+instead of looping over ORM Commit objects.
+
+Message/file classification comes from the `commits.flags` bitmask set at
+ingest (github/classifier.py). Rows not classified yet (before
+backfill_commit_flags.py ran) fall back to keyword matching in SQL, so commit
+messages never leave the database for aggregate metrics.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Session
+
+from app.modules.github.classifier import CommitFlag, FIX_KEYWORDS, STRESS_KEYWORDS
+from app.shared.models import Commit
+
+FLAG_STRESS = int(CommitFlag.STRESS)
+FLAG_FIX = int(CommitFlag.FIX)
+FLAG_DOCS = int(CommitFlag.DOCS)
+FLAG_README = int(CommitFlag.README)
+FLAG_CONTRIBUTING = int(CommitFlag.CONTRIBUTING)
+FLAG_LICENSE = int(CommitFlag.LICENSE)
+
+UNKNOWN_AUTHOR = "Unknown"
+
+
+def message_matches(keywords: Sequence[str]):
+    """SQL condition: lower(message) contains any of the keywords"""
+    message = func.lower(func.coalesce(Commit.message, ""))
+    return or_(*[message.like(f"%{keyword}%") for keyword in keywords])
+
+
+def flags_column():
+    """Stored CommitFlag bitmask, or message keyword flags for unclassified rows"""
+    return func.coalesce(
+        Commit.flags,
+        case((message_matches(STRESS_KEYWORDS), FLAG_STRESS), else_=0)
+        + case((message_matches(FIX_KEYWORDS), FLAG_FIX), else_=0)
+    )
+
+
+def has_flag(flag: int):
+    """SQL condition: the commit has the flag"""
+    return flags_column().op("&")(flag) != 0
+
+
+def frame_columns() -> list:
+    """Selected columns, in CommitFrame.from_rows order"""
+    return [
+        Commit.committed_date,
+        Commit.author_name,
+        Commit.author_email,
+        Commit.additions,
+        Commit.deletions,
+        Commit.repository_id,
+        flags_column()
+    ]
+
+
+def factorize(values: Sequence[Optional[str]], labels: List[str] = None, missing: str = ""):
+    """
+    (codes, labels) for a column of strings. Pass existing labels to extend
+    them: known values keep their code, new values are appended.
+    """
+    labels = list(labels or [])
+    index: Dict[str, int] = {label: code for code, label in enumerate(labels)}
+    codes = np.fromiter(
+        (index.setdefault(v if v else missing, len(index)) for v in values),
+        dtype=np.int32,
+        count=len(values)
+    )
+    labels.extend(list(index)[len(labels):])
+    return codes, labels
+
+
+@dataclass
+class CommitFrame:
+    """Commit columns of a set of repositories, one row per commit"""
+    timestamp: np.ndarray        # datetime64[s], UTC
+    author: np.ndarray           # int32 codes into author_names (author_name)
+    author_names: List[str]
+    email: np.ndarray            # int32 codes into emails ("" when missing)
+    emails: List[str]
+    identity: np.ndarray         # int32 codes into identities (email, else name: distinct contributors)
+    identities: List[str]
+    additions: np.ndarray        # int64
+    deletions: np.ndarray        # int64
+    repository: np.ndarray       # int64 repository ids
+    flags: np.ndarray            # uint8 FLAG_* bits
+
+    @classmethod
+    def load(cls, db: Session, repo_ids: List[int], since: datetime = None) -> "CommitFrame":
+        query = db.query(*frame_columns()).filter(
+            Commit.repository_id.in_(repo_ids),
+            Commit.committed_date.isnot(None)
+        )
+        if since is not None:
+            query = query.filter(Commit.committed_date >= since)
+        rows = query.all() if repo_ids else []
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "CommitFrame":
+        """rows: (committed_date, author_name, author_email, additions, deletions, repository_id, flags)"""
+        if rows:
+            dates, names, emails, additions, deletions, repos, flags = zip(*rows)
+        else:
+            dates = names = emails = additions = deletions = repos = flags = ()
+        author, author_names = factorize(names, missing=UNKNOWN_AUTHOR)
+        email, email_labels = factorize(emails)
+        identity, identities = factorize([e or n for e, n in zip(emails, names)])
+        return cls(
+            timestamp=np.array(dates, dtype="datetime64[s]"),
+            author=author,
+            author_names=author_names,
+            email=email,
+            emails=email_labels,
+            identity=identity,
+            identities=identities,
+            additions=np.array([a or 0 for a in additions], dtype=np.int64),
+            deletions=np.array([d or 0 for d in deletions], dtype=np.int64),
+            repository=np.array(repos, dtype=np.int64),
+            flags=np.array([f or 0 for f in flags], dtype=np.uint8)
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def take(self, mask: np.ndarray) -> "CommitFrame":
+        """Rows where mask is set (labels are shared)"""
+        return CommitFrame(
+            timestamp=self.timestamp[mask],
+            author=self.author[mask],
+            author_names=self.author_names,
+            email=self.email[mask],
+            emails=self.emails,
+            identity=self.identity[mask],
+            identities=self.identities,
+            additions=self.additions[mask],
+            deletions=self.deletions[mask],
+            repository=self.repository[mask],
+            flags=self.flags[mask]
+        )
+
+    @classmethod
+    def concat(cls, frames: List["CommitFrame"]) -> "CommitFrame":
+        """Stack frames, re-coding authors/emails/identities onto shared labels"""
+        if len(frames) == 1:
+            return frames[0]
+        if not frames:
+            return cls.from_rows([])
+        author_names: List[str] = []
+        emails: List[str] = []
+        identities: List[str] = []
+        authors, email_codes, identity_codes = [], [], []
+        for frame in frames:
+            author_map, author_names = factorize(frame.author_names, author_names)
+            email_map, emails = factorize(frame.emails, emails)
+            identity_map, identities = factorize(frame.identities, identities)
+            authors.append(author_map[frame.author])
+            email_codes.append(email_map[frame.email])
+            identity_codes.append(identity_map[frame.identity])
+        return cls(
+            timestamp=np.concatenate([f.timestamp for f in frames]),
+            author=np.concatenate(authors).astype(np.int32),
+            author_names=author_names,
+            email=np.concatenate(email_codes).astype(np.int32),
+            emails=emails,
+            identity=np.concatenate(identity_codes).astype(np.int32),
+            identities=identities,
+            additions=np.concatenate([f.additions for f in frames]),
+            deletions=np.concatenate([f.deletions for f in frames]),
+            repository=np.concatenate([f.repository for f in frames]),
+            flags=np.concatenate([f.flags for f in frames])
+        )
+
+    # ---- derived columns -----------------------------------------------------
+
+    @property
+    def hour(self) -> np.ndarray:
+        return (self.timestamp.astype("datetime64[h]") - self.timestamp.astype("datetime64[D]")).astype(np.int64)
+
+    @property
+    def weekday(self) -> np.ndarray:
+        """0=Monday ... 6=Sunday (1970-01-01 was a Thursday)"""
+        return (self.timestamp.astype("datetime64[D]").astype(np.int64) + 3) % 7
+
+    def since(self, start: datetime) -> np.ndarray:
+        return self.timestamp >= np.datetime64(start, "s")
+
+    def has_flag(self, flag: int) -> np.ndarray:
+        return (self.flags & flag) != 0
+
+    # ---- aggregations --------------------------------------------------------
+
+    def hour_histogram(self, mask: np.ndarray = None) -> np.ndarray:
+        hours = self.hour if mask is None else self.hour[mask]
+        return np.bincount(hours, minlength=24)
+
+    def weekday_histogram(self, mask: np.ndarray = None) -> np.ndarray:
+        days = self.weekday if mask is None else self.weekday[mask]
+        return np.bincount(days, minlength=7)
+
+    def count_by_author(self, mask: np.ndarray = None) -> np.ndarray:
+        """Commits per author code (optionally only rows where mask is set)"""
+        weights = None if mask is None else mask.astype(np.int64)
+        return np.bincount(self.author, weights=weights, minlength=len(self.author_names)).astype(np.int64)
+
+    def count_by_repository(self, repo_ids: List[int]) -> Dict[int, int]:
+        ids, counts = np.unique(self.repository, return_counts=True)
+        found = dict(zip(ids.tolist(), counts.tolist()))
+        return {repo_id: found.get(repo_id, 0) for repo_id in repo_ids}
+
+    def daily_counts(self, start: datetime, days: int, mask: np.ndarray = None) -> np.ndarray:
+        """Commits per day for `days` days from `start` (rows outside are ignored)"""
+        offsets = (self.timestamp.astype("datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+        keep = (offsets >= 0) & (offsets < days)
+        if mask is not None:
+            keep &= mask
+        return np.bincount(offsets[keep], minlength=days)
+
+    def distinct_identities(self) -> int:
+        return int(len(np.unique(self.identity)))
+
+    def author_mask(self, names: Sequence[str] = (), emails: Sequence[str] = ()) -> np.ndarray:
+        """Rows authored under any of the git names or emails"""
+        name_codes = [i for i, label in enumerate(self.author_names) if label in set(names)]
+        email_codes = [i for i, label in enumerate(self.emails) if label and label in set(emails)]
+        return np.isin(self.author, name_codes) | np.isin(self.email, email_codes)
+
+
+def rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums (same length as values; early windows are partial)"""
+    cumulative = np.cumsum(values, dtype=np.float64)
+    result = cumulative.copy()
+    result[window:] = cumulative[window:] - cumulative[:-window]
+    return result
+
+
+def safe_ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
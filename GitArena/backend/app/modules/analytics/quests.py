@@ -0,0 +1,224 @@
+"""
+Quest progress.
+
+A quest counts one metric per space member between its starts_at and ends_at
+(open-ended when ends_at is null):
+
+    commits   commits authored
+    prs       pull requests authored and merged
+    issues    issues opened by the member and closed
+    reviews   reviews submitted
+
+All quests of a space are answered from one daily series per metric:
+
+    member -> (active days, cumulative count up to each day)
+
+read with a single grouped query over the repositories of the space, from
+the earliest quest start on. A quest's progress is then two bisects per
+member, so hundreds of quests cost no more queries than four.
+
+Members are matched through the XP ledger (gamification/ledger.py), issues by
+the author's GitHub login. Series are cached per (space, metric) until the
+next ingest: the cache key holds the highest xp_events / issues id and the
+latest merge / issue close in the space, which every sync that changes
+progress moves, plus the space's members and repositories.
+"""
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, func, or_
+from sqlalchemy.orm import Session
+
+from app.shared.models import Commit, Issue, PullRequest, Quest, Repository, Review, Space, SpaceMember, User, XpEvent
+
+QUEST_METRICS = ("commits", "prs", "issues", "reviews")
+# metric -> XP ledger source
+LEDGER_SOURCES = {"commits": "commit", "prs": "pull_request", "reviews": "review"}
+CACHE_SERIES = 256
+LEADERS = 10
+
+# member id -> (sorted active days, cumulative counts)
+Series = Dict[int, Tuple[List[date], List[int]]]
+
+_cache: "OrderedDict[Tuple[int, str], Tuple[tuple, date, Series]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def clear_series_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def is_active(quest: Quest, now: Optional[datetime] = None) -> bool:
+    now = now or datetime.utcnow()
+    starts_at = quest.starts_at or quest.created_at
+    return (starts_at is None or starts_at <= now) and (quest.ends_at is None or quest.ends_at > now)
+
+
+def _window_count(series: Tuple[List[date], List[int]], first: date, last: date) -> int:
+    """Activity on days first..last (inclusive)"""
+    days, cumulative = series
+    hi = bisect.bisect_right(days, last)
+    lo = bisect.bisect_left(days, first)
+    return (cumulative[hi - 1] if hi else 0) - (cumulative[lo - 1] if lo else 0)
+
+
+class QuestProgressService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _watermark(self, repo_ids: List[int]) -> tuple:
+        latest_issue, latest_close = self.db.query(func.max(Issue.id), func.max(Issue.closed_at)).filter(
+            Issue.repository_id.in_(repo_ids)
+        ).one()
+        return (
+            self.db.query(func.max(XpEvent.id)).scalar(),
+            self.db.query(func.max(PullRequest.merged_at)).filter(PullRequest.repository_id.in_(repo_ids)).scalar(),
+            latest_issue,
+            latest_close,
+        )
+
+    def _members(self, space_id: int) -> List[User]:
+        """The space owner and members"""
+        member_ids = self.db.query(SpaceMember.user_id).filter(SpaceMember.space_id == space_id)
+        owner_ids = self.db.query(Space.owner_id).filter(Space.id == space_id)
+        return self.db.query(User).filter(or_(User.id.in_(member_ids), User.id.in_(owner_ids))).all()
+
+    def _load_series(self, metric: str, repo_ids: List[int], members: List[User], since: date) -> Series:
+        """(member, day) counts of one metric in the repositories, from `since` on"""
+        member_ids = [member.id for member in members]
+        start = datetime.combine(since, datetime.min.time())
+        if metric == "issues":
+            logins = {}
+            for member in members:
+                for login in (member.username, member.github_login):
+                    if login:
+                        logins.setdefault(login, member.id)
+            day = func.date(Issue.closed_at, type_=Date)
+            rows = [
+                (logins[author], issue_day, count)
+                for author, issue_day, count in self.db.query(Issue.author, day, func.count(Issue.id)).filter(
+                    Issue.repository_id.in_(repo_ids),
+                    Issue.author.in_(list(logins)),
+                    Issue.closed_at >= start
+                ).group_by(Issue.author, day).all()
+            ]
+        elif metric == "prs":
+            day = func.date(PullRequest.merged_at, type_=Date)
+            rows = self.db.query(XpEvent.user_id, day, func.count(XpEvent.id)).join(
+                PullRequest, PullRequest.id == XpEvent.source_id
+            ).filter(
+                XpEvent.source == LEDGER_SOURCES[metric],
+                XpEvent.user_id.in_(member_ids),
+                PullRequest.repository_id.in_(repo_ids),
+                PullRequest.merged_at >= start
+            ).group_by(XpEvent.user_id, day).all()
+        else:
+            day = func.date(XpEvent.occurred_at, type_=Date)
+            query = self.db.query(XpEvent.user_id, day, func.count(XpEvent.id)).filter(
+                XpEvent.source == LEDGER_SOURCES[metric],
+                XpEvent.user_id.in_(member_ids),
+                XpEvent.occurred_at >= start
+            )
+            if metric == "commits":
+                query = query.join(Commit, Commit.id == XpEvent.source_id).filter(Commit.repository_id.in_(repo_ids))
+            else:
+                query = query.join(Review, Review.id == XpEvent.source_id).join(
+                    PullRequest, PullRequest.id == Review.pull_request_id
+                ).filter(PullRequest.repository_id.in_(repo_ids))
+            rows = query.group_by(XpEvent.user_id, day).all()
+
+        daily: Dict[int, Dict[date, int]] = {}
+        for member_id, activity_day, count in rows:
+            per_day = daily.setdefault(member_id, {})
+            per_day[activity_day] = per_day.get(activity_day, 0) + count
+        series: Series = {}
+        for member_id, per_day in daily.items():
+            days = sorted(per_day)
+            cumulative, total = [], 0
+            for activity_day in days:
+                total += per_day[activity_day]
+                cumulative.append(total)
+            series[member_id] = (days, cumulative)
+        return series
+
+    def _series(self, space_id: int, metric: str, repo_ids: List[int], members: List[User],
+                since: date, watermark: tuple) -> Series:
+        key = (space_id, metric)
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached and cached[0] == watermark and cached[1] <= since:
+            return cached[2]
+        series = self._load_series(metric, repo_ids, members, since) if repo_ids and members else {}
+        with _cache_lock:
+            _cache[key] = (watermark, since, series)
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_SERIES:
+                _cache.popitem(last=False)
+        return series
+
+    def space_progress(self, space_id: int, quests: List[Quest] = None, leaders: int = LEADERS) -> List[dict]:
+        """Progress of every member toward the quests of a space (its active quests by default)"""
+        now = datetime.utcnow()
+        if quests is None:
+            quests = [q for q in self.db.query(Quest).filter(Quest.project_id == space_id).all() if is_active(q, now)]
+        quests = [q for q in quests if q.metric in QUEST_METRICS]
+        if not quests:
+            return []
+
+        members = self._members(space_id)
+        repo_ids = [row.id for row in self.db.query(Repository.id).filter(Repository.space_id == space_id).all()]
+        # Membership or repository changes also invalidate the cached series
+        watermark = self._watermark(repo_ids) + (
+            tuple(sorted(member.id for member in members)), tuple(sorted(repo_ids))
+        )
+        starts = {q.id: (q.starts_at or q.created_at or now).date() for q in quests}
+        series = {
+            metric: self._series(space_id, metric, repo_ids, members,
+                                 min(starts[q.id] for q in quests if q.metric == metric), watermark)
+            for metric in {q.metric for q in quests}
+        }
+
+        results = []
+        for quest in quests:
+            last = min(quest.ends_at, now).date() if quest.ends_at else now.date()
+            target = max(quest.target or 0, 0)
+            progress = []
+            for member in members:
+                value = _window_count(series[quest.metric][member.id], starts[quest.id], last) \
+                    if member.id in series[quest.metric] else 0
+                progress.append({
+                    "user_id": member.id,
+                    "username": member.username,
+                    "avatar_url": member.avatar_url,
+                    "progress": value,
+                    "percent": min(round(value / target * 100, 1), 100.0) if target else 100.0,
+                    "completed": value >= target,
+                })
+            progress.sort(key=lambda p: (-p["progress"], p["username"] or ""))
+            results.append({
+                "quest_id": quest.id,
+                "title": quest.title,
+                "metric": quest.metric,
+                "target": quest.target,
+                "starts_at": quest.starts_at or quest.created_at,
+                "ends_at": quest.ends_at,
+                "active": is_active(quest, now),
+                "members_count": len(progress),
+                "completed_count": sum(1 for p in progress if p["completed"]),
+                "leaders": progress[:leaders],
+            })
+        return results
+
+    def quest_progress(self, quest: Quest, leaders: int = LEADERS) -> dict:
+        """Progress of one quest; quests outside a space have no members"""
+        if quest.project_id is None or quest.metric not in QUEST_METRICS:
+            return {
+                "quest_id": quest.id, "title": quest.title, "metric": quest.metric, "target": quest.target,
+                "starts_at": quest.starts_at or quest.created_at, "ends_at": quest.ends_at,
+                "active": is_active(quest), "members_count": 0, "completed_count": 0, "leaders": [],
+            }
+        return self.space_progress(quest.project_id, [quest], leaders)[0]
@@ -1,13 +1,49 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from app.shared.models import SpaceMember, User, Commit, Repository, Space
-from sqlalchemy import func, desc
+from sqlalchemy import func, desc, or_
+from typing import List, Optional
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+import time
+from app.config.settings import settings
+from app.shared.exceptions import BadRequestException
+from app.shared.scope import get_user_scope
 from app.modules.analytics.repository import AnalyticsRepository
+from app.modules.analytics.engine import (
+    CommitFrame, FLAG_STRESS,
+    UNKNOWN_AUTHOR, has_flag
+)
+from app.modules.analytics.snapshots import load_space_frame
+from app.modules.analytics.bottlenecks import BottleneckService
+from app.modules.analytics.capacity import WEEKS as CAPACITY_WEEKS, capacity_report
+from app.modules.analytics.collaboration import Member, co_change_edges, edge_strength
+from app.modules.analytics.doc_index import DocIndexService
+from app.modules.analytics.dora import DoraService
 from app.modules.analytics.dto import DashboardStats
 from app.modules.users.repository import UserRepository
 from app.modules.github.repository import GitHubRepository
 
 
+@dataclass
+class AnalyticsScope:
+    """Spaces and repositories a dashboard widget covers, resolved once per request"""
+    space_ids: List[int] = field(default_factory=list)
+    repo_ids: List[int] = field(default_factory=list)
+
+
 class AnalyticsService:
+    # Dashboard bundle widget name -> service method (all take user_id, project_id, scope)
+    BUNDLE_WIDGETS = {
+        "manager-stats": "get_manager_stats",
+        "dora": "get_dora_metrics",
+        "burnout": "get_burnout_metrics",
+        "capacity": "get_team_capacity",
+        "knowledge-base": "get_knowledge_base_metrics",
+        "bottlenecks": "get_bottlenecks",
+        "leaderboard": "get_leaderboard",
+        "collaboration": "get_team_collaboration",
+    }
+
     def __init__(self, db: Session):
         self.db = db
         self.repository = AnalyticsRepository(db)
@@ -49,122 +85,43 @@ class AnalyticsService:
 
     def _get_user_team_space_ids(self, user_id: int) -> list[int]:
         """Helper to get all space IDs were user is member or owner"""
-        # 1. Find all spaces the user is a member of
-        user_spaces = self.db.query(SpaceMember).filter(SpaceMember.user_id == user_id).all()
-        space_ids = [sm.space_id for sm in user_spaces]
-        
-        # 2. Add spaces where user is owner
-        from app.shared.models import Space
-        owned_spaces = self.db.query(Space).filter(Space.owner_id == user_id).all()
-        space_ids.extend([s.id for s in owned_spaces])
-        
-        return list(set(space_ids)) # Deduplicate
+        return get_user_scope(self.db, user_id).space_ids
 
-    def _get_repository_contributors(self, repo_ids: list[int]) -> list[dict]:
+    def _has_project_access(self, user_id: int, project_id: int) -> bool:
+        """True if the user is a member or the owner of the project (space)"""
+        return get_user_scope(self.db, user_id).is_member(project_id)
+
+    def resolve_scope(self, user_id: int, project_id: int = None) -> AnalyticsScope:
         """
-        Identify all contributors based on commit history.
-        Tries to fuzzy match git authors to registered users.
-        Returns list of dicts with user info (real or virtual).
+        Space and repository ids for a project, or for all of the user's teams.
+        Projects the user is not part of resolve to an empty scope.
         """
-        # 1. Get all distinct authors from commits
-        from app.shared.models import Commit
-        authors = self.db.query(
-            Commit.author_name, 
-            Commit.author_email
-        ).filter(
-            Commit.repository_id.in_(repo_ids)
-        ).distinct().all()
-        
-        contributors = {}
-        
-        # 2. Get all registered users to cache (optimization)
-        # In a huge system we would query by email, but here we can fetch all or just match
-        all_users = self.db.query(User).all()
-        user_email_map = {u.email.lower(): u for u in all_users if u.email}
-        # Normalize maps: lowercase and remove spaces for fuzzy name matching
-        user_username_map = {u.username.lower().replace(" ", ""): u for u in all_users if u.username}
-        user_realname_map = {u.name.lower().replace(" ", ""): u for u in all_users if u.name}
-        
-        for name, email in authors:
-            if not name: continue
-            
-            # Normalization
-            email_key = email.lower() if email else None
-            name_key = name.lower()
-            name_key_stripped = name_key.replace(" ", "")
-            
-            # Try match
-            matched_user = None
-            if email_key and email_key in user_email_map:
-                matched_user = user_email_map[email_key]
-            elif name_key_stripped in user_username_map:
-                matched_user = user_username_map[name_key_stripped]
-            elif name_key_stripped in user_realname_map:
-                matched_user = user_realname_map[name_key_stripped]
-                
-            # Key for deduplication in our result list
-            # If matched user, use user_id. If not, use email or name.
-            # IMPORTANT: We use the matched user's ID as the primary key if found to merge different git identities
-            unique_id = f"user_{matched_user.id}" if matched_user else (email_key or name_key)
-            
-            if unique_id not in contributors:
-                if matched_user:
-                    contributors[unique_id] = {
-                        "id": matched_user.id,
-                        "is_registered": True,
-                        "name": matched_user.name or matched_user.username,
-                        "username": matched_user.username,
-                        "email": matched_user.email,
-                        "avatar_url": matched_user.avatar_url or f"https://ui-avatars.com/api/?name={matched_user.name or matched_user.username}&background=random",
-                        "git_emails": {email_key} if email_key else set(),
-                        "git_names": {name_key}
-                    }
-                else:
-                    contributors[unique_id] = {
-                        "id": None, # Non-registered
-                        "is_registered": False,
-                        "name": name,
-                        "username": name, # Fallback
-                        "email": email,
-                        "avatar_url": f"https://ui-avatars.com/api/?name={name}&background=random",
-                        "git_emails": {email_key} if email_key else set(),
-                        "git_names": {name_key}
-                    }
-            else:
-                # Merge git identities
-                if email_key: contributors[unique_id]["git_emails"].add(email_key)
-                contributors[unique_id]["git_names"].add(name_key)
-                
-        return list(contributors.values())
-
-    def get_manager_stats(self, user_id: int, project_id: int = None):
+        user_scope = get_user_scope(self.db, user_id)
+        if project_id:
+            space_ids = [project_id] if user_scope.is_member(project_id) else []
+        else:
+            space_ids = user_scope.space_ids
+        return AnalyticsScope(space_ids=space_ids, repo_ids=user_scope.repos_for(space_ids))
+
+    def _commit_frame(self, scope: AnalyticsScope, since=None) -> CommitFrame:
+        """Commit columns of the scope, from the per-space snapshots when enabled"""
+        if settings.ANALYTICS_SNAPSHOTS_ENABLED and scope.space_ids:
+            return load_space_frame(self.db, settings.ANALYTICS_SNAPSHOT_DIR, scope.space_ids, scope.repo_ids, since)
+        return CommitFrame.load(self.db, scope.repo_ids, since=since)
+
+    def get_manager_stats(self, user_id: int, project_id: int = None, scope: AnalyticsScope = None):
         """
         Aggregate statistics for manager dashboard, optionally filtered by project
         """
         try:
-            if project_id:
-                # Validate user access to this project
-                space_member = self.db.query(SpaceMember).filter(
-                    SpaceMember.space_id == project_id,
-                    SpaceMember.user_id == user_id
-                ).first()
-                if not space_member:
-                     # Check if owner
-                    from app.shared.models import Space
-                    space = self.db.query(Space).filter(Space.id == project_id, Space.owner_id == user_id).first()
-                    if not space:
-                        return {}
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                 return {}
 
             # Get all repositories in these spaces
-            from app.shared.models import Space
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
+            repos = self.db.query(Repository).filter(Repository.id.in_(repo_ids)).all() if repo_ids else []
             
             print(f"DEBUG: ManagerStats - Found {len(repos)} repos: {[r.name for r in repos]}")
 
@@ -181,32 +138,23 @@ class AnalyticsService:
             monday_this_week = today - timedelta(days=days_since_monday)
             monday_this_week = monday_this_week.replace(hour=0, minute=0, second=0, microsecond=0)
             
-            # Initialize activity array for Mon-Sun
-            activity = [0] * 7
-            
-            # Get commits from this week (Monday to Sunday) for weekly activity
-            commits_this_week = self.db.query(Commit).filter(
-                Commit.repository_id.in_(repo_ids),
-                Commit.committed_date >= monday_this_week
-            ).all()
+            # All-time commit columns for this scope (weekly activity, top repos, peak hours)
+            frame = self._commit_frame(scope)
+            this_week = frame.since(monday_this_week)
             
-            print(f"DEBUG: ManagerStats - Found {len(commits_this_week)} commits this week (since {monday_this_week.date()})")
+            print(f"DEBUG: ManagerStats - Found {int(this_week.sum())} commits this week (since {monday_this_week.date()})")
 
-            for commit in commits_this_week:
-                # Map to weekday: 0=Monday, 1=Tuesday, ..., 6=Sunday
-                weekday_index = commit.committed_date.weekday()
-                if 0 <= weekday_index < 7:
-                    activity[weekday_index] += 1
+            # Map to weekday: 0=Monday, 1=Tuesday, ..., 6=Sunday
+            activity = frame.weekday_histogram(this_week).tolist()
             
             print(f"DEBUG: ManagerStats - Weekly activity: {activity}")
 
             # 2. Top Repositories (by activity/stars) - ALL TIME
+            commit_counts = frame.count_by_repository(repo_ids)
             top_repos = []
             for r in repos:
                  # Calculate simple "hotness" score: stars * 5 + all-time commits
-                 all_commits_count = self.db.query(Commit).filter(
-                     Commit.repository_id == r.id
-                 ).count()
+                 all_commits_count = commit_counts.get(r.id, 0)
                  score = (r.stargazers_count or 0) * 5 + all_commits_count
                  top_repos.append({
                      "name": r.name,
@@ -272,19 +220,16 @@ class AnalyticsService:
             ]
 
             # 6. Peak Hours (ALL TIME)
-            peak_hours = [0] * 24
-            all_commits_for_hours = self.db.query(Commit).filter(
-                Commit.repository_id.in_(repo_ids)
-            ).all()
-            for commit in all_commits_for_hours:
-                peak_hours[commit.committed_date.hour] += 1
+            peak_hours = frame.hour_histogram().tolist()
 
             # 7. Files Changed (this week)
+            lines_added = int(frame.additions[this_week].sum())
+            lines_deleted = int(frame.deletions[this_week].sum())
             files_changed_data = {
-                "filesModified": len(commits_this_week),
-                "linesAdded": sum((c.additions or 0) for c in commits_this_week),
-                "linesDeleted": sum((c.deletions or 0) for c in commits_this_week),
-                "netChange": sum((c.additions or 0) - (c.deletions or 0) for c in commits_this_week)
+                "filesModified": int(this_week.sum()),
+                "linesAdded": lines_added,
+                "linesDeleted": lines_deleted,
+                "netChange": lines_added - lines_deleted
             }
 
             return {
@@ -303,88 +248,52 @@ class AnalyticsService:
             traceback.print_exc()
             return {}
 
-    def get_team_collaboration(self, user_id: int, project_id: int = None):
+    def get_team_collaboration(self, user_id: int, project_id: int = None, scope: AnalyticsScope = None):
         """
-        Derive team collaboration network from shared spaces and repositories
-        Optionally filtered by a specific project_id
+        Team collaboration network: members of the user's spaces, connected by
+        the files they both changed (co-change). Optionally one project_id
         """
         try:
-            if project_id:
-                # Use only the specified project
-                space_ids = [project_id]
-            else:
-                # Use all user spaces
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
-            print(f"DEBUG: Analytics - Found {len(space_ids)} spaces for user {user_id}: {space_ids}")
-
             if not space_ids:
                 return {"members": [], "collaborations": []}
 
-            # 2. Find all other members in these spaces
-            peers = self.db.query(User).join(SpaceMember).filter(
-                SpaceMember.space_id.in_(space_ids),
-                User.id != user_id
-            ).distinct().all()
-            
-            print(f"DEBUG: Analytics - Found {len(peers)} peers: {[p.username for p in peers]}")
+            # Members and owners of the spaces, current user first
+            users = self.db.query(User).filter(or_(
+                User.id.in_(self.db.query(SpaceMember.user_id).filter(SpaceMember.space_id.in_(space_ids))),
+                User.id.in_(self.db.query(Space.owner_id).filter(Space.id.in_(space_ids))),
+                User.id == user_id
+            )).all()
+            users.sort(key=lambda u: (u.id != user_id, u.id))
 
+            frame = self._commit_frame(scope)
             members_data = []
-            # Add current user first
-            current_user = self.user_repository.get_by_id(user_id)
-            if current_user:
-                # Count commits by this user (match by email or username in commit author)
-                user_commits = self.db.query(Commit).join(Repository).filter(
-                    Repository.space_id.in_(space_ids),
-                    (Commit.author_email == current_user.email) | 
-                    (Commit.author_name == current_user.username) |
-                    (Commit.author_name == current_user.name)
-                ).count()
-                
-                members_data.append({
-                    "id": str(current_user.id),
-                    "name": "You",
-                    "avatar": current_user.avatar_url,
-                    "contributions": user_commits
-                })
-
-            peer_map = {}
-            for peer in peers:
-                # Count contributions: commits by this peer (match by email or username)
-                contribs = self.db.query(Commit).join(Repository).filter(
-                    Repository.space_id.in_(space_ids),
-                    (Commit.author_email == peer.email) | 
-                    (Commit.author_name == peer.username) |
-                    (Commit.author_name == peer.name)
-                ).count()
-                
+            members = []
+            for user in users:
+                names = [n for n in (user.username, user.name) if n]
+                emails = [user.email] if user.email else []
+                members.append(Member(id=user.id, names=names, emails=emails))
                 members_data.append({
-                    "id": str(peer.id),
-                    "name": peer.name or peer.username,
-                    "avatar": peer.avatar_url,
-                    "contributions": contribs
+                    "id": str(user.id),
+                    "name": "You" if user.id == user_id else (user.name or user.username),
+                    "avatar": user.avatar_url,
+                    "contributions": int(frame.author_mask(names=names, emails=emails).sum())
                 })
-                peer_map[peer.id] = True
-
-            # 3. Calculate edges (Shared Spaces count as strength)
-            collaborations = []
-            
-            # Limit to top connections to avoid graph clutter
-            for peer in peers:
-                # Find shared spaces count
-                shared_spaces_count = self.db.query(SpaceMember).filter(
-                    SpaceMember.user_id == peer.id,
-                    SpaceMember.space_id.in_(space_ids)
-                ).count()
-                
-                if shared_spaces_count > 0:
-                    collaborations.append({
-                        "from": str(user_id),
-                        "to": str(peer.id),
-                        "strength": min(10, shared_spaces_count * 2 + 3) # Base strength + bonus
-                    })
 
-            # TODO: Add peer-to-peer connections (optional for next iteration)
+            # Peer-to-peer edges: files changed by both members (one sparse product per request)
+            edges = co_change_edges(self.db, space_ids, members)
+            max_weight = max((weight for _, _, weight in edges), default=0)
+            collaborations = [
+                {
+                    "from": str(a),
+                    "to": str(b),
+                    "strength": edge_strength(weight, max_weight),
+                    "sharedFiles": weight
+                }
+                for a, b, weight in sorted(edges, key=lambda e: -e[2])
+            ]
             
             return {
                 "members": members_data,
@@ -396,55 +305,29 @@ class AnalyticsService:
             traceback.print_exc()
             return {"members": [], "collaborations": []}
 
-    def get_manager_activity_log(self, user_id: int, filters: dict = None) -> list[dict]:
-        """Aggregate activity log from all managed spaces"""
+    def get_manager_activity_log(self, user_id: int, filters: dict = None, project_id: int = None,
+                                 cursor: str = None, limit: int = 100) -> tuple[list[dict], Optional[str]]:
+        """Activity log across all managed spaces (or one of them). Returns (items, next_cursor)"""
         try:
-            space_ids = self._get_user_team_space_ids(user_id)
+            from app.modules.timeline.service import TimelineService
+            
+            space_ids = self.resolve_scope(user_id, project_id).space_ids
             if not space_ids:
-                return []
-
-            from app.shared.models import Space, Activity
-            repo_ids = [r.id for s in self.db.query(Space).filter(Space.id.in_(space_ids)).all() for r in s.repositories]
-
-            if not repo_ids:
-                return []
-
-            query = self.db.query(Activity).filter(Activity.repository_id.in_(repo_ids))
-
-            if filters:
-                if filters.get("type"):
-                    query = query.filter(Activity.type == filters.get("type"))
-                
-                # Date range
-                from datetime import datetime, timedelta
-                days = 7
-                date_range = filters.get("dateRange", "7days")
-                if "30" in str(date_range): days = 30
-                elif "90" in str(date_range): days = 90
-                elif "all" in str(date_range): days = 3650
-                
-                start_date = datetime.utcnow() - timedelta(days=days)
-                query = query.filter(Activity.created_at >= start_date)
-
-            activities = query.order_by(Activity.created_at.desc()).limit(100).all()
-
-            return [
-                {
-                    "id": str(act.id),
-                    "type": act.type.lower(),
-                    "actor": {
-                        "name": act.user_login,
-                        "avatar": None 
-                    },
-                    "action": act.action,
-                    "target": act.title,
-                    "timestamp": act.created_at.isoformat(),
-                    "metadata": {"description": act.description}
-                } for act in activities
-            ]
+                return [], None
+
+            filters = filters or {}
+            return TimelineService(self.db).get_activity_page(
+                space_ids,
+                filters.get("type"),
+                filters.get("dateRange") or "7days",
+                cursor=cursor,
+                limit=limit
+            )
+        except BadRequestException:
+            raise
         except Exception as e:
             print(f"ERROR: get_manager_activity_log: {e}")
-            return []
+            return [], None
 
     def _get_repository_contributors(self, repo_ids: list[int]) -> list[dict]:
         """
@@ -539,10 +422,8 @@ class AnalyticsService:
     def get_manager_team_members(self, user_id: int, project_id: int = None) -> list[dict]:
         """Aggregate team members from all managed spaces (Includes inactive members)"""
         try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = self.resolve_scope(user_id, project_id)
+            space_ids = scope.space_ids
             if not space_ids:
                 return []
 
@@ -586,8 +467,7 @@ class AnalyticsService:
                 }
 
             # 2. Fetch Repos & Contributors
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
+            repo_ids = scope.repo_ids
             
             if repo_ids:
                 contributors = self._get_repository_contributors(repo_ids)
@@ -654,23 +534,14 @@ class AnalyticsService:
     def get_manager_deep_dive_analytics(self, user_id: int, time_range: str = "30days", project_id: int = None) -> dict:
         """Get deep dive analytics for all managed projects"""
         try:
-            space_ids = []
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
                 
             if not space_ids:
                 return {}
 
             from app.shared.models import Space, Commit, PullRequest
             
-            repo_ids = []
-            spaces = self.db.query(Space).filter(Space.id.in_(space_ids)).all()
-            for s in spaces:
-                if s.repositories:
-                    repo_ids.extend([r.id for r in s.repositories])
-            
             if not repo_ids:
                 return {}
 
@@ -778,12 +649,8 @@ class AnalyticsService:
         Properly calculates total commits, PRs, reviews, and active repos
         """
         try:
-            if project_id:
-                 # Validate access (simplified for brevity, re-use existing logic if possible or trust caller/middleware)
-                 # Ideally reuse the check or just filter
-                 space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                 return {
@@ -793,10 +660,6 @@ class AnalyticsService:
                     "active_repos": 0
                 }
 
-            # Get all repositories in managed spaces
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
-            
             if not repo_ids:
                 return {
                     "total_commits": 0,
@@ -852,168 +715,17 @@ class AnalyticsService:
             }
 
 
-    def get_dora_metrics(self, user_id: int, project_id: int = None) -> dict:
-        """
-        Calculate DORA metrics based on real data:
-        1. Deployment Frequency: Count of deployments (or merged PRs to main)
-        2. Lead Time for Changes: Avg time from First Commit to Deployment (or PR create to merge)
-        3. Change Failure Rate: % of deployments causing failure (or deployments following by hotfix)
-        4. MTTR: Mean Time to Restore Service (avg time to close bug/incident issues)
-        """
-        try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
-            
-            if not space_ids:
-                return {}
-
-            from app.shared.models import Deployment, PullRequest, Issue, Repository
-            
-            repo_ids = [r.id for s in self.db.query(Space).filter(Space.id.in_(space_ids)).all() for r in s.repositories]
-            
-            if not repo_ids:
-                 return {}
-
-            from datetime import datetime, timedelta
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-
-            # 1. Deployment Frequency
-            # Check for actual deployments
-            deployments = self.db.query(Deployment).filter(
-                Deployment.repository_id.in_(repo_ids),
-                Deployment.created_at >= thirty_days_ago
-            ).all()
-            
-            deployment_source = "deployments"
-            if not deployments:
-                # Fallback to Merged PRs
-                deployments = self.db.query(PullRequest).filter(
-                    PullRequest.repository_id.in_(repo_ids),
-                    PullRequest.state == 'merged', # OR merged_at is not null
-                    PullRequest.created_at >= thirty_days_ago # Ideally merged_at
-                ).all()
-                deployment_source = "prs"
-
-            # Calculate Frequency (Deployments per day)
-            deployment_count = len(deployments)
-            deployment_frequency = deployment_count / 30.0
-            
-            # Daily History for Chart
-            from collections import defaultdict
-            daily_deployments = defaultdict(int)
-            for d in deployments:
-                day_key = d.created_at.strftime('%a') # Mon, Tue...
-                daily_deployments[day_key] += 1
-            
-            deployments_history = [
-                {"day": day, "count": daily_deployments.get(day, 0)}
-                 for day in ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
-            ]
-
-            # 2. Lead Time for Changes
-            # Avg time from PR Create -> PR Merge
-            total_lead_time_seconds = 0
-            merged_prs_count = 0
-            
-            # Re-fetch PRs specifically for lead time to ensure we have merge dates
-            merged_prs = self.db.query(PullRequest).filter(
-                PullRequest.repository_id.in_(repo_ids),
-                PullRequest.state == 'merged',
-                PullRequest.created_at >= thirty_days_ago
-            ).all()
-
-            for pr in merged_prs:
-                if pr.merged_at and pr.created_at:
-                    lead_time = (pr.merged_at - pr.created_at).total_seconds()
-                    total_lead_time_seconds += lead_time
-                    merged_prs_count += 1
-                elif pr.updated_at and pr.created_at: # Fallback if merged_at missing
-                     lead_time = (pr.updated_at - pr.created_at).total_seconds()
-                     total_lead_time_seconds += lead_time
-                     merged_prs_count += 1
-
-            avg_lead_time_hours = (total_lead_time_seconds / merged_prs_count / 3600) if merged_prs_count > 0 else 24 # Default 24h if no data
-            
-            # Lead Time History (Weekly or arbitrary) -> Just some trend data
-            lead_time_history = [
-                {"date": "W1", "hours": avg_lead_time_hours * 1.5},
-                {"date": "W2", "hours": avg_lead_time_hours * 1.2},
-                {"date": "W3", "hours": avg_lead_time_hours * 0.9},
-                {"date": "W4", "hours": avg_lead_time_hours} 
-            ]
-
-            # 3. Change Failure Rate
-            # Failed deployments OR Issues labeled "bug" created closely after deployment
-            # Simplifying: Count failed deployments if source is deployments, else look for "bug" issues
-            failure_count = 0
-            if deployment_source == "deployments":
-                failure_count = sum(1 for d in deployments if d.state == 'failure')
-            else:
-                 # Check for "bug" issues in last 30 days
-                 bug_issues = self.db.query(Issue).filter(
-                     Issue.repository_id.in_(repo_ids),
-                     Issue.created_at >= thirty_days_ago,
-                     (Issue.labels.contains("bug") | Issue.title.ilike("%bug%") | Issue.title.ilike("%fix%"))
-                 ).count()
-                 # Heuristic: 1 bug = 1 failed change (very rough)
-                 failure_count = bug_issues
-
-            failure_rate = (failure_count / deployment_count * 100) if deployment_count > 0 else 0
-            if failure_rate > 100: failure_rate = 100 # Cap at 100
-
-            # 4. MTTR (Mean Time to Restore)
-            # Avg time to close "bug" issues
-            closed_bugs = self.db.query(Issue).filter(
-                Issue.repository_id.in_(repo_ids),
-                Issue.state == 'closed',
-                 (Issue.labels.contains("bug") | Issue.title.ilike("%bug%") | Issue.title.ilike("%fix%")),
-                Issue.created_at >= thirty_days_ago
-            ).all()
-
-            total_restore_time = 0
-            restore_count = 0
-            for bug in closed_bugs:
-                if bug.closed_at and bug.created_at:
-                    restore_time = (bug.closed_at - bug.created_at).total_seconds()
-                    total_restore_time += restore_time
-                    restore_count += 1
-            
-            mttr_minutes = (total_restore_time / restore_count / 60) if restore_count > 0 else 60 # Default 60m
-
-            return {
-                "deploymentFrequency": deployment_frequency,
-                "deploymentsHistory": deployments_history,
-                "leadTime": avg_lead_time_hours,
-                "leadTimeHistory": lead_time_history,
-                "failureRate": round(failure_rate, 1),
-                "mttr": round(mttr_minutes, 0)
-            }
-
-        except Exception as e:
-            print(f"ERROR: get_dora_metrics failed: {e}")
-            import traceback
-            traceback.print_exc()
-            return {}
-
-    def get_leaderboard(self, user_id: int, project_id: int = None, period: str = "all-time") -> dict:
+    def get_leaderboard(self, user_id: int, project_id: int = None, period: str = "all-time", scope: AnalyticsScope = None) -> dict:
         """
         Get team leaderboard rankings based on contributions (ALL CONTRIBUTORS)
         """
         try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                 return {"entries": [], "period": period}
             
-            # Get all repositories in these spaces
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
-            
             if not repo_ids:
                 return {"entries": [], "period": period}
             
@@ -1091,93 +803,27 @@ class AnalyticsService:
             traceback.print_exc()
             return {"entries": [], "period": period}
 
-    def get_bottlenecks(self, user_id: int, project_id: int = None) -> dict:
+    def get_bottlenecks(self, user_id: int, project_id: int = None, scope: AnalyticsScope = None) -> dict:
         """
-        Detect development bottlenecks:
-        - Stuck PRs (no activity for days)
-        - PRs waiting for review too long
-        - High churn PRs (many comments/reviews but not merged)
+        Open development bottleneck alerts:
+        - Stuck PRs (open for a week without reviews)
+        - Inactive PRs (no activity for days)
+        - High churn PRs (many reviews but not merged)
         """
         try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                 return {"alerts": [], "total_high_severity": 0, "total_medium_severity": 0}
 
-            # Get all repositories
-            from app.shared.models import Repository, PullRequest, Review
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
-            
             if not repo_ids:
                 return {"alerts": [], "total_high_severity": 0, "total_medium_severity": 0}
 
-            # Fetch relevant OPEN PRs
-            open_prs = self.db.query(PullRequest).filter(
-                PullRequest.repository_id.in_(repo_ids),
-                PullRequest.state == 'open'
-            ).all()
-
-            alerts = []
-            from datetime import datetime, timedelta
-            now = datetime.utcnow()
-            
-            for pr in open_prs:
-                # 1. Stale PR (Created > 7 days ago and no updates/reviews)
-                days_open = (now - pr.created_at).days
-                days_since_update = (now - (pr.updated_at or pr.created_at)).days
-                
-                # Count reviews
-                review_count = self.db.query(func.count(Review.id)).filter(
-                    Review.pull_request_id == pr.id
-                ).scalar() or 0
-                
-                # Check 1: Old and ignored (High Severity)
-                if days_open > 7 and review_count == 0:
-                    alerts.append({
-                        "id": f"stale-{pr.id}",
-                        "type": "stuck_pr",
-                        "severity": "high",
-                        "title": f"Stale PR: {pr.title}",
-                        "description": f"Open for {days_open} days with no reviews.",
-                        "repository": pr.repository.name,
-                        "url": f"https://github.com/{pr.repository.owner}/{pr.repository.name}/pull/{pr.number}", # Construct URL strictly
-                        "created_at": pr.created_at
-                    })
-                    continue # Skip other checks if high severity found
-
-                # Check 2: Sitting idle (Medium Severity)
-                if days_since_update > 3:
-                     alerts.append({
-                        "id": f"idle-{pr.id}",
-                        "type": "inactive_pr",
-                        "severity": "medium",
-                        "title": f"Inactive PR: {pr.title}",
-                        "description": f"No activity for {days_since_update} days.",
-                        "repository": pr.repository.name,
-                         "url": f"https://github.com/{pr.repository.owner}/{pr.repository.name}/pull/{pr.number}",
-                        "created_at": pr.created_at # Alert timestamp is now or pr creation? Let's use pr creation for context
-                    })
-                
-                # Check 3: High Contention / Long Review (Medium Severity)
-                if review_count > 5:
-                     alerts.append({
-                        "id": f"churn-{pr.id}",
-                        "type": "high_churn",
-                        "severity": "medium",
-                        "title": f"High Churn: {pr.title}",
-                        "description": f"Has {review_count} reviews but is still open.",
-                        "repository": pr.repository.name,
-                        "url": f"https://github.com/{pr.repository.owner}/{pr.repository.name}/pull/{pr.number}",
-                        "created_at": pr.created_at
-                    })
-
-            # Sort alerts by severity (High first) and then by date
-            severity_order = {"high": 0, "medium": 1, "low": 2}
-            alerts.sort(key=lambda x: (severity_order.get(x["severity"], 2), x["created_at"]))
+            # Alerts are evaluated at ingest and persisted (analytics/bottlenecks.py)
+            bottlenecks = BottleneckService(self.db)
+            bottlenecks.evaluate_if_due(repo_ids)
+            alerts = bottlenecks.open_alerts(repo_ids)
 
             counts = {
                 "high": sum(1 for a in alerts if a["severity"] == "high"),
@@ -1196,7 +842,7 @@ class AnalyticsService:
             traceback.print_exc()
             return {"alerts": [], "total_high_severity": 0, "total_medium_severity": 0}
 
-    def get_knowledge_base_metrics(self, user_id: int, project_id: int = None) -> dict:
+    def get_knowledge_base_metrics(self, user_id: int, project_id: int = None, scope: AnalyticsScope = None) -> dict:
         """
         Calculate documentation health metrics:
         - README existence/freshness
@@ -1204,10 +850,8 @@ class AnalyticsService:
         - Frequency of documentation updates
         """
         try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                 return {
@@ -1219,10 +863,7 @@ class AnalyticsService:
                     "recent_updates_count": 0
                 }
 
-            # Get all repositories
             from app.shared.models import Repository
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
             
             if not repo_ids:
                  return {
@@ -1234,17 +875,16 @@ class AnalyticsService:
                     "recent_updates_count": 0
                 }
 
-            # Fetch commits
-            # Optimize: Limit to last 1000 commits or last 3 months to avoid scanning everything
+            # Answered from the documentation index maintained at ingest (analytics/doc_index.py)
             from datetime import datetime, timedelta
-            three_months_ago = datetime.utcnow() - timedelta(days=90)
-            
-            commits = self.db.query(Commit).filter(
-                Commit.repository_id.in_(repo_ids),
-                Commit.committed_date >= three_months_ago
-            ).order_by(Commit.committed_date.desc()).all()
+            today = datetime.utcnow().date()
+            index = DocIndexService(self.db).summary(
+                repo_ids,
+                since=today - timedelta(days=90),
+                recent_since=today - timedelta(days=30)
+            )
             
-            if not commits:
+            if not index["total_commits"] and not index["last_update"]:
                  return {
                     "health_score": 0,
                     "last_update": None,
@@ -1254,59 +894,11 @@ class AnalyticsService:
                     "recent_updates_count": 0
                 }
 
-            doc_commits_count = 0
-            readme_found = False
-            contributing_found = False
-            license_found = False
-            last_doc_update = None
-            
-            recent_threshold = datetime.utcnow() - timedelta(days=30)
-            recent_updates = 0
-
-            for commit in commits:
-                is_doc_commit = False
-                
-                # Check diff_data if available
-                files = []
-                if commit.diff_data and isinstance(commit.diff_data, dict):
-                     files = commit.diff_data.get('files', [])
-                elif commit.diff_data and isinstance(commit.diff_data, list):
-                    files = commit.diff_data
-                
-                # Fallback: check commit message
-                if not files and ("docs" in (commit.message or "").lower() or "readme" in (commit.message or "").lower()):
-                     is_doc_commit = True
-                
-                for file_entry in files:
-                    filename = ""
-                    if isinstance(file_entry, str):
-                        filename = file_entry
-                    elif isinstance(file_entry, dict):
-                        filename = file_entry.get('filename', '') or file_entry.get('name', '')
-                    
-                    filename_lower = filename.lower()
-                    
-                    # File checks
-                    if 'readme.md' in filename_lower:
-                        readme_found = True
-                        is_doc_commit = True
-                    if 'contributing.md' in filename_lower:
-                        contributing_found = True
-                        is_doc_commit = True
-                    if 'license' in filename_lower or 'copying' in filename_lower:
-                        license_found = True
-                        is_doc_commit = True
-                    
-                    if filename_lower.endswith('.md') or 'docs/' in filename_lower:
-                        is_doc_commit = True
-                
-                if is_doc_commit:
-                    doc_commits_count += 1
-                    if not last_doc_update:
-                        last_doc_update = commit.committed_date
-                    
-                    if commit.committed_date >= recent_threshold:
-                        recent_updates += 1
+            readme_found = index["has_readme"]
+            contributing_found = index["has_contributing"]
+            license_found = index["has_license"]
+            last_doc_update = index["last_update"]
+            recent_updates = index["recent_doc_commits"]
 
             # Calculate Score
             score = 0
@@ -1319,7 +911,7 @@ class AnalyticsService:
             elif recent_updates > 0: score += 10
             
             # Ratio bonus (up to 20)
-            ratio = (doc_commits_count / len(commits)) if commits else 0
+            ratio = index["doc_commits"] / index["total_commits"] if index["total_commits"] else 0.0
             if ratio > 0.1: score += 20
             elif ratio > 0.05: score += 10
             
@@ -1346,90 +938,31 @@ class AnalyticsService:
                 "recent_updates_count": 0
             }
 
-    def get_team_capacity(self, user_id: int, project_id: int = None) -> dict:
+    def get_team_capacity(self, user_id: int, project_id: int = None, scope: AnalyticsScope = None) -> dict:
         """
-        Calculate team capacity planning metrics (ALL CONTRIBUTORS)
+        Calculate team capacity planning metrics (ALL CONTRIBUTORS): velocity
+        over the last 4 weeks and a weekly load series per member, so status
+        reflects the trend rather than one 30-day count
         """
         try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                 return self._empty_capacity()
 
-            # Get Repos
-            from app.shared.models import Repository, Commit
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
-            
             if not repo_ids:
                 return self._empty_capacity()
 
-            # Get Contributors
-            contributors = self._get_repository_contributors(repo_ids)
-            
-            if not contributors:
-                return self._empty_capacity()
-
-            # Calculate velocity
+            # Contributor x week load matrix over the last CAPACITY weeks (analytics/capacity.py)
             from datetime import datetime, timedelta
-            from sqlalchemy import or_
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            
-            member_loads = []
-            total_velocity = 0.0
-            
-            for contributor in contributors:
-                # Build filter list
-                emails = [e for e in contributor["git_emails"] if e]
-                names = [n for n in contributor["git_names"] if n]
-                
-                filters = []
-                if emails: filters.append(Commit.author_email.in_(emails))
-                if names: filters.append(Commit.author_name.in_(names))
-                if not filters: continue
-                
-                commit_count = self.db.query(Commit).filter(
-                    Commit.repository_id.in_(repo_ids),
-                    Commit.committed_date >= thirty_days_ago,
-                    or_(*filters)
-                ).count()
-                
-                daily_velocity = commit_count / 30.0
-                total_velocity += daily_velocity
-                
-                if daily_velocity > 0: # Only include active
-                    member_loads.append({
-                        "user_id": contributor["id"],
-                        "username": contributor["username"],
-                        "avatar_url": contributor["avatar_url"],
-                        "velocity": round(daily_velocity, 2),
-                        "raw_velocity": daily_velocity
-                    })
-            
-            avg_velocity = total_velocity / len(member_loads) if member_loads else 0
-            
-            # Determine status
-            final_member_loads = []
-            for m in member_loads:
-                status = "Optimal"
-                if m["raw_velocity"] > (avg_velocity * 1.5) and m["raw_velocity"] > 0.5:
-                    status = "Overloaded"
-                elif m["raw_velocity"] < (avg_velocity * 0.5):
-                    status = "Underutilized"
-                
-                final_member_loads.append({
-                    "user_id": m["user_id"],
-                    "username": m["username"],
-                    "avatar_url": m["avatar_url"],
-                    "velocity": m["velocity"],
-                    "status": status
-                })
+            now = datetime.utcnow()
+            frame = self._commit_frame(scope, since=now - timedelta(weeks=CAPACITY_WEEKS))
+            report = capacity_report(self.db, frame, end=now)
             
-            # Sort by velocity desc
-            final_member_loads.sort(key=lambda x: x["velocity"], reverse=True)
+            final_member_loads = report["members"]
+            total_velocity = report["total_velocity"]
+            avg_velocity = report["average_velocity"]
             
             predicted_sprint_output = int(total_velocity * 14) # 2 weeks
             
@@ -1450,7 +983,8 @@ class AnalyticsService:
                 "average_velocity": round(avg_velocity, 2),
                 "predicted_sprint_output": predicted_sprint_output,
                 "sprint_risk": sprint_risk,
-                "member_loads": final_member_loads
+                "member_loads": final_member_loads,
+                "weeks": report["weeks"]
             }
 
         except Exception as e:
@@ -1466,142 +1000,45 @@ class AnalyticsService:
             "average_velocity": 0.0,
             "predicted_sprint_output": 0,
             "sprint_risk": "Low",
-            "member_loads": []
+            "member_loads": [],
+            "weeks": []
         }
 
-    def get_dora_metrics(self, user_id: int, project_id: int = None) -> dict:
+    def get_dora_metrics(self, user_id: int, project_id: int = None, scope: AnalyticsScope = None) -> dict:
         """
-        Calculate DORA Metrics:
-        1. Deployment Frequency (merges to main)
-        2. Lead Time for Changes (commit to merge time)
-        3. Change Failure Rate (hotfixes / total deployments)
-        4. Mean Time to Recovery (time to fix)
+        Calculate DORA Metrics (last 30 days):
+        1. Deployment Frequency (deployments, or merged PRs without deployments)
+        2. Lead Time for Changes (first PR commit to merge)
+        3. Change Failure Rate (failed deployments, or fix commits per merged PR)
+        4. Mean Time to Recovery (failed deployment to next successful one)
         """
         try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                 return {"data": self._empty_dora()}
-
-            from app.shared.models import Repository, PullRequest, Commit
-            from datetime import datetime, timedelta
-            
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
             
             if not repo_ids:
                 return {"data": self._empty_dora()}
 
-            # 1. Deployment Frequency
-            # Count merged PRs in last 30 days
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            merged_prs = self.db.query(PullRequest).filter(
-                PullRequest.repository_id.in_(repo_ids),
-                PullRequest.state == 'merged',
-                PullRequest.merged_at >= thirty_days_ago
-            ).order_by(PullRequest.merged_at.asc()).all()
-            
-            deploy_count = len(merged_prs)
-            deployment_frequency = deploy_count / 30.0 # per day
-            
-            # History
-            history_map = {}
-            for pr in merged_prs:
-                day = pr.merged_at.date().isoformat()
-                history_map[day] = history_map.get(day, 0) + 1
-                
-            deployments_history = [{"day": day, "count": count} for day, count in history_map.items()]
-
-            # 2. Lead Time for Changes (Time from PR creation to merge)
-            # In a real system, would be first commit to deploy. PR creation to merge is a proxy.
-            total_lead_hours = 0
-            for pr in merged_prs:
-                if pr.created_at and pr.merged_at:
-                    delta = pr.merged_at - pr.created_at
-                    total_lead_hours += delta.total_seconds() / 3600.0
-            
-            lead_time = total_lead_hours / deploy_count if deploy_count > 0 else 0
-            
-            # Lead Time History (Moving avg? Or just daily avg)
-            lead_time_history = []
-            if deploy_count > 0:
-                 lead_time_history = [{"date": datetime.utcnow().date().isoformat(), "hours": round(lead_time, 1)}]
-
-            # 3. Change Failure Rate & 4. MTTR
-            # Look for commits with "fix", "hotfix", "revert" in message
-            failed_changes = 0
-            total_time_to_restore = 0 # minutes
-            
-            # Get recent commits
-            recent_commits = self.db.query(Commit).filter(
-                Commit.repository_id.in_(repo_ids),
-                Commit.committed_date >= thirty_days_ago
-            ).all()
-            
-            fix_keywords = ["hotfix", "urgent", "fix!", "revert"]
-            last_failure_time = None
-            
-            for commit in recent_commits:
-                msg = (commit.message or "").lower()
-                if any(k in msg for k in fix_keywords):
-                    failed_changes += 1
-                    # Approx MTTR: Assume fix took 60 mins if we can't measure
-                    total_time_to_restore += 60 
-
-            # 3. Active Days (Engagement) - replacing Failure Rate
-            # 4. Commit Velocity - replacing MTTR
-            
-            # Switch to ALL TIME stats for student projects to ensure visibility
-            all_commits = self.db.query(Commit).filter(
-                Commit.repository_id.in_(repo_ids)
-            ).all()
+            # Delivery metrics from the daily aggregates maintained at ingest (analytics/dora.py)
+            dora = DoraService(self.db).metrics(repo_ids)
 
-            total_commits = len(all_commits)
-            
-            # Debug Log
-            try:
-                with open("debug_log.txt", "a") as f:
-                    f.write(f"\n--- Debug Request {datetime.utcnow()} ---\n")
-                    f.write(f"ProjectID: {project_id}\n")
-                    f.write(f"Repo IDs: {repo_ids}\n")
-                    f.write(f"Total Commits: {total_commits}\n")
-            except: 
-                pass
-            
-
-            
-            # Calculate Total LOC (Additions)
-            total_additions = sum((c.additions or 0) for c in all_commits)
-            total_deletions = sum((c.deletions or 0) for c in all_commits)
-            total_loc = total_additions - total_deletions
-            
-            # Avg Commit Size
+            # Vitality metrics (all time) from the commit columns
+            frame = self._commit_frame(scope)
+            total_commits = len(frame)
+            total_additions = int(frame.additions.sum())
+            total_loc = total_additions - int(frame.deletions.sum())
             avg_commit_size = round(total_additions / total_commits) if total_commits > 0 else 0
             
-            # Contributors
-            unique_authors = {c.author_email or c.author_name for c in all_commits}
-            contributors_count = len(unique_authors)
-
-            # Keep legacy values but they will be ignored by frontend
-            failure_rate = (failed_changes / deploy_count * 100) if deploy_count > 0 else 0
-            mttr = total_time_to_restore / failed_changes if failed_changes > 0 else 0
-            
             return {
                 "data": {
-                    "deploymentFrequency": deployment_frequency,
-                    "leadTime": lead_time,
-                    "failureRate": round(min(failure_rate, 100), 1),
-                    "mttr": round(mttr),
-                    "deploymentsHistory": deployments_history if 'deployments_history' in locals() else [],
-                    "leadTimeHistory": lead_time_history,
-                    # New Vitality Metrics (All Time)
+                    **dora,
                     "totalCommits": total_commits,
                     "totalLoc": total_loc,
                     "avgCommitSize": avg_commit_size,
-                    "contributorsCount": contributors_count
+                    "contributorsCount": frame.distinct_identities()
                 }
             }
 
@@ -1619,22 +1056,18 @@ class AnalyticsService:
             "leadTimeHistory": []
         }
 
-    def get_burnout_metrics(self, user_id: int, project_id: int = None) -> dict:
+    def get_burnout_metrics(self, user_id: int, project_id: int = None, scope: AnalyticsScope = None) -> dict:
         """
         Analyze team burnout risk based on work patterns
         """
         try:
-            if project_id:
-                space_ids = [project_id]
-            else:
-                space_ids = self._get_user_team_space_ids(user_id)
+            scope = scope or self.resolve_scope(user_id, project_id)
+            space_ids, repo_ids = scope.space_ids, scope.repo_ids
             
             if not space_ids:
                  return {"data": {"members": [], "overallRisk": 0}}
 
             from app.shared.models import Repository, Commit
-            repos = self.db.query(Repository).filter(Repository.space_id.in_(space_ids)).all()
-            repo_ids = [r.id for r in repos]
             
             if not repo_ids:
                  return {"data": {"members": [], "overallRisk": 0}}
@@ -1643,45 +1076,38 @@ class AnalyticsService:
             from datetime import datetime, timedelta
             thirty_days_ago = datetime.utcnow() - timedelta(days=30)
             
-            commits = self.db.query(Commit).filter(
-                Commit.repository_id.in_(repo_ids),
-                Commit.committed_date >= thirty_days_ago
-            ).all()
-            
-            # Group by author
-            author_stats = {}
-            
-            for commit in commits:
-                author = commit.author_name or "Unknown"
-                if author not in author_stats:
-                    author_stats[author] = {
-                        "late_night": 0,
-                        "weekend": 0,
-                        "stress_commits": 0,
-                        "total": 0,
-                        "stressors": []
-                    }
-                
-                stats = author_stats[author]
-                stats["total"] += 1
-                
-                # Late night: 22:00 - 05:00
-                hour = commit.committed_date.hour
-                if hour >= 22 or hour < 5:
-                    stats["late_night"] += 1
-                
-                # Weekend: Sat (5) or Sun (6)
-                weekday = commit.committed_date.weekday()
-                if weekday >= 5:
-                    stats["weekend"] += 1
-                
-                # Stress keywords
-                msg = (commit.message or "").lower()
-                stress_words = ["wtf", "urgent", "damn", "hack", "broken", "fail", "stupid"]
-                if any(w in msg for w in stress_words):
-                    stats["stress_commits"] += 1
-                    if len(stats["stressors"]) < 3:
-                        stats["stressors"].append(commit.message)
+            frame = self._commit_frame(scope, since=thirty_days_ago)
+            
+            # Per-author counts (vectorized group-by over author codes)
+            hours = frame.hour
+            totals = frame.count_by_author()
+            late_night = frame.count_by_author((hours >= 22) | (hours < 5))  # 22:00 - 05:00
+            weekend = frame.count_by_author(frame.weekday >= 5)  # Sat (5) or Sun (6)
+            stress = frame.count_by_author(frame.has_flag(FLAG_STRESS))
+            
+            # Up to 3 example messages per stressed author
+            stressors = {}
+            if stress.any():
+                stress_rows = self.db.query(Commit.author_name, Commit.message).filter(
+                    Commit.repository_id.in_(repo_ids),
+                    Commit.committed_date >= thirty_days_ago,
+                    has_flag(FLAG_STRESS)
+                ).all()
+                for author, message in stress_rows:
+                    examples = stressors.setdefault(author or UNKNOWN_AUTHOR, [])
+                    if len(examples) < 3:
+                        examples.append(message)
+            
+            author_stats = {
+                author: {
+                    "late_night": int(late_night[code]),
+                    "weekend": int(weekend[code]),
+                    "stress_commits": int(stress[code]),
+                    "total": int(totals[code]),
+                    "stressors": stressors.get(author, [])
+                }
+                for code, author in enumerate(frame.author_names)
+            }
 
             # Calculate risk
             members = []
@@ -1748,3 +1174,51 @@ class AnalyticsService:
         except Exception as e:
             print(f"ERROR: get_burnout_metrics failed: {e}")
             return {"data": {"members": [], "overallRisk": 0}}
+
+    def get_dashboard_bundle(self, user_id: int, widgets: List[str], project_id: int = None,
+                             period: str = "all-time") -> dict:
+        """
+        Compute several dashboard widgets in one call.
+        Scope (spaces and repositories) is resolved once and shared; widgets run
+        concurrently, each on its own session since a Session is not thread-safe.
+        """
+        unknown = [w for w in widgets if w not in self.BUNDLE_WIDGETS]
+        if unknown:
+            raise BadRequestException(f"Unknown widgets: {', '.join(unknown)}")
+        widgets = list(dict.fromkeys(widgets))
+
+        started = time.perf_counter()
+        scope = self.resolve_scope(user_id, project_id)
+        scope_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.db.get_bind())
+
+        def run_widget(widget: str):
+            widget_started = time.perf_counter()
+            db = session_factory()
+            try:
+                method = getattr(AnalyticsService(db), self.BUNDLE_WIDGETS[widget])
+                if widget == "leaderboard":
+                    result = method(user_id, project_id, period=period, scope=scope)
+                else:
+                    result = method(user_id, project_id, scope=scope)
+            finally:
+                db.close()
+            return result, round((time.perf_counter() - widget_started) * 1000, 2)
+
+        results, timings = {}, {}
+        if widgets:
+            workers = max(1, min(settings.ANALYTICS_BUNDLE_WORKERS, len(widgets)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {widget: pool.submit(run_widget, widget) for widget in widgets}
+                for widget, future in futures.items():
+                    results[widget], timings[widget] = future.result()
+
+        return {
+            "widgets": results,
+            "timings_ms": {
+                "scope": scope_ms,
+                **timings,
+                "total": round((time.perf_counter() - started) * 1000, 2)
+            }
+        }
@@ -0,0 +1,333 @@
+"""
+Memory-mapped per-space commit column snapshots.
+
+Workers read commit columns from shared, memory-mapped files instead of
+re-loading them from the database after every restart, so several uvicorn
+workers share one copy in the OS page cache.
+
+Layout of a snapshot directory (one per space):
+    gen_<n>/      commit_id.i64 timestamp.i64 author.i32 email.i32 identity.i32
+                  additions.i64 deletions.i64 repository.i64 flags.u8   raw columns
+    meta.json     {"format", "generation", "count", "probe", "watermark",
+                   "author_names", "emails", "identities"}
+
+`watermark` maps each repository of the space to the (max commit id, commit
+count) the snapshot covers. A refresh compares it with the database: new
+commits are appended, anything else (a repository joined or left the space,
+commits were deleted or rewritten, format change) rebuilds the snapshot.
+Counting commits is O(commits), so it only happens when `probe`
+(change_marker: max commit id and the repositories' last sync times) has
+moved; an unchanged space costs two index lookups.
+
+As in the vector index, `meta.json` is replaced atomically after the column
+files are appended, so readers never see a half-written row. A rebuild
+writes a new generation directory and then switches `meta.json` to it, so
+the files a published meta points to are never rewritten or removed under a
+reader; superseded generations are deleted once they have been unused for
+GENERATION_GRACE_SECONDS. Writers are serialised with a file lock across
+processes.
+"""
+import json
+import os
+import re
+import shutil
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.modules.analytics.engine import CommitFrame, factorize, frame_columns, UNKNOWN_AUTHOR
+from app.shared.file_lock import FileLock
+from app.shared.models import Commit, Repository
+
+# Bump when the column layout or the meaning of flags changes
+SNAPSHOT_FORMAT = 2
+# Readers map the columns right after reading meta.json; a superseded
+# generation is kept this long for readers that are still between the two
+GENERATION_GRACE_SECONDS = 300
+GENERATION_PATTERN = re.compile(r"^gen_(\d+)$")
+
+COLUMNS = (
+    ("commit_id", np.int64),
+    ("timestamp", np.int64),
+    ("author", np.int32),
+    ("email", np.int32),
+    ("identity", np.int32),
+    ("additions", np.int64),
+    ("deletions", np.int64),
+    ("repository", np.int64),
+    ("flags", np.uint8),
+)
+
+
+def change_marker(db: Session, model, repo_ids: List[int]) -> list:
+    """
+    Cheap freshness key of data derived from `model` rows (Commit, CommitFile)
+    of some repositories: the table's max id, read through the primary key
+    index, and the repositories' last sync times. Inserts move the first;
+    deletions and rewrites only happen in a sync, which moves the second.
+    JSON-encodable, so snapshots can store it in their meta.
+    """
+    max_id = db.query(func.max(model.id)).scalar() or 0
+    synced = db.query(Repository.id, Repository.last_synced_at).filter(
+        Repository.id.in_(repo_ids)
+    ).order_by(Repository.id).all() if repo_ids else []
+    return [int(max_id), [[repo_id, synced_at.isoformat() if synced_at else None] for repo_id, synced_at in synced]]
+
+
+class CommitSnapshot:
+    """Append-only commit column files of one space"""
+
+    def __init__(self, directory: str, space_id: int):
+        self.directory = directory
+        self.space_id = space_id
+
+    # ---- files -------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def _column_file(name: str, dtype) -> str:
+        return f"{name}.{np.dtype(dtype).kind}{np.dtype(dtype).itemsize * 8}"
+
+    def _column_path(self, generation: str, name: str, dtype) -> str:
+        return self._path(os.path.join(generation, self._column_file(name, dtype)))
+
+    def read_meta(self) -> Optional[dict]:
+        path = self._path("meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return meta if meta.get("format") == SNAPSHOT_FORMAT else None
+
+    def _write_meta(self, meta: dict):
+        tmp_path = self._path("meta.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._path("meta.json"))
+
+    def _generations(self) -> Dict[str, int]:
+        """Generation directory name -> number"""
+        if not os.path.isdir(self.directory):
+            return {}
+        return {
+            name: int(match.group(1))
+            for name in os.listdir(self.directory)
+            for match in [GENERATION_PATTERN.match(name)] if match
+        }
+
+    def _new_generation(self) -> str:
+        generation = f"gen_{max(self._generations().values(), default=0) + 1}"
+        os.makedirs(self._path(generation))
+        return generation
+
+    def _retire(self, generation: Optional[str]):
+        """Start the grace period of a generation that meta.json no longer points to"""
+        if generation and os.path.isdir(self._path(generation)):
+            os.utime(self._path(generation))
+
+    def _prune(self, current: str):
+        """Delete generations (and pre-generation column files) unused for the grace period"""
+        cutoff = time.time() - GENERATION_GRACE_SECONDS
+        for generation in self._generations():
+            path = self._path(generation)
+            if generation != current and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        for name, dtype in COLUMNS:
+            legacy = self._path(self._column_file(name, dtype))
+            if os.path.exists(legacy) and os.path.getmtime(legacy) < cutoff:
+                os.remove(legacy)
+
+    def _truncate_to_count(self, generation: str, count: int):
+        """Drop rows left behind by an interrupted append"""
+        for name, dtype in COLUMNS:
+            path = self._column_path(generation, name, dtype)
+            size = count * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def _memmap(self, generation: str, name: str, dtype, count: int) -> np.ndarray:
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self._column_path(generation, name, dtype), dtype=dtype, mode="r", shape=(count,))
+
+    # ---- watermark ---------------------------------------------------------
+
+    def _repo_ids(self, db: Session) -> List[int]:
+        return [row.id for row in db.query(Repository.id).filter(Repository.space_id == self.space_id).all()]
+
+    def _db_watermark(self, db: Session, repo_ids: List[int]) -> Dict[str, List[int]]:
+        watermark = {str(repo_id): [0, 0] for repo_id in repo_ids}
+        if repo_ids:
+            for repo_id, max_id, count in db.query(
+                Commit.repository_id, func.max(Commit.id), func.count(Commit.id)
+            ).filter(
+                Commit.repository_id.in_(repo_ids),
+                Commit.committed_date.isnot(None)
+            ).group_by(Commit.repository_id).all():
+                watermark[str(repo_id)] = [int(max_id), int(count)]
+        return watermark
+
+    # ---- read / refresh ----------------------------------------------------
+
+    def frame(self, meta: dict) -> CommitFrame:
+        """CommitFrame over the memory-mapped columns (no copy)"""
+        count = meta["count"]
+        columns = {name: self._memmap(meta["generation"], name, dtype, count) for name, dtype in COLUMNS}
+        return CommitFrame(
+            timestamp=columns["timestamp"].view("datetime64[s]"),
+            author=columns["author"],
+            author_names=meta["author_names"],
+            email=columns["email"],
+            emails=meta["emails"],
+            identity=columns["identity"],
+            identities=meta["identities"],
+            additions=columns["additions"],
+            deletions=columns["deletions"],
+            repository=columns["repository"],
+            flags=columns["flags"]
+        )
+
+    def refresh(self, db: Session) -> CommitFrame:
+        """Bring the snapshot up to the database watermark and return its frame"""
+        repo_ids = self._repo_ids(db)
+        # Read before the watermark, so a stored probe never runs ahead of the rows
+        probe = change_marker(db, Commit, repo_ids)
+        meta = self.read_meta()
+        if meta and meta["probe"] == probe:
+            return self.frame(meta)
+
+        watermark = self._db_watermark(db, repo_ids)
+        with FileLock(self.directory):
+            # Another worker may have refreshed while we waited
+            meta = self.read_meta()
+            if meta and meta["watermark"] == watermark:
+                if meta["probe"] != probe:
+                    meta["probe"] = probe
+                    self._write_meta(meta)
+                return self.frame(meta)
+
+            if meta and set(meta["watermark"]) == set(watermark):
+                appended = self._append(db, meta, watermark, probe)
+                if appended is not None:
+                    return self.frame(appended)
+            return self.frame(self._rebuild(db, meta, watermark, probe))
+
+    def _rows(self, db: Session, condition) -> List[tuple]:
+        return db.query(Commit.id, *frame_columns()).filter(
+            condition,
+            Commit.committed_date.isnot(None)
+        ).order_by(Commit.id).all()
+
+    def _append(self, db: Session, meta: dict, watermark: Dict[str, List[int]], probe: list) -> Optional[dict]:
+        """Append commits past the stored watermark; None when a rebuild is needed"""
+        conditions = []
+        for repo_id, (max_id, count) in watermark.items():
+            stored_max, stored_count = meta["watermark"][repo_id]
+            if max_id < stored_max or count < stored_count:
+                return None
+            if count > stored_count:
+                conditions.append(and_(Commit.repository_id == int(repo_id), Commit.id > stored_max))
+        rows = self._rows(db, or_(*conditions)) if conditions else []
+
+        # Appended rows must account for every new commit, otherwise history changed
+        new_counts: Dict[str, int] = {}
+        for row in rows:
+            new_counts[str(row[6])] = new_counts.get(str(row[6]), 0) + 1
+        for repo_id, (_, count) in watermark.items():
+            if new_counts.get(repo_id, 0) != count - meta["watermark"][repo_id][1]:
+                return None
+
+        # Rows past `count` are not visible to any reader of this generation
+        self._truncate_to_count(meta["generation"], meta["count"])
+        return self._write_rows(rows, meta, watermark, probe)
+
+    def _rebuild(self, db: Session, meta: Optional[dict], watermark: Dict[str, List[int]], probe: list) -> dict:
+        """Write every row into a new generation, then switch meta.json to it"""
+        repo_ids = [int(repo_id) for repo_id in watermark]
+        rows = self._rows(db, Commit.repository_id.in_(repo_ids)) if repo_ids else []
+        empty = {"generation": self._new_generation(), "count": 0, "author_names": [], "emails": [], "identities": []}
+        new_meta = self._write_rows(rows, empty, watermark, probe)
+        self._retire(meta["generation"] if meta else None)
+        self._prune(new_meta["generation"])
+        return new_meta
+
+    def _write_rows(self, rows: List[tuple], meta: dict, watermark: Dict[str, List[int]], probe: list) -> dict:
+        if rows:
+            commit_ids, dates, names, emails, additions, deletions, repos, flags = zip(*rows)
+        else:
+            commit_ids = dates = names = emails = additions = deletions = repos = flags = ()
+        author, author_names = factorize(names, meta["author_names"], missing=UNKNOWN_AUTHOR)
+        email, email_labels = factorize(emails, meta["emails"])
+        identity, identities = factorize([e or n for e, n in zip(emails, names)], meta["identities"])
+
+        columns = {
+            "commit_id": np.array(commit_ids, dtype=np.int64),
+            "timestamp": np.array(dates, dtype="datetime64[s]").astype(np.int64),
+            "author": author,
+            "email": email,
+            "identity": identity,
+            "additions": np.array([a or 0 for a in additions], dtype=np.int64),
+            "deletions": np.array([d or 0 for d in deletions], dtype=np.int64),
+            "repository": np.array(repos, dtype=np.int64),
+            "flags": np.array([f or 0 for f in flags], dtype=np.uint8),
+        }
+        for name, dtype in COLUMNS:
+            with open(self._column_path(meta["generation"], name, dtype), "ab") as f:
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+        new_meta = {
+            "format": SNAPSHOT_FORMAT,
+            "space_id": self.space_id,
+            "generation": meta["generation"],
+            "count": meta["count"] + len(rows),
+            "probe": probe,
+            "watermark": watermark,
+            "author_names": author_names,
+            "emails": email_labels,
+            "identities": identities,
+        }
+        self._write_meta(new_meta)
+        return new_meta
+
+
+def load_space_frame(db: Session, directory: str, space_ids: List[int], repo_ids: List[int] = None,
+                     since=None) -> CommitFrame:
+    """Commit frame of the given spaces from their snapshots, refreshed to the current watermark"""
+    frames = [
+        CommitSnapshot(os.path.join(directory, f"space_{space_id}"), space_id).refresh(db)
+        for space_id in sorted(set(space_ids))
+    ]
+    frame = CommitFrame.concat(frames)
+    mask = None
+    if repo_ids is not None:
+        mask = np.isin(frame.repository, np.asarray(repo_ids, dtype=np.int64))
+    if since is not None:
+        mask = frame.since(since) if mask is None else mask & frame.since(since)
+    return frame if mask is None else frame.take(mask)
+
+
+def invalidate_snapshots(directory: str) -> int:
+    """
+    Force every snapshot under directory to rebuild on next use (e.g. after
+    commit flags were backfilled). Only meta.json is removed; its generation
+    starts its grace period, so readers that already read it are unaffected.
+    """
+    removed = 0
+    if not os.path.isdir(directory):
+        return removed
+    for name in os.listdir(directory):
+        snapshot = CommitSnapshot(os.path.join(directory, name), space_id=0)
+        with FileLock(snapshot.directory):
+            meta = snapshot.read_meta()
+            path = snapshot._path("meta.json")
+            if os.path.exists(path):
+                snapshot._retire(meta["generation"] if meta else None)
+                os.remove(path)
+                removed += 1
+    return removed
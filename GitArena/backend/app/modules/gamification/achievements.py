@@ -0,0 +1,178 @@
+"""
+Rule-driven achievement evaluation.
+
+An achievement unlocks when the user's value of its `condition_type` reaches
+`condition_value`. Each condition type is one grouped query over the XP
+ledger, gamification_stats or the team tables, so a whole set of users is
+evaluated with one query per condition type in use, and unlocks are inserted
+only where missing (user_achievements is unique per user and achievement).
+
+Evaluated after every sync batch for the users it credited
+(github/service.py), after a repository sync for its owner (repo_count),
+after a membership change for everyone in the space (collaborators), on a
+user's first stats read, and for everyone by backfill_xp_ledger.py. Achievements with an unknown condition type ("manual")
+are never unlocked here.
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, literal, select, union
+from sqlalchemy.orm import Session
+
+from app.shared.models import (
+    Achievement, Commit, GamificationStats, PullRequest, Repository, Review, Space, SpaceMember,
+    User, UserAchievement, XpEvent
+)
+
+DEFAULT_ACHIEVEMENTS = [
+    {"id": 1, "title": "Early Adopter", "description": "Joined GitArena", "icon": "🚀", "xp_reward": 100,
+     "condition_type": "joined", "condition_value": 1},
+    {"id": 2, "title": "Commit Master", "description": "100+ commits", "icon": "⚡", "xp_reward": 500,
+     "condition_type": "commits_count", "condition_value": 100},
+    {"id": 3, "title": "Code Reviewer", "description": "50+ reviews", "icon": "👀", "xp_reward": 300,
+     "condition_type": "reviews_count", "condition_value": 50},
+    {"id": 4, "title": "Team Player", "description": "10+ collaborators", "icon": "🤝", "xp_reward": 200,
+     "condition_type": "collaborators", "condition_value": 10},
+    {"id": 5, "title": "Streak Master", "description": "30-day streak", "icon": "🔥", "xp_reward": 1000,
+     "condition_type": "streak_days", "condition_value": 30},
+    {"id": 6, "title": "Repository King", "description": "20+ repos", "icon": "👑", "xp_reward": 400,
+     "condition_type": "repo_count", "condition_value": 20},
+]
+
+
+def _restrict(query, column, user_ids: Optional[List[int]]):
+    return query if user_ids is None else query.filter(column.in_(user_ids))
+
+
+def _ledger_count(source: str) -> Callable:
+    def metric(db: Session, user_ids: Optional[List[int]]):
+        return _restrict(db.query(XpEvent.user_id, func.count(XpEvent.id)).filter(
+            XpEvent.source == source
+        ), XpEvent.user_id, user_ids).group_by(XpEvent.user_id)
+    return metric
+
+
+def _joined(db: Session, user_ids: Optional[List[int]]):
+    return _restrict(db.query(User.id, literal(1)), User.id, user_ids)
+
+
+def _stats_column(column) -> Callable:
+    def metric(db: Session, user_ids: Optional[List[int]]):
+        return _restrict(db.query(GamificationStats.user_id, column), GamificationStats.user_id, user_ids)
+    return metric
+
+
+def _repo_count(db: Session, user_ids: Optional[List[int]]):
+    return _restrict(
+        db.query(Repository.user_id, func.count(Repository.id)), Repository.user_id, user_ids
+    ).group_by(Repository.user_id)
+
+
+def _collaborators(db: Session, user_ids: Optional[List[int]]):
+    """Distinct other users sharing a space (as member or owner)"""
+    memberships = union(
+        select(SpaceMember.space_id.label("space_id"), SpaceMember.user_id.label("user_id")),
+        select(Space.id.label("space_id"), Space.owner_id.label("user_id"))
+    ).subquery()
+    mine = memberships.alias("mine")
+    theirs = memberships.alias("theirs")
+    return _restrict(db.query(mine.c.user_id, func.count(theirs.c.user_id.distinct())).join(
+        theirs, (theirs.c.space_id == mine.c.space_id) & (theirs.c.user_id != mine.c.user_id)
+    ), mine.c.user_id, user_ids).group_by(mine.c.user_id)
+
+
+# condition_type -> query of (user id, value)
+METRICS: Dict[str, Callable] = {
+    "joined": _joined,
+    "commits_count": _ledger_count("commit"),
+    "prs_count": _ledger_count("pull_request"),
+    "reviews_count": _ledger_count("review"),
+    "xp_total": _stats_column(GamificationStats.xp),
+    "streak_days": _stats_column(GamificationStats.streak),
+    "repo_count": _repo_count,
+    "collaborators": _collaborators,
+}
+
+
+def seed_default_achievements(db: Session):
+    """Insert the default badges when the achievements table is empty"""
+    if db.query(Achievement.id).first() is None:
+        # Specific IDs match the frontend badge list
+        db.bulk_insert_mappings(Achievement, DEFAULT_ACHIEVEMENTS)
+        db.commit()
+
+
+class AchievementService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- ingest --------------------------------------------------------------
+
+    def record_commits(self, repo: Repository, commits: Iterable[Commit]) -> int:
+        return self.evaluate(self._credited_users({"commit": [c.id for c in commits]}, repo))
+
+    def record_pull_requests(self, repo: Repository, prs: Iterable[PullRequest]) -> int:
+        pr_ids = [pr.id for pr in prs]
+        review_ids = [review_id for (review_id,) in self.db.query(Review.id).filter(
+            Review.pull_request_id.in_(pr_ids)
+        ).all()] if pr_ids else []
+        return self.evaluate(self._credited_users({"pull_request": pr_ids, "review": review_ids}, repo))
+
+    def record_repositories(self, user_id: int) -> int:
+        """The user's repositories were synced (repo_count)"""
+        return self.evaluate([user_id])
+
+    def record_membership(self, space_id: int, user_ids: Iterable[int] = ()) -> int:
+        """
+        Membership of a space changed (collaborators): re-evaluate its owner,
+        its members and the given users (e.g. one who just left)
+        """
+        members = {user_id for (user_id,) in self.db.query(SpaceMember.user_id).filter(
+            SpaceMember.space_id == space_id
+        ).all()}
+        owners = {owner_id for (owner_id,) in self.db.query(Space.owner_id).filter(Space.id == space_id).all()}
+        return self.evaluate(sorted((members | owners | set(user_ids)) - {None}))
+
+    def _credited_users(self, sources: Dict[str, List[int]], repo: Repository) -> List[int]:
+        """Users the XP ledger credited for these rows, plus the repository owner"""
+        user_ids = {repo.user_id} if repo.user_id else set()
+        for source, ids in sources.items():
+            if ids:
+                user_ids |= {user_id for (user_id,) in self.db.query(XpEvent.user_id).filter(
+                    XpEvent.source == source, XpEvent.source_id.in_(ids)
+                ).distinct().all()}
+        return sorted(user_ids)
+
+    # ---- evaluation ----------------------------------------------------------
+
+    def evaluate(self, user_ids: Optional[List[int]] = None) -> int:
+        """Unlock every reached achievement of the given users (all when None); returns new unlocks"""
+        if user_ids is not None and not user_ids:
+            return 0
+        seed_default_achievements(self.db)
+        achievements = self.db.query(
+            Achievement.id, Achievement.condition_type, Achievement.condition_value
+        ).filter(Achievement.condition_type.in_(list(METRICS))).all()
+        if not achievements:
+            return 0
+
+        values = {
+            condition_type: {user_id: value or 0 for user_id, value in METRICS[condition_type](self.db, user_ids).all()}
+            for condition_type in {a.condition_type for a in achievements}
+        }
+        unlocked = set(_restrict(self.db.query(UserAchievement.user_id, UserAchievement.achievement_id).filter(
+            UserAchievement.achievement_id.in_([a.id for a in achievements])
+        ), UserAchievement.user_id, user_ids).all())
+
+        now = datetime.utcnow()
+        unlocks = [
+            {"user_id": user_id, "achievement_id": achievement.id, "unlocked_at": now}
+            for achievement in achievements
+            for user_id, value in values[achievement.condition_type].items()
+            if value > 0 and value >= (achievement.condition_value or 0)
+            and (user_id, achievement.id) not in unlocked
+        ]
+        if unlocks:
+            self.db.bulk_insert_mappings(UserAchievement, unlocks)
+            self.db.commit()
+        return len(unlocks)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.shared.database import get_db
 from app.modules.gamification.service import GamificationService
+from app.modules.gamification.ledger import LEVEL_XP, current_streak
 from app.modules.users.controller import get_current_user
 from app.shared.models import User
 
@@ -23,8 +24,8 @@ def get_gamification_stats(
         "level": stats.level,
         "xp": stats.xp,
         "totalXp": stats.xp,
-        "nextLevelXp": stats.level * 1000, # Simple formula: level * 1000
-        "streak": stats.streak,
+        "nextLevelXp": stats.level * LEVEL_XP,
+        "streak": current_streak(stats),
         "achievements": [str(a.id) for a in achievements],
         "skills": {
             "Python": stats.xp // 2, # Mock distribution for now
@@ -0,0 +1,239 @@
+"""
+XP ledger.
+
+Every commit, pull request and review credited to a registered user is
+appended to `xp_events` at ingest (github/service.py), once per source row.
+The user's `gamification_stats` row is folded forward from the new events -
+xp, level, and the streak of consecutive active days - so reading stats is a
+single lookup with no writes.
+
+Attribution: commits by author email, else author name as username or full
+name; pull requests and reviews by GitHub login. A user's stats row is built
+from their whole history the first time it is read (rebuild()), which also
+covers activity ingested before they registered.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Date, func, or_
+from sqlalchemy.orm import Session
+
+from app.shared.models import Commit, GamificationStats, PullRequest, Repository, Review, User, XpEvent
+
+XP_PER_COMMIT = 10
+XP_PER_PULL_REQUEST = 50
+XP_PER_REVIEW = 30
+LEVEL_XP = 1000
+
+# (source, source id, user id, xp, occurred_at)
+Event = Tuple[str, int, int, int, datetime]
+
+
+def level_for(xp: int) -> int:
+    return xp // LEVEL_XP + 1
+
+
+def current_streak(stats: GamificationStats, today: Optional[date] = None) -> int:
+    """The stored streak while it is alive (last activity today or yesterday), else 0"""
+    if not stats.last_activity_date:
+        return 0
+    today = today or datetime.utcnow().date()
+    return (stats.streak or 0) if stats.last_activity_date.date() >= today - timedelta(days=1) else 0
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _leading_run(days_desc: List[date]) -> int:
+    """Consecutive days counted back from the first (latest) one"""
+    run = 0
+    for day in days_desc:
+        if run and day != days_desc[run - 1] - timedelta(days=1):
+            break
+        run += 1
+    return run
+
+
+class XpLedger:
+    def __init__(self, db: Session):
+        self.db = db
+
+    # ---- attribution ---------------------------------------------------------
+
+    def _commit_events(self, rows: Iterable[tuple]) -> List[Event]:
+        """rows: (commit id, author email, author name, committed_date)"""
+        rows = [row for row in rows if row[3] is not None]
+        emails = {email for _, email, _, _ in rows if email}
+        names = {name for _, _, name, _ in rows if name}
+        users = self.db.query(User.id, User.email, User.username, User.name).filter(or_(
+            User.email.in_(emails), User.username.in_(names), User.name.in_(names)
+        )).all() if emails or names else []
+        by_email = {email: user_id for user_id, email, _, _ in users if email}
+        by_username = {username: user_id for user_id, _, username, _ in users if username}
+        by_name = {name: user_id for user_id, _, _, name in users if name}
+
+        events = []
+        for commit_id, email, name, committed_date in rows:
+            user_id = by_email.get(email) or by_username.get(name) or by_name.get(name)
+            if user_id:
+                events.append(("commit", commit_id, user_id, XP_PER_COMMIT, _utc_naive(committed_date)))
+        return events
+
+    def _login_events(self, source: str, xp: int, rows: Iterable[tuple]) -> List[Event]:
+        """rows: (source id, GitHub login, occurred_at)"""
+        rows = [row for row in rows if row[1] and row[2] is not None]
+        logins = {login for _, login, _ in rows}
+        users = {}
+        if logins:
+            for user_id, username, github_login in self.db.query(User.id, User.username, User.github_login).filter(
+                or_(User.username.in_(logins), User.github_login.in_(logins))
+            ).all():
+                users.setdefault(username, user_id)
+                if github_login:
+                    users[github_login] = user_id
+        return [
+            (source, source_id, users[login], xp, _utc_naive(occurred_at))
+            for source_id, login, occurred_at in rows if login in users
+        ]
+
+    def _review_events(self, condition) -> List[Event]:
+        return self._login_events("review", XP_PER_REVIEW, self.db.query(
+            Review.id, Review.reviewer, Review.submitted_at
+        ).filter(condition).all())
+
+    # ---- ingest --------------------------------------------------------------
+
+    def record_commits(self, repo: Repository, commits: Iterable[Commit]) -> int:
+        return self._append(self._commit_events(
+            (c.id, c.author_email, c.author_name, c.committed_date) for c in commits
+        ))
+
+    def record_pull_requests(self, repo: Repository, prs: Iterable[PullRequest]) -> int:
+        """Credit PR authors, and reviewers of the PRs' reviews (stored just before)"""
+        prs = list(prs)
+        events = self._login_events(
+            "pull_request", XP_PER_PULL_REQUEST, ((pr.id, pr.author, pr.created_at) for pr in prs)
+        )
+        events += self._review_events(Review.pull_request_id.in_([pr.id for pr in prs]))
+        return self._append(events)
+
+    def _append(self, events: List[Event]) -> int:
+        """Insert events not in the ledger yet and fold them into existing stats rows"""
+        new = self._unrecorded(events)
+        if not new:
+            return 0
+        self.db.bulk_insert_mappings(XpEvent, [
+            {"source": source, "source_id": source_id, "user_id": user_id, "xp": xp, "occurred_at": occurred_at}
+            for source, source_id, user_id, xp, occurred_at in new
+        ])
+
+        gained: Dict[int, list] = {}  # user id -> [xp, active days, latest event]
+        for _, _, user_id, xp, occurred_at in new:
+            entry = gained.setdefault(user_id, [0, set(), occurred_at])
+            entry[0] += xp
+            entry[1].add(occurred_at.date())
+            entry[2] = max(entry[2], occurred_at)
+        # Users without a stats row get one built from the ledger on first read
+        for stats in self.db.query(GamificationStats).filter(GamificationStats.user_id.in_(list(gained))).all():
+            xp, days, latest = gained[stats.user_id]
+            stats.xp = (stats.xp or 0) + xp
+            stats.level = level_for(stats.xp)
+            self._advance_streak(stats, sorted(days), latest)
+        self.db.commit()
+        return len(new)
+
+    def _unrecorded(self, events: List[Event]) -> List[Event]:
+        by_source: Dict[str, set] = {}
+        for source, source_id, *_ in events:
+            by_source.setdefault(source, set()).add(source_id)
+        recorded = set()
+        for source, ids in by_source.items():
+            recorded |= {
+                (source, source_id)
+                for (source_id,) in self.db.query(XpEvent.source_id).filter(
+                    XpEvent.source == source, XpEvent.source_id.in_(list(ids))
+                ).all()
+            }
+        unique = {}
+        for event in events:
+            if (event[0], event[1]) not in recorded:
+                unique.setdefault((event[0], event[1]), event)
+        return list(unique.values())
+
+    def _advance_streak(self, stats: GamificationStats, days: List[date], latest: datetime):
+        """Extend the streak with new active days (ascending); older days recount it from the ledger"""
+        last = stats.last_activity_date.date() if stats.last_activity_date else None
+        if last is not None and days[0] < last:
+            stats.streak = _leading_run(self._active_days(stats.user_id))
+        else:
+            streak = stats.streak or 0
+            for day in days:
+                if day == last:
+                    continue
+                streak = streak + 1 if last is not None and day == last + timedelta(days=1) else 1
+                last = day
+            stats.streak = streak
+        if stats.last_activity_date is None or latest > stats.last_activity_date:
+            stats.last_activity_date = latest
+
+    def _active_days(self, user_id: int) -> List[date]:
+        """The user's distinct active days, latest first"""
+        day = func.date(XpEvent.occurred_at, type_=Date)
+        return [d for (d,) in self.db.query(day).filter(
+            XpEvent.user_id == user_id
+        ).group_by(day).order_by(day.desc()).all()]
+
+    # ---- rebuild -------------------------------------------------------------
+
+    def rebuild(self, user_ids: List[int] = None) -> int:
+        """
+        Re-derive the ledger of the given users (all when None) from commits,
+        pull requests and reviews, and recompute their stats rows.
+        """
+        users = self.db.query(User)
+        if user_ids is not None:
+            users = users.filter(User.id.in_(user_ids))
+        users = users.all()
+        if not users:
+            return 0
+        ids = {user.id for user in users}
+
+        events = self.db.query(XpEvent)
+        if user_ids is not None:
+            events = events.filter(XpEvent.user_id.in_(list(ids)))
+        events.delete(synchronize_session=False)
+
+        commits = self.db.query(Commit.id, Commit.author_email, Commit.author_name, Commit.committed_date)
+        prs = self.db.query(PullRequest.id, PullRequest.author, PullRequest.created_at)
+        review_condition = Review.id.isnot(None)
+        if user_ids is not None:
+            emails = [user.email for user in users if user.email]
+            names = [n for user in users for n in (user.username, user.name) if n]
+            logins = [n for user in users for n in (user.username, user.github_login) if n]
+            commits = commits.filter(or_(Commit.author_email.in_(emails), Commit.author_name.in_(names)))
+            prs = prs.filter(PullRequest.author.in_(logins))
+            review_condition = Review.reviewer.in_(logins)
+
+        candidates = self._commit_events(commits.all())
+        candidates += self._login_events("pull_request", XP_PER_PULL_REQUEST, prs.all())
+        candidates += self._review_events(review_condition)
+        new = self._unrecorded([event for event in candidates if event[2] in ids])
+        self.db.bulk_insert_mappings(XpEvent, [
+            {"source": source, "source_id": source_id, "user_id": user_id, "xp": xp, "occurred_at": occurred_at}
+            for source, source_id, user_id, xp, occurred_at in new
+        ])
+        self.db.flush()
+
+        for stats in self.db.query(GamificationStats).filter(GamificationStats.user_id.in_(list(ids))).all():
+            xp, latest = self.db.query(
+                func.coalesce(func.sum(XpEvent.xp), 0), func.max(XpEvent.occurred_at)
+            ).filter(XpEvent.user_id == stats.user_id).one()
+            stats.xp = int(xp)
+            stats.level = level_for(stats.xp)
+            stats.streak = _leading_run(self._active_days(stats.user_id))
+            stats.last_activity_date = latest
+        self.db.commit()
+        return len(new)
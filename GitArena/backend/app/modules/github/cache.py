@@ -0,0 +1,176 @@
+"""
+Proxy cache for GitHub repository content.
+
+The code browser and dashboards read a repository's tree, README, languages
+and contributors straight from GitHub. Those reads are cached by the commit
+SHA the default branch pointed to:
+
+    (kind, full_name, head sha, path) -> JSON
+
+Tree and README are fetched with ?ref=<sha>, so an entry is immutable and
+never expires; languages and contributors follow the head as well, so they
+refresh on the next push. Resolving the head ("commits/HEAD") is the only
+call that goes to GitHub on every visit, and it is itself cached for
+GITHUB_HEAD_TTL_SECONDS per (repository, token). Keying heads by token keeps
+the resolution an access check: a user whose token cannot see the repository
+never learns a SHA, so never reaches the shared entries. Heads are kept in
+expiry order: expired ones are dropped on insert, and at most
+GITHUB_HEAD_CACHE_ENTRIES are kept.
+
+Entries are kept as encoded JSON in an LRU bounded by
+GITHUB_CACHE_MEMORY_BYTES. Entries evicted from memory spill to
+GITHUB_CACHE_DIR (bounded by GITHUB_CACHE_DISK_BYTES, oldest files pruned
+first) and are promoted back to memory on the next hit.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import orjson
+
+from app.config.settings import settings
+
+_memory: "OrderedDict[tuple, bytes]" = OrderedDict()
+_memory_bytes = 0
+_disk_bytes: Optional[int] = None  # scanned on first spill
+_heads: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def clear_proxy_cache():
+    """Drop the in-memory entries and resolved heads (spilled files stay valid)"""
+    global _memory_bytes, _disk_bytes
+    with _lock:
+        _memory.clear()
+        _memory_bytes = 0
+        _disk_bytes = None
+        _heads.clear()
+
+
+# ---- branch heads ------------------------------------------------------------
+
+def _token_key(access_token: str) -> str:
+    return hashlib.sha1(access_token.encode()).hexdigest()
+
+
+def cached_head(full_name: str, access_token: str) -> Optional[str]:
+    with _lock:
+        cached = _heads.get((full_name, _token_key(access_token)))
+    return cached[1] if cached and cached[0] > time.monotonic() else None
+
+
+def remember_head(full_name: str, access_token: str, sha: str):
+    now = time.monotonic()
+    key = (full_name, _token_key(access_token))
+    with _lock:
+        _heads.pop(key, None)
+        _heads[key] = (now + settings.GITHUB_HEAD_TTL_SECONDS, sha)
+        # Oldest first: drop what expired, then what exceeds the bound
+        while _heads and (next(iter(_heads.values()))[0] <= now or len(_heads) > settings.GITHUB_HEAD_CACHE_ENTRIES):
+            _heads.popitem(last=False)
+
+
+# ---- entries -----------------------------------------------------------------
+
+def _path(key: tuple) -> str:
+    name = hashlib.sha1(repr(key).encode()).hexdigest()
+    return os.path.join(settings.GITHUB_CACHE_DIR, name[:2], f"{name}.json")
+
+
+def _remember(key: tuple, raw: bytes):
+    """Insert into the memory LRU; returns the entries evicted from it"""
+    global _memory_bytes
+    evicted = []
+    with _lock:
+        if key in _memory:
+            _memory_bytes -= len(_memory.pop(key))
+        _memory[key] = raw
+        _memory_bytes += len(raw)
+        while _memory_bytes > settings.GITHUB_CACHE_MEMORY_BYTES and len(_memory) > 1:
+            old_key, old_raw = _memory.popitem(last=False)
+            _memory_bytes -= len(old_raw)
+            evicted.append((old_key, old_raw))
+    return evicted
+
+
+def _spill(key: tuple, raw: bytes):
+    global _disk_bytes
+    path = _path(key)
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+    os.replace(tmp, path)
+    with _lock:
+        if _disk_bytes is None:
+            _disk_bytes = _scan_disk()[1]
+        else:
+            _disk_bytes += len(raw)
+        over = _disk_bytes > settings.GITHUB_CACHE_DISK_BYTES
+    if over:
+        _prune_disk()
+
+
+def _scan_disk():
+    files = []
+    for root, _, names in os.walk(settings.GITHUB_CACHE_DIR):
+        for name in names:
+            if name.endswith(".json"):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+    return files, sum(size for _, size, _ in files)
+
+
+def _prune_disk():
+    """Remove the least recently used files down to 80% of the disk budget"""
+    global _disk_bytes
+    files, total = _scan_disk()
+    target = settings.GITHUB_CACHE_DISK_BYTES * 0.8
+    for _, size, path in sorted(files):
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    with _lock:
+        _disk_bytes = total
+
+
+def _load(key: tuple) -> Optional[bytes]:
+    with _lock:
+        raw = _memory.get(key)
+        if raw is not None:
+            _memory.move_to_end(key)
+            return raw
+    path = _path(key)
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        os.utime(path)  # recency for pruning
+    except OSError:
+        return None
+    for old_key, old_raw in _remember(key, raw):
+        _spill(old_key, old_raw)
+    return raw
+
+
+async def cached_json(key: tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """The cached value of an immutable key, fetched once on a miss"""
+    raw = _load(key)
+    if raw is None:
+        raw = orjson.dumps(await fetch())
+        for old_key, old_raw in _remember(key, raw):
+            _spill(old_key, old_raw)
+    # Decoded per call, so callers never share (or mutate) a cached object
+    return orjson.loads(raw)
@@ -0,0 +1,100 @@
+"""
+Ingest-time commit classification.
+
+Each commit is classified once, when it is stored, into a bitmask saved in
+`commits.flags`. Analytics then count flags instead of scanning message text
+and `diff_data` file lists on every request. Existing rows are classified by
+backfill_commit_flags.py.
+"""
+import re
+from enum import IntFlag
+from typing import Dict, Iterable, List, Optional, Sequence
+
+
+class CommitFlag(IntFlag):
+    STRESS = 1          # frustrated wording (burnout signal)
+    FIX = 2             # hotfix / revert (change failure signal)
+    DOCS = 4            # documentation change
+    MERGE = 8           # merge commit
+    README = 16         # touches a README.md
+    CONTRIBUTING = 32   # touches CONTRIBUTING.md
+    LICENSE = 64        # touches a LICENSE / COPYING file
+
+
+STRESS_KEYWORDS = ["wtf", "urgent", "damn", "hack", "broken", "fail", "stupid"]
+FIX_KEYWORDS = ["hotfix", "urgent", "fix!", "revert"]
+DOCS_KEYWORDS = ["docs", "readme"]
+
+
+def _matcher(keywords: Sequence[str]) -> "re.Pattern":
+    """One compiled alternation instead of a substring loop per keyword"""
+    return re.compile("|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)))
+
+
+_STRESS_RE = _matcher(STRESS_KEYWORDS)
+_FIX_RE = _matcher(FIX_KEYWORDS)
+_DOCS_RE = _matcher(DOCS_KEYWORDS)
+_MERGE_RE = re.compile(r"^merge (pull request|branch|remote-tracking branch|tag) ")
+
+# File path checks (lowercased path)
+_PATH_RULES = [
+    (re.compile(r"readme\.md"), CommitFlag.README | CommitFlag.DOCS),
+    (re.compile(r"contributing\.md"), CommitFlag.CONTRIBUTING | CommitFlag.DOCS),
+    (re.compile(r"license|copying"), CommitFlag.LICENSE | CommitFlag.DOCS),
+    (re.compile(r"\.md$|docs/"), CommitFlag.DOCS),
+]
+
+
+def _file_names(files) -> Iterable[str]:
+    """File names from `diff_data` (list of GitHub file entries, names, or {"files": [...]})"""
+    if isinstance(files, dict):
+        files = files.get("files", [])
+    for entry in files or []:
+        if isinstance(entry, str):
+            yield entry
+        elif isinstance(entry, dict):
+            yield entry.get("filename", "") or entry.get("name", "") or ""
+
+
+def commit_file_entries(files) -> List[dict]:
+    """{"path", "status", "additions", "deletions"} per distinct changed file of `diff_data`"""
+    if isinstance(files, dict):
+        files = files.get("files", [])
+    entries: Dict[str, dict] = {}
+    for entry in files or []:
+        if isinstance(entry, str):
+            entry = {"filename": entry}
+        elif not isinstance(entry, dict):
+            continue
+        path = entry.get("filename") or entry.get("name")
+        if path and path not in entries:
+            entries[path] = {
+                "path": path,
+                "status": entry.get("status"),
+                "additions": entry.get("additions") or 0,
+                "deletions": entry.get("deletions") or 0,
+            }
+    return list(entries.values())
+
+
+def classify_commit(message: Optional[str], files=None) -> int:
+    """CommitFlag bitmask for a commit message and its changed files"""
+    text = (message or "").lower()
+    flags = CommitFlag(0)
+    if _STRESS_RE.search(text):
+        flags |= CommitFlag.STRESS
+    if _FIX_RE.search(text):
+        flags |= CommitFlag.FIX
+    if _MERGE_RE.match(text):
+        flags |= CommitFlag.MERGE
+
+    names = [name.lower() for name in _file_names(files)]
+    if names:
+        for name in names:
+            for pattern, flag in _PATH_RULES:
+                if pattern.search(name):
+                    flags |= flag
+    elif _DOCS_RE.search(text):
+        # No file list: fall back to the commit message
+        flags |= CommitFlag.DOCS
+    return int(flags)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.shared.database import get_db
+from app.shared.responses import stream_json_array
 from app.modules.github.service import GitHubService
-from app.modules.github.dto import RepositoryResponse, CommitResponse
+from app.modules.analytics.conditional import repository_etag
+from app.modules.github.dto import RepositoryResponse, CommitResponse, LastCommitsRequest
 from app.modules.users.controller import get_current_user
 from app.modules.users.dto import UserResponse
 from app.modules.users.repository import UserRepository
@@ -27,7 +29,7 @@ async def get_repositories(
         if user and user.access_token:
             return await service.sync_repositories(current_user.id, user.access_token)
     
-    return service.get_user_repositories(current_user.id)
+    return stream_json_array(service.get_user_repositories(current_user.id))
 
 
 @router.get("/repos/{repo_id}/commits", response_model=List[CommitResponse])
@@ -48,7 +50,7 @@ async def get_commits(
         if user and user.access_token:
             return await service.sync_commits(repo_id, user.access_token)
     
-    return service.get_repository_commits(repo_id, limit)
+    return stream_json_array(service.get_repository_commits(repo_id, limit))
 
 
 @router.get("/repos/{repo_id}/tree")
@@ -69,6 +71,60 @@ async def get_repository_tree(
     return await service.get_repository_tree(repo_id, user.access_token, path)
 
 
+@router.get("/repos/{repo_id}/tree/search")
+async def search_repository_tree(
+    repo_id: int,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Find files and directories by path"""
+    service = GitHubService(db)
+    user_repo = UserRepository(db)
+    user = user_repo.get_by_id(current_user.id)
+    
+    if not user or not user.access_token:
+        raise HTTPException(status_code=400, detail="User not connected to GitHub")
+        
+    return await service.search_repository_tree(repo_id, user.access_token, q, limit)
+
+
+@router.get("/repos/{repo_id}/tree/stats")
+async def get_repository_tree_stats(
+    repo_id: int,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """File count, size and extensions of the repository tree"""
+    service = GitHubService(db)
+    user_repo = UserRepository(db)
+    user = user_repo.get_by_id(current_user.id)
+    
+    if not user or not user.access_token:
+        raise HTTPException(status_code=400, detail="User not connected to GitHub")
+        
+    return await service.get_repository_tree_stats(repo_id, user.access_token)
+
+
+@router.post("/repos/{repo_id}/commits/paths")
+async def get_commits_for_paths(
+    repo_id: int,
+    request: LastCommitsRequest,
+    current_user: UserResponse = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the last commit for every entry of a directory and/or a list of paths"""
+    service = GitHubService(db)
+    user_repo = UserRepository(db)
+    user = user_repo.get_by_id(current_user.id)
+    
+    if not user or not user.access_token:
+        raise HTTPException(status_code=400, detail="User not connected to GitHub")
+        
+    return await service.get_last_commits(repo_id, user.access_token, request.directory, request.paths)
+
+
 @router.get("/repos/{repo_id}/commits/path")
 async def get_commit_for_path(
     repo_id: int,
@@ -138,7 +194,7 @@ async def get_languages(
     return await service.get_language_stats(repo_id, user.access_token)
 
 
-@router.get("/repos/{repo_id}/activity")
+@router.get("/repos/{repo_id}/activity", dependencies=[Depends(repository_etag)])
 async def get_commit_activity(
     repo_id: int,
     days: int = Query(30, ge=1, le=365),
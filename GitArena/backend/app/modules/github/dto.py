@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -57,6 +57,12 @@ class CommitResponse(CommitBase):
         from_attributes = True
 
 
+class LastCommitsRequest(BaseModel):
+    """Paths to look up: the entries of `directory`, plus `paths`"""
+    directory: Optional[str] = None
+    paths: List[str] = Field(default_factory=list, max_length=500)
+
+
 class PullRequestBase(BaseModel):
     github_id: str
     number: int
@@ -71,6 +77,7 @@ class PullRequestBase(BaseModel):
 
 class PullRequestCreate(PullRequestBase):
     repository_id: int
+    updated_at: Optional[datetime] = None
 
 
 class PullRequestResponse(PullRequestBase):
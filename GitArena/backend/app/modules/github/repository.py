@@ -1,12 +1,24 @@
+import logging
+
+from sqlalchemy import String, literal, select, union_all
 from sqlalchemy.orm import Session
-from app.shared.models import Repository, Commit, PullRequest, Issue, Release, Deployment, Activity
+from app.shared.models import User, Repository, Commit, CommitFile, PullRequest, PullRequestCommit, Review, Issue, Release, Deployment, Activity
 from app.modules.github.dto import (
     RepositoryCreate, CommitCreate, PullRequestCreate, IssueCreate,
     ReleaseCreate, DeploymentCreate, ActivityCreate
 )
-from typing import List, Optional
+from app.modules.timeline.repository import TimelineRepository
+from app.modules.github.classifier import classify_commit, commit_file_entries
+from app.shared.scope import invalidate_space_scope
+from app.shared.versions import bump_versions
+from typing import Dict, List, Optional
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+# Compound SELECTs are capped at 500 members on SQLite
+LAST_COMMIT_LOOKUPS_PER_QUERY = 200
+
 
 class GitHubRepository:
     def __init__(self, db: Session):
@@ -35,11 +47,28 @@ class GitHubRepository:
     
     def update_repository(self, repo: Repository, **kwargs) -> Repository:
         """Update repository"""
+        moved_spaces = None
+        if "space_id" in kwargs and kwargs["space_id"] != repo.space_id:
+            # Timeline events are denormalised per space
+            TimelineRepository(self.db).set_repository_space(repo.id, kwargs["space_id"])
+            moved_spaces = (repo.space_id, kwargs["space_id"])
         for key, value in kwargs.items():
             setattr(repo, key, value)
         self.db.commit()
         self.db.refresh(repo)
+        if moved_spaces:
+            invalidate_space_scope(self.db, *moved_spaces)
+            bump_versions(self.db, repositories=[repo], space_ids=moved_spaces)
+            self._move_embeddings(repo, moved_spaces[0])
         return repo
+
+    def _move_embeddings(self, repo: Repository, old_space_id: Optional[int]):
+        """Keep the repository's commit/PR vectors searchable from its new space. Failures never fail the move"""
+        try:
+            from app.modules.ai.semantic_search import SemanticSearchService
+            SemanticSearchService(self.db).move_repository(repo, old_space_id)
+        except Exception as e:
+            logger.warning(f"Failed to move embeddings of repository {repo.id}: {e}")
     
     # Commit operations
     def get_commit_by_sha(self, sha: str) -> Optional[Commit]:
@@ -57,11 +86,54 @@ class GitHubRepository:
     def create_commit(self, commit_data: CommitCreate) -> Commit:
         """Create new commit"""
         commit = Commit(**commit_data.model_dump())
+        commit.flags = classify_commit(commit.message, commit.diff_data)
         self.db.add(commit)
+        self.db.flush()
+        self.db.add_all(self.commit_files_for(commit))
         self.db.commit()
         self.db.refresh(commit)
         return commit
     
+    def get_last_commits_for_paths(self, repo_id: int, files: List[str], directories: List[str]) -> Dict[str, tuple]:
+        """
+        Latest ingested commit touching each file, or anything under each directory,
+        as path -> (sha, message, author_name, author_email, committed_date, avatar_url).
+        Each path is its own LIMIT 1 lookup: files seek (repository_id, path, committed_date),
+        directories walk (repository_id, committed_date, id) newest first until a path matches
+        """
+        lookups = [(path, CommitFile.path == path) for path in files]
+        lookups += [(d, CommitFile.path.startswith(f"{d}/", autoescape=True)) for d in directories]
+        found = {}
+        for start in range(0, len(lookups), LAST_COMMIT_LOOKUPS_PER_QUERY):
+            chunk = [self._latest_commit_file(repo_id, key, match)
+                     for key, match in lookups[start:start + LAST_COMMIT_LOOKUPS_PER_QUERY]]
+            latest = (union_all(*chunk) if len(chunk) > 1 else chunk[0]).subquery()
+            rows = self.db.query(latest.c.key, Commit.sha, Commit.message, Commit.author_name, Commit.author_email,
+                Commit.committed_date, User.avatar_url
+            ).join(Commit, Commit.id == latest.c.commit_id).outerjoin(User, User.email == Commit.author_email).all()
+            found.update((row[0], tuple(row[1:])) for row in rows)
+        return found
+
+    @staticmethod
+    def _latest_commit_file(repo_id: int, key: str, match):
+        latest = select(CommitFile.commit_id).where(CommitFile.repository_id == repo_id, match).order_by(
+            CommitFile.committed_date.desc(), CommitFile.id.desc()
+        ).limit(1).subquery()
+        return select(literal(key, String).label("key"), latest.c.commit_id.label("commit_id"))
+    
+    @staticmethod
+    def commit_files_for(commit: Commit) -> List[CommitFile]:
+        """commit_files rows of a stored commit (one per path in diff_data)"""
+        return [
+            CommitFile(
+                commit_id=commit.id,
+                repository_id=commit.repository_id,
+                committed_date=commit.committed_date,
+                **entry
+            )
+            for entry in commit_file_entries(commit.diff_data)
+        ]
+    
     def count_commits(self) -> int:
         """Count all commits"""
         return self.db.query(Commit).count()
@@ -97,6 +169,38 @@ class GitHubRepository:
         self.db.refresh(pr)
         return pr
 
+    def replace_pull_request_commits(self, pr: PullRequest, commits: List[dict]) -> PullRequest:
+        """Store a PR's commit list ({"sha", "authored_at"}) and its first commit time"""
+        self.db.query(PullRequestCommit).filter(
+            PullRequestCommit.pull_request_id == pr.id
+        ).delete(synchronize_session=False)
+        self.db.add_all([PullRequestCommit(pull_request_id=pr.id, **c) for c in commits])
+        authored = [c["authored_at"] for c in commits if c.get("authored_at")]
+        pr.first_commit_at = min(authored) if authored else None
+        self.db.commit()
+        self.db.refresh(pr)
+        return pr
+
+    def upsert_reviews(self, pr: PullRequest, reviews: List[dict]) -> int:
+        """Insert new reviews of a PR and refresh existing ones (matched by github_id)"""
+        if not reviews:
+            return 0
+        existing = {
+            review.github_id: review
+            for review in self.db.query(Review).filter(
+                Review.github_id.in_([r["github_id"] for r in reviews])
+            ).all()
+        }
+        for data in reviews:
+            review = existing.get(data["github_id"])
+            if review:
+                for key, value in data.items():
+                    setattr(review, key, value)
+            else:
+                self.db.add(Review(pull_request_id=pr.id, **data))
+        self.db.commit()
+        return len(reviews)
+
     # Issue operations
     def get_issue_by_github_id(self, github_id: str) -> Optional[Issue]:
         """Get issue by GitHub ID"""
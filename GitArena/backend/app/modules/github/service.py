@@ -7,7 +7,19 @@ from app.modules.github.dto import (
     ActivityCreate, ActivityResponse
 )
 from app.shared.exceptions import NotFoundException, GitHubAPIException
-from typing import List
+from app.shared.responses import construct_many
+from app.shared.versions import bump_versions
+from app.config.settings import settings
+from app.modules.timeline.service import TimelineService
+from app.modules.analytics.bottlenecks import BottleneckService
+from app.modules.analytics.collaboration import CollaborationService
+from app.modules.analytics.doc_index import DocIndexService
+from app.modules.analytics.dora import DoraService, FINISHED_DEPLOYMENT_STATES
+from app.modules.gamification.achievements import AchievementService
+from app.modules.gamification.ledger import XpLedger
+from app.modules.github import cache as proxy_cache
+from app.modules.github.tree_index import TreeIndex, load_tree_index
+from typing import List, Optional
 import httpx
 import asyncio
 import logging
@@ -16,9 +28,21 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# GitHub lookups for requested paths without ingested history (get_last_commits):
+# at most this many per request, this many in flight
+LAST_COMMIT_FALLBACK_LIMIT = 16
+LAST_COMMIT_FALLBACK_CONCURRENCY = 8
+
 class GitHubService:
     def __init__(self, db: Session):
         self.repository = GitHubRepository(db)
+        self.timeline = TimelineService(db)
+        self.doc_index = DocIndexService(db)
+        self.dora = DoraService(db)
+        self.bottlenecks = BottleneckService(db)
+        self.collaboration = CollaborationService(db)
+        self.xp = XpLedger(db)
+        self.achievements = AchievementService(db)
     
     async def fetch_user_repositories(self, access_token: str) -> List[dict]:
         """Fetch repositories from GitHub API"""
@@ -40,6 +64,7 @@ class GitHubService:
         """Sync repositories from GitHub"""
         github_repos = await self.fetch_user_repositories(access_token)
         synced_repos = []
+        stored_repos = []
         
         for gh_repo in github_repos:
             existing_repo = self.repository.get_repository_by_github_id(str(gh_repo["id"]))
@@ -72,16 +97,24 @@ class GitHubService:
                     repo = self.repository.create_repository(repo_data)
                 
                 synced_repos.append(RepositoryResponse.model_validate(repo))
+                stored_repos.append(repo)
             except Exception as e:
                 logger.error(f"Failed to sync repository {gh_repo.get('full_name', 'unknown')}: {str(e)}")
                 continue
         
+        self._bump_data_versions(stored_repos)
+        if stored_repos:
+            try:
+                self.achievements.record_repositories(user_id)
+            except Exception as e:
+                self.repository.db.rollback()
+                logger.warning(f"Failed to evaluate achievements for user {user_id}: {e}")
         return synced_repos
     
     def get_user_repositories(self, user_id: int) -> List[RepositoryResponse]:
         """Get all repositories for a user"""
         repos = self.repository.get_user_repositories(user_id)
-        return [RepositoryResponse.model_validate(repo) for repo in repos]
+        return construct_many(RepositoryResponse, repos)
     
     async def fetch_repository_commits(self, owner: str, repo: str, access_token: str, per_page: int = 100) -> List[dict]:
         """Fetch commits from GitHub API"""
@@ -126,6 +159,7 @@ class GitHubService:
         
         github_commits = await self.fetch_repository_commits(owner, repo_name, access_token)
         synced_commits = []
+        new_commits = []
         
         # Identify which commits need details
         new_gh_commits = []
@@ -172,13 +206,71 @@ class GitHubService:
                     diff_data=diff_data
                 )
                 commit = self.repository.create_commit(commit_data)
+                new_commits.append(commit)
                 synced_commits.append(CommitResponse.model_validate(commit))
         
         # Update repository sync status
         self.repository.update_repository(repo, is_synced=True, last_synced_at=datetime.utcnow())
         
+        if new_commits:
+            await self._after_commits_ingested(repo, new_commits)
+        
         return synced_commits
 
+    def _record_derived(self, record, repo, rows: list, target: str):
+        """Write ingested rows to a derived table. Failures never fail the sync"""
+        if not rows:
+            return
+        try:
+            record(repo, rows)
+        except Exception as e:
+            self.repository.db.rollback()
+            logger.warning(f"Failed to record {target} for repository {repo.id}: {e}")
+
+    def _bump_data_versions(self, repos: list):
+        """Move the dashboard ETags of the repositories, once their data is written. Failures never fail the sync"""
+        if not repos:
+            return
+        try:
+            bump_versions(self.repository.db, repositories=repos)
+        except Exception as e:
+            self.repository.db.rollback()
+            logger.warning(f"Failed to bump data versions for repositories {[r.id for r in repos]}: {e}")
+
+    def _record_timeline(self, record, repo, rows: list):
+        """Write ingested rows to the activity timeline. Failures never fail the sync"""
+        self._record_derived(record, repo, rows, "timeline events")
+
+    async def _after_commits_ingested(self, repo, commits: list):
+        """Derived data maintained at ingest time. Failures never fail the sync"""
+        self._record_timeline(self.timeline.record_commits, repo, commits)
+        self._record_derived(self.doc_index.record_commits, repo, commits, "documentation index")
+        self._record_derived(self.dora.record_commits, repo, commits, "DORA aggregates")
+        self._record_derived(self.collaboration.record_commits, repo, commits, "collaboration graph")
+        self._record_derived(self.xp.record_commits, repo, commits, "XP ledger")
+        self._record_derived(self.achievements.record_commits, repo, commits, "achievements")
+        self._bump_data_versions([repo])
+        try:
+            from app.modules.ai.semantic_search import SemanticSearchService
+            await SemanticSearchService(self.repository.db).index_commits(repo, commits)
+        except Exception as e:
+            logger.warning(f"Failed to index commit embeddings for repository {repo.id}: {e}")
+
+    async def _after_pull_requests_ingested(self, repo, prs: list):
+        """Derived data maintained at ingest time. Failures never fail the sync"""
+        self._record_timeline(self.timeline.record_pull_requests, repo, prs)
+        self._record_derived(self.dora.record_pull_requests, repo, prs, "DORA aggregates")
+        self._record_derived(self.bottlenecks.record_pull_requests, repo, prs, "bottleneck alerts")
+        self._record_derived(self.xp.record_pull_requests, repo, prs, "XP ledger")
+        self._record_derived(self.achievements.record_pull_requests, repo, prs, "achievements")
+        self._bump_data_versions([repo])
+        if settings.EMBEDDING_INDEX_PULL_REQUESTS:
+            try:
+                from app.modules.ai.semantic_search import SemanticSearchService
+                await SemanticSearchService(self.repository.db).index_pull_requests(repo, prs)
+            except Exception as e:
+                logger.warning(f"Failed to index PR embeddings for repository {repo.id}: {e}")
+
     async def sync_pull_requests(self, repo_id: int, access_token: str) -> List[PullRequestResponse]:
         """Sync pull requests for a repository"""
         repo = self.repository.get_repository_by_id(repo_id)
@@ -203,6 +295,9 @@ class GitHubService:
                 
             github_prs = response.json()
             synced_prs = []
+            ingested_prs = []
+            unlinked_prs = []
+            reviewed_prs = []
             
             for gh_pr in github_prs:
                 existing_pr = self.repository.get_pull_request_by_github_id(str(gh_pr["id"]))
@@ -216,26 +311,85 @@ class GitHubService:
                     author=gh_pr["user"]["login"],
                     repository_id=repo_id,
                     created_at=datetime.fromisoformat(gh_pr["created_at"].replace("Z", "+00:00")),
+                    updated_at=datetime.fromisoformat(gh_pr["updated_at"].replace("Z", "+00:00")).replace(tzinfo=None),
                     closed_at=datetime.fromisoformat(gh_pr["closed_at"].replace("Z", "+00:00")) if gh_pr.get("closed_at") else None,
                     merged_at=datetime.fromisoformat(gh_pr["merged_at"].replace("Z", "+00:00")) if gh_pr.get("merged_at") else None
                 )
                 
+                # Reviews are only re-read for PRs with activity since the last sync
+                has_activity = not existing_pr or existing_pr.updated_at != pr_data.updated_at
+                
                 if existing_pr:
                     pr = self.repository.update_pull_request(
                         existing_pr,
                         title=pr_data.title,
                         description=pr_data.description,
                         state=pr_data.state,
+                        updated_at=pr_data.updated_at,
                         closed_at=pr_data.closed_at,
                         merged_at=pr_data.merged_at
                     )
                 else:
                     pr = self.repository.create_pull_request(pr_data)
                 
+                if has_activity:
+                    reviewed_prs.append((pr, gh_pr["url"]))
+                if pr.merged_at and pr.first_commit_at is None:
+                    unlinked_prs.append((pr, gh_pr["commits_url"]))
+                ingested_prs.append(pr)
                 synced_prs.append(PullRequestResponse.model_validate(pr))
+            
+            await self._sync_pull_request_commits(unlinked_prs, access_token)
+            await self._sync_pull_request_reviews(reviewed_prs, access_token)
+            
+            if ingested_prs:
+                await self._after_pull_requests_ingested(repo, ingested_prs)
                 
             return synced_prs
 
+    async def _sync_pull_request_commits(self, prs: list, access_token: str):
+        """Store the commit lists of merged PRs (first commit -> merge is the DORA lead time)"""
+        if not prs:
+            return
+        # Oldest first, so the first page holds the PR's first commit
+        tasks = [self.fetch_item_details(f"{commits_url}?per_page=100", access_token) for _, commits_url in prs]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for (pr, _), gh_commits in zip(prs, results):
+            if isinstance(gh_commits, Exception) or not gh_commits:
+                logger.warning(f"Failed to fetch commits for pull request {pr.id}: {gh_commits}")
+                continue
+            self.repository.replace_pull_request_commits(pr, [
+                {
+                    "sha": c["sha"],
+                    "authored_at": datetime.fromisoformat(c["commit"]["author"]["date"].replace("Z", "+00:00"))
+                }
+                for c in gh_commits
+            ])
+
+    async def _sync_pull_request_reviews(self, prs: list, access_token: str):
+        """Store submitted reviews of PRs (bottleneck review aggregates are derived from them)"""
+        if not prs:
+            return
+        tasks = [self.fetch_item_details(f"{pr_url}/reviews?per_page=100", access_token) for _, pr_url in prs]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for (pr, _), gh_reviews in zip(prs, results):
+            if isinstance(gh_reviews, Exception) or gh_reviews is None:
+                logger.warning(f"Failed to fetch reviews for pull request {pr.id}: {gh_reviews}")
+                continue
+            self.repository.upsert_reviews(pr, [
+                {
+                    "github_id": str(r["id"]),
+                    "reviewer": (r.get("user") or {}).get("login"),
+                    "state": (r.get("state") or "").lower(),
+                    "body": r.get("body"),
+                    "submitted_at": datetime.fromisoformat(r["submitted_at"].replace("Z", "+00:00")).replace(tzinfo=None)
+                }
+                for r in gh_reviews
+                if r.get("submitted_at")  # pending reviews are not submitted yet
+            ])
+
     async def sync_issues(self, repo_id: int, access_token: str) -> List[IssueResponse]:
         """Sync issues for a repository"""
         repo = self.repository.get_repository_by_id(repo_id)
@@ -263,6 +417,7 @@ class GitHubService:
                 
             github_issues = response.json()
             synced_issues = []
+            ingested_issues = []
             
             for gh_issue in github_issues:
                 # Skip if it is a Pull Request
@@ -294,71 +449,137 @@ class GitHubService:
                 else:
                     issue = self.repository.create_issue(issue_data)
                 
+                ingested_issues.append(issue)
                 synced_issues.append(IssueResponse.model_validate(issue))
+            
+            self._record_timeline(self.timeline.record_issues, repo, ingested_issues)
+            if ingested_issues:
+                self._bump_data_versions([repo])
                 
             return synced_issues
     
     def get_repository_commits(self, repo_id: int, limit: int = 50) -> List[CommitResponse]:
         """Get commits for a repository"""
         commits = self.repository.get_repository_commits(repo_id, limit)
-        return [CommitResponse.model_validate(commit) for commit in commits]
+        return construct_many(CommitResponse, commits)
     
     def count_commits(self) -> int:
         """Count all commits"""
         return self.repository.count_commits()
 
+    async def _github_get(self, url: str, access_token: str, params: dict = None,
+                          accept: str = "application/vnd.github.v3+json") -> httpx.Response:
+        async with httpx.AsyncClient() as client:
+            return await client.get(
+                url,
+                headers={
+                    "Authorization": f"Bearer {access_token}",
+                    "Accept": accept
+                },
+                params=params
+            )
+
+    async def resolve_head(self, repo, access_token: str) -> Optional[str]:
+        """
+        Commit SHA of the default branch, cached briefly per token (github/cache.py).
+        None for empty or unreachable repositories; their content is not cached
+        """
+        sha = proxy_cache.cached_head(repo.full_name, access_token)
+        if sha:
+            return sha
+        response = await self._github_get(
+            f"https://api.github.com/repos/{repo.full_name}/commits/HEAD", access_token,
+            accept="application/vnd.github.sha"
+        )
+        if response.status_code != 200:
+            return None
+        sha = response.text.strip()
+        proxy_cache.remember_head(repo.full_name, access_token, sha)
+        return sha
+
+    async def _cached_content(self, kind: str, repo, access_token: str, fetch, path: str = ""):
+        """Repository content keyed by the head SHA; fetch(ref) reads it from GitHub"""
+        ref = await self.resolve_head(repo, access_token)
+        if ref is None:
+            return await fetch(None)
+        return await proxy_cache.cached_json((kind, repo.full_name, ref, path), lambda: fetch(ref))
+
+    async def get_tree_index(self, repo, access_token: str) -> Optional[TreeIndex]:
+        """Path index of the head commit's tree (github/tree_index.py); None when the head is unresolved"""
+        ref = await self.resolve_head(repo, access_token)
+        if ref is None:
+            return None
+
+        async def get(url: str, params: dict = None):
+            return await self._github_get(url, access_token, params=params)
+
+        return await load_tree_index(repo.full_name, ref, get)
+
     async def get_repository_tree(self, repo_id: int, access_token: str, path: str = None) -> List[dict]:
-        """Get repository file tree from GitHub"""
+        """Get the entries of a repository directory, from the tree snapshot when available"""
         repo = self.repository.get_repository_by_id(repo_id)
         if not repo:
             raise NotFoundException("Repository not found")
-        
-        owner, repo_name = repo.full_name.split("/")
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/contents"
+
+        index = await self.get_tree_index(repo, access_token)
+        if index is not None:
+            return index.list_dir(path or "")
+
+        # Empty or unreachable repository: ask GitHub directly
+        url = f"https://api.github.com/repos/{repo.full_name}/contents"
         if path:
             url += f"/{path}"
-            
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
-            )
-            if response.status_code in [404, 409]:
-                return []
-            if response.status_code != 200:
-                raise GitHubAPIException("Failed to fetch repository tree")
-            return response.json()
+        response = await self._github_get(url, access_token)
+        if response.status_code in [404, 409]:
+            return []
+        if response.status_code != 200:
+            raise GitHubAPIException("Failed to fetch repository tree")
+        return response.json()
 
-    async def get_last_commit_for_path(self, repo_id: int, access_token: str, path: str) -> dict:
-        """Get last commit for a specific file path"""
+    async def search_repository_tree(self, repo_id: int, access_token: str, query: str, limit: int = 50) -> List[dict]:
+        """Find files and directories by path in the head commit's tree"""
         repo = self.repository.get_repository_by_id(repo_id)
         if not repo:
             raise NotFoundException("Repository not found")
-            
-        owner, repo_name = repo.full_name.split("/")
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo_name}/commits",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github.v3+json"
-                },
-                params={"path": path, "per_page": 1}
-            )
+        index = await self.get_tree_index(repo, access_token)
+        return index.search(query, limit) if index is not None else []
+
+    async def get_repository_tree_stats(self, repo_id: int, access_token: str) -> dict:
+        """File and directory counts of the head commit's tree"""
+        repo = self.repository.get_repository_by_id(repo_id)
+        if not repo:
+            raise NotFoundException("Repository not found")
+        index = await self.get_tree_index(repo, access_token)
+        if index is None:
+            return {"sha": None, "files": 0, "directories": 0, "total_size": 0, "extensions": []}
+        return index.stats()
+
+    @staticmethod
+    def _path_commit(sha, message, author_name, author_email, committed_date, avatar_url) -> dict:
+        return {
+            "sha": sha,
+            "message": message,
+            "author_name": author_name,
+            "author_email": author_email,
+            "date": committed_date.isoformat() if committed_date else None,
+            "avatar_url": avatar_url
+        }
+
+    async def _last_commit_from_github(self, repo, access_token: str, path: str) -> Optional[dict]:
+        """Latest commit touching a path at the head commit (cached by head SHA)"""
+        async def fetch(ref):
+            params = {"path": path, "per_page": 1}
+            if ref:
+                params["sha"] = ref
+            response = await self._github_get(f"https://api.github.com/repos/{repo.full_name}/commits", access_token,
+                                              params=params)
             if response.status_code == 409:
                 return None
             if response.status_code != 200:
                 raise GitHubAPIException("Failed to fetch commit info")
-
-            
             commits = response.json()
             if not commits:
                 return None
-                
             commit = commits[0]
             return {
                 "sha": commit["sha"],
@@ -369,54 +590,91 @@ class GitHubService:
                 "avatar_url": commit["author"]["avatar_url"] if commit["author"] else None
             }
 
+        return await self._cached_content("last-commit", repo, access_token, fetch, path)
+
+    async def get_last_commit_for_path(self, repo_id: int, access_token: str, path: str) -> dict:
+        """Get last commit for a specific file path"""
+        repo = self.repository.get_repository_by_id(repo_id)
+        if not repo:
+            raise NotFoundException("Repository not found")
+        return await self._last_commit_from_github(repo, access_token, path)
+
+    async def get_last_commits(self, repo_id: int, access_token: str, directory: str = None,
+                               paths: List[str] = None) -> dict:
+        """
+        Latest commit touching each entry of a directory and/or each path (anything
+        under it, for directories), from the ingested commit_files (one indexed LIMIT 1 lookup per path).
+        Directory entries without ingested history are None, for the client to ask
+        one by one (get_last_commit_for_path); listed paths without it are asked
+        from GitHub, up to LAST_COMMIT_FALLBACK_LIMIT per request
+        """
+        repo = self.repository.get_repository_by_id(repo_id)
+        if not repo:
+            raise NotFoundException("Repository not found")
+
+        index = await self.get_tree_index(repo, access_token)
+        targets = {}
+        if directory is not None and index is not None:
+            targets = {entry["path"]: entry["type"] for entry in index.list_dir(directory)}
+        requested = []
+        for path in paths or []:
+            path = path.strip("/")
+            if path:
+                targets.setdefault(path, (index.kind(path) if index is not None else None) or "file")
+                requested.append(path)
+
+        local = self.repository.get_last_commits_for_paths(
+            repo.id,
+            [path for path, kind in targets.items() if kind != "dir"],
+            [path for path, kind in targets.items() if kind == "dir"]
+        )
+        result = {path: self._path_commit(*local[path]) if path in local else None for path in targets}
+
+        semaphore = asyncio.Semaphore(LAST_COMMIT_FALLBACK_CONCURRENCY)
+
+        async def fallback(path: str):
+            async with semaphore:
+                try:
+                    result[path] = await self._last_commit_from_github(repo, access_token, path)
+                except GitHubAPIException as e:
+                    logger.warning(f"Failed to fetch last commit for {repo.full_name}:{path}: {e}")
+
+        uncovered = list(dict.fromkeys(path for path in requested if path not in local))
+        await asyncio.gather(*[fallback(path) for path in uncovered[:LAST_COMMIT_FALLBACK_LIMIT]])
+        return result
+
     async def get_contributors(self, repo_id: int, access_token: str) -> List[dict]:
         """Get contributors for a repository"""
         repo = self.repository.get_repository_by_id(repo_id)
         if not repo:
             raise NotFoundException("Repository not found")
-            
-        owner, repo_name = repo.full_name.split("/")
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo_name}/contributors",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
-            )
+
+        async def fetch(ref):
+            response = await self._github_get(f"https://api.github.com/repos/{repo.full_name}/contributors", access_token)
             if response.status_code in [204, 404, 409]:
                 return []
             if response.status_code != 200:
                 raise GitHubAPIException("Failed to fetch contributors")
-
-            
             return response.json()
 
+        return await self._cached_content("contributors", repo, access_token, fetch)
+
     async def get_languages(self, repo_id: int, access_token: str) -> dict:
         """Get languages for a repository"""
         repo = self.repository.get_repository_by_id(repo_id)
         if not repo:
             raise NotFoundException("Repository not found")
-            
-        owner, repo_name = repo.full_name.split("/")
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo_name}/languages",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
-            )
+
+        async def fetch(ref):
+            response = await self._github_get(f"https://api.github.com/repos/{repo.full_name}/languages", access_token)
             if response.status_code in [404, 409]:
                 return {}
             if response.status_code != 200:
                 raise GitHubAPIException("Failed to fetch languages")
-
-            
             return response.json()
 
+        return await self._cached_content("languages", repo, access_token, fetch)
+
     async def sync_releases(self, repo_id: int, access_token: str) -> List[ReleaseResponse]:
         """Sync releases for a repository"""
         repo = self.repository.get_repository_by_id(repo_id)
@@ -441,6 +699,7 @@ class GitHubService:
                 
             github_releases = response.json()
             synced_releases = []
+            ingested_releases = []
             
             for gh_release in github_releases:
                 existing_release = self.repository.get_release_by_github_id(str(gh_release["id"]))
@@ -469,7 +728,12 @@ class GitHubService:
                 else:
                     release = self.repository.create_release(release_data)
                 
+                ingested_releases.append(release)
                 synced_releases.append(ReleaseResponse.model_validate(release))
+            
+            self._record_timeline(self.timeline.record_releases, repo, ingested_releases)
+            if ingested_releases:
+                self._bump_data_versions([repo])
                 
             return synced_releases
 
@@ -497,15 +761,26 @@ class GitHubService:
                 
             github_deployments = response.json()
             synced_deployments = []
+            ingested_deployments = []
+            
+            existing = {
+                str(d["id"]): self.repository.get_deployment_by_github_id(str(d["id"]))
+                for d in github_deployments
+            }
+            latest_status = await self._fetch_deployment_statuses([
+                d for d in github_deployments
+                if not existing[str(d["id"])] or existing[str(d["id"])].state not in FINISHED_DEPLOYMENT_STATES
+            ], access_token)
             
             for gh_dep in github_deployments:
-                existing_dep = self.repository.get_deployment_by_github_id(str(gh_dep["id"]))
+                existing_dep = existing[str(gh_dep["id"])]
+                state = latest_status.get(str(gh_dep["id"])) or (existing_dep.state if existing_dep else "unknown")
                 
                 deployment_data = DeploymentCreate(
                     github_id=str(gh_dep["id"]),
                     environment=gh_dep["environment"],
                     description=gh_dep.get("description"),
-                    state="unknown",
+                    state=state,
                     created_at=datetime.fromisoformat(gh_dep["created_at"].replace("Z", "+00:00")),
                     updated_at=datetime.fromisoformat(gh_dep["updated_at"].replace("Z", "+00:00")),
                     repository_id=repo_id
@@ -521,10 +796,29 @@ class GitHubService:
                 else:
                     deployment = self.repository.create_deployment(deployment_data)
                 
+                ingested_deployments.append(deployment)
                 synced_deployments.append(DeploymentResponse.model_validate(deployment))
+            
+            self._record_timeline(self.timeline.record_deployments, repo, ingested_deployments)
+            self._record_derived(self.dora.record_deployments, repo, ingested_deployments, "DORA aggregates")
+            if ingested_deployments:
+                self._bump_data_versions([repo])
                 
             return synced_deployments
 
+    async def _fetch_deployment_statuses(self, deployments: list, access_token: str) -> dict:
+        """Latest status state per deployment github_id (statuses are returned newest first)"""
+        tasks = [self.fetch_item_details(f"{d['statuses_url']}?per_page=1", access_token) for d in deployments]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        states = {}
+        for gh_dep, statuses in zip(deployments, results):
+            if isinstance(statuses, Exception):
+                logger.warning(f"Failed to fetch statuses for deployment {gh_dep['id']}: {statuses}")
+            elif statuses:
+                states[str(gh_dep["id"])] = statuses[0]["state"]
+        return states
+
     async def sync_activities(self, repo_id: int, access_token: str) -> List[ActivityResponse]:
         """Sync unified activities for a repository by looking at events"""
         repo = self.repository.get_repository_by_id(repo_id)
@@ -549,6 +843,7 @@ class GitHubService:
                 
             github_events = response.json()
             synced_activities = []
+            ingested_activities = []
             
             for event in github_events:
                 existing_activity = self.repository.get_activity_by_github_id(str(event["id"]))
@@ -587,7 +882,12 @@ class GitHubService:
                 )
                 
                 activity = self.repository.create_activity(activity_data)
+                ingested_activities.append(activity)
                 synced_activities.append(ActivityResponse.model_validate(activity))
+            
+            self._record_timeline(self.timeline.record_activities, repo, ingested_activities)
+            if ingested_activities:
+                self._bump_data_versions([repo])
                 
             return synced_activities
     async def get_readme(self, repo_id: int, access_token: str) -> dict:
@@ -595,30 +895,24 @@ class GitHubService:
         repo = self.repository.get_repository_by_id(repo_id)
         if not repo:
             raise NotFoundException("Repository not found")
-            
-        owner, repo_name = repo.full_name.split("/")
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.github.com/repos/{owner}/{repo_name}/readme",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/vnd.github.v3+json"
-                }
+
+        async def fetch(ref):
+            response = await self._github_get(
+                f"https://api.github.com/repos/{repo.full_name}/readme", access_token,
+                params={"ref": ref} if ref else None
             )
-            
             if response.status_code == 404:
                 return {"content": "No README found for this repository."}
-            
             if response.status_code != 200:
                 raise GitHubAPIException(f"Failed to fetch README: {response.status_code}")
-                
             data = response.json()
             # GitHub returns base64 encoded content
             import base64
             content = base64.b64decode(data["content"]).decode("utf-8")
             return {"content": content}
 
+        return await self._cached_content("readme", repo, access_token, fetch)
+
     async def get_pull_requests(self, repo_id: int, access_token: str) -> List[dict]:
         """Get repository pull requests (wrapper for sync or mock)"""
         # For now, let's just return synced PRs or fetch them live
@@ -0,0 +1,155 @@
+"""
+Repository tree snapshots.
+
+The code browser used to ask GitHub for one directory at a time
+(`contents/{path}`). Instead, the whole tree of the head commit is read once
+with `git/trees/{sha}?recursive=1` and kept as a compact path index:
+
+    [[path, type, size, sha], ...]    sorted by path; type is file / dir / submodule
+
+Directory listings, path search and file-count stats are then answered
+locally. A snapshot is keyed by commit SHA, so it is immutable: it is stored
+through the proxy cache (github/cache.py, memory then disk), and the parsed
+index of the most recently used snapshots is kept in process.
+
+GitHub truncates recursive trees above 100,000 entries / 7 MB. A truncated
+level is re-read non-recursively and each of its subtrees is fetched on its
+own (recursively, falling back again if that is truncated too).
+"""
+import asyncio
+import bisect
+import os
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.modules.github import cache as proxy_cache
+from app.shared.exceptions import GitHubAPIException
+
+GIT_TYPES = {"blob": "file", "tree": "dir", "commit": "submodule"}
+SUBTREE_CONCURRENCY = 8
+PARSED_INDEXES = 16
+TOP_EXTENSIONS = 10
+
+_indexes: "OrderedDict[tuple, TreeIndex]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def clear_tree_indexes():
+    with _lock:
+        _indexes.clear()
+
+
+class TreeIndex:
+    """Path index of one commit's tree"""
+
+    def __init__(self, sha: str, entries: List[list]):
+        self.sha = sha
+        self.entries = sorted(entries)
+        self._paths = [entry[0] for entry in self.entries]
+        # parent directory ("" for the root) -> entry positions
+        self._children: Dict[str, List[int]] = {}
+        for i, (path, _, _, _) in enumerate(self.entries):
+            self._children.setdefault(path.rpartition("/")[0], []).append(i)
+
+    @staticmethod
+    def _item(entry: list) -> dict:
+        path, kind, size, sha = entry
+        return {"name": path.rpartition("/")[2], "path": path, "type": kind, "size": size, "sha": sha}
+
+    def kind(self, path: str) -> Optional[str]:
+        """file / dir / submodule, or None when the path is not in the tree"""
+        path = path.strip("/")
+        i = bisect.bisect_left(self._paths, path)
+        return self.entries[i][1] if i < len(self._paths) and self._paths[i] == path else None
+
+    def list_dir(self, path: str = "") -> List[dict]:
+        """Entries directly under a directory, shaped like the contents API"""
+        return [self._item(self.entries[i]) for i in self._children.get(path.strip("/"), [])]
+
+    def search(self, query: str, limit: int = 50) -> List[dict]:
+        """Paths containing the query (case-insensitive); name prefix matches first, then shorter paths"""
+        needle = query.strip().lower()
+        if not needle:
+            return []
+        ranked = []
+        for entry in self.entries:
+            path = entry[0].lower()
+            if needle not in path:
+                continue
+            name = path.rpartition("/")[2]
+            rank = 0 if name.startswith(needle) else 1 if needle in name else 2
+            ranked.append((rank, len(path), entry[0], entry))
+        ranked.sort()
+        return [self._item(entry) for _, _, _, entry in ranked[:limit]]
+
+    def stats(self) -> dict:
+        files = [entry for entry in self.entries if entry[1] == "file"]
+        extensions: Dict[str, List[int]] = {}
+        for path, _, size, _ in files:
+            extension = os.path.splitext(path)[1].lower() or "(none)"
+            counts = extensions.setdefault(extension, [0, 0])
+            counts[0] += 1
+            counts[1] += size or 0
+        top = sorted(extensions.items(), key=lambda item: (-item[1][0], item[0]))[:TOP_EXTENSIONS]
+        return {
+            "sha": self.sha,
+            "files": len(files),
+            "directories": sum(1 for entry in self.entries if entry[1] == "dir"),
+            "total_size": sum(entry[2] or 0 for entry in files),
+            "extensions": [{"extension": ext, "files": count, "bytes": size} for ext, (count, size) in top],
+        }
+
+
+# get(url, params) -> httpx.Response, authenticated as the caller
+Get = Callable[..., Awaitable]
+
+
+async def fetch_git_tree(get: Get, full_name: str, sha: str) -> List[list]:
+    """Every entry of a commit's tree, splitting truncated levels into subtree reads"""
+    semaphore = asyncio.Semaphore(SUBTREE_CONCURRENCY)
+
+    async def read(tree_sha: str, recursive: bool) -> Optional[dict]:
+        async with semaphore:
+            response = await get(f"https://api.github.com/repos/{full_name}/git/trees/{tree_sha}",
+                                 params={"recursive": "1"} if recursive else None)
+        if response.status_code in [404, 409]:
+            return None
+        if response.status_code != 200:
+            raise GitHubAPIException("Failed to fetch repository tree")
+        return response.json()
+
+    def entries(data: dict, prefix: str) -> List[list]:
+        return [
+            [prefix + item["path"], GIT_TYPES.get(item["type"], item["type"]), item.get("size", 0), item["sha"]]
+            for item in data.get("tree", [])
+        ]
+
+    async def level(tree_sha: str, prefix: str) -> List[list]:
+        data = await read(tree_sha, recursive=True)
+        if data is None:
+            return []
+        if not data.get("truncated"):
+            return entries(data, prefix)
+        top = entries(await read(tree_sha, recursive=False) or {}, prefix)
+        subtrees = await asyncio.gather(*[level(entry[3], entry[0] + "/") for entry in top if entry[1] == "dir"])
+        return top + [entry for subtree in subtrees for entry in subtree]
+
+    return await level(sha, "")
+
+
+async def load_tree_index(full_name: str, sha: str, get: Get) -> TreeIndex:
+    """The parsed snapshot of a commit, fetched from GitHub once per SHA"""
+    key = (full_name, sha)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            return index
+    entries = await proxy_cache.cached_json(("git-tree", full_name, sha), lambda: fetch_git_tree(get, full_name, sha))
+    index = TreeIndex(sha, entries)
+    with _lock:
+        _indexes[key] = index
+        while len(_indexes) > PARSED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
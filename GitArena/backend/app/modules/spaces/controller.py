@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from app.shared.database import get_db
 from app.modules.spaces.service import SpaceService
+from app.modules.analytics.conditional import space_etag
 from app.modules.spaces.dto import SpaceCreate, SpaceUpdate, SpaceResponse, SpaceDashboardResponse
 from app.modules.users.controller import get_current_user
 from app.modules.users.dto import UserResponse
@@ -89,7 +90,7 @@ def get_space_details(
          raise HTTPException(status_code=403, detail="Not authorized to view this space")
     return SpaceResponse.model_validate(space)
 
-@router.get("/{space_id}/dashboard", response_model=SpaceDashboardResponse)
+@router.get("/{space_id}/dashboard", response_model=SpaceDashboardResponse, dependencies=[Depends(space_etag)])
 async def get_space_dashboard(
     space_id: int,
     current_user: UserResponse = Depends(get_current_user),
@@ -157,19 +158,28 @@ async def remove_project_member(
 @router.get("/projects/{project_id}/activity")
 async def get_project_activity(
     project_id: int,
+    response: Response,
     type: str = Query(None, alias="type"),
     type_filter: str = Query(None),
     date_range: str = Query("7days"),
     dateRange: str = Query(None),
+    cursor: str = Query(None),
+    limit: int = Query(100, ge=1, le=500),
     current_user: UserResponse = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get project activity log"""
+    """
+    Get project activity log, newest first
+    The cursor for the next page is returned in the X-Next-Cursor header
+    """
     service = SpaceService(db)
     # Support both camelCase (from frontend) and snake_case
     final_type = type or type_filter
     final_date_range = dateRange or date_range or "7days"
-    return service.get_activity_log(project_id, final_type, final_date_range)
+    items, next_cursor = service.get_activity_log(project_id, final_type, final_date_range, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @router.get("/projects/{project_id}/analytics")
@@ -1,8 +1,16 @@
+import logging
+
 from sqlalchemy.orm import Session, joinedload
 from app.shared.models import Space, SpaceMember, User
+from app.modules.gamification.achievements import AchievementService
 from app.modules.spaces.dto import SpaceCreate
+from app.shared.scope import invalidate_user_scope
+from app.shared.versions import bump_versions
 from typing import List
 
+logger = logging.getLogger(__name__)
+
+
 class SpaceRepository:
     def __init__(self, db: Session):
         self.db = db
@@ -16,6 +24,8 @@ class SpaceRepository:
         self.db.add(space)
         self.db.commit()
         self.db.refresh(space)
+        invalidate_user_scope(self.db, owner_id)
+        bump_versions(self.db, space_ids=[space.id])
         return space
 
     def get_user_spaces(self, user_id: int) -> List[Space]:
@@ -35,6 +45,9 @@ class SpaceRepository:
         self.db.add(member)
         self.db.commit()
         self.db.refresh(member)
+        invalidate_user_scope(self.db, user_id)
+        bump_versions(self.db, space_ids=[space_id])
+        self._evaluate_achievements(space_id, user_id)
         return member
 
     def get_members(self, space_id: int) -> List[SpaceMember]:
@@ -51,6 +64,17 @@ class SpaceRepository:
         if member:
             self.db.delete(member)
             self.db.commit()
+            invalidate_user_scope(self.db, user_id)
+            bump_versions(self.db, space_ids=[space_id])
+            self._evaluate_achievements(space_id, user_id)
+
+    def _evaluate_achievements(self, space_id: int, user_id: int):
+        """Collaborator counts changed for everyone in the space. Failures never fail the membership change"""
+        try:
+            AchievementService(self.db).record_membership(space_id, [user_id])
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Failed to evaluate achievements for space {space_id}: {e}")
 
     def find_space_by_repository_id(self, github_repo_id: str) -> Space:
         """Find a space that contains a repository with the given GitHub ID"""
@@ -7,7 +7,9 @@ from app.modules.github.dto import ActivityResponse
 from app.modules.users.repository import UserRepository
 from app.shared.models import User, Commit, PullRequest, Issue, Release, Deployment, Activity
 from app.shared.exceptions import NotFoundException
-from typing import List
+from app.shared.scope import OWNER_ROLE, get_request_scope
+from app.shared.versions import bump_versions
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 
 class SpaceService:
@@ -51,6 +53,7 @@ class SpaceService:
                 self.db.add(user)
                 self.db.commit()
                 self.db.refresh(user)
+                bump_versions(self.db)
             
             # Add to Space
             self.repository.add_member(space.id, user.id, role="viewer")
@@ -116,27 +119,16 @@ class SpaceService:
 
     def get_user_role_in_project(self, space_id: int, user_id: int) -> str:
         """Get user's role in a specific project. Returns 'manager' or 'member'"""
-        from app.shared.models import SpaceMember
-        
         space = self.repository.get_space_by_id(space_id)
         if not space:
             raise NotFoundException("Space not found")
         
-        # Check if user is owner
-        if space.owner_id == user_id:
-            return "manager"
-        
-        # Check user's role in space_members
-        user_member = self.db.query(SpaceMember).filter(
-            SpaceMember.space_id == space_id,
-            SpaceMember.user_id == user_id
-        ).first()
-        
-        if not user_member:
+        role = get_request_scope(self.db, user_id).role(space_id)
+        if not role:
             raise NotFoundException("Not a member of this project")
         
-        # If role is 'admin' or 'manager', return 'manager', otherwise 'member'
-        if user_member.role in ['admin', 'manager']:
+        # Owners and 'admin'/'manager' roles are managers, otherwise 'member'
+        if role in [OWNER_ROLE, 'admin', 'manager']:
             return "manager"
         else:
             return "member"
@@ -425,103 +417,21 @@ class SpaceService:
             
         return self.repository.remove_member(project_id, user_id)
 
-    def get_activity_log(self, project_id: int, type_filter: str = None, date_range: str = "7days") -> List[dict]:
-        """Get project-wide activity log aggregating Commits, PRs, Issues and generic Activity"""
-        from app.shared.models import Commit, PullRequest, Issue
-        from sqlalchemy import func
+    def get_activity_log(self, project_id: int, type_filter: str = None, date_range: str = "7days",
+                         cursor: str = None, limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+        """
+        Get project-wide activity log (commits, PRs, issues, releases, deployments, events)
+        from the timeline table. Returns (items, next_cursor)
+        """
+        from app.modules.timeline.service import TimelineService
         
         space = self.repository.get_space_by_id(project_id)
         if not space:
-            return []
-            
-        repo_ids = [r.id for r in space.repositories]
-        combined_activities = []
-        
-        # Calculate start date
-        days = 7
-        if str(date_range).lower() == "all" or str(date_range).lower() == "all time":
-            days = 3650 # 10 years
-        elif "today" in str(date_range): days = 1
-        elif "7" in str(date_range): days = 7
-        elif "30" in str(date_range): days = 30
-        elif "90" in str(date_range): days = 90
-        
-        start_date = datetime.utcnow() - timedelta(days=days)
-
-        # Helper to normalize data
-        def normalize(obj, type_name, action, title, target, created_at, actor_name, actor_avatar=None):
-            return {
-                "id": f"{type_name}_{obj.id}",
-                "type": type_name,
-                "actor": {
-                    "name": actor_name or "Unknown",
-                    "avatar": actor_avatar
-                },
-                "action": action,
-                "target": target,
-                "timestamp": created_at.isoformat(),
-                "metadata": {
-                    "description": title
-                }
-            }
-
-        # 1. Fetch Commits
-        if not type_filter or type_filter.lower() in ['commit', 'all']:
-            commits = self.db.query(Commit).filter(
-                Commit.repository_id.in_(repo_ids),
-                Commit.committed_date >= start_date
-            ).order_by(Commit.committed_date.desc()).limit(100).all()
-            
-            for c in commits:
-                combined_activities.append(normalize(
-                    c, 'commit', 'pushed', c.message.split('\n')[0], c.sha[:7], c.committed_date, c.author_name
-                ))
-
-        # 2. Fetch Pull Requests
-        if not type_filter or type_filter.lower() in ['pr', 'all']:
-            prs = self.db.query(PullRequest).filter(
-                PullRequest.repository_id.in_(repo_ids),
-                PullRequest.created_at >= start_date
-            ).order_by(PullRequest.created_at.desc()).limit(100).all()
-            
-            for pr in prs:
-                combined_activities.append(normalize(
-                    pr, 'pr', pr.state, pr.title, f"#{pr.number}", pr.created_at, pr.author, None
-                ))
-
-        # 3. Fetch Issues
-        if not type_filter or type_filter.lower() in ['issue', 'all']:
-            issues = self.db.query(Issue).filter(
-                Issue.repository_id.in_(repo_ids),
-                Issue.created_at >= start_date
-            ).order_by(Issue.created_at.desc()).limit(100).all()
-            
-            for i in issues:
-                combined_activities.append(normalize(
-                    i, 'issue', i.state, i.title, f"#{i.number}", i.created_at, i.author, None
-                ))
-                
-        # 4. Fetch generic Activity (for releases, deployments, etc.) if needed
-        # We assume Activity table might overlap so we only take other types if 'all' or specific
-        other_types = ['release', 'deployment', 'merge', 'review', 'deploy']
-        if not type_filter or type_filter.lower() in other_types or type_filter.lower() == 'all':
-            activities = self.db.query(Activity).filter(
-                Activity.repository_id.in_(repo_ids),
-                Activity.created_at >= start_date,
-                Activity.type.in_(['ReleaseEvent', 'DeploymentEvent', 'PushEvent']) == False  # Exclude duplicates ideally
-            ).order_by(Activity.created_at.desc()).limit(50).all()
-            
-            for act in activities:
-                # Basic mapping
-                t = act.type.lower().replace('event', '')
-                combined_activities.append(normalize(
-                    act, t, act.action, act.description, act.title, act.created_at, act.user_login
-                ))
-
-        # Sort combined list by timestamp desc
-        combined_activities.sort(key=lambda x: x['timestamp'], reverse=True)
+            return [], None
         
-        return combined_activities[:100]
+        return TimelineService(self.db).get_activity_page(
+            [project_id], type_filter, date_range, cursor=cursor, limit=limit
+        )
 
     def get_analytics(self, project_id: int, time_range: str = "30days") -> dict:
         """Get high-level project analytics"""
@@ -646,6 +556,7 @@ class SpaceService:
                     self.db.add(user)
                     self.db.commit()
                     self.db.refresh(user)
+                    bump_versions(self.db)
                 else:
                     print(f"DEBUG: Found existing user {user.username} (ID: {user.id})")
                 
@@ -0,0 +1 @@
+# Timeline module
@@ -0,0 +1,65 @@
+from sqlalchemy.orm import Session
+from app.shared.models import TimelineEvent
+from app.shared.pagination import apply_keyset, fetch_page
+from typing import List, Optional, Tuple
+from datetime import datetime
+
+
+class TimelineRepository:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def upsert_events(self, events: List[dict]) -> int:
+        """Insert new events and refresh existing ones (matched by source_key)"""
+        if not events:
+            return 0
+        
+        existing = {
+            event.source_key: event
+            for event in self.db.query(TimelineEvent).filter(
+                TimelineEvent.source_key.in_([e["source_key"] for e in events])
+            ).all()
+        }
+        for data in events:
+            event = existing.get(data["source_key"])
+            if event:
+                for key, value in data.items():
+                    setattr(event, key, value)
+            else:
+                self.db.add(TimelineEvent(**data))
+        self.db.commit()
+        return len(events)
+    
+    def set_repository_space(self, repository_id: int, space_id: Optional[int]):
+        """Move a repository's events when it is linked to another space (caller commits)"""
+        self.db.query(TimelineEvent).filter(
+            TimelineEvent.repository_id == repository_id
+        ).update({TimelineEvent.space_id: space_id}, synchronize_session=False)
+    
+    def get_events(
+        self,
+        space_ids: List[int],
+        types: Optional[List[str]] = None,
+        action: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100
+    ) -> Tuple[List[TimelineEvent], Optional[str]]:
+        """Newest-first page of events for the given spaces"""
+        if len(space_ids) == 1:
+            query = self.db.query(TimelineEvent).filter(TimelineEvent.space_id == space_ids[0])
+        else:
+            query = self.db.query(TimelineEvent).filter(TimelineEvent.space_id.in_(space_ids))
+        
+        if types:
+            query = query.filter(TimelineEvent.type.in_(types))
+        if action:
+            query = query.filter(TimelineEvent.action == action)
+        if start_date:
+            query = query.filter(TimelineEvent.occurred_at >= start_date)
+        if end_date:
+            query = query.filter(TimelineEvent.occurred_at <= end_date)
+        
+        query = apply_keyset(query, TimelineEvent.occurred_at, TimelineEvent.id, cursor)
+        return fetch_page(query, limit, timestamp_attr="occurred_at")
@@ -0,0 +1,159 @@
+from sqlalchemy.orm import Session
+from app.modules.timeline.repository import TimelineRepository
+from app.shared.models import Repository, Commit, PullRequest, Issue, Release, Deployment, Activity
+from typing import Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+
+
+# GitHub events already covered by first-class sources (commits, PRs, issues, ...)
+DUPLICATE_EVENT_TYPES = {"PushEvent", "PullRequestEvent", "IssuesEvent", "ReleaseEvent", "DeploymentEvent"}
+REVIEW_EVENT_TYPES = {"PullRequestReviewEvent", "PullRequestReviewCommentEvent"}
+
+# Activity log filter -> (event types, action)
+TYPE_FILTERS = {
+    "commit": (["commit"], None),
+    "pr": (["pr"], None),
+    "merge": (["pr"], "merged"),
+    "issue": (["issue"], None),
+    "review": (["review"], None),
+    "release": (["release"], None),
+    "deploy": (["deploy"], None),
+    "deployment": (["deploy"], None),
+}
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def parse_date_range(date_range: Optional[str]) -> Optional[datetime]:
+    """Start date for the activity log `dateRange` values (today, 7days, 30days, 90days, all)"""
+    value = str(date_range or "7days").lower()
+    if value in ("all", "all time"):
+        return None
+    days = 7
+    if "today" in value: days = 1
+    elif "7" in value: days = 7
+    elif "30" in value: days = 30
+    elif "90" in value: days = 90
+    return datetime.utcnow() - timedelta(days=days)
+
+
+class TimelineService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.repository = TimelineRepository(db)
+
+    # ---- ingest --------------------------------------------------------------
+
+    def _event(self, repo: Repository, source_key: str, type: str, occurred_at: datetime,
+               actor: str, action: str, title: str, target: str, meta: dict = None) -> Optional[dict]:
+        if occurred_at is None:
+            return None
+        return {
+            "space_id": repo.space_id,
+            "repository_id": repo.id,
+            "type": type,
+            "occurred_at": _utc_naive(occurred_at),
+            "actor": actor,
+            "action": action,
+            "title": title,
+            "target": target,
+            "source_key": source_key,
+            "meta": meta
+        }
+
+    def _record(self, events: Iterable[Optional[dict]]) -> int:
+        return self.repository.upsert_events([e for e in events if e])
+
+    def record_commits(self, repo: Repository, commits: Iterable[Commit]) -> int:
+        return self._record(
+            self._event(repo, f"commit_{c.id}", "commit", c.committed_date, c.author_name, "pushed",
+                        (c.message or "").split("\n")[0], (c.sha or "")[:7])
+            for c in commits
+        )
+
+    def record_pull_requests(self, repo: Repository, prs: Iterable[PullRequest]) -> int:
+        return self._record(
+            self._event(repo, f"pr_{pr.id}", "pr", pr.created_at, pr.author,
+                        "merged" if pr.merged_at else pr.state, pr.title, f"#{pr.number}")
+            for pr in prs
+        )
+
+    def record_issues(self, repo: Repository, issues: Iterable[Issue]) -> int:
+        return self._record(
+            self._event(repo, f"issue_{i.id}", "issue", i.created_at, i.author, i.state, i.title, f"#{i.number}")
+            for i in issues
+        )
+
+    def record_releases(self, repo: Repository, releases: Iterable[Release]) -> int:
+        return self._record(
+            self._event(repo, f"release_{r.id}", "release", r.published_at or r.created_at, None,
+                        "published" if r.published_at else "created", r.name or r.tag_name, r.tag_name)
+            for r in releases
+        )
+
+    def record_deployments(self, repo: Repository, deployments: Iterable[Deployment]) -> int:
+        return self._record(
+            self._event(repo, f"deployment_{d.id}", "deploy", d.created_at, None, d.state,
+                        d.description or f"Deployment to {d.environment}", d.environment)
+            for d in deployments
+        )
+
+    def record_activities(self, repo: Repository, activities: Iterable[Activity]) -> int:
+        events = []
+        for act in activities:
+            if act.type in DUPLICATE_EVENT_TYPES:
+                continue
+            type_name = "review" if act.type in REVIEW_EVENT_TYPES else (act.type or "").lower().replace("event", "")
+            events.append(self._event(
+                repo, f"activity_{act.id}", type_name, act.created_at, act.user_login, act.action,
+                act.description, act.title
+            ))
+        return self._record(events)
+
+    # ---- read ----------------------------------------------------------------
+
+    def get_activity_page(
+        self,
+        space_ids: List[int],
+        type_filter: str = None,
+        date_range: str = "7days",
+        cursor: str = None,
+        limit: int = 100
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Activity log page in the shape the activity journal renders, plus the next cursor"""
+        if not space_ids:
+            return [], None
+
+        types, action = None, None
+        if type_filter and type_filter.lower() != "all":
+            types, action = TYPE_FILTERS.get(type_filter.lower(), ([type_filter.lower()], None))
+
+        events, next_cursor = self.repository.get_events(
+            space_ids,
+            types=types,
+            action=action,
+            start_date=parse_date_range(date_range),
+            cursor=cursor,
+            limit=limit
+        )
+        return [
+            {
+                "id": event.source_key,
+                "type": event.type,
+                "actor": {
+                    "name": event.actor or "Unknown",
+                    "avatar": None
+                },
+                "action": event.action,
+                "target": event.target,
+                "timestamp": event.occurred_at.isoformat(),
+                "metadata": {
+                    "description": event.title
+                }
+            }
+            for event in events
+        ], next_cursor
@@ -49,13 +49,17 @@ async def get_user(
 
 @router.get("/dashboard/stats", response_model=None)
 async def get_user_dashboard(
+    compact_heatmap: bool = False,
     db: Session = Depends(get_db),
     current_user: UserResponse = Depends(get_current_user)
 ):
-    """Get dashboard analytics for the current user"""
-    from app.modules.users.dashboard_dto import UserDashboardResponse
+    """
+    Get dashboard analytics for the current user.
+    compact_heatmap=true returns the heatmap as {start, counts, thresholds}
+    instead of one object per day.
+    """
     service = UserService(db)
-    return service.get_user_dashboard_stats(current_user.id)
+    return service.get_user_dashboard_stats(current_user.id, compact_heatmap=compact_heatmap)
 
 
 @router.post("/sync-projects", response_model=dict)
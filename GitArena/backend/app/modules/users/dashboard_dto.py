@@ -1,6 +1,9 @@
 from pydantic import BaseModel
 from typing import List, Optional
 
+# Heatmap level = number of thresholds the day's count reaches (0-4)
+HEATMAP_LEVEL_THRESHOLDS = [1, 3, 6, 10]
+
 class LanguageStats(BaseModel):
     name: str
     percentage: float
@@ -30,10 +33,16 @@ class ActivityStats(BaseModel):
     count: int
     level: int
 
+class CompactHeatmap(BaseModel):
+    start: str # first day (YYYY-MM-DD); counts[i] is start + i days
+    counts: List[int]
+    thresholds: List[int] = HEATMAP_LEVEL_THRESHOLDS
+
 class UserDashboardResponse(BaseModel):
     languages: List[LanguageStats]
     recent_commits: List[CommitStats]
     pr_status: List[PRStats]
     top_repos: List[RepoStats]
     weekly_activity: List[int] # simple array of counts for last 7 days
-    heatmap_data: List[ActivityStats]
+    heatmap_data: List[ActivityStats] = [] # one entry per day (default format)
+    heatmap: Optional[CompactHeatmap] = None # ?compact_heatmap=true
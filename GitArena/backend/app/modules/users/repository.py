@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.shared.models import User
 from app.modules.users.dto import UserCreate
+from app.shared.versions import bump_versions
 from typing import Optional
 
 
@@ -26,6 +27,8 @@ class UserRepository:
         self.db.add(user)
         self.db.commit()
         self.db.refresh(user)
+        # The dashboard counts registered users
+        bump_versions(self.db)
         return user
     
     def update(self, user: User, **kwargs) -> User:
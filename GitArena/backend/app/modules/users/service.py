@@ -126,30 +126,64 @@ class UserService:
         return UserResponse.model_validate(user)
 
     
-    def get_user_dashboard_stats(self, user_id: int) -> "UserDashboardResponse":
-        """Get aggregated dashboard stats for a user"""
+    def get_user_dashboard_stats(self, user_id: int, compact_heatmap: bool = False) -> "UserDashboardResponse":
+        """
+        Get aggregated dashboard stats for a user. Heatmap, weekly activity and
+        top repository trends share one grouped (day, repository) commit query;
+        compact_heatmap returns the heatmap as a start day plus a counts array.
+        """
         from app.modules.users.dashboard_dto import (
             UserDashboardResponse, LanguageStats, CommitStats, 
-            PRStats, RepoStats, ActivityStats
+            PRStats, RepoStats, ActivityStats, CompactHeatmap, HEATMAP_LEVEL_THRESHOLDS
         )
-        from sqlalchemy import desc
+        from sqlalchemy import Date, case, desc, or_
         from datetime import datetime, timedelta
+        import bisect
 
-        user = self.get_user_by_id(user_id)
+        user = self.repository.get_by_id(user_id)
+        if not user:
+            raise NotFoundException("User not found")
+        
+        # Commits by the user: author email or name - best effort
+        identity = [Commit.author_name == name for name in {user.username, user.name} if name]
+        if user.email:
+            identity.append(Commit.author_email == user.email)
+        mine = or_(*identity)
         
         # 1. Top Repositories (by stars, then updated_at)
         repos = self.db.query(Repository).filter(
             Repository.user_id == user.id
         ).order_by(desc(Repository.stargazers_count), desc(Repository.updated_at)).limit(3).all()
+
+        # 2. Daily commit counts for the last 365 days: the user's commits in any
+        # repository, plus all commits of the top repositories (their trend)
+        today = datetime.utcnow().date()
+        year_ago = today - timedelta(days=365)
+        week_start = today - timedelta(days=6)
+        day = func.date(Commit.committed_date, type_=Date)
+        scope = or_(mine, Commit.repository_id.in_([repo.id for repo in repos])) if repos else mine
+        daily = self.db.query(
+            day,
+            Commit.repository_id,
+            func.count(Commit.id),
+            func.sum(case((mine, 1), else_=0))
+        ).filter(
+            scope,
+            Commit.committed_date >= datetime.combine(year_ago, datetime.min.time())
+        ).group_by(day, Commit.repository_id).all()
+
+        heatmap_counts = [0] * 366
+        repo_trends = {}
+        for commit_day, repository_id, total, own in daily:
+            offset = (commit_day - year_ago).days
+            if 0 <= offset < len(heatmap_counts):
+                heatmap_counts[offset] += int(own or 0)
+            if commit_day >= week_start:
+                repo_trends[repository_id] = repo_trends.get(repository_id, 0) + total
         
         top_repos_data = []
         for repo in repos:
-            # Simple trend mock or calculation? Let's use mock for now or calculate based on recent activity?
-            # Let's verify if we can query recent activity for this repo
-            recent_commits_count = self.db.query(func.count(Commit.id)).filter(
-                Commit.repository_id == repo.id,
-                Commit.committed_date >= datetime.utcnow() - timedelta(days=7)
-            ).scalar()
+            recent_commits_count = repo_trends.get(repo.id, 0)
             trend = f"+{recent_commits_count}" if recent_commits_count > 0 else "0"
             
             top_repos_data.append(RepoStats(
@@ -159,12 +193,9 @@ class UserService:
                 trend=trend
             ))
 
-        # 2. Recent Commits (Global for user)
-        # Find commits by author email or name
+        # 3. Recent Commits (Global for user)
         commits_query = self.db.query(Commit, Repository).join(Repository).filter(
-            (Commit.author_email == user.email) | 
-            (Commit.author_name == user.username) |
-            (Commit.author_name == user.name)
+            mine
         ).order_by(desc(Commit.committed_date)).limit(5).all()
         
         recent_commits_data = []
@@ -186,10 +217,7 @@ class UserService:
                 deletions=commit.deletions
             ))
 
-        # 3. Language Distribution (Aggregate from all user repos)
-        # Verify if we have language data. GitHub API returns map per repo.
-        # We stored primary language in Repository table.
-        # For better accuracy we would need a separate table for repo languages, but let's use primary for now.
+        # 4. Language Distribution (primary language of the user's repos)
         lang_counts = self.db.query(
             Repository.language, func.count(Repository.id)
         ).filter(
@@ -209,77 +237,41 @@ class UserService:
                 color=COLORS[i % len(COLORS)]
             ))
             
-        # 4. PR Status
-        open_prs = self.db.query(func.count(PullRequest.id)).filter(PullRequest.author == user.username, PullRequest.state == 'open').scalar() or 0
-        merged_prs = self.db.query(func.count(PullRequest.id)).filter(PullRequest.author == user.username, PullRequest.state == 'closed', PullRequest.merged_at.isnot(None)).scalar() or 0
-        closed_prs = self.db.query(func.count(PullRequest.id)).filter(PullRequest.author == user.username, PullRequest.state == 'closed', PullRequest.merged_at.is_(None)).scalar() or 0
+        # 5. PR Status (one grouped pass)
+        merged = PullRequest.merged_at.isnot(None)
+        open_prs, merged_prs, closed_prs = self.db.query(
+            func.sum(case((PullRequest.state == 'open', 1), else_=0)),
+            func.sum(case(((PullRequest.state == 'closed') & merged, 1), else_=0)),
+            func.sum(case(((PullRequest.state == 'closed') & ~merged, 1), else_=0))
+        ).filter(PullRequest.author == user.username).one()
         
         pr_status_data = [
-            PRStats(label='Open', count=open_prs, color='text-blue-400', bgColor='bg-blue-500/10'),
-            PRStats(label='Merged', count=merged_prs, color='text-green-400', bgColor='bg-green-500/10'), # Changed color to green for merged
-            PRStats(label='Closed', count=closed_prs, color='text-slate-400', bgColor='bg-slate-500/10'),
+            PRStats(label='Open', count=open_prs or 0, color='text-blue-400', bgColor='bg-blue-500/10'),
+            PRStats(label='Merged', count=merged_prs or 0, color='text-green-400', bgColor='bg-green-500/10'), # Changed color to green for merged
+            PRStats(label='Closed', count=closed_prs or 0, color='text-slate-400', bgColor='bg-slate-500/10'),
         ]
 
-        # 5. Weekly Activity (last 7 days commit counts)
-        weekly_activity = []
-        today = datetime.utcnow().date()
-        # Ensure we align with Monday-Sunday or just last 7 days? Frontend expects 7 values.
-        # Let's do last 7 days ending today.
-        for i in range(6, -1, -1):
-            date = today - timedelta(days=i)
-            # Count commits for this day
-            count = self.db.query(func.count(Commit.id)).filter(
-                (Commit.author_email == user.email) | 
-                (Commit.author_name == user.username) |
-                (Commit.author_name == user.name),
-                func.date(Commit.committed_date) == date
-            ).scalar() or 0
-            weekly_activity.append(count)
-
-        # 6. Heatmap Data (last 365 days)
-        # Optimize: Group by date query
-        year_ago = today - timedelta(days=365)
-        heatmap_query = self.db.query(
-            func.date(Commit.committed_date).label('date'),
-            func.count(Commit.id).label('count')
-        ).filter(
-            (Commit.author_email == user.email) | 
-            (Commit.author_name == user.username) |
-            (Commit.author_name == user.name),
-            Commit.committed_date >= year_ago
-        ).group_by(func.date(Commit.committed_date)).all()
+        # 6. Weekly Activity (last 7 days ending today) and heatmap (last 365 days)
+        weekly_activity = heatmap_counts[-7:]
         
-        heatmap_data = []
-        # Convert query result to map for easy lookup
-        heatmap_map = {str(row.date): row.count for row in heatmap_query}
-        
-        # We need to fill in zeros? Or frontend handles sparse data? Frontend handles it if we pass array of days.
-        # Actually standard heatmap usually expects sparse data or full data depending on implementation.
-        # Our ContributionHeatmap component expects array of ContributionDay.
+        if compact_heatmap:
+            return UserDashboardResponse(
+                languages=language_data,
+                recent_commits=recent_commits_data,
+                pr_status=pr_status_data,
+                top_repos=top_repos_data,
+                weekly_activity=weekly_activity,
+                heatmap=CompactHeatmap(start=year_ago.isoformat(), counts=heatmap_counts)
+            )
         
-        # Let's iterate and build
-        current = year_ago
-        while current <= today:
-            d_str = str(current)
-            count = heatmap_map.get(d_str, 0)
-            level = 0
-            if count > 0:
-                if count < 3: level = 1
-                elif count < 6: level = 2
-                elif count < 10: level = 3
-                else: level = 4
-            
-            # To reduce payload size, maybe only send days with > 0? 
-            # Frontend generates sample data if empty, but if we provide data, does it merge?
-            # Looking at frontend code: "const contributions = data || generateSampleData();"
-            # So we should provide full data or at least enough.
-            
-            heatmap_data.append(ActivityStats(
-                date=d_str,
+        heatmap_data = [
+            ActivityStats(
+                date=str(year_ago + timedelta(days=offset)),
                 count=count,
-                level=level
-            ))
-            current += timedelta(days=1)
+                level=bisect.bisect_right(HEATMAP_LEVEL_THRESHOLDS, count)
+            )
+            for offset, count in enumerate(heatmap_counts)
+        ]
             
         return UserDashboardResponse(
             languages=language_data,
@@ -0,0 +1,48 @@
+"""
+Directory lock shared by the on-disk indexes (analytics snapshots, vector
+indexes) that several workers and scripts append to.
+
+A FileLock is a per-directory thread lock plus an exclusive flock on
+<directory>/.lock, so writers are serialised within a process and across
+processes (uvicorn workers, backfill scripts).
+"""
+import os
+import threading
+from typing import Dict
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(path, threading.Lock())
+
+
+class FileLock:
+    """Thread lock plus an exclusive flock on <directory>/.lock"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._thread_lock = _lock_for(os.path.abspath(directory))
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = open(os.path.join(self.directory, ".lock"), "a")
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, Boolean, JSON, TIMESTAMP
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Float, Boolean, JSON, TIMESTAMP, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -110,10 +110,65 @@ class Commit(Base):
     deletions = Column(Integer, default=0)
     files_changed = Column(Integer, default=0)
     diff_data = Column(JSON, nullable=True)  # Detailed file changes (patch, etc)
+    flags = Column(Integer, nullable=True)  # CommitFlag bitmask (github/classifier.py), set at ingest
     created_at = Column(DateTime, default=datetime.utcnow)
     
     repository = relationship("Repository", back_populates="commits")
 
+    __table_args__ = (
+        Index("ix_commits_repo_date_flags", "repository_id", "committed_date", postgresql_include=["flags"]),
+    )
+
+
+class CommitFile(Base):
+    """Files changed by a commit (from its diff_data), written at ingest"""
+    __tablename__ = "commit_files"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    commit_id = Column(Integer, ForeignKey("commits.id"), nullable=False)
+    repository_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
+    path = Column(String, nullable=False)
+    status = Column(String, nullable=True)  # added, modified, removed, renamed
+    additions = Column(Integer, default=0)
+    deletions = Column(Integer, default=0)
+    committed_date = Column(DateTime, nullable=True)  # denormalised from commits
+
+    __table_args__ = (
+        Index("ix_commit_files_commit", "commit_id"),
+        Index("ix_commit_files_repo_id", "repository_id", "id"),
+        Index("ix_commit_files_repo_path_date", "repository_id", "path", "committed_date"),
+        Index("ix_commit_files_repo_date", "repository_id", "committed_date", "id"),
+    )
+
+
+class RepositoryDocIndex(Base):
+    """
+    Documentation health of a repository, maintained at ingest from commit
+    flags (analytics/doc_index.py): latest touch per doc category and
+    presence of the standard files.
+    """
+    __tablename__ = "repository_doc_index"
+    
+    repository_id = Column(Integer, ForeignKey("repositories.id"), primary_key=True)
+    docs_touched_at = Column(DateTime, nullable=True)
+    readme_touched_at = Column(DateTime, nullable=True)
+    contributing_touched_at = Column(DateTime, nullable=True)
+    license_touched_at = Column(DateTime, nullable=True)
+    has_readme = Column(Boolean, default=False)
+    has_contributing = Column(Boolean, default=False)
+    has_license = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DocCommitDaily(Base):
+    """Documentation and total commit counts per repository and day"""
+    __tablename__ = "doc_commits_daily"
+    
+    repository_id = Column(Integer, ForeignKey("repositories.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    doc_commits = Column(Integer, default=0)
+    total_commits = Column(Integer, default=0)
+
 
 class PullRequest(Base):
     __tablename__ = "pull_requests"
@@ -127,13 +182,37 @@ class PullRequest(Base):
     author = Column(String)
     repository_id = Column(Integer, ForeignKey("repositories.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)  # GitHub updated_at (last activity on the PR)
     closed_at = Column(DateTime, nullable=True)
     merged_at = Column(DateTime, nullable=True)
+    first_commit_at = Column(DateTime, nullable=True)  # earliest authored commit of the PR (DORA lead time)
+    # Review aggregates, maintained at ingest (analytics/bottlenecks.py)
+    review_count = Column(Integer, default=0)
+    first_review_at = Column(DateTime, nullable=True)
+    last_activity_at = Column(DateTime, nullable=True)
     
     repository = relationship("Repository", back_populates="pull_requests")
     reviews = relationship("Review", back_populates="pull_request")
 
+    __table_args__ = (
+        Index("ix_pull_requests_repo_merged", "repository_id", "merged_at"),
+        Index("ix_pull_requests_repo_state", "repository_id", "state"),
+    )
+
+
+class PullRequestCommit(Base):
+    """Commits listed on a pull request (GitHub /pulls/{number}/commits)"""
+    __tablename__ = "pull_request_commits"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pull_request_id = Column(Integer, ForeignKey("pull_requests.id"), nullable=False)
+    sha = Column(String, nullable=False)
+    authored_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("pull_request_id", "sha", name="uq_pull_request_commits_pr_sha"),
+    )
+
 
 class Issue(Base):
     __tablename__ = "issues"
@@ -167,6 +246,36 @@ class Review(Base):
     
     pull_request = relationship("PullRequest", back_populates="reviews")
 
+    __table_args__ = (
+        Index("ix_reviews_pr_submitted", "pull_request_id", "submitted_at"),
+    )
+
+
+class BottleneckAlert(Base):
+    """
+    Persisted PR bottleneck alert, one row per (pull request, rule); evaluated
+    by analytics/bottlenecks.py and moved between open and resolved.
+    """
+    __tablename__ = "bottleneck_alerts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    pull_request_id = Column(Integer, ForeignKey("pull_requests.id"), nullable=False)
+    repository_id = Column(Integer, ForeignKey("repositories.id"), nullable=False)
+    rule = Column(String, nullable=False)  # stuck_pr, inactive_pr, high_churn
+    severity = Column(String, nullable=False)  # high, medium
+    state = Column(String, default="open")  # open, resolved
+    opened_at = Column(DateTime, default=datetime.utcnow)
+    resolved_at = Column(DateTime, nullable=True)
+    evaluated_at = Column(DateTime, default=datetime.utcnow)
+    details = Column(JSON, nullable=True)
+    
+    pull_request = relationship("PullRequest")
+
+    __table_args__ = (
+        UniqueConstraint("pull_request_id", "rule", name="uq_bottleneck_alerts_pr_rule"),
+        Index("ix_bottleneck_alerts_repo_state", "repository_id", "state"),
+    )
+
 
 class AnalyticsActivity(Base):
     __tablename__ = "analytics_activity"
@@ -229,6 +338,17 @@ class AIFeedback(Base):
     strengths = Column(JSON, nullable=True)  # רשימת חוזקות
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    user = relationship("User")
+    repository = relationship("Repository")
+    
+    # Keyset pagination of the feedback history: (created_at, id) per filter,
+    # feedback_type included so the type filter is resolved from the index
+    __table_args__ = (
+        Index("ix_ai_feedback_created_id", "created_at", "id", postgresql_include=["feedback_type"]),
+        Index("ix_ai_feedback_repo_created_id", "repository_id", "created_at", "id", postgresql_include=["feedback_type"]),
+        Index("ix_ai_feedback_user_created_id", "user_id", "created_at", "id", postgresql_include=["feedback_type"]),
+    )
 
 
 class Release(Base):
@@ -262,6 +382,28 @@ class Deployment(Base):
     
     repository = relationship("Repository", back_populates="deployments")
 
+    __table_args__ = (
+        Index("ix_deployments_repo_created", "repository_id", "created_at"),
+    )
+
+
+class DoraDaily(Base):
+    """
+    DORA counters per repository and day, maintained at ingest
+    (analytics/dora.py); windows are summed over these rows at read time.
+    """
+    __tablename__ = "dora_daily"
+    
+    repository_id = Column(Integer, ForeignKey("repositories.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    deployments = Column(Integer, default=0)
+    failed_deployments = Column(Integer, default=0)
+    merged_prs = Column(Integer, default=0)
+    lead_time_seconds = Column(Float, default=0.0)  # sum over merged_prs (first commit -> merge)
+    restored_incidents = Column(Integer, default=0)
+    restore_seconds = Column(Float, default=0.0)  # sum over restored_incidents (failure -> next success)
+    fix_commits = Column(Integer, default=0)
+
 
 class Activity(Base):
     __tablename__ = "activities"
@@ -279,6 +421,33 @@ class Activity(Base):
     repository = relationship("Repository")
 
 
+class TimelineEvent(Base):
+    """
+    Denormalised activity feed (commits, PRs, issues, releases, deployments,
+    GitHub events) written at ingest, so activity logs are one indexed scan.
+    """
+    __tablename__ = "timeline_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    space_id = Column(Integer, ForeignKey("spaces.id"), nullable=True)
+    repository_id = Column(Integer, ForeignKey("repositories.id"))
+    type = Column(String)  # commit, pr, issue, release, deploy, review, ...
+    occurred_at = Column(DateTime, nullable=False)
+    actor = Column(String, nullable=True)
+    action = Column(String, nullable=True)
+    title = Column(Text, nullable=True)
+    target = Column(String, nullable=True)
+    source_key = Column(String, unique=True)  # e.g. commit_42 - one row per source record
+    meta = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Descending (newest first) scans per space, optionally per type, and per repository
+Index("ix_timeline_space_occurred", TimelineEvent.space_id, TimelineEvent.occurred_at.desc(), TimelineEvent.id.desc())
+Index("ix_timeline_space_type_occurred", TimelineEvent.space_id, TimelineEvent.type, TimelineEvent.occurred_at.desc(), TimelineEvent.id.desc())
+Index("ix_timeline_repo_occurred", TimelineEvent.repository_id, TimelineEvent.occurred_at.desc(), TimelineEvent.id.desc())
+
+
 class Quest(Base):
     __tablename__ = "quests"
     
@@ -289,6 +458,8 @@ class Quest(Base):
     metric = Column(String)  # commits, prs, issues, reviews
     reward = Column(String, nullable=True)
     project_id = Column(Integer, ForeignKey("spaces.id"), nullable=True)
+    starts_at = Column(DateTime, nullable=True)  # counting window; created_at when null
+    ends_at = Column(DateTime, nullable=True)  # open-ended when null
     created_at = Column(DateTime, default=datetime.utcnow)
     
     project = relationship("Space")
@@ -309,6 +480,28 @@ class GamificationStats(Base):
     user = relationship("User", back_populates="gamification_stats")
 
 
+class XpEvent(Base):
+    """
+    Append-only XP ledger: one row per credited commit, pull request or review,
+    written at ingest by gamification/ledger.py. gamification_stats is
+    maintained from it.
+    """
+    __tablename__ = "xp_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    source = Column(String, nullable=False)  # commit, pull_request, review
+    source_id = Column(Integer, nullable=False)  # id in the source table
+    xp = Column(Integer, nullable=False)
+    occurred_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("source", "source_id", name="uq_xp_events_source"),
+        Index("ix_xp_events_user_occurred", "user_id", "occurred_at"),
+    )
+
+
 class Achievement(Base):
     __tablename__ = "achievements"
     
@@ -317,7 +510,7 @@ class Achievement(Base):
     description = Column(String)
     icon = Column(String)
     xp_reward = Column(Integer)
-    condition_type = Column(String)  # commits_count, prs_merged, etc.
+    condition_type = Column(String)  # gamification/achievements.py METRICS key, or "manual"
     condition_value = Column(Integer)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -332,3 +525,21 @@ class UserAchievement(Base):
     
     user = relationship("User", back_populates="achievements")
     achievement = relationship("Achievement")
+
+    __table_args__ = (
+        Index("uq_user_achievements_user_achievement", "user_id", "achievement_id", unique=True),
+    )
+
+
+class DataVersion(Base):
+    """
+    Change counter per repository / space (and one global row), bumped by
+    ingestion and membership changes; dashboard ETags are derived from it
+    (shared/versions.py).
+    """
+    __tablename__ = "data_versions"
+
+    scope = Column(String(16), primary_key=True)  # "repository", "space" or "global"
+    scope_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,50 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Cursors encode the (timestamp, id) of the last row of a page, so the next
+page is an index range scan instead of an OFFSET that re-reads skipped rows.
+Lists are ordered by (timestamp DESC, id DESC); the timestamp column is
+expected to be non-null.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+from app.shared.exceptions import BadRequestException
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise BadRequestException("Invalid cursor")
+
+
+def apply_keyset(query, timestamp_column, id_column, cursor: Optional[str]):
+    """Order by (timestamp, id) DESC and continue after the cursor row"""
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            timestamp_column < timestamp,
+            and_(timestamp_column == timestamp, id_column < row_id)
+        ))
+    return query.order_by(timestamp_column.desc(), id_column.desc())
+
+
+def fetch_page(query, limit: int, timestamp_attr: str = "created_at") -> Tuple[List, Optional[str]]:
+    """Run a keyset-ordered query; returns (rows, next_cursor)"""
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp_attr), last.id)
@@ -19,7 +19,8 @@ from typing import Optional
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.shared.models import User, Space, SpaceMember
+from app.shared.models import User
+from app.shared.scope import get_request_scope
 
 
 class PermissionDenied(HTTPException):
@@ -68,22 +69,8 @@ def is_team_admin(db: Session, space_id: int, user: User) -> bool:
     Returns:
         True if user is owner or has admin role in team
     """
-    # Check if user is the space owner
-    space = db.query(Space).filter(Space.id == space_id).first()
-    if not space:
-        return False
-    
-    if space.owner_id == user.id:
-        return True
-    
-    # Check if user has admin role in space members
-    membership = db.query(SpaceMember).filter(
-        SpaceMember.space_id == space_id,
-        SpaceMember.user_id == user.id,
-        SpaceMember.role == "admin"
-    ).first()
-    
-    return membership is not None
+    # Owner or admin role in space members (membership scope read by this request)
+    return get_request_scope(db, user.id).is_admin(space_id)
 
 
 def is_team_member(db: Session, space_id: int, user: User) -> bool:
@@ -98,21 +85,8 @@ def is_team_member(db: Session, space_id: int, user: User) -> bool:
     Returns:
         True if user is owner or member of team
     """
-    # Check if user is the space owner
-    space = db.query(Space).filter(Space.id == space_id).first()
-    if not space:
-        return False
-    
-    if space.owner_id == user.id:
-        return True
-    
-    # Check if user is in space members
-    membership = db.query(SpaceMember).filter(
-        SpaceMember.space_id == space_id,
-        SpaceMember.user_id == user.id
-    ).first()
-    
-    return membership is not None
+    # Owner or any member role (membership scope read by this request)
+    return get_request_scope(db, user.id).is_member(space_id)
 
 
 def require_team_admin(space_id_param: str = "space_id"):
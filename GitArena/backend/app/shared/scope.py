@@ -0,0 +1,154 @@
+"""
+User scope resolution: which spaces a user belongs to, with which role, and
+which repositories those spaces contain.
+
+The scope is loaded with a single joined query, memoized on the request's
+Session (`db.info`) and cached across requests for SCOPE_CACHE_TTL_SECONDS.
+Writes that change membership or repository placement call the
+`invalidate_*` helpers; the TTL bounds staleness for writes made by other
+processes.
+
+That staleness is fine for analytics scoping, not for authorization: the
+invalidation only reaches the cache of the process that made the change.
+Permission checks use get_request_scope, which reads the database once per
+session and never the cross-request cache.
+"""
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.shared.models import Repository, Space, SpaceMember
+
+OWNER_ROLE = "owner"
+ADMIN_ROLES = {OWNER_ROLE, "admin"}
+
+_SESSION_KEY = "user_scopes"
+_REQUEST_SESSION_KEY = "user_scopes_uncached"
+
+_cache: Dict[int, Tuple[float, "UserScope"]] = {}
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class UserScope:
+    """Spaces (with the user's role) and their repositories"""
+    user_id: int
+    roles: Dict[int, str] = field(default_factory=dict)
+    repo_ids_by_space: Dict[int, Tuple[int, ...]] = field(default_factory=dict)
+
+    @property
+    def space_ids(self) -> List[int]:
+        return list(self.roles)
+
+    @property
+    def repo_ids(self) -> List[int]:
+        return [repo_id for repo_ids in self.repo_ids_by_space.values() for repo_id in repo_ids]
+
+    def role(self, space_id: int) -> Optional[str]:
+        """"owner", the space_members role, or None when the user is not in the space"""
+        return self.roles.get(space_id)
+
+    def is_member(self, space_id: int) -> bool:
+        return space_id in self.roles
+
+    def is_admin(self, space_id: int) -> bool:
+        return self.roles.get(space_id) in ADMIN_ROLES
+
+    def repos_for(self, space_ids: List[int]) -> List[int]:
+        return [repo_id for space_id in space_ids for repo_id in self.repo_ids_by_space.get(space_id, ())]
+
+
+def load_user_scope(db: Session, user_id: int) -> UserScope:
+    """Resolve the scope from the database (one query, no caching)"""
+    rows = db.query(Space.id, Space.owner_id, SpaceMember.role, Repository.id).outerjoin(
+        SpaceMember, and_(SpaceMember.space_id == Space.id, SpaceMember.user_id == user_id)
+    ).outerjoin(
+        Repository, Repository.space_id == Space.id
+    ).filter(
+        or_(Space.owner_id == user_id, SpaceMember.id.isnot(None))
+    ).all()
+
+    roles: Dict[int, str] = {}
+    repo_ids: Dict[int, List[int]] = {}
+    for space_id, owner_id, member_role, repo_id in rows:
+        roles[space_id] = OWNER_ROLE if owner_id == user_id else (member_role or "member")
+        space_repos = repo_ids.setdefault(space_id, [])
+        if repo_id is not None and repo_id not in space_repos:
+            space_repos.append(repo_id)
+
+    return UserScope(
+        user_id=user_id,
+        roles=roles,
+        repo_ids_by_space={space_id: tuple(ids) for space_id, ids in repo_ids.items()}
+    )
+
+
+def get_request_scope(db: Session, user_id: int) -> UserScope:
+    """Scope of a user read from the database, memoized per session only (for permission checks)"""
+    memo = db.info.setdefault(_REQUEST_SESSION_KEY, {})
+    if user_id not in memo:
+        memo[user_id] = load_user_scope(db, user_id)
+    return memo[user_id]
+
+
+def get_user_scope(db: Session, user_id: int) -> UserScope:
+    """Scope of a user, memoized per session and cached across requests"""
+    memo = db.info.setdefault(_SESSION_KEY, {})
+    if user_id in memo:
+        return memo[user_id]
+    # A scope this request already read from the database is at least as fresh
+    if user_id in db.info.get(_REQUEST_SESSION_KEY, {}):
+        memo[user_id] = db.info[_REQUEST_SESSION_KEY][user_id]
+        return memo[user_id]
+
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(user_id)
+    if cached and cached[0] > now:
+        scope = cached[1]
+    else:
+        scope = load_user_scope(db, user_id)
+        if settings.SCOPE_CACHE_TTL_SECONDS > 0:
+            with _cache_lock:
+                _cache[user_id] = (now + settings.SCOPE_CACHE_TTL_SECONDS, scope)
+
+    memo[user_id] = scope
+    return scope
+
+
+def invalidate_user_scope(db: Optional[Session], *user_ids: int):
+    """Drop cached scopes of the given users (membership or ownership changed)"""
+    with _cache_lock:
+        for user_id in user_ids:
+            _cache.pop(user_id, None)
+    if db is not None:
+        for key in (_SESSION_KEY, _REQUEST_SESSION_KEY):
+            memo = db.info.get(key, {})
+            for user_id in user_ids:
+                memo.pop(user_id, None)
+
+
+def invalidate_space_scope(db: Optional[Session], *space_ids: int):
+    """Drop cached scopes that include any of the spaces (e.g. a repository moved in or out)"""
+    space_ids = {space_id for space_id in space_ids if space_id is not None}
+    if not space_ids:
+        return
+    with _cache_lock:
+        stale = [user_id for user_id, (_, scope) in _cache.items() if space_ids & set(scope.roles)]
+        for user_id in stale:
+            _cache.pop(user_id, None)
+    if db is not None:
+        for key in (_SESSION_KEY, _REQUEST_SESSION_KEY):
+            memo = db.info.get(key, {})
+            for user_id in [u for u, scope in memo.items() if space_ids & set(scope.roles)]:
+                memo.pop(user_id, None)
+
+
+def clear_scope_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,75 @@
+"""
+Data versions: change counters behind conditional (ETag) responses.
+
+data_versions holds a counter per repository and per space, plus one global
+row. Ingestion bumps the repository, its space and the global row once per
+sync batch, after the batch and its derived data are committed
+(github/service.py). Membership changes, repositories moving between spaces
+and quest writes bump the spaces involved.
+
+Dashboard endpoints hash the counters they depend on into their ETag
+(analytics/conditional.py). A request reads the counters before it reads any
+data, so a response is never tagged with a version newer than what it shows;
+at worst a poll that raced an ingest is recomputed once more.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.shared.models import DataVersion, Repository
+
+REPOSITORY = "repository"
+SPACE = "space"
+GLOBAL = "global"
+
+Key = Tuple[str, int]
+
+# INSERT ... ON CONFLICT DO UPDATE per dialect
+_UPSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def bump_versions(db: Session, repositories: Iterable[Repository] = (), space_ids: Iterable[int] = ()):
+    """Increment the counters of the repositories, their spaces, the given spaces and the global row"""
+    keys = {(GLOBAL, 0)}
+    for repo in repositories:
+        keys.add((REPOSITORY, repo.id))
+        if repo.space_id is not None:
+            keys.add((SPACE, repo.space_id))
+    keys |= {(SPACE, space_id) for space_id in space_ids if space_id is not None}
+
+    now = datetime.utcnow()
+    # Sorted, so concurrent bumps lock rows in the same order
+    statement = _UPSERT[db.get_bind().dialect.name](DataVersion).values([
+        {"scope": scope, "scope_id": scope_id, "version": 1, "updated_at": now} for scope, scope_id in sorted(keys)
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[DataVersion.scope, DataVersion.scope_id],
+        set_={"version": DataVersion.version + 1, "updated_at": now}
+    ))
+    db.commit()
+
+
+def get_versions(db: Session, keys: List[Key]) -> Dict[Key, int]:
+    """Current counters of the keys (0 for keys never bumped), in one query"""
+    versions = {key: 0 for key in keys}
+    if not keys:
+        return versions
+    by_scope = defaultdict(list)
+    for scope, scope_id in keys:
+        by_scope[scope].append(scope_id)
+    rows = db.query(DataVersion.scope, DataVersion.scope_id, DataVersion.version).filter(or_(*[
+        and_(DataVersion.scope == scope, DataVersion.scope_id.in_(ids)) for scope, ids in by_scope.items()
+    ])).all()
+    for scope, scope_id, version in rows:
+        versions[(scope, scope_id)] = version
+    return versions
+
+
+def make_etag(*parts) -> str:
+    """Weak ETag: equal parts mean an equivalent response, not a byte-identical one"""
+    return 'W/"%s"' % hashlib.sha1(repr(parts).encode()).hexdigest()
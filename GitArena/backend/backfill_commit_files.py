@@ -0,0 +1,52 @@
+"""
+📁 סקריפט למילוי טבלת commit_files מתוך diff_data של commits קיימים
+(commits חדשים נכתבים אוטומטית בזמן הסנכרון)
+
+Usage:
+    python backfill_commit_files.py
+"""
+from sqlalchemy.orm import Session
+from app.shared.database import SessionLocal
+from app.modules.github.repository import GitHubRepository
+from app.shared.models import Commit, CommitFile
+
+BATCH_SIZE = 500
+
+
+def backfill():
+    db: Session = SessionLocal()
+    try:
+        written = 0
+        commits_done = 0
+        last_id = 0
+        while True:
+            # Commits that have a file list but no commit_files rows yet
+            commits = db.query(Commit).filter(
+                Commit.id > last_id,
+                Commit.diff_data.isnot(None),
+                ~db.query(CommitFile.id).filter(CommitFile.commit_id == Commit.id).exists()
+            ).order_by(Commit.id).limit(BATCH_SIZE).all()
+            if not commits:
+                break
+
+            for commit in commits:
+                rows = GitHubRepository.commit_files_for(commit)
+                db.add_all(rows)
+                written += len(rows)
+            db.commit()
+            commits_done += len(commits)
+            last_id = commits[-1].id
+            print(f"📁 {commits_done} commits, {written} file rows (up to id {last_id})")
+
+        print(f"\n✅ Wrote {written} file rows for {commits_done} commits")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill()
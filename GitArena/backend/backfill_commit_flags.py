@@ -0,0 +1,62 @@
+"""
+🏷️ סקריפט לסיווג commits קיימים (stress / fix / docs / merge) לעמודת flags
+ובניה מחדש של אינדקס התיעוד (repository_doc_index / doc_commits_daily)
+(commits חדשים מסווגים ומאונדקסים אוטומטית בזמן הסנכרון)
+
+Usage:
+    python backfill_commit_flags.py            # only commits without flags
+    python backfill_commit_flags.py --all      # re-classify every commit
+"""
+import argparse
+from sqlalchemy.orm import Session
+from app.config.settings import settings
+from app.shared.database import SessionLocal
+from app.modules.analytics.doc_index import DocIndexService
+from app.modules.analytics.snapshots import invalidate_snapshots
+from app.modules.github.classifier import classify_commit
+from app.shared.models import Commit
+
+BATCH_SIZE = 1000
+
+
+def backfill(reclassify_all: bool = False):
+    db: Session = SessionLocal()
+    try:
+        updated = 0
+        last_id = 0
+        while True:
+            query = db.query(Commit.id, Commit.message, Commit.diff_data).filter(Commit.id > last_id)
+            if not reclassify_all:
+                query = query.filter(Commit.flags.is_(None))
+            rows = query.order_by(Commit.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+
+            db.bulk_update_mappings(Commit, [
+                {"id": row.id, "flags": classify_commit(row.message, row.diff_data)}
+                for row in rows
+            ])
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1].id
+            print(f"🏷️  Classified {updated} commits (up to id {last_id})")
+
+        # Documentation index and column snapshots are derived from the flags
+        indexed = DocIndexService(db).rebuild()
+        print(f"📚 Rebuilt documentation index for {indexed} repositories")
+        removed = invalidate_snapshots(settings.ANALYTICS_SNAPSHOT_DIR)
+        print(f"\n✅ Classified {updated} commits, {removed} analytics snapshots will rebuild")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Classify existing commits into commits.flags")
+    parser.add_argument("--all", action="store_true", help="Re-classify commits that already have flags")
+    args = parser.parse_args()
+    backfill(reclassify_all=args.all)
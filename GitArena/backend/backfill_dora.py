@@ -0,0 +1,34 @@
+"""
+🚀 סקריפט לבניה מחדש של אגרגציות DORA היומיות (dora_daily)
+מתוך deployments, pull requests ו-commits שכבר קיימים במסד הנתונים
+(נתונים חדשים מתעדכנים אוטומטית בזמן הסנכרון)
+
+Usage:
+    python backfill_dora.py                # every repository
+    python backfill_dora.py --repo 12 34   # only these repositories
+"""
+import argparse
+from sqlalchemy.orm import Session
+from app.shared.database import SessionLocal
+from app.modules.analytics.dora import DoraService
+
+
+def backfill(repo_ids=None):
+    db: Session = SessionLocal()
+    try:
+        days = DoraService(db).rebuild(repo_ids)
+        print(f"\n✅ Rebuilt {days} daily DORA rows")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild daily DORA aggregates from stored data")
+    parser.add_argument("--repo", type=int, nargs="*", help="Repository ids (default: all)")
+    args = parser.parse_args()
+    backfill(repo_ids=args.repo or None)
@@ -0,0 +1,35 @@
+"""
+🧠 סקריפט לבניית אינדקס ה-embeddings עבור commits ו-PRs קיימים
+(סנכרונים חדשים מתווספים לאינדקס אוטומטית)
+"""
+import asyncio
+from sqlalchemy.orm import Session
+from app.shared.database import SessionLocal
+from app.modules.ai.semantic_search import SemanticSearchService
+from app.shared.models import Repository
+
+
+async def backfill():
+    db: Session = SessionLocal()
+    try:
+        service = SemanticSearchService(db)
+        print(f"🔧 Embedding backend: {service.embedder.name} (dim {service.embedder.dim})")
+
+        repositories = db.query(Repository).all()
+        total = 0
+        for repo in repositories:
+            added = await service.index_repository(repo)
+            total += added
+            print(f"📁 {repo.full_name}: {added} new vectors ({service.index_key(repo)})")
+
+        print(f"\n✅ Indexed {total} items across {len(repositories)} repositories")
+    except Exception as e:
+        print(f"❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill())
@@ -0,0 +1,37 @@
+"""
+🚀 סקריפט לבניה מחדש של יומן ה-XP (xp_events) וסטטיסטיקות המשחוק
+מתוך commits, pull requests ו-reviews שכבר קיימים במסד הנתונים
+(נתונים חדשים מתעדכנים אוטומטית בזמן הסנכרון)
+
+Usage:
+    python backfill_xp_ledger.py                # every user
+    python backfill_xp_ledger.py --user 3 7     # only these users
+"""
+import argparse
+from sqlalchemy.orm import Session
+from app.shared.database import SessionLocal
+from app.modules.gamification.achievements import AchievementService
+from app.modules.gamification.ledger import XpLedger
+
+
+def backfill(user_ids=None):
+    db: Session = SessionLocal()
+    try:
+        events = XpLedger(db).rebuild(user_ids)
+        print(f"\n✅ Recorded {events} XP events")
+        unlocks = AchievementService(db).evaluate(user_ids)
+        print(f"🏆 Unlocked {unlocks} achievements")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the XP ledger and gamification stats from stored data")
+    parser.add_argument("--user", type=int, nargs="*", help="User ids (default: all)")
+    args = parser.parse_args()
+    backfill(user_ids=args.user or None)
@@ -1,73 +1,74 @@
 """
 📊 סקריפט להרצת ניתוח AI על כל הריפוזיטורים
 ומילוי טבלת ai_feedback עם מדדי ביצועים
+
+הריצה מקבילית (מספר workers), מדלגת על ריפוזיטורים ללא פעילות חדשה
+מאז הניתוח האחרון, ושומרת checkpoint כדי שאפשר יהיה להמשיך ריצה שנקטעה.
+
+שימוש:
+    python generate_ai_insights.py [--concurrency N] [--checkpoint PATH] [--force] [--no-resume]
 """
+import argparse
 import asyncio
-import sys
 from sqlalchemy.orm import Session
+from app.config.settings import settings
 from app.shared.database import SessionLocal
-from app.modules.ai.service import AIService
-from app.shared.models import Repository, User, AIFeedback
+from app.modules.ai.batch_runner import TeamAnalysisBatchRunner
+from app.shared.models import User, AIFeedback
 from datetime import datetime
 
-async def run_analysis_for_all_repos():
-    """הרץ ניתוח על כל הריפוזיטורים שיש להם נתונים"""
+
+def print_repository_result(repo, result: dict):
+    """הצג מדדים של כל מפתח בריפוזיטורי שנותח"""
+    print(f"\n{'='*60}")
+    print(f"📁 Repository: {repo.name if repo else 'Unknown'} (ID: {result.get('repository_id')})")
+    print(f"{'='*60}")
+
+    developer_stats = result.get('developer_stats') or {}
+    if not developer_stats:
+        print(f"⚠️  No developer stats found")
+        return
+
+    print(f"✅ Analysis completed for {len(developer_stats)} developers")
+    for email, stats in developer_stats.items():
+        print(f"\n   👤 {stats.get('name', 'Unknown')} ({email})")
+        print(f"      Commits: {stats.get('commits', 0)}")
+        print(f"      PRs: {stats.get('prs_created', 0)}")
+        print(f"      Reviews: {stats.get('reviews_given', 0)}")
+        print(f"      Performance Score: {stats.get('performance_score', 0)}")
+
+
+async def run_analysis_for_all_repos(concurrency: int, checkpoint_path: str, force: bool, resume: bool):
+    """הרץ ניתוח על כל הריפוזיטורים שיש להם נתונים חדשים"""
+    runner = TeamAnalysisBatchRunner(
+        SessionLocal,
+        concurrency=concurrency,
+        checkpoint_path=checkpoint_path,
+        on_result=print_repository_result
+    )
+
+    print(f"🔍 Searching for repositories with new activity (workers: {runner.concurrency})...")
+    result = await runner.run(force=force, resume=resume)
+
+    print(f"\n{'='*60}")
+    if result.resumed:
+        print(f"♻️  Resumed from checkpoint ({len(result.resumed)} repositories already done)")
+    print(f"✅ SUMMARY: Analyzed {result.developers_analyzed} developers across {len(result.analyzed)} repositories")
+    print(f"⏭️  Skipped {len(result.skipped)} up-to-date repositories")
+    if result.failed:
+        print(f"❌ Failed: {len(result.failed)} repositories (re-run to retry, checkpoint: {runner.checkpoint.path})")
+        for repo_id, error in result.failed.items():
+            print(f"   - {repo_id}: {error}")
+    print(f"{'='*60}\n")
+
+    # הצג דוגמה מהנתונים שנשמרו
     db: Session = SessionLocal()
-    
     try:
-        print("🔍 Searching for repositories with data...")
-        
-        # מצא את כל הריפוזיטורים
-        repositories = db.query(Repository).all()
-        
-        if not repositories:
-            print("❌ No repositories found in database")
-            return
-        
-        print(f"📚 Found {len(repositories)} repositories\n")
-        
-        ai_service = AIService(db)
-        total_analyzed = 0
-        
-        for repo in repositories:
-            print(f"\n{'='*60}")
-            print(f"📁 Repository: {repo.name} (ID: {repo.id})")
-            print(f"{'='*60}")
-            
-            try:
-                # הרץ ניתוח
-                result = await ai_service.analyze_repository_team(repo.id)
-                
-                if result and 'developer_stats' in result:
-                    num_devs = len(result['developer_stats'])
-                    print(f"✅ Analysis completed for {num_devs} developers")
-                    
-                    # הצג מדדים של כל מפתח
-                    for email, stats in result['developer_stats'].items():
-                        print(f"\n   👤 {stats.get('name', 'Unknown')} ({email})")
-                        print(f"      Commits: {stats.get('commits', 0)}")
-                        print(f"      PRs: {stats.get('prs_created', 0)}")
-                        print(f"      Reviews: {stats.get('reviews_given', 0)}")
-                        print(f"      Performance Score: {stats.get('performance_score', 0)}")
-                    
-                    total_analyzed += num_devs
-                else:
-                    print(f"⚠️  No developer stats found")
-                    
-            except Exception as e:
-                print(f"❌ Error analyzing repository {repo.name}: {e}")
-                continue
-        
-        print(f"\n{'='*60}")
-        print(f"✅ SUMMARY: Analyzed {total_analyzed} developers across {len(repositories)} repositories")
-        print(f"{'='*60}\n")
-        
-        # הצג דוגמה מהנתונים שנשמרו
         print("📊 Sample of saved AI feedback:")
         recent_feedback = db.query(AIFeedback).filter(
             AIFeedback.feedback_type.in_(['team_analysis', 'auto_analysis'])
         ).order_by(AIFeedback.created_at.desc()).limit(5).all()
-        
+
         for i, fb in enumerate(recent_feedback, 1):
             user = db.query(User).filter(User.id == fb.user_id).first()
             print(f"\n{i}. User: {user.username if user else 'Unknown'}")
@@ -76,7 +77,6 @@ async def run_analysis_for_all_repos():
             print(f"   Effort Score: {fb.effort_score}")
             print(f"   Velocity Score: {fb.velocity_score}")
             print(f"   Created: {fb.created_at}")
-        
     except Exception as e:
         print(f"❌ Fatal error: {e}")
         import traceback
@@ -84,13 +84,30 @@ async def run_analysis_for_all_repos():
     finally:
         db.close()
 
+
 def main():
+    parser = argparse.ArgumentParser(description="Run AI team analysis for all repositories")
+    parser.add_argument("--concurrency", type=int, default=settings.AI_BATCH_CONCURRENCY,
+                        help="Number of repositories analyzed in parallel")
+    parser.add_argument("--checkpoint", default=settings.AI_BATCH_CHECKPOINT_PATH,
+                        help="Checkpoint file used to resume an interrupted run")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-analyze every repository, even if nothing changed")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Ignore an existing checkpoint and start a fresh run")
+    args = parser.parse_args()
+
     print("🚀 Starting AI Analysis...")
     print(f"⏰ Time: {datetime.now()}\n")
-    
+
     # הרץ את הניתוח
-    asyncio.run(run_analysis_for_all_repos())
-    
+    asyncio.run(run_analysis_for_all_repos(
+        concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint,
+        force=args.force,
+        resume=not args.no_resume
+    ))
+
     print("\n✅ Done!")
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+"""add ai feedback history indexes
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Covering indexes for keyset pagination of /ai/feedback/history
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_ai_feedback_created_id
+        ON ai_feedback (created_at, id) INCLUDE (feedback_type)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_ai_feedback_repo_created_id
+        ON ai_feedback (repository_id, created_at, id) INCLUDE (feedback_type)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_ai_feedback_user_created_id
+        ON ai_feedback (user_id, created_at, id) INCLUDE (feedback_type)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_ai_feedback_user_created_id")
+    op.execute("DROP INDEX IF EXISTS ix_ai_feedback_repo_created_id")
+    op.execute("DROP INDEX IF EXISTS ix_ai_feedback_created_id")
@@ -0,0 +1,105 @@
+"""add timeline events
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 12:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS timeline_events (
+            id SERIAL PRIMARY KEY,
+            space_id INTEGER REFERENCES spaces(id),
+            repository_id INTEGER REFERENCES repositories(id),
+            type VARCHAR,
+            occurred_at TIMESTAMP NOT NULL,
+            actor VARCHAR,
+            action VARCHAR,
+            title TEXT,
+            target VARCHAR,
+            source_key VARCHAR UNIQUE,
+            meta JSON,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_timeline_events_id ON timeline_events(id)")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_timeline_space_occurred
+        ON timeline_events (space_id, occurred_at DESC, id DESC)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_timeline_space_type_occurred
+        ON timeline_events (space_id, type, occurred_at DESC, id DESC)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_timeline_repo_occurred
+        ON timeline_events (repository_id, occurred_at DESC, id DESC)
+    """)
+
+    # Backfill from the source tables (same mapping as TimelineService)
+    op.execute("""
+        INSERT INTO timeline_events (space_id, repository_id, type, occurred_at, actor, action, title, target, source_key)
+        SELECT r.space_id, c.repository_id, 'commit', c.committed_date, c.author_name, 'pushed',
+               split_part(c.message, E'\\n', 1), left(c.sha, 7), 'commit_' || c.id
+        FROM commits c JOIN repositories r ON r.id = c.repository_id
+        WHERE c.committed_date IS NOT NULL
+        ON CONFLICT (source_key) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO timeline_events (space_id, repository_id, type, occurred_at, actor, action, title, target, source_key)
+        SELECT r.space_id, p.repository_id, 'pr', p.created_at, p.author,
+               CASE WHEN p.merged_at IS NOT NULL THEN 'merged' ELSE p.state END,
+               p.title, '#' || p.number, 'pr_' || p.id
+        FROM pull_requests p JOIN repositories r ON r.id = p.repository_id
+        WHERE p.created_at IS NOT NULL
+        ON CONFLICT (source_key) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO timeline_events (space_id, repository_id, type, occurred_at, actor, action, title, target, source_key)
+        SELECT r.space_id, i.repository_id, 'issue', i.created_at, i.author, i.state,
+               i.title, '#' || i.number, 'issue_' || i.id
+        FROM issues i JOIN repositories r ON r.id = i.repository_id
+        WHERE i.created_at IS NOT NULL
+        ON CONFLICT (source_key) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO timeline_events (space_id, repository_id, type, occurred_at, actor, action, title, target, source_key)
+        SELECT r.space_id, rel.repository_id, 'release', COALESCE(rel.published_at, rel.created_at), NULL,
+               CASE WHEN rel.published_at IS NOT NULL THEN 'published' ELSE 'created' END,
+               COALESCE(rel.name, rel.tag_name), rel.tag_name, 'release_' || rel.id
+        FROM releases rel JOIN repositories r ON r.id = rel.repository_id
+        WHERE COALESCE(rel.published_at, rel.created_at) IS NOT NULL
+        ON CONFLICT (source_key) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO timeline_events (space_id, repository_id, type, occurred_at, actor, action, title, target, source_key)
+        SELECT r.space_id, d.repository_id, 'deploy', d.created_at, NULL, d.state,
+               COALESCE(d.description, 'Deployment to ' || d.environment), d.environment, 'deployment_' || d.id
+        FROM deployments d JOIN repositories r ON r.id = d.repository_id
+        WHERE d.created_at IS NOT NULL
+        ON CONFLICT (source_key) DO NOTHING
+    """)
+    op.execute("""
+        INSERT INTO timeline_events (space_id, repository_id, type, occurred_at, actor, action, title, target, source_key)
+        SELECT r.space_id, a.repository_id,
+               CASE WHEN a.type IN ('PullRequestReviewEvent', 'PullRequestReviewCommentEvent') THEN 'review'
+                    ELSE replace(lower(a.type), 'event', '') END,
+               a.created_at, a.user_login, a.action, a.description, a.title, 'activity_' || a.id
+        FROM activities a JOIN repositories r ON r.id = a.repository_id
+        WHERE a.created_at IS NOT NULL
+          AND a.type NOT IN ('PushEvent', 'PullRequestEvent', 'IssuesEvent', 'ReleaseEvent', 'DeploymentEvent')
+        ON CONFLICT (source_key) DO NOTHING
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('timeline_events')
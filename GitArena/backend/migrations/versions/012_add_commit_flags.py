@@ -0,0 +1,29 @@
+"""add commit classification flags
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CommitFlag bitmask set at ingest; existing rows: python backfill_commit_flags.py
+    op.execute("ALTER TABLE commits ADD COLUMN IF NOT EXISTS flags INTEGER")
+    # Flag counts per repository/date range become index-only scans
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_commits_repo_date_flags
+        ON commits (repository_id, committed_date) INCLUDE (flags)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_commits_repo_date_flags")
+    op.execute("ALTER TABLE commits DROP COLUMN IF EXISTS flags")
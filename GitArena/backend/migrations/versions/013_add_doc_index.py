@@ -0,0 +1,46 @@
+"""add documentation index tables
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Maintained at ingest; existing repositories: python backfill_commit_flags.py
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS repository_doc_index (
+            repository_id INTEGER PRIMARY KEY REFERENCES repositories(id),
+            docs_touched_at TIMESTAMP,
+            readme_touched_at TIMESTAMP,
+            contributing_touched_at TIMESTAMP,
+            license_touched_at TIMESTAMP,
+            has_readme BOOLEAN DEFAULT FALSE,
+            has_contributing BOOLEAN DEFAULT FALSE,
+            has_license BOOLEAN DEFAULT FALSE,
+            updated_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    # Primary key (repository_id, day) serves the date-range sums
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS doc_commits_daily (
+            repository_id INTEGER NOT NULL REFERENCES repositories(id),
+            day DATE NOT NULL,
+            doc_commits INTEGER DEFAULT 0,
+            total_commits INTEGER DEFAULT 0,
+            PRIMARY KEY (repository_id, day)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS doc_commits_daily")
+    op.execute("DROP TABLE IF EXISTS repository_doc_index")
@@ -0,0 +1,53 @@
+"""add PR commit linkage and daily DORA aggregates
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE pull_requests ADD COLUMN IF NOT EXISTS first_commit_at TIMESTAMP")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS pull_request_commits (
+            id SERIAL PRIMARY KEY,
+            pull_request_id INTEGER NOT NULL REFERENCES pull_requests(id),
+            sha VARCHAR NOT NULL,
+            authored_at TIMESTAMP,
+            CONSTRAINT uq_pull_request_commits_pr_sha UNIQUE (pull_request_id, sha)
+        )
+    """)
+    # Day recounts read merged PRs and deployments per repository by date
+    op.execute("CREATE INDEX IF NOT EXISTS ix_pull_requests_repo_merged ON pull_requests (repository_id, merged_at)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_deployments_repo_created ON deployments (repository_id, created_at)")
+    # Maintained at ingest; existing data: python backfill_dora.py
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS dora_daily (
+            repository_id INTEGER NOT NULL REFERENCES repositories(id),
+            day DATE NOT NULL,
+            deployments INTEGER DEFAULT 0,
+            failed_deployments INTEGER DEFAULT 0,
+            merged_prs INTEGER DEFAULT 0,
+            lead_time_seconds DOUBLE PRECISION DEFAULT 0,
+            restored_incidents INTEGER DEFAULT 0,
+            restore_seconds DOUBLE PRECISION DEFAULT 0,
+            fix_commits INTEGER DEFAULT 0,
+            PRIMARY KEY (repository_id, day)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS dora_daily")
+    op.execute("DROP INDEX IF EXISTS ix_deployments_repo_created")
+    op.execute("DROP INDEX IF EXISTS ix_pull_requests_repo_merged")
+    op.execute("DROP TABLE IF EXISTS pull_request_commits")
+    op.execute("ALTER TABLE pull_requests DROP COLUMN IF EXISTS first_commit_at")
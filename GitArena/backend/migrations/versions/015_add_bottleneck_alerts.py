@@ -0,0 +1,51 @@
+"""add PR review aggregates and bottleneck alerts
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19 17:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Review aggregates, maintained at ingest from reviews
+    op.execute("ALTER TABLE pull_requests ADD COLUMN IF NOT EXISTS review_count INTEGER DEFAULT 0")
+    op.execute("ALTER TABLE pull_requests ADD COLUMN IF NOT EXISTS first_review_at TIMESTAMP")
+    op.execute("ALTER TABLE pull_requests ADD COLUMN IF NOT EXISTS last_activity_at TIMESTAMP")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_pull_requests_repo_state ON pull_requests (repository_id, state)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_reviews_pr_submitted ON reviews (pull_request_id, submitted_at)")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS bottleneck_alerts (
+            id SERIAL PRIMARY KEY,
+            pull_request_id INTEGER NOT NULL REFERENCES pull_requests(id),
+            repository_id INTEGER NOT NULL REFERENCES repositories(id),
+            rule VARCHAR NOT NULL,
+            severity VARCHAR NOT NULL,
+            state VARCHAR DEFAULT 'open',
+            opened_at TIMESTAMP DEFAULT NOW(),
+            resolved_at TIMESTAMP,
+            evaluated_at TIMESTAMP DEFAULT NOW(),
+            details JSON,
+            CONSTRAINT uq_bottleneck_alerts_pr_rule UNIQUE (pull_request_id, rule)
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_bottleneck_alerts_repo_state
+        ON bottleneck_alerts (repository_id, state)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS bottleneck_alerts")
+    op.execute("DROP INDEX IF EXISTS ix_reviews_pr_submitted")
+    op.execute("DROP INDEX IF EXISTS ix_pull_requests_repo_state")
+    op.execute("ALTER TABLE pull_requests DROP COLUMN IF EXISTS last_activity_at")
+    op.execute("ALTER TABLE pull_requests DROP COLUMN IF EXISTS first_review_at")
+    op.execute("ALTER TABLE pull_requests DROP COLUMN IF EXISTS review_count")
@@ -0,0 +1,41 @@
+"""add commit_files (per-file commit data)
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19 18:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Written at ingest from diff_data; existing commits: python backfill_commit_files.py
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS commit_files (
+            id SERIAL PRIMARY KEY,
+            commit_id INTEGER NOT NULL REFERENCES commits(id),
+            repository_id INTEGER NOT NULL REFERENCES repositories(id),
+            path VARCHAR NOT NULL,
+            status VARCHAR,
+            additions INTEGER DEFAULT 0,
+            deletions INTEGER DEFAULT 0,
+            committed_date TIMESTAMP
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_commit_files_commit ON commit_files (commit_id)")
+    # Incremental reads past a watermark, and history per path
+    op.execute("CREATE INDEX IF NOT EXISTS ix_commit_files_repo_id ON commit_files (repository_id, id)")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_commit_files_repo_path_date
+        ON commit_files (repository_id, path, committed_date)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS commit_files")
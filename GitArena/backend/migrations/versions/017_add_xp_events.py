@@ -0,0 +1,35 @@
+"""add xp_events (XP ledger)
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19 19:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Written at ingest; existing history and stats: python backfill_xp_ledger.py
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS xp_events (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            source VARCHAR NOT NULL,
+            source_id INTEGER NOT NULL,
+            xp INTEGER NOT NULL,
+            occurred_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT NOW(),
+            CONSTRAINT uq_xp_events_source UNIQUE (source, source_id)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_xp_events_user_occurred ON xp_events (user_id, occurred_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS xp_events")
@@ -0,0 +1,47 @@
+"""achievement rules and unique unlocks
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19 20:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+# Default badges were seeded with condition_type 'manual'
+RULES = [
+    ("Early Adopter", "joined", 1),
+    ("Commit Master", "commits_count", 100),
+    ("Code Reviewer", "reviews_count", 50),
+    ("Team Player", "collaborators", 10),
+    ("Streak Master", "streak_days", 30),
+    ("Repository King", "repo_count", 20),
+]
+
+
+def upgrade() -> None:
+    for title, condition_type, condition_value in RULES:
+        op.execute(f"""
+            UPDATE achievements SET condition_type = '{condition_type}', condition_value = {condition_value}
+            WHERE title = '{title}' AND condition_type = 'manual'
+        """)
+    # Unlocks are inserted idempotently: keep the first of any duplicates
+    op.execute("""
+        DELETE FROM user_achievements a USING user_achievements b
+        WHERE a.user_id = b.user_id AND a.achievement_id = b.achievement_id AND a.id > b.id
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_user_achievements_user_achievement
+        ON user_achievements (user_id, achievement_id)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_user_achievements_user_achievement")
+    for title, _, _ in RULES:
+        op.execute(f"UPDATE achievements SET condition_type = 'manual', condition_value = 0 WHERE title = '{title}'")
@@ -0,0 +1,26 @@
+"""add quest starts_at / ends_at
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19 21:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Progress counts activity inside the window; existing quests start at creation
+    op.execute("ALTER TABLE quests ADD COLUMN IF NOT EXISTS starts_at TIMESTAMP")
+    op.execute("ALTER TABLE quests ADD COLUMN IF NOT EXISTS ends_at TIMESTAMP")
+    op.execute("UPDATE quests SET starts_at = created_at WHERE starts_at IS NULL")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE quests DROP COLUMN IF EXISTS ends_at")
+    op.execute("ALTER TABLE quests DROP COLUMN IF EXISTS starts_at")
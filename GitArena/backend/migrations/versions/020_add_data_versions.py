@@ -0,0 +1,31 @@
+"""add data_versions (ETag counters)
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-19 22:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rows are created on the first bump; a missing row reads as version 0
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope VARCHAR(16) NOT NULL,
+            scope_id INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT NOW(),
+            PRIMARY KEY (scope, scope_id)
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS data_versions")
@@ -0,0 +1,27 @@
+"""add newest-first commit_files index for directory last-commit lookups
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-19 20:00:00
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # A "path LIKE 'dir/%'" prefix can't use the path index under a non-C collation,
+    # so the latest commit under a directory is found by walking the repository's files newest first
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_commit_files_repo_date
+        ON commit_files (repository_id, committed_date, id)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_commit_files_repo_date")
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config.settings import settings
+from app.modules.analytics.bottlenecks import clear_evaluation_cache
+from app.modules.analytics.collaboration import clear_incidence_cache
+from app.modules.analytics.quests import clear_series_cache
+from app.modules.github.cache import clear_proxy_cache
+from app.modules.github.tree_index import clear_tree_indexes
+from app.shared.database import Base
+from app.shared.scope import clear_scope_cache
+
+# One in-memory database shared by every session of a test (StaticPool keeps a single connection)
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def session_factory():
+    """Session factory bound to the test database, for code that opens its own sessions"""
+    return TestingSessionLocal
+
+
+@pytest.fixture
+def db_session():
+    """Create test database session"""
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(autouse=True)
+def _clear_scope_cache():
+    """Test databases reuse ids, so cached membership scopes (and other per-id caches) must not leak between tests"""
+    clear_scope_cache()
+    clear_evaluation_cache()
+    clear_incidence_cache()
+    clear_series_cache()
+    clear_proxy_cache()
+    clear_tree_indexes()
+    yield
+    clear_scope_cache()
+    clear_evaluation_cache()
+    clear_incidence_cache()
+    clear_series_cache()
+    clear_proxy_cache()
+    clear_tree_indexes()
+
+
+@pytest.fixture(autouse=True)
+def _analytics_snapshot_dir(tmp_path, monkeypatch):
+    """Keep commit column snapshots and the GitHub proxy cache out of the working directory"""
+    monkeypatch.setattr(settings, "ANALYTICS_SNAPSHOT_DIR", str(tmp_path / "analytics"))
+    monkeypatch.setattr(settings, "GITHUB_CACHE_DIR", str(tmp_path / "github_cache"))
@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.modules.gamification.achievements import DEFAULT_ACHIEVEMENTS, AchievementService
+from app.modules.github.service import GitHubService
+from app.modules.spaces.repository import SpaceRepository
+from app.shared.models import (
+    Achievement, GamificationStats, Repository, Space, SpaceMember, User, UserAchievement, XpEvent
+)
+
+
+def test_achievements_unlock_in_bulk_and_once(db_session):
+    users = [User(github_id=str(i), username=name) for i, name in enumerate(["ana", "ben", "cai"])]
+    db_session.add_all(users)
+    db_session.flush()
+    ana, ben, cai = users
+    space = Space(name="team", owner_id=ana.id)
+    db_session.add(space)
+    db_session.flush()
+    db_session.add_all([SpaceMember(space_id=space.id, user_id=u.id, role="member") for u in (ben, cai)])
+    db_session.add(Repository(github_id="r1", name="api", full_name="o/api", user_id=ben.id))
+    db_session.add_all([
+        GamificationStats(user_id=ana.id, xp=0, level=1, streak=3),
+        GamificationStats(user_id=cai.id, xp=0, level=1, streak=1),
+    ])
+    now = datetime.utcnow()
+    db_session.add_all(
+        [XpEvent(user_id=ana.id, source="commit", source_id=i, xp=10, occurred_at=now) for i in range(3)]
+        + [XpEvent(user_id=cai.id, source="commit", source_id=9, xp=10, occurred_at=now),
+           XpEvent(user_id=cai.id, source="review", source_id=1, xp=30, occurred_at=now)]
+    )
+    rules = {
+        "Committer": ("commits_count", 2),
+        "Reviewer": ("reviews_count", 1),
+        "Team": ("collaborators", 2),
+        "Streak": ("streak_days", 2),
+        "Owner": ("repo_count", 1),
+        "Hand-picked": ("manual", 0),
+    }
+    db_session.add_all([
+        Achievement(title=title, description=title, icon="*", xp_reward=0, condition_type=kind, condition_value=value)
+        for title, (kind, value) in rules.items()
+    ])
+    db_session.commit()
+
+    service = AchievementService(db_session)
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        assert service.evaluate() == 7
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    # One query per condition type, whatever the number of users
+    assert len(statements) <= len(rules) + 4
+
+    unlocked = {
+        (username, title)
+        for username, title in db_session.query(User.username, Achievement.title).join(
+            UserAchievement, UserAchievement.user_id == User.id
+        ).join(Achievement, Achievement.id == UserAchievement.achievement_id).all()
+    }
+    assert unlocked == {
+        ("ana", "Committer"), ("ana", "Team"), ("ana", "Streak"),
+        ("ben", "Team"), ("ben", "Owner"),
+        ("cai", "Reviewer"), ("cai", "Team"),
+    }
+
+    assert service.evaluate() == 0
+    assert service.evaluate([ana.id]) == 0
+    assert db_session.query(UserAchievement).count() == 7
+
+
+def test_default_achievements_are_seeded_with_rules(db_session):
+    db_session.add(User(github_id="1", username="ana"))
+    db_session.commit()
+
+    assert AchievementService(db_session).evaluate() == 1  # Early Adopter
+    assert db_session.query(Achievement).count() == len(DEFAULT_ACHIEVEMENTS)
+    assert db_session.query(Achievement).filter(Achievement.condition_type == "manual").count() == 0
+
+
+def test_membership_and_repository_syncs_unlock_achievements(db_session, monkeypatch):
+    users = [User(github_id=str(i), username=name) for i, name in enumerate(["ana", "ben", "cai"])]
+    db_session.add_all(users)
+    db_session.flush()
+    ana, ben, cai = users
+    space = Space(name="team", owner_id=ana.id)
+    db_session.add(space)
+    db_session.flush()
+    db_session.add_all([
+        Achievement(title="Team", description="Team", icon="*", xp_reward=0,
+                    condition_type="collaborators", condition_value=2),
+        Achievement(title="Owner", description="Owner", icon="*", xp_reward=0,
+                    condition_type="repo_count", condition_value=2),
+    ])
+    db_session.commit()
+
+    def unlocked():
+        return {
+            (username, title)
+            for username, title in db_session.query(User.username, Achievement.title).join(
+                UserAchievement, UserAchievement.user_id == User.id
+            ).join(Achievement, Achievement.id == UserAchievement.achievement_id).all()
+        }
+
+    spaces = SpaceRepository(db_session)
+    spaces.add_member(space.id, ben.id, role="member")
+    assert unlocked() == set()
+    # cai joining gives everyone in the space two collaborators
+    spaces.add_member(space.id, cai.id, role="member")
+    assert unlocked() == {("ana", "Team"), ("ben", "Team"), ("cai", "Team")}
+
+    async def fetch_user_repositories(service, access_token):
+        return [
+            {"id": i, "name": f"repo{i}", "full_name": f"ben/repo{i}", "html_url": f"https://github.com/ben/repo{i}"}
+            for i in (1, 2)
+        ]
+
+    monkeypatch.setattr(GitHubService, "fetch_user_repositories", fetch_user_repositories)
+    asyncio.run(GitHubService(db_session).sync_repositories(ben.id, "token"))
+    assert ("ben", "Owner") in unlocked()
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.modules.ai.batch_runner import BatchCheckpoint, TeamAnalysisBatchRunner
+from app.shared.models import AIFeedback, Commit, Repository, User
+
+
+def test_find_stale_repositories(db_session, session_factory, tmp_path):
+    """Only repositories with activity newer than their last analysis are stale"""
+    now = datetime.utcnow()
+    user = User(github_id="1", username="dev", email="dev@example.com")
+    db_session.add(user)
+    db_session.flush()
+
+    fresh, stale, never, empty = (
+        Repository(github_id=str(i), name=f"repo{i}", full_name=f"o/repo{i}", user_id=user.id)
+        for i in range(4)
+    )
+    db_session.add_all([fresh, stale, never, empty])
+    db_session.flush()
+
+    db_session.add_all([
+        Commit(sha="a", repository_id=fresh.id, committed_date=now - timedelta(days=2)),
+        Commit(sha="b", repository_id=stale.id, committed_date=now - timedelta(hours=1)),
+        Commit(sha="c", repository_id=never.id, committed_date=now - timedelta(days=5)),
+        AIFeedback(user_id=user.id, repository_id=fresh.id, feedback_type="team_analysis",
+                   content="{}", created_at=now - timedelta(days=1)),
+        AIFeedback(user_id=user.id, repository_id=stale.id, feedback_type="team_analysis",
+                   content="{}", created_at=now - timedelta(days=1)),
+    ])
+    db_session.commit()
+
+    runner = TeamAnalysisBatchRunner(session_factory, checkpoint_path=str(tmp_path / "cp.json"))
+    to_analyze, up_to_date = runner.find_stale_repositories(db_session)
+
+    assert to_analyze == [stale.id, never.id]
+    assert sorted(up_to_date) == sorted([fresh.id, empty.id])
+
+    forced, _ = runner.find_stale_repositories(db_session, force=True)
+    assert forced == [fresh.id, stale.id, never.id, empty.id]
+
+
+def test_checkpoint_resume(tmp_path):
+    """A reloaded checkpoint only returns the repositories not yet completed"""
+    path = str(tmp_path / "checkpoint.json")
+    checkpoint = BatchCheckpoint(path)
+    checkpoint.start([1, 2, 3])
+    checkpoint.mark_completed(1)
+    checkpoint.mark_failed(2, "boom")
+
+    reloaded = BatchCheckpoint(path).load()
+    assert reloaded.remaining() == [2, 3]
+    assert reloaded.failed == {"2": "boom"}
+
+    reloaded.clear()
+    assert not reloaded.exists()
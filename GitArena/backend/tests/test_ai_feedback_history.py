@@ -0,0 +1,83 @@
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.main import app
+from app.modules.users.controller import get_current_user
+from app.shared.database import get_db
+from app.shared.models import AIFeedback, Repository, User
+
+
+@pytest.fixture
+def client(db_session):
+    """Create test client with an authenticated user"""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def seed(db_session, count=5):
+    user = User(github_id="1", username="dev", email="dev@example.com")
+    db_session.add(user)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id)
+    db_session.add(repo)
+    db_session.flush()
+    # Two rows share a timestamp to exercise the id tie-breaker
+    base = datetime(2026, 1, 1)
+    times = [base + timedelta(hours=i) for i in range(count - 1)] + [base + timedelta(hours=count - 2)]
+    for created_at in times:
+        db_session.add(AIFeedback(user_id=user.id, repository_id=repo.id, feedback_type="team_analysis",
+                                  content=json.dumps({"stats": {"commits": 3}}), created_at=created_at))
+    db_session.commit()
+    return repo
+
+
+def test_feedback_history_cursor_pagination(client, db_session):
+    repo = seed(db_session)
+    seen = []
+    cursor = None
+    while True:
+        params = {"repository_id": repo.id, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get("/api/ai/feedback/history", params=params).json()
+        seen.extend(a["id"] for a in body["analyses"])
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+
+    assert sorted(seen) == [1, 2, 3, 4, 5]
+    assert len(set(seen)) == 5
+    assert seen[:2] == [5, 4]
+
+
+def test_feedback_history_content_is_opt_in_and_eager_loaded(client, db_session):
+    seed(db_session)
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        slim = client.get("/api/ai/feedback/history", params={"limit": 5}).json()
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+
+    assert "content" not in slim["analyses"][0]
+    assert slim["analyses"][0]["user"]["username"] == "dev"
+    assert slim["analyses"][0]["repository"]["name"] == "repo"
+    assert len(statements) == 1
+
+    full = client.get("/api/ai/feedback/history", params={"limit": 1, "include_content": True}).json()
+    assert full["analyses"][0]["content"]["stats"]["commits"] == 3
+
+
+def test_feedback_history_rejects_bad_cursor(client, db_session):
+    assert client.get("/api/ai/feedback/history", params={"cursor": "nope"}).status_code == 400
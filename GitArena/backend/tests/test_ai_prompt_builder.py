@@ -0,0 +1,51 @@
+from app.modules.ai.prompt_builder import (
+    estimate_tokens,
+    summarize_code,
+    summarize_developer_stats,
+    summarize_diff,
+)
+
+
+def test_summarize_diff_keeps_top_files_by_churn():
+    files = [
+        {"filename": f"file{i}.py", "additions": i, "deletions": 0, "patch": "+line\n" * 200}
+        for i in range(30)
+    ]
+    summary = summarize_diff(files, max_tokens=500, top_n=5)
+
+    assert "file29.py" in summary
+    assert "file0.py" not in summary
+    assert "25 more files" in summary
+    assert estimate_tokens(summary) <= 500
+
+
+def test_summarize_code_detects_unified_diff():
+    diff = "".join(
+        f"diff --git a/src/m{i}.py b/src/m{i}.py\n--- a/src/m{i}.py\n+++ b/src/m{i}.py\n@@ -1 +1 @@\n"
+        + ("+x = 1\n" * (i + 1) * 50)
+        for i in range(10)
+    )
+    summary = summarize_code(diff, max_tokens=400)
+
+    assert "src/m9.py (modified, +500/-0)" in summary
+    assert estimate_tokens(summary) <= 400
+
+
+def test_summarize_code_returns_small_input_unchanged():
+    assert summarize_code("print('hi')", max_tokens=100) == "print('hi')"
+
+
+def test_summarize_developer_stats_aggregates_the_rest():
+    stats = {
+        f"dev{i}@x.com": {"name": f"dev{i}", "commits": i, "prs_created": 0, "prs_merged": 0,
+                          "reviews_given": 0, "additions": 1, "deletions": 1, "performance_score": i}
+        for i in range(100)
+    }
+    summary = summarize_developer_stats(
+        stats, max_tokens=200, format_developer=lambda email, s: f"\n{s['name']} ({email}): {s['commits']}\n"
+    )
+
+    assert "dev99" in summary
+    assert "dev0 " not in summary
+    assert "(aggregated)" in summary
+    assert estimate_tokens(summary) <= 200
@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.modules.ai.embeddings import HashingEmbedder
+from app.modules.ai.semantic_search import SemanticSearchService
+from app.modules.ai.vector_index import KIND_COMMIT, KIND_PULL_REQUEST, VectorIndex
+from app.modules.github.repository import GitHubRepository
+from app.modules.users.controller import get_current_user
+from app.shared.database import get_db
+from app.shared.models import Commit, PullRequest, Repository, Space, User
+
+
+def random_unit_vectors(n, dim, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_hashing_embedder_is_deterministic_and_normalised():
+    embedder = HashingEmbedder(dim=64)
+    first = asyncio.run(embedder.embed(["fix login bug", ""]))
+    second = asyncio.run(embedder.embed(["fix login bug", ""]))
+
+    assert np.array_equal(first, second)
+    assert np.isclose(np.linalg.norm(first[0]), 1.0)
+    assert not first[1].any()
+
+
+def test_vector_index_append_dedupe_and_search(tmp_path):
+    vectors = random_unit_vectors(50, 16)
+    index = VectorIndex(str(tmp_path), dim=16, backend="test")
+
+    assert index.add(list(range(50)), [KIND_COMMIT] * 50, [1] * 50, vectors) == 50
+    # Same ids again are skipped
+    assert index.add(list(range(10)), [KIND_COMMIT] * 10, [1] * 10, vectors[:10]) == 0
+
+    reopened = VectorIndex(str(tmp_path), dim=16, backend="test")
+    assert reopened.count == 50
+    row_id, kind, score = reopened.search(vectors[7], k=3)[0]
+    assert (row_id, kind) == (7, KIND_COMMIT)
+    assert score == pytest.approx(1.0, abs=1e-5)
+    assert reopened.search(vectors[7], k=3, kind=KIND_PULL_REQUEST) == []
+
+
+def test_vector_index_ivf_finds_exact_match(tmp_path):
+    vectors = random_unit_vectors(400, 16, seed=1)
+    index = VectorIndex(str(tmp_path), dim=16, backend="test", ivf_min_vectors=300, ivf_nprobe=4)
+    index.add(list(range(400)), [KIND_COMMIT] * 400, [1] * 400, vectors)
+
+    assert index.meta["ivf_count"] == 400
+    extra = random_unit_vectors(5, 16, seed=2)
+    index.add(list(range(400, 405)), [KIND_COMMIT] * 5, [1] * 5, extra)
+
+    assert index.search(vectors[123], k=1)[0][0] == 123
+    assert index.search(extra[2], k=1)[0][0] == 402
+
+
+def test_vector_index_readers_survive_retraining_and_resets(tmp_path):
+    vectors = random_unit_vectors(400, 16, seed=3)
+    writer = VectorIndex(str(tmp_path), dim=16, backend="test", ivf_min_vectors=100)
+    writer.add(list(range(100)), [KIND_COMMIT] * 100, [1] * 100, vectors[:100])
+    reader = VectorIndex(str(tmp_path), dim=16, backend="test", ivf_min_vectors=100)
+    assert reader.meta["ivf_nlist"] == 10
+
+    # The index doubled: IVF is re-trained with more lists into a new directory
+    writer.add(list(range(100, 400)), [KIND_COMMIT] * 300, [1] * 300, vectors[100:])
+    assert writer.meta["ivf_nlist"] == 20
+    assert reader.search(vectors[5], k=1)[0][0] == 5
+
+    # Another embedding backend starts a new generation instead of deleting live files
+    VectorIndex(str(tmp_path), dim=16, backend="other").add([1], [KIND_COMMIT], [1], vectors[:1])
+    assert reader.search(vectors[5], k=1)[0][0] == 5
+    assert VectorIndex(str(tmp_path), dim=16, backend="test").count == 0
+
+
+def test_semantic_search_over_space(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.modules.ai.semantic_search.settings.EMBEDDING_INDEX_DIR", str(tmp_path))
+
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.flush()
+    messages = ["fix login redirect bug", "add dark mode toggle", "update readme badges"]
+    commits = [
+        Commit(sha=str(i), message=m, repository_id=repo.id, committed_date=datetime.utcnow())
+        for i, m in enumerate(messages)
+    ]
+    db_session.add_all(commits)
+    db_session.add(PullRequest(github_id="p1", number=1, title="Dark mode", description="toggle for dark mode",
+                               state="open", author="dev", repository_id=repo.id))
+    db_session.commit()
+
+    service = SemanticSearchService(db_session, embedder=HashingEmbedder(dim=128))
+    assert asyncio.run(service.index_repository(repo)) == 4
+    assert asyncio.run(service.index_repository(repo)) == 0
+
+    results = asyncio.run(service.search("login bug", space_id=space.id, k=2))
+    assert results[0]["type"] == "commit"
+    assert results[0]["message"] == "fix login redirect bug"
+
+    prs = asyncio.run(service.search("dark mode", repository_id=repo.id, kind=KIND_PULL_REQUEST))
+    assert [r["number"] for r in prs] == [1]
+
+
+def test_search_by_repository_requires_access(db_session):
+    owner = User(github_id="1", username="owner")
+    outsider = User(github_id="2", username="outsider")
+    db_session.add_all([owner, outsider])
+    db_session.flush()
+    space = Space(name="team", owner_id=owner.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=owner.id, space_id=space.id)
+    unlinked = Repository(github_id="r2", name="solo", full_name="o/solo", user_id=owner.id)
+    db_session.add_all([repo, unlinked])
+    db_session.commit()
+
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=outsider.id)
+    try:
+        client = TestClient(app)
+        for repo_id in (repo.id, unlinked.id):
+            response = client.get("/api/ai/search", params={"q": "login", "repository_id": repo_id})
+            assert response.status_code == 403
+        assert client.get("/api/ai/search", params={"q": "login", "repository_id": 999}).status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_current_user, None)
+
+
+def _append_from_process(directory, offset):
+    vectors = random_unit_vectors(50, 16, seed=offset)
+    index = VectorIndex(directory, dim=16, backend="test")
+    for start in range(0, 50, 5):
+        ids = list(range(offset + start, offset + start + 5))
+        index.add(ids, [KIND_COMMIT] * 5, [1] * 5, vectors[start:start + 5])
+
+
+def test_vector_index_appends_from_several_processes(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_append_from_process, args=(str(tmp_path), offset)) for offset in (0, 1000)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    index = VectorIndex(str(tmp_path), dim=16, backend="test")
+    assert index.count == 100
+    assert os.path.getsize(index._data_path("vectors.f32")) == 100 * 16 * 4
+    assert sorted(index._columns()[0]) == list(range(50)) + list(range(1000, 1050))
+
+
+def test_search_skips_repositories_that_left_the_space(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.modules.ai.semantic_search.settings.EMBEDDING_INDEX_DIR", str(tmp_path))
+    # Moves open the indexes with the configured embedder
+    monkeypatch.setattr("app.modules.ai.semantic_search.settings.EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setattr("app.modules.ai.semantic_search.settings.EMBEDDING_HASHING_DIM", 128)
+
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    first, second = Space(name="a", owner_id=user.id), Space(name="b", owner_id=user.id)
+    db_session.add_all([first, second])
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id, space_id=first.id)
+    db_session.add(repo)
+    db_session.flush()
+    db_session.add(Commit(sha="1", message="fix login redirect bug", repository_id=repo.id,
+                          committed_date=datetime.utcnow()))
+    db_session.commit()
+
+    service = SemanticSearchService(db_session, embedder=HashingEmbedder(dim=128))
+    asyncio.run(service.index_repository(repo))
+    assert len(asyncio.run(service.search("login bug", space_id=first.id))) == 1
+
+    GitHubRepository(db_session).update_repository(repo, space_id=second.id)
+    # The vector stays in space a's index, but the repository is no longer in that space
+    assert asyncio.run(service.search("login bug", space_id=first.id)) == []
+    # ... and it was copied into space b's index, so its history stays searchable there
+    assert len(asyncio.run(service.search("login bug", space_id=second.id))) == 1
+
+    GitHubRepository(db_session).update_repository(repo, space_id=None)
+    assert len(asyncio.run(service.search("login bug", repository_id=repo.id))) == 1
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.modules.ai.service import AIService
+from app.modules.ai.streaming import sse_event
+from app.modules.users.controller import get_current_user
+from app.shared.database import get_db
+from app.shared.models import AIFeedback, Commit, Repository, User
+
+
+def parse_events(raw_events):
+    events = []
+    for raw in raw_events:
+        event_line, data_line = raw.strip().split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def test_sse_event_format():
+    assert sse_event("token", {"content": "hi"}) == 'event: token\ndata: {"content": "hi"}\n\n'
+
+
+def test_stream_team_analysis_emits_stats_then_result(db_session, monkeypatch):
+    """Stats are sent first and only the final result is persisted"""
+    monkeypatch.setattr("app.modules.ai.service.settings.OPENAI_API_KEY", None)
+
+    user = User(github_id="1", username="dev", email="dev@example.com")
+    db_session.add(user)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id)
+    db_session.add(repo)
+    db_session.flush()
+    db_session.add(Commit(sha="a", repository_id=repo.id, author_name="dev",
+                          author_email="dev@example.com", committed_date=datetime.utcnow(),
+                          additions=10, deletions=2))
+    db_session.commit()
+
+    service = AIService(db_session)
+    team = service.collect_team_stats(repo.id)
+
+    async def collect():
+        return [event async for event in service.stream_repository_team_analysis(team)]
+
+    events = parse_events(asyncio.run(collect()))
+
+    assert [name for name, _ in events] == ["stats", "result"]
+    assert "dev@example.com" in events[0][1]["developer_stats"]
+    assert events[1][1]["repository_id"] == repo.id
+    assert db_session.query(AIFeedback).filter(AIFeedback.feedback_type == "team_analysis").count() == 1
+
+
+def test_collect_team_stats_missing_repository(db_session):
+    assert AIService(db_session).collect_team_stats(999) is None
+
+
+class FakeAsyncOpenAI:
+    """Streams a fixed completion in chunks, like chat.completions.create(stream=True)"""
+    tokens = ["Looks ", "good", "."]
+
+    def __init__(self, api_key=None):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        assert kwargs["stream"] is True
+
+        async def chunks():
+            for token in self.tokens:
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+        return chunks()
+
+
+def test_stream_code_review_saves_once_with_its_own_session(db_session, session_factory, monkeypatch):
+    monkeypatch.setattr("app.modules.ai.service.settings.OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr("openai.AsyncOpenAI", FakeAsyncOpenAI)
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.commit()
+    user_id = user.id
+
+    def get_test_db():
+        # Like get_db: the request session is closed before the body streams
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=user_id)
+    try:
+        response = TestClient(app).post("/api/ai/code-review/stream", json={"content": "x = 1", "context": "demo"})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_current_user, None)
+
+    events = parse_events(chunk + "\n\n" for chunk in response.text.strip().split("\n\n"))
+    assert [name for name, _ in events] == ["token", "token", "token", "result"]
+    assert "".join(data["content"] for _, data in events[:3]) == "Looks good."
+    assert events[-1][1]["feedback"] == "Looks good."
+
+    db_session.expire_all()
+    saved = db_session.query(AIFeedback).all()
+    assert len(saved) == 1
+    assert (saved[0].user_id, saved[0].feedback_type, saved[0].content) == (user_id, "code_review", "Looks good.")
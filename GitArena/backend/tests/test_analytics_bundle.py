@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.modules.analytics.service import AnalyticsService
+from app.modules.users.controller import get_current_user
+from app.shared.database import Base, get_db
+from app.shared.models import Commit, PullRequest, Repository, Space, SpaceMember, User
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    """File-backed database: bundle widgets open their own sessions from worker threads"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'bundle.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def client(db_session):
+    """Create test client with an authenticated user"""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def seed(db_session):
+    manager = User(github_id="1", username="lead", email="lead@example.com")
+    dev = User(github_id="2", username="dev", email="dev@example.com")
+    db_session.add_all([manager, dev])
+    db_session.flush()
+    space = Space(name="team", owner_id=manager.id)
+    db_session.add(space)
+    db_session.flush()
+    db_session.add(SpaceMember(space_id=space.id, user_id=dev.id, role="member"))
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=manager.id,
+                      space_id=space.id, language="Python")
+    db_session.add(repo)
+    db_session.flush()
+    now = datetime.utcnow()
+    for i in range(6):
+        db_session.add(Commit(sha=f"sha{i}", message=f"feat {i}", author_name="dev",
+                              author_email="dev@example.com", repository_id=repo.id,
+                              committed_date=now - timedelta(days=i), additions=10, deletions=2))
+    db_session.add(PullRequest(github_id="p1", number=1, title="Feature", state="closed", author="dev",
+                               repository_id=repo.id, created_at=now - timedelta(days=2),
+                               merged_at=now - timedelta(days=1)))
+    db_session.commit()
+    return space
+
+
+def test_bundle_matches_individual_widgets(client, db_session):
+    space = seed(db_session)
+    widgets = ["dora", "capacity", "leaderboard", "collaboration", "burnout"]
+
+    body = client.get("/api/analytics/bundle", params={"widgets": ",".join(widgets)}).json()
+
+    assert set(body["widgets"]) == set(widgets)
+    assert set(widgets) <= set(body["timings_ms"])
+    assert {"scope", "total"} <= set(body["timings_ms"])
+
+    service = AnalyticsService(db_session)
+    assert body["widgets"]["leaderboard"] == service.get_leaderboard(1)
+    assert body["widgets"]["capacity"] == service.get_team_capacity(1)
+    assert body["widgets"]["collaboration"] == service.get_team_collaboration(1)
+    assert body["widgets"]["leaderboard"]["entries"]
+
+    scoped = client.get("/api/analytics/bundle", params={"widgets": "leaderboard", "project_id": space.id}).json()
+    assert scoped["widgets"]["leaderboard"] == body["widgets"]["leaderboard"]
+
+
+def test_bundle_rejects_unknown_widgets_and_foreign_projects(client, db_session):
+    seed(db_session)
+    other_owner = User(github_id="3", username="other")
+    db_session.add(other_owner)
+    db_session.flush()
+    foreign = Space(name="foreign", owner_id=other_owner.id)
+    db_session.add(foreign)
+    db_session.commit()
+
+    assert client.get("/api/analytics/bundle", params={"widgets": "dora,nope"}).status_code == 400
+
+    body = client.get("/api/analytics/bundle", params={"widgets": "leaderboard", "project_id": foreign.id}).json()
+    assert body["widgets"]["leaderboard"]["entries"] == []
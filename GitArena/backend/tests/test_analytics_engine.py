@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.modules.analytics.engine import FLAG_FIX, FLAG_STRESS, CommitFrame, rolling_sum
+from app.modules.analytics.service import AnalyticsScope, AnalyticsService
+from app.shared.models import Commit, Repository, Space, User
+
+
+@pytest.fixture
+def repo_commits(db_session):
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.flush()
+
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    commits = []
+    for i in range(40):
+        commits.append(Commit(
+            sha=f"sha{i:03d}",
+            message="hotfix: broken build" if i % 10 == 0 else f"feature {i}",
+            author_name="night" if i % 2 else "day",
+            author_email="night@example.com" if i % 2 else None,
+            repository_id=repo.id,
+            committed_date=now - timedelta(hours=7 * i),
+            additions=i,
+            deletions=1
+        ))
+    db_session.add_all(commits)
+    db_session.commit()
+    return repo, commits
+
+
+def test_commit_frame_matches_python_loops(db_session, repo_commits):
+    repo, commits = repo_commits
+    frame = CommitFrame.load(db_session, [repo.id])
+
+    assert len(frame) == len(commits)
+    assert frame.hour_histogram().tolist() == np.bincount([c.committed_date.hour for c in commits], minlength=24).tolist()
+    assert frame.weekday_histogram().tolist() == np.bincount([c.committed_date.weekday() for c in commits], minlength=7).tolist()
+    assert int(frame.additions.sum()) == sum(c.additions for c in commits)
+    assert int(frame.has_flag(FLAG_FIX).sum()) == 4
+    assert int(frame.has_flag(FLAG_STRESS).sum()) == 4
+    assert frame.distinct_identities() == 2
+
+    by_author = dict(zip(frame.author_names, frame.count_by_author().tolist()))
+    assert by_author == {"day": 20, "night": 20}
+    assert int(frame.author_mask(emails=["night@example.com"]).sum()) == 20
+    assert int(frame.author_mask(names=["day"]).sum()) == 20
+
+    start = min(c.committed_date for c in commits).replace(hour=0)
+    assert frame.daily_counts(start, 15).sum() == len(commits)
+    assert rolling_sum(np.array([1, 2, 3, 4]), 2).tolist() == [1, 3, 5, 7]
+
+
+def test_service_metrics_delegate_to_engine(db_session, repo_commits):
+    repo, commits = repo_commits
+    service = AnalyticsService(db_session)
+    scope = AnalyticsScope(space_ids=[repo.space_id], repo_ids=[repo.id])
+
+    burnout = service.get_burnout_metrics(1, scope=scope)["data"]
+    recent = [c for c in commits if c.committed_date >= datetime.utcnow() - timedelta(days=30)]
+    for member in burnout["members"]:
+        mine = [c for c in recent if c.author_name == member["name"]]
+        assert member["metrics"]["weekend"] == sum(1 for c in mine if c.committed_date.weekday() >= 5)
+        assert member["metrics"]["lateNight"] == sum(1 for c in mine if c.committed_date.hour >= 22 or c.committed_date.hour < 5)
+        assert member["metrics"]["stressCommits"] == sum(1 for c in mine if "broken" in c.message)
+        assert len(member["recentStressors"]) == min(3, member["metrics"]["stressCommits"])
+
+    dora = service.get_dora_metrics(1, scope=scope)["data"]
+    assert dora["totalCommits"] == len(commits)
+    assert dora["contributorsCount"] == 2
+    assert dora["totalLoc"] == sum(c.additions - c.deletions for c in commits)
+
+    capacity = service.get_team_capacity(1, scope=scope)
+    assert capacity["active_members_count"] == 2
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config.settings import settings
+from app.modules.analytics.bottlenecks import BottleneckService
+from app.modules.analytics.service import AnalyticsScope, AnalyticsService
+from app.modules.github.repository import GitHubRepository
+from app.shared.models import BottleneckAlert, PullRequest, Repository, Space, User
+
+
+def _reviews(prefix: str, count: int, submitted_at: datetime) -> list:
+    return [
+        {"github_id": f"{prefix}{i}", "reviewer": "rev", "state": "commented", "body": None,
+         "submitted_at": submitted_at + timedelta(minutes=i)}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def team_repo(db_session):
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="api", full_name="acme/api", user_id=user.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.flush()
+    return user, space, repo
+
+
+def _alert_states(db) -> dict:
+    return {(a.pull_request_id, a.rule): a.state for a in db.query(BottleneckAlert).all()}
+
+
+def test_alerts_are_persisted_with_transitions(db_session, team_repo):
+    user, space, repo = team_repo
+
+    now = datetime.utcnow()
+    stale = PullRequest(github_id="p1", number=1, title="old", state="open", repository_id=repo.id,
+                        created_at=now - timedelta(days=10), updated_at=now - timedelta(days=1))
+    idle = PullRequest(github_id="p2", number=2, title="idle", state="open", repository_id=repo.id,
+                       created_at=now - timedelta(days=6), updated_at=now - timedelta(days=5))
+    churn = PullRequest(github_id="p3", number=3, title="busy", state="open", repository_id=repo.id,
+                        created_at=now - timedelta(days=9), updated_at=now)
+    fresh = PullRequest(github_id="p4", number=4, title="new", state="open", repository_id=repo.id,
+                        created_at=now - timedelta(hours=2), updated_at=now)
+    db_session.add_all([stale, idle, churn, fresh])
+    db_session.commit()
+
+    github = GitHubRepository(db_session)
+    github.upsert_reviews(idle, _reviews("i", 1, now - timedelta(days=5)))
+    github.upsert_reviews(churn, _reviews("c", 6, now - timedelta(days=8)))
+    github.upsert_reviews(churn, _reviews("c", 6, now - timedelta(days=8)))  # re-synced, not duplicated
+
+    bottlenecks = BottleneckService(db_session)
+    assert bottlenecks.record_pull_requests(repo, [stale, idle, churn, fresh]) == 3
+    assert churn.review_count == 6
+    assert churn.first_review_at == now - timedelta(days=8)
+
+    scope = AnalyticsScope(space_ids=[space.id], repo_ids=[repo.id])
+    result = AnalyticsService(db_session).get_bottlenecks(user.id, scope=scope)
+    assert [a["id"] for a in result["alerts"]] == [f"stale-{stale.id}", f"churn-{churn.id}", f"idle-{idle.id}"]
+    assert result["total_high_severity"] == 1 and result["total_medium_severity"] == 2
+    assert result["alerts"][0]["url"] == "https://github.com/acme/api/pull/1"
+    assert result["alerts"][0]["description"] == "Open for 10 days with no reviews."
+    assert result["alerts"][1]["metadata"]["first_review_hours"] == 24.0
+
+    # Merged -> resolved; reviewed later -> the stale alert resolves too
+    idle.state = "closed"
+    github.upsert_reviews(stale, _reviews("s", 1, now))
+    bottlenecks.record_pull_requests(repo, [stale, idle])
+    assert _alert_states(db_session) == {
+        (stale.id, "stuck_pr"): "resolved",
+        (idle.id, "inactive_pr"): "resolved",
+        (churn.id, "high_churn"): "open",
+    }
+
+    # Idle again later: the resolved row is reopened rather than duplicated
+    idle.state = "open"
+    db_session.commit()
+    bottlenecks.evaluate([repo.id])
+    assert db_session.query(BottleneckAlert).filter(BottleneckAlert.pull_request_id == idle.id).one().state == "open"
+
+
+def test_stale_pr_only_raises_the_high_severity_alert(db_session, team_repo):
+    user, space, repo = team_repo
+    now = datetime.utcnow()
+    # Old enough to be stale, and idle as well
+    pr = PullRequest(github_id="p1", number=1, title="old", state="open", repository_id=repo.id,
+                     created_at=now - timedelta(days=12), updated_at=now - timedelta(days=6))
+    db_session.add(pr)
+    db_session.commit()
+
+    assert BottleneckService(db_session).record_pull_requests(repo, [pr]) == 1
+    assert _alert_states(db_session) == {(pr.id, "stuck_pr"): "open"}
+    alert = db_session.query(BottleneckAlert).one()
+    assert alert.severity == "high"
+
+
+def test_closed_and_merged_prs_resolve_their_alerts(db_session, team_repo):
+    user, space, repo = team_repo
+    now = datetime.utcnow()
+    closed, merged = (
+        PullRequest(github_id=f"p{i}", number=i, title="idle", state="open", repository_id=repo.id,
+                    created_at=now - timedelta(days=5), updated_at=now - timedelta(days=4))
+        for i in (1, 2)
+    )
+    db_session.add_all([closed, merged])
+    db_session.commit()
+    bottlenecks = BottleneckService(db_session)
+    assert bottlenecks.record_pull_requests(repo, [closed, merged]) == 2
+
+    closed.state = "closed"
+    merged.state, merged.merged_at = "merged", now
+    db_session.commit()
+    assert bottlenecks.record_pull_requests(repo, [closed, merged]) == 0
+    assert _alert_states(db_session) == {(closed.id, "inactive_pr"): "resolved", (merged.id, "inactive_pr"): "resolved"}
+    assert all(alert.resolved_at == alert.evaluated_at for alert in db_session.query(BottleneckAlert).all())
+
+    scope = AnalyticsScope(space_ids=[space.id], repo_ids=[repo.id])
+    assert AnalyticsService(db_session).get_bottlenecks(user.id, scope=scope)["alerts"] == []
+
+
+def test_alerts_are_re_evaluated_on_read_once_due(db_session, team_repo, monkeypatch):
+    user, space, repo = team_repo
+    now = datetime.utcnow()
+    pr = PullRequest(github_id="p1", number=1, title="new", state="open", repository_id=repo.id,
+                     created_at=now - timedelta(days=1), updated_at=now)
+    db_session.add(pr)
+    db_session.commit()
+    assert BottleneckService(db_session).record_pull_requests(repo, [pr]) == 0
+
+    # The PR ages without any ingest
+    pr.created_at, pr.updated_at, pr.last_activity_at = now - timedelta(days=8), now - timedelta(days=8), None
+    db_session.commit()
+    service = AnalyticsService(db_session)
+    scope = AnalyticsScope(space_ids=[space.id], repo_ids=[repo.id])
+    assert service.get_bottlenecks(user.id, scope=scope)["alerts"] == []
+
+    # Once the evaluation interval has passed, the read evaluates the rules again
+    monkeypatch.setattr(settings, "BOTTLENECK_EVALUATION_INTERVAL_SECONDS", 0)
+    alerts = service.get_bottlenecks(user.id, scope=scope)["alerts"]
+    assert [a["id"] for a in alerts] == [f"stale-{pr.id}"]
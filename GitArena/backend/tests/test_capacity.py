@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.modules.analytics.capacity import capacity_report
+from app.modules.analytics.engine import CommitFrame
+from app.shared.models import User
+
+END = datetime(2026, 3, 1, 12)
+
+
+def rows_for(name, email, per_week):
+    """Commit rows with per_week[i] commits in week i of 12 (the last ends at END)"""
+    rows = []
+    for week, count in enumerate(per_week):
+        week_end = END - timedelta(days=7 * (len(per_week) - 1 - week))
+        rows += [(week_end - timedelta(hours=1 + i), name, email, 1, 0, 1, 0) for i in range(count)]
+    return rows
+
+
+def test_capacity_status_follows_weekly_trend(db_session):
+    ana = User(github_id="1", username="ana", email="ana@example.com")
+    db_session.add(ana)
+    db_session.commit()
+
+    frame = CommitFrame.from_rows(
+        rows_for("Ana", "ana@example.com", [3] * 12)          # one user, two git identities
+        + rows_for("ana", None, [3] * 12)
+        + rows_for("ben", "ben@example.com", [1] * 12)
+        + rows_for("cai", "cai@example.com", [0] * 8 + [1, 2, 3, 4])
+        + rows_for("dee", "dee@example.com", [10] * 8 + [1, 1, 1, 1])
+        + rows_for("eve", "eve@example.com", [0] * 10 + [1, 1])
+        + rows_for("old", "old@example.com", [5] * 6 + [0] * 6)  # inactive for 4 weeks
+    )
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        report = capacity_report(db_session, frame, end=END)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    assert len(statements) == 1  # identities resolved in one users query
+
+    members = {m["username"]: m for m in report["members"]}
+    assert set(members) == {"ana", "ben", "cai", "dee", "eve"}
+    assert members["ana"]["user_id"] == ana.id
+    assert members["ana"]["weekly_load"] == [6] * 12
+    assert members["ana"]["velocity"] == round(24 / 28, 2)
+    assert len(report["weeks"]) == 12
+
+    status = {name: (m["status"], m["trend"]) for name, m in members.items()}
+    assert status == {
+        "ana": ("Overloaded", "steady"),
+        "ben": ("Underutilized", "steady"),
+        "cai": ("Optimal", "rising"),
+        "dee": ("Underutilized", "falling"),
+        "eve": ("Optimal", "rising"),       # ramping up, not idle
+    }
+    assert report["total_velocity"] == pytest.approx((24 + 4 + 10 + 4 + 2) / 28)
+
+
+def test_capacity_of_empty_frame(db_session):
+    report = capacity_report(db_session, CommitFrame.from_rows([]), end=END)
+    assert report == {"weeks": [], "members": [], "total_velocity": 0.0, "average_velocity": 0.0}
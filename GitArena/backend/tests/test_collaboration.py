@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.modules.analytics import collaboration
+from app.modules.analytics.collaboration import space_incidence
+from app.modules.analytics.service import AnalyticsScope, AnalyticsService
+from app.modules.github.dto import CommitCreate
+from app.modules.github.repository import GitHubRepository
+from app.shared.models import CommitFile, Repository, Space, SpaceMember, User
+
+
+@pytest.fixture
+def team(db_session):
+    users = [User(github_id=str(i), username=name, email=f"{name}@example.com")
+             for i, name in enumerate(["ana", "ben", "cai", "dee"])]
+    db_session.add_all(users)
+    db_session.flush()
+    space = Space(name="team", owner_id=users[0].id)
+    db_session.add(space)
+    db_session.flush()
+    db_session.add_all([SpaceMember(space_id=space.id, user_id=u.id, role="member") for u in users[1:]])
+    repo = Repository(github_id="r1", name="api", full_name="o/api", user_id=users[0].id, space_id=space.id)
+    db_session.add(repo)
+    db_session.commit()
+    return users, space, repo
+
+
+def _commit(db, repo, sha, author, files):
+    return GitHubRepository(db).create_commit(CommitCreate(
+        sha=sha, message="change", author_name=author.username, author_email=f"{author.username}@example.com",
+        committed_date=datetime.utcnow() - timedelta(hours=len(sha)), repository_id=repo.id,
+        diff_data=[{"filename": f, "status": "modified", "additions": 1, "deletions": 0} for f in files]
+    ))
+
+
+@pytest.fixture
+def extensions(monkeypatch):
+    """The incidence each _extend call started from (None for a rebuild)"""
+    calls = []
+    extend = collaboration._extend
+
+    def spy(incidence, *args):
+        calls.append(incidence)
+        return extend(incidence, *args)
+
+    monkeypatch.setattr(collaboration, "_extend", spy)
+    return calls
+
+
+def test_co_change_graph_connects_every_pair(db_session, team):
+    (ana, ben, cai, dee), space, repo = team
+    _commit(db_session, repo, "a1", ana, ["api.py", "db.py", "db.py"])
+    _commit(db_session, repo, "b1", ben, ["api.py", "db.py"])
+    _commit(db_session, repo, "c1", cai, ["ui.tsx", "api.py"])
+    _commit(db_session, repo, "d1", dee, ["ui.tsx"])
+    assert db_session.query(CommitFile).count() == 7  # duplicate paths in diff_data collapse
+
+    incidence = space_incidence(db_session, space.id)
+    assert incidence.matrix.shape == (4, 3)
+    assert int(incidence.matrix.sum()) == 7
+
+    service = AnalyticsService(db_session)
+    graph = service.get_team_collaboration(ana.id, scope=AnalyticsScope(space_ids=[space.id], repo_ids=[repo.id]))
+    assert graph["members"][0] == {"id": str(ana.id), "name": "You", "avatar": None, "contributions": 1}
+    edges = {(e["from"], e["to"]): (e["sharedFiles"], e["strength"]) for e in graph["collaborations"]}
+    assert edges == {
+        (str(ana.id), str(ben.id)): (2, 10),
+        (str(ana.id), str(cai.id)): (1, 5),
+        (str(ben.id), str(cai.id)): (1, 5),
+        (str(cai.id), str(dee.id)): (1, 5),
+    }
+
+
+def test_new_commit_files_extend_the_cached_matrix(db_session, team, extensions):
+    (ana, ben, cai, dee), space, repo = team
+    _commit(db_session, repo, "a1", ana, ["api.py", "db.py"])
+    cached = space_incidence(db_session, space.id)
+    extensions.clear()
+
+    _commit(db_session, repo, "d1", dee, ["ui.tsx"])
+    updated = space_incidence(db_session, space.id)
+    assert extensions == [cached]
+    assert updated.matrix.shape == (2, 3)
+    assert np.array_equal(updated.matrix[:1, :2].toarray(), cached.matrix.toarray())
+    assert updated.watermark[str(repo.id)][1] == 3
+
+
+def test_repository_leaving_the_space_rebuilds_the_matrix(db_session, team, extensions):
+    (ana, ben, cai, dee), space, repo = team
+    other = Repository(github_id="r2", name="web", full_name="o/web", user_id=ana.id, space_id=space.id)
+    db_session.add(other)
+    db_session.commit()
+    _commit(db_session, repo, "a1", ana, ["api.py"])
+    _commit(db_session, other, "b1", ben, ["web.tsx"])
+    assert len(space_incidence(db_session, space.id).paths) == 2
+    extensions.clear()
+
+    GitHubRepository(db_session).update_repository(other, space_id=None)
+    rebuilt = space_incidence(db_session, space.id)
+    assert extensions == [None]
+    assert rebuilt.paths == [f"{repo.id}:api.py"]
+    assert list(rebuilt.watermark) == [str(repo.id)]
+
+
+def test_unmoved_probe_reuses_the_cached_matrix(db_session, team):
+    (ana, ben, cai, dee), space, repo = team
+    _commit(db_session, repo, "a1", ana, ["api.py", "db.py"])
+    cached = space_incidence(db_session, space.id)
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        assert space_incidence(db_session, space.id) is cached
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    # Answered from the probe, without counting commit_files
+    assert not any("count(" in statement.lower() for statement in statements)
+
+    # A sync without new rows moves the probe: the rows are counted, the matrix is kept
+    GitHubRepository(db_session).update_repository(repo, last_synced_at=datetime.utcnow())
+    resynced = space_incidence(db_session, space.id)
+    assert resynced is not cached and resynced.matrix is cached.matrix
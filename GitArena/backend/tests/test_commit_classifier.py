@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.modules.analytics.doc_index import DocIndexService
+from app.modules.analytics.service import AnalyticsScope, AnalyticsService
+from app.modules.github.classifier import CommitFlag, classify_commit
+from app.modules.github.dto import CommitCreate
+from app.modules.github.repository import GitHubRepository
+from app.shared.models import Repository, Space, User
+
+
+def test_classify_commit_message_and_paths():
+    assert classify_commit("WTF is this broken build") == CommitFlag.STRESS
+    assert classify_commit("Revert \"feature\"") == CommitFlag.FIX
+    assert classify_commit("urgent: patch") == CommitFlag.STRESS | CommitFlag.FIX
+    assert classify_commit("Merge pull request #12 from o/feature") == CommitFlag.MERGE
+    assert classify_commit("update docs") == CommitFlag.DOCS
+    # With a file list, docs come from paths rather than wording
+    assert classify_commit("update docs", [{"filename": "src/app.py"}]) == 0
+    assert classify_commit("init", [{"filename": "README.md"}, {"filename": "LICENSE"}]) == (
+        CommitFlag.README | CommitFlag.LICENSE | CommitFlag.DOCS
+    )
+    assert classify_commit("guide", {"files": ["docs/setup.txt", "CONTRIBUTING.md"]}) == (
+        CommitFlag.CONTRIBUTING | CommitFlag.DOCS
+    )
+    assert classify_commit(None, None) == 0
+
+
+def test_ingested_commits_are_classified_and_counted(db_session):
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.commit()
+
+    github = GitHubRepository(db_session)
+    now = datetime.utcnow()
+    files = [[{"filename": "README.md"}], [{"filename": "src/main.py"}], [{"filename": "docs/api.md"}], None]
+    commits = []
+    for i, diff_data in enumerate(files):
+        commits.append(github.create_commit(CommitCreate(
+            sha=f"sha{i}", message="hotfix: broken" if i == 1 else f"change {i}", author_name="dev",
+            author_email="dev@example.com", committed_date=now - timedelta(days=i * 10),
+            repository_id=repo.id, diff_data=diff_data
+        )))
+    DocIndexService(db_session).record_commits(repo, commits)
+
+    flags = [c.flags for c in github.get_repository_commits(repo.id)]
+    assert CommitFlag.README | CommitFlag.DOCS in flags
+    assert CommitFlag.STRESS | CommitFlag.FIX in flags
+
+    metrics = AnalyticsService(db_session).get_knowledge_base_metrics(
+        user.id, scope=AnalyticsScope(space_ids=[space.id], repo_ids=[repo.id])
+    )
+    assert metrics["readme_exists"] is True
+    assert metrics["contributing_exists"] is False
+    assert metrics["documentation_ratio"] == 0.5
+    assert metrics["recent_updates_count"] == 2
+    assert metrics["last_update"].date() == now.date()
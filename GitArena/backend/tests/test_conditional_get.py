@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.config.settings import settings
+from app.main import app
+from app.modules.spaces.repository import SpaceRepository
+from app.modules.users.controller import get_current_user
+from app.modules.users.dto import UserCreate
+from app.modules.users.repository import UserRepository
+from app.shared.database import get_db
+from app.shared.models import Commit, DataVersion, PullRequest, Repository, Space, User
+from app.shared.versions import bump_versions
+
+
+@pytest.fixture
+def client(db_session):
+    """Create test client with an authenticated user"""
+    app.dependency_overrides[get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_current_user, None)
+
+
+def seed(db_session):
+    users = [User(github_id=str(i), username=name) for i, name in enumerate(["ana", "ben"], start=1)]
+    db_session.add_all(users)
+    db_session.flush()
+    space = Space(name="team", owner_id=users[0].id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="api", full_name="o/api", user_id=users[0].id, space_id=space.id)
+    db_session.add(repo)
+    db_session.commit()
+    return space, repo
+
+
+def counting(db_session):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    return statements, lambda: event.remove(db_session.get_bind(), "before_cursor_execute", count)
+
+
+def test_unchanged_poll_is_a_304_after_one_lookup(client, db_session):
+    space, repo = seed(db_session)
+    url = f"/api/github/repos/{repo.id}/activity"
+
+    first = client.get(url, params={"days": 7})
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    statements, stop = counting(db_session)
+    try:
+        again = client.get(url, params={"days": 7}, headers={"If-None-Match": etag})
+    finally:
+        stop()
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == etag
+    assert len(statements) == 1
+
+    # Other parameters are another representation
+    assert client.get(url, params={"days": 30}, headers={"If-None-Match": etag}).status_code == 200
+
+    # Ingestion bumps the repository
+    db_session.add(Commit(sha="a1", message="fix", author_name="ana", author_email="ana@example.com",
+                          repository_id=repo.id, committed_date=datetime.utcnow() - timedelta(days=1)))
+    db_session.commit()
+    bump_versions(db_session, repositories=[repo])
+    changed = client.get(url, params={"days": 7}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert sum(day["count"] for day in changed.json()) == 1
+
+
+def test_scope_etag_follows_space_versions(client, db_session):
+    space, repo = seed(db_session)
+    other = Space(name="other", owner_id=2)
+    db_session.add(other)
+    db_session.commit()
+    space_id, other_id = space.id, other.id
+
+    etag = client.get("/api/analytics/capacity").headers["etag"]
+    assert client.get("/api/analytics/capacity", headers={"If-None-Match": etag}).status_code == 304
+
+    # Spaces outside the user's scope do not matter
+    bump_versions(db_session, space_ids=[other_id])
+    assert client.get("/api/analytics/capacity", headers={"If-None-Match": etag}).status_code == 304
+
+    # Membership changes bump the space
+    SpaceRepository(db_session).add_member(space_id, 2, role="member")
+    assert client.get("/api/analytics/capacity", headers={"If-None-Match": etag}).status_code == 200
+    assert db_session.query(DataVersion).filter(
+        DataVersion.scope == "space", DataVersion.scope_id == space_id
+    ).one().version == 1
+
+    # The deep-dive report returns its own response and keeps the ETag
+    report = client.get("/api/analytics/manager/analytics-report")
+    assert report.status_code == 200
+    assert client.get("/api/analytics/manager/analytics-report",
+                      headers={"If-None-Match": report.headers["etag"]}).status_code == 304
+
+
+def test_clock_driven_bottleneck_changes_are_not_hidden(client, db_session, monkeypatch):
+    space, repo = seed(db_session)
+    now = datetime.utcnow()
+    pr = PullRequest(github_id="p1", number=1, title="slow", state="open", repository_id=repo.id,
+                     created_at=now - timedelta(days=2), updated_at=now - timedelta(days=2))
+    db_session.add(pr)
+    db_session.commit()
+
+    first = client.get("/api/analytics/bottlenecks")
+    assert first.json()["alerts"] == []
+    etag = first.headers["etag"]
+    assert client.get("/api/analytics/bottlenecks", headers={"If-None-Match": etag}).status_code == 304
+
+    # The PR goes idle with no new data; the next due evaluation opens an alert
+    pr.updated_at = now - timedelta(days=4)
+    db_session.commit()
+    monkeypatch.setattr(settings, "BOTTLENECK_EVALUATION_INTERVAL_SECONDS", 0)
+    again = client.get("/api/analytics/bottlenecks", headers={"If-None-Match": etag})
+    assert again.status_code == 200
+    assert [alert["type"] for alert in again.json()["alerts"]] == ["inactive_pr"]
+
+    # Re-evaluating without a state change keeps the new ETag valid
+    assert client.get("/api/analytics/bottlenecks",
+                      headers={"If-None-Match": again.headers["etag"]}).status_code == 304
+
+
+def test_registration_changes_the_global_etag(client, db_session):
+    seed(db_session)
+    etag = client.get("/api/analytics/dashboard").headers["etag"]
+    assert client.get("/api/analytics/dashboard", headers={"If-None-Match": etag}).status_code == 304
+
+    UserRepository(db_session).create(UserCreate(github_id="3", username="cai"))
+    response = client.get("/api/analytics/dashboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["total_users"] == 3
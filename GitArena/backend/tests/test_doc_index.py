@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.modules.analytics.doc_index import DocIndexService
+from app.modules.github.classifier import CommitFlag
+from app.shared.models import Commit, DocCommitDaily, Repository, RepositoryDocIndex, Space, User
+
+
+def _index_state(db_session):
+    daily = sorted(
+        (row.repository_id, row.day, row.doc_commits, row.total_commits)
+        for row in db_session.query(DocCommitDaily).all()
+        if row.total_commits
+    )
+    entries = [
+        (row.repository_id, row.docs_touched_at, row.readme_touched_at, row.license_touched_at,
+         row.has_readme, row.has_contributing, row.has_license)
+        for row in db_session.query(RepositoryDocIndex).order_by(RepositoryDocIndex.repository_id).all()
+    ]
+    return daily, entries
+
+
+def test_incremental_index_matches_rebuild(db_session):
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.commit()
+
+    now = datetime.utcnow().replace(microsecond=0)
+    flags = [CommitFlag.README | CommitFlag.DOCS, 0, CommitFlag.DOCS, CommitFlag.LICENSE | CommitFlag.DOCS, 0, 0]
+    service = DocIndexService(db_session)
+    for batch in ([0, 1, 2], [3, 4, 5]):
+        commits = [
+            Commit(sha=f"sha{i}", message=f"change {i}", author_name="dev", repository_id=repo.id,
+                   committed_date=now - timedelta(days=i * 20, hours=i), flags=int(flags[i]))
+            for i in batch
+        ]
+        db_session.add_all(commits)
+        db_session.commit()
+        service.record_commits(repo, commits)
+    # Re-recording the same commits does not double count
+    service.record_commits(repo, db_session.query(Commit).all())
+
+    incremental = _index_state(db_session)
+    assert sum(total for *_, total in incremental[0]) == 6
+    assert incremental[1][0][4:] == (True, False, True)
+
+    assert service.rebuild([repo.id]) == 1
+    assert _index_state(db_session) == incremental
+
+    today = now.date()
+    summary = service.summary([repo.id], since=today - timedelta(days=90), recent_since=today - timedelta(days=30))
+    assert summary["last_update"] == now
+    assert (summary["doc_commits"], summary["total_commits"], summary["recent_doc_commits"]) == (3, 5, 1)
+    assert summary["has_readme"] and summary["has_license"] and not summary["has_contributing"]
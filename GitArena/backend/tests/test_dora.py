@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.modules.analytics.dora import DoraService
+from app.modules.github.classifier import CommitFlag
+from app.modules.github.repository import GitHubRepository
+from app.shared.models import Commit, Deployment, DoraDaily, PullRequest, Repository, Space, User
+
+
+@pytest.fixture
+def repos(db_session):
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    deployed = Repository(github_id="r1", name="api", full_name="o/api", user_id=user.id, space_id=space.id)
+    undeployed = Repository(github_id="r2", name="lib", full_name="o/lib", user_id=user.id, space_id=space.id)
+    db_session.add_all([deployed, undeployed])
+    db_session.commit()
+    return deployed, undeployed
+
+
+def _daily_rows(db_session):
+    return sorted(
+        (row.repository_id, row.day, row.deployments, row.failed_deployments, row.merged_prs,
+         row.lead_time_seconds, row.restored_incidents, row.restore_seconds, row.fix_commits)
+        for row in db_session.query(DoraDaily).all()
+        if any([row.deployments, row.merged_prs, row.fix_commits])
+    )
+
+
+def test_dora_aggregates_follow_ingest(db_session, repos):
+    repo, other = repos
+    now = datetime.utcnow().replace(microsecond=0)
+    incident = now - timedelta(days=5)
+    deployments = [
+        Deployment(github_id="d1", environment="production", state="success", created_at=now - timedelta(days=10)),
+        Deployment(github_id="d2", environment="production", state="failure", created_at=incident),
+        Deployment(github_id="d3", environment="production", state="error", created_at=incident + timedelta(hours=1)),
+        Deployment(github_id="d4", environment="production", state="success", created_at=incident + timedelta(hours=3)),
+        Deployment(github_id="d5", environment="production", state="pending", created_at=now - timedelta(days=1)),
+    ]
+    prs = [
+        PullRequest(github_id="p1", number=1, state="closed", created_at=now - timedelta(days=4),
+                    merged_at=now - timedelta(days=2), first_commit_at=now - timedelta(days=6)),
+        PullRequest(github_id="p2", number=2, state="closed", created_at=now - timedelta(days=1, hours=2),
+                    merged_at=now - timedelta(days=1)),
+        PullRequest(github_id="p3", number=3, state="open", created_at=now - timedelta(days=1)),
+    ]
+    for row in deployments + prs:
+        row.repository_id = repo.id
+    fixes = [
+        Commit(sha="f1", message="hotfix", repository_id=repo.id, committed_date=now - timedelta(days=3),
+               flags=int(CommitFlag.FIX)),
+        Commit(sha="f2", message="revert", repository_id=other.id, committed_date=now - timedelta(days=3),
+               flags=int(CommitFlag.FIX)),
+    ]
+    other_pr = PullRequest(github_id="p4", number=1, state="closed", repository_id=other.id,
+                           created_at=now - timedelta(hours=5), merged_at=now)
+    db_session.add_all(deployments + prs + fixes + [other_pr])
+    db_session.commit()
+
+    dora = DoraService(db_session)
+    dora.record_deployments(repo, deployments)
+    dora.record_pull_requests(repo, prs)
+    dora.record_commits(repo, fixes[:1])
+    dora.record_pull_requests(other, [other_pr])
+    dora.record_commits(other, fixes[1:])
+
+    metrics = dora.metrics([repo.id])
+    assert metrics["deploymentSource"] == "deployments"
+    assert metrics["deploymentFrequency"] == pytest.approx(5 / 30)
+    assert metrics["failureRate"] == 40.0
+    assert metrics["mttr"] == 180  # first failure -> next success
+    assert metrics["leadTime"] == pytest.approx((96 + 2) / 2)  # first commit (or PR open) -> merge
+    assert sum(point["count"] for point in metrics["deploymentsHistory"]) == 5
+    assert metrics["leadTimeHistory"][-1]["hours"] == pytest.approx(49.0)
+
+    # Without deployments, merged PRs and fix commits stand in
+    fallback = dora.metrics([other.id])
+    assert fallback["deploymentSource"] == "prs"
+    assert fallback["failureRate"] == 100.0
+    assert fallback["leadTime"] == pytest.approx(5)
+
+    # A status change is recounted on the next ingest
+    deployments[-1].state = "failure"
+    db_session.commit()
+    dora.record_deployments(repo, deployments[-1:])
+    assert dora.metrics([repo.id])["failureRate"] == 60.0
+
+    incremental = _daily_rows(db_session)
+    dora.rebuild([repo.id, other.id])
+    assert _daily_rows(db_session) == incremental
+
+
+def test_pull_request_commits_set_first_commit(db_session, repos):
+    repo, _ = repos
+    pr = PullRequest(github_id="p1", number=1, state="closed", repository_id=repo.id, created_at=datetime(2026, 1, 3))
+    db_session.add(pr)
+    db_session.commit()
+
+    github = GitHubRepository(db_session)
+    github.replace_pull_request_commits(pr, [
+        {"sha": "b", "authored_at": datetime(2026, 1, 2)},
+        {"sha": "a", "authored_at": datetime(2026, 1, 1)},
+    ])
+    github.replace_pull_request_commits(pr, [
+        {"sha": "a", "authored_at": datetime(2026, 1, 1)},
+        {"sha": "b", "authored_at": datetime(2026, 1, 2)},
+    ])
+    assert pr.first_commit_at == datetime(2026, 1, 1)
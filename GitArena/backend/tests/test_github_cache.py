@@ -0,0 +1,107 @@
+import asyncio
+import base64
+import os
+
+import httpx
+import pytest
+
+from app.config.settings import settings
+from app.modules.github import cache as proxy_cache
+from app.modules.github.service import GitHubService
+from app.shared.models import Repository, User
+
+
+class FakeGitHub:
+    """Answers GitHubService._github_get; `head` is the default branch SHA"""
+    def __init__(self):
+        self.head = "a" * 40
+        self.calls = []
+
+    async def __call__(self, url, access_token, params=None, accept=None):
+        ref = (params or {}).get("ref")
+        self.calls.append((url.rsplit("/o/api/", 1)[1], ref))
+        if access_token != "good":
+            return httpx.Response(404, json={"message": "Not Found"})
+        if url.endswith("/commits/HEAD"):
+            return httpx.Response(200, text=self.head)
+        if url.endswith("/languages"):
+            return httpx.Response(200, json={"Python": 100})
+        if url.endswith("/readme"):
+            return httpx.Response(200, json={"content": base64.b64encode(f"# api @ {ref}".encode()).decode()})
+        return httpx.Response(200, json=[{"name": "main.py", "path": "main.py", "ref": ref}])
+
+
+@pytest.fixture
+def github(db_session, monkeypatch):
+    fake = FakeGitHub()
+    monkeypatch.setattr(GitHubService, "_github_get", lambda service, *args, **kwargs: fake(*args, **kwargs))
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="api", full_name="o/api", user_id=user.id)
+    db_session.add(repo)
+    db_session.commit()
+    return fake, GitHubService(db_session), repo.id
+
+
+def test_content_is_cached_by_head_sha(github, monkeypatch):
+    fake, service, repo_id = github
+
+    first = asyncio.run(service.get_contributors(repo_id, "good"))
+    first[0]["name"] = "mutated"
+    assert asyncio.run(service.get_contributors(repo_id, "good"))[0]["name"] == "main.py"
+    assert asyncio.run(service.get_readme(repo_id, "good")) == {"content": f"# api @ {fake.head}"}
+    assert asyncio.run(service.get_languages(repo_id, "good")) == {"Python": 100}
+    # One head resolution within the TTL, one fetch per entry
+    assert fake.calls == [("commits/HEAD", None), ("contributors", None), ("readme", fake.head), ("languages", None)]
+
+    # A push moves the head once the TTL lapses
+    clock = proxy_cache.time.monotonic
+    monkeypatch.setattr(proxy_cache.time, "monotonic", lambda: clock() + settings.GITHUB_HEAD_TTL_SECONDS + 1)
+    fake.head = "b" * 40
+    fake.calls.clear()
+    assert asyncio.run(service.get_readme(repo_id, "good")) == {"content": f"# api @ {fake.head}"}
+    assert fake.calls == [("commits/HEAD", None), ("readme", fake.head)]
+
+
+def test_unresolved_heads_are_not_shared(github):
+    fake, service, repo_id = github
+    asyncio.run(service.get_languages(repo_id, "good"))
+    fake.calls.clear()
+
+    # A token that cannot see the repository never reaches the cached entry
+    assert asyncio.run(service.get_languages(repo_id, "other")) == {}
+    assert fake.calls == [("commits/HEAD", None), ("languages", None)]
+
+
+def test_evicted_entries_spill_to_disk(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_CACHE_MEMORY_BYTES", 200)
+    fetched = []
+
+    async def fetch(i):
+        fetched.append(i)
+        return {"path": f"dir{i}", "entries": list(range(10))}
+
+    for i in range(6):
+        asyncio.run(proxy_cache.cached_json(("tree", "o/api", "a" * 40, i), lambda: fetch(i)))
+    assert proxy_cache._memory_bytes <= 200
+    assert any(files for _, _, files in os.walk(settings.GITHUB_CACHE_DIR))
+
+    for i in range(6):
+        value = asyncio.run(proxy_cache.cached_json(("tree", "o/api", "a" * 40, i), lambda: fetch(i)))
+        assert value["path"] == f"dir{i}"
+    assert fetched == list(range(6))
+
+
+def test_resolved_heads_are_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "GITHUB_HEAD_CACHE_ENTRIES", 3)
+    for i in range(5):
+        proxy_cache.remember_head("o/api", f"token{i}", "a" * 40)
+    assert len(proxy_cache._heads) == 3
+    assert proxy_cache.cached_head("o/api", "token0") is None
+    assert proxy_cache.cached_head("o/api", "token4") == "a" * 40
+
+    # Expired heads are dropped by the next insert
+    monkeypatch.setattr(proxy_cache.time, "monotonic", lambda: 10 ** 9)
+    proxy_cache.remember_head("o/web", "token0", "b" * 40)
+    assert list(proxy_cache._heads) == [("o/web", proxy_cache._token_key("token0"))]
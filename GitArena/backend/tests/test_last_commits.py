@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.modules.github.dto import CommitCreate
+from app.modules.github.repository import GitHubRepository
+from app.modules.github.service import GitHubService
+from app.shared.models import Repository, User
+
+HEAD = "d" * 40
+TREE = [
+    {"path": "README.md", "type": "blob", "size": 1, "sha": "b1"},
+    {"path": "src", "type": "tree", "sha": "t1"},
+    {"path": "src/app.py", "type": "blob", "size": 1, "sha": "b2"},
+    {"path": "src/lib", "type": "tree", "sha": "t2"},
+    {"path": "src/lib/a%b.py", "type": "blob", "size": 1, "sha": "b3"},
+    {"path": "src/new.py", "type": "blob", "size": 1, "sha": "b4"},
+]
+
+
+def test_last_commits_come_from_commit_files(db_session, monkeypatch):
+    calls = []
+
+    async def github_get(service, url, access_token, params=None, accept=None):
+        endpoint = url.rsplit("/o/api/", 1)[1]
+        calls.append((endpoint, (params or {}).get("path")))
+        if endpoint == "commits/HEAD":
+            return httpx.Response(200, text=HEAD)
+        if endpoint.startswith("git/trees/"):
+            return httpx.Response(200, json={"tree": TREE, "truncated": False})
+        return httpx.Response(200, json=[{
+            "sha": "remote", "author": None,
+            "commit": {"message": "older", "author": {"name": "gh", "email": None, "date": "2020-01-01T00:00:00Z"}},
+        }])
+
+    monkeypatch.setattr(GitHubService, "_github_get", github_get)
+    user = User(github_id="1", username="ana", email="ana@example.com", avatar_url="https://a/ana.png")
+    db_session.add(user)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="api", full_name="o/api", user_id=user.id)
+    db_session.add(repo)
+    db_session.commit()
+
+    base = datetime(2026, 1, 1)
+    history = [
+        ("c1", "init", "ana@example.com", 0, ["README.md", "src/app.py"]),
+        ("c2", "lib", "ben@example.com", 1, ["src/lib/a%b.py"]),
+        ("c3", "fix app", "ana@example.com", 2, ["src/app.py"]),
+        ("c4", "elsewhere", "ben@example.com", 3, ["srcfile.txt"]),  # not under src/
+    ]
+    github = GitHubRepository(db_session)
+    for sha, message, email, day, files in history:
+        github.create_commit(CommitCreate(
+            sha=sha, message=message, author_name=email.split("@")[0], author_email=email,
+            committed_date=base + timedelta(days=day), repository_id=repo.id,
+            diff_data=[{"filename": path, "status": "modified"} for path in files]
+        ))
+
+    repo_id = repo.id
+    service = GitHubService(db_session)
+    root = asyncio.run(service.get_last_commits(repo_id, "token", directory=""))
+    assert {path: commit["sha"] for path, commit in root.items()} == {"README.md": "c1", "src": "c3"}
+    assert root["src"]["avatar_url"] == "https://a/ana.png"
+    assert root["src"]["date"] == "2026-01-03T00:00:00"
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    calls.clear()
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        listing = asyncio.run(service.get_last_commits(repo_id, "token", directory="src", paths=["README.md"]))
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    assert {path: commit and commit["sha"] for path, commit in listing.items()} == {
+        "src/app.py": "c3", "src/lib": "c2", "src/new.py": None, "README.md": "c1"
+    }
+    # Repository lookup, then one query for every covered path
+    assert len(statements) == 2
+    # A directory entry without ingested history is left to the client, not asked from GitHub
+    assert calls == []
+
+    # A listed path without it is asked from GitHub, pinned to the head, and cached
+    listing = asyncio.run(service.get_last_commits(repo_id, "token", paths=["src/new.py"]))
+    assert listing["src/new.py"]["sha"] == "remote"
+    assert calls == [("commits", "src/new.py")]
+    calls.clear()
+    asyncio.run(service.get_last_commits(repo_id, "token", paths=["src/new.py"]))
+    assert calls == []
+
+    # GitHub lookups per request are capped
+    monkeypatch.setattr("app.modules.github.service.LAST_COMMIT_FALLBACK_LIMIT", 1)
+    listing = asyncio.run(service.get_last_commits(repo_id, "token", paths=["docs/a.md", "docs/b.md"]))
+    assert calls == [("commits", "docs/a.md")]
+    assert listing["docs/b.md"] is None
@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.modules.analytics.quests import QuestProgressService
+from app.shared.models import (
+    Commit, Issue, PullRequest, Quest, Repository, Review, Space, SpaceMember, User, XpEvent
+)
+
+
+def test_space_quests_share_one_series_per_metric(db_session):
+    users = [User(github_id=str(i), username=name) for i, name in enumerate(["ana", "ben", "out"])]
+    db_session.add_all(users)
+    db_session.flush()
+    ana, ben, out = users
+    space = Space(name="team", owner_id=ana.id)
+    db_session.add(space)
+    db_session.flush()
+    db_session.add(SpaceMember(space_id=space.id, user_id=ben.id, role="member"))
+    repo = Repository(github_id="r1", name="api", full_name="o/api", user_id=ana.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.flush()
+
+    now = datetime.utcnow()
+    events = []
+
+    def commit(sha, user, days_ago):
+        row = Commit(sha=sha, message="change", author_name=user.username, repository_id=repo.id,
+                     committed_date=now - timedelta(days=days_ago))
+        db_session.add(row)
+        db_session.flush()
+        events.append(XpEvent(user_id=user.id, source="commit", source_id=row.id, xp=10,
+                              occurred_at=row.committed_date))
+
+    for i, days_ago in enumerate([1, 2, 3, 20]):
+        commit(f"a{i}", ana, days_ago)
+    commit("b0", ben, 1)
+    commit("o0", out, 1)  # not a member of the space
+
+    merged = PullRequest(github_id="p1", number=1, title="feat", state="closed", author="ben", repository_id=repo.id,
+                         created_at=now - timedelta(days=15), merged_at=now - timedelta(days=2))
+    open_pr = PullRequest(github_id="p2", number=2, title="wip", state="open", author="ben", repository_id=repo.id,
+                          created_at=now - timedelta(days=1))
+    db_session.add_all([merged, open_pr])
+    db_session.flush()
+    review = Review(github_id="v1", pull_request_id=merged.id, reviewer="ana", state="approved",
+                    submitted_at=now - timedelta(days=3))
+    db_session.add(review)
+    db_session.flush()
+    events += [
+        XpEvent(user_id=ben.id, source="pull_request", source_id=merged.id, xp=50, occurred_at=merged.created_at),
+        XpEvent(user_id=ben.id, source="pull_request", source_id=open_pr.id, xp=50, occurred_at=open_pr.created_at),
+        XpEvent(user_id=ana.id, source="review", source_id=review.id, xp=30, occurred_at=review.submitted_at),
+    ]
+    db_session.add_all(events)
+    db_session.add_all([
+        Issue(github_id="i1", number=3, title="bug", state="closed", author="ana", repository_id=repo.id,
+              created_at=now - timedelta(days=30), closed_at=now - timedelta(days=1)),
+        Issue(github_id="i2", number=4, title="idea", state="open", author="ben", repository_id=repo.id,
+              created_at=now - timedelta(days=1)),
+    ])
+
+    week_ago = now - timedelta(days=7)
+    quests = {
+        "commits": Quest(title="Ship it", metric="commits", target=3, project_id=space.id, starts_at=week_ago),
+        "prs": Quest(title="Merge", metric="prs", target=1, project_id=space.id, starts_at=week_ago),
+        "issues": Quest(title="Triage", metric="issues", target=2, project_id=space.id, starts_at=week_ago),
+        "reviews": Quest(title="Review", metric="reviews", target=1, project_id=space.id, starts_at=week_ago),
+        "month": Quest(title="Marathon", metric="commits", target=10, project_id=space.id,
+                       starts_at=now - timedelta(days=30)),
+        "ended": Quest(title="Old", metric="commits", target=1, project_id=space.id,
+                       starts_at=now - timedelta(days=60), ends_at=now - timedelta(days=10)),
+    }
+    db_session.add_all(quests.values())
+    db_session.commit()
+
+    space_id = space.id
+    service = QuestProgressService(db_session)
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        progress = {p["title"]: p for p in service.space_progress(space_id)}
+        first_call = len(statements)
+        service.space_progress(space_id)
+        second_call = len(statements) - first_call
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    # quests, members, repositories, watermark (3), one series per metric (4)
+    assert first_call == 10
+    assert second_call == first_call - 4  # series cached until the next ingest
+
+    assert set(progress) == {"Ship it", "Merge", "Triage", "Review", "Marathon"}
+    leaders = {title: [(p["username"], p["progress"]) for p in q["leaders"]] for title, q in progress.items()}
+    assert leaders == {
+        "Ship it": [("ana", 3), ("ben", 1)],
+        "Merge": [("ben", 1), ("ana", 0)],
+        "Triage": [("ana", 1), ("ben", 0)],
+        "Review": [("ana", 1), ("ben", 0)],
+        "Marathon": [("ana", 4), ("ben", 1)],
+    }
+    assert progress["Ship it"]["completed_count"] == 1
+    assert progress["Triage"]["leaders"][0]["percent"] == 50.0
+
+    ended = service.quest_progress(quests["ended"])
+    assert ended["active"] is False
+    assert [(p["username"], p["progress"]) for p in ended["leaders"]] == [("ana", 1), ("ben", 0)]
+
+    # A new ledger row moves the watermark
+    commit("b1", ben, 0)
+    db_session.add_all(events[-1:])
+    db_session.commit()
+    progress = {p["title"]: p for p in service.space_progress(space.id)}
+    assert [(p["username"], p["progress"]) for p in progress["Ship it"]["leaders"]] == [("ana", 3), ("ben", 2)]
@@ -0,0 +1,61 @@
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.modules.github.dto import CommitResponse, RepositoryResponse
+from app.shared.responses import FastJSONResponse, construct_many, stream_json_array
+
+
+def body(response):
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return json.loads(asyncio.run(collect()))
+
+
+def commit_row(i):
+    return SimpleNamespace(
+        id=i, sha=f"s{i}", message="fix", author_name="dev", author_email="dev@example.com",
+        committed_date=datetime(2026, 1, 1, 12, i % 60), additions=i, deletions=0, files_changed=1,
+        diff_data=None, repository_id=7, created_at=datetime(2026, 1, 2)
+    )
+
+
+def test_fast_json_response_encodes_analytics_types():
+    content = {
+        "trend": [{"date": datetime(2026, 1, 1).date(), "count": np.int64(3)}],
+        "scores": np.array([1.5, 2.0]),
+        "ratio": Decimal("0.25"),
+        7: {"a", "a"},
+    }
+    assert json.loads(FastJSONResponse(content).body) == {
+        "trend": [{"date": "2026-01-01", "count": 3}],
+        "scores": [1.5, 2.0],
+        "ratio": 0.25,
+        "7": ["a"],
+    }
+
+
+def test_constructed_dtos_match_validated_ones():
+    rows = [commit_row(i) for i in range(3)]
+    constructed = construct_many(CommitResponse, rows)
+    assert constructed == [CommitResponse.model_validate(row) for row in rows]
+
+    # Missing attributes fall back to the field defaults
+    repo = construct_many(RepositoryResponse, [SimpleNamespace(id=1, name="api")])[0]
+    assert repo.stargazers_count == 0 and repo.is_synced is False and repo.github_id is None
+
+
+def test_stream_json_array_batches_and_envelope():
+    commits = construct_many(CommitResponse, [commit_row(i) for i in range(7)])
+    expected = [json.loads(commit.model_dump_json()) for commit in commits]
+
+    assert body(stream_json_array(commits, batch_size=3)) == expected
+    assert body(stream_json_array([])) == []
+    assert body(stream_json_array(commits, key="items", envelope={"total": 7, "next_cursor": None})) == {
+        "total": 7, "next_cursor": None, "items": expected
+    }
+    assert body(stream_json_array([], key="items")) == {"items": []}
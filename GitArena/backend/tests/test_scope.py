@@ -0,0 +1,104 @@
+import pytest
+from sqlalchemy import event
+
+from app.modules.github.repository import GitHubRepository
+from app.modules.spaces.dto import SpaceCreate
+from app.modules.spaces.repository import SpaceRepository
+from app.shared.models import Repository, Space, SpaceMember, User
+from app.shared.permissions import is_team_admin, is_team_member
+from app.shared.scope import get_user_scope
+
+
+@pytest.fixture
+def team(db_session):
+    owner = User(github_id="1", username="lead")
+    dev = User(github_id="2", username="dev")
+    db_session.add_all([owner, dev])
+    db_session.flush()
+    first = Space(name="first", owner_id=owner.id)
+    second = Space(name="second", owner_id=owner.id)
+    db_session.add_all([first, second])
+    db_session.flush()
+    db_session.add_all([
+        Repository(github_id=f"r{i}", name=f"repo{i}", full_name=f"o/repo{i}", user_id=owner.id, space_id=first.id)
+        for i in range(3)
+    ])
+    db_session.commit()
+    return owner, dev, first, second
+
+
+@pytest.fixture
+def statements(db_session):
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", record)
+    yield executed
+    event.remove(db_session.get_bind(), "before_cursor_execute", record)
+
+
+def test_scope_is_one_query_and_memoized(db_session, session_factory, team, statements):
+    owner, dev, first, second = team
+    owner_id, first_id, second_id = owner.id, first.id, second.id
+    statements.clear()
+
+    scope = get_user_scope(db_session, owner_id)
+    assert sorted(scope.space_ids) == [first_id, second_id]
+    assert len(scope.repos_for([first_id])) == 3
+    assert scope.repos_for([second_id]) == []
+    assert scope.role(first_id) == "owner"
+    assert len(statements) == 1
+
+    # Memoized on the session and cached across sessions
+    assert get_user_scope(db_session, owner_id) is scope
+    other = session_factory()
+    try:
+        assert get_user_scope(other, owner_id) is scope
+    finally:
+        other.close()
+    # Permission checks read the database once per session, never the shared cache
+    assert is_team_admin(db_session, first_id, owner)
+    assert is_team_member(db_session, second_id, owner)
+    assert len(statements) == 2
+
+
+def test_membership_and_repository_moves_invalidate(db_session, team):
+    owner, dev, first, second = team
+    spaces = SpaceRepository(db_session)
+
+    assert not is_team_member(db_session, first.id, dev)
+    spaces.add_member(first.id, dev.id, role="member")
+    assert is_team_member(db_session, first.id, dev)
+    assert not is_team_admin(db_session, first.id, dev)
+    assert get_user_scope(db_session, dev.id).repos_for([first.id])
+
+    repo = db_session.query(Repository).first()
+    GitHubRepository(db_session).update_repository(repo, space_id=second.id)
+    assert repo.id in get_user_scope(db_session, owner.id).repos_for([second.id])
+    assert repo.id not in get_user_scope(db_session, dev.id).repo_ids
+
+    spaces.remove_member(first.id, dev.id)
+    assert get_user_scope(db_session, dev.id).space_ids == []
+
+    new_space = spaces.create_space(SpaceCreate(name="third", repository_id=0), owner_id=dev.id)
+    assert get_user_scope(db_session, dev.id).role(new_space.id) == "owner"
+
+
+def test_permission_checks_ignore_the_shared_cache(db_session, session_factory, team):
+    owner, dev, first, second = team
+    SpaceRepository(db_session).add_member(first.id, dev.id, role="admin")
+    assert get_user_scope(db_session, dev.id).is_admin(first.id)
+
+    # Removed by another worker: this process's cache is never invalidated
+    db_session.query(SpaceMember).filter(SpaceMember.user_id == dev.id).delete()
+    db_session.commit()
+
+    request = session_factory()
+    try:
+        assert get_user_scope(request, dev.id).is_admin(first.id)
+        assert not is_team_admin(request, first.id, dev)
+        assert not is_team_member(request, first.id, dev)
+    finally:
+        request.close()
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.modules.analytics.engine import CommitFrame
+from app.modules.analytics.snapshots import CommitSnapshot, load_space_frame
+from app.shared.models import Commit, Repository, Space, User
+
+
+@pytest.fixture
+def repo_commits(db_session):
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.flush()
+
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    commits = []
+    for i in range(40):
+        commits.append(Commit(
+            sha=f"sha{i:03d}",
+            message="hotfix: broken build" if i % 10 == 0 else f"feature {i}",
+            author_name="night" if i % 2 else "day",
+            author_email="night@example.com" if i % 2 else None,
+            repository_id=repo.id,
+            committed_date=now - timedelta(hours=7 * i),
+            additions=i,
+            deletions=1
+        ))
+    db_session.add_all(commits)
+    db_session.commit()
+    return repo, commits
+
+
+def _resync_without(db, repo, sha):
+    """Deletions and rewrites come from a sync, which moves the repository's last sync time"""
+    db.delete(db.query(Commit).filter(Commit.sha == sha).one())
+    repo.last_synced_at = datetime.utcnow()
+    db.commit()
+
+
+def test_snapshot_appends_new_commits_and_rebuilds_on_repository_moves(db_session, repo_commits, tmp_path):
+    repo, commits = repo_commits
+    snapshot = CommitSnapshot(str(tmp_path / "space"), repo.space_id)
+
+    frame = snapshot.refresh(db_session)
+    assert isinstance(frame.additions, np.memmap)
+    assert len(frame) == len(commits)
+    assert frame.hour_histogram().tolist() == CommitFrame.load(db_session, [repo.id]).hour_histogram().tolist()
+
+    db_session.add(Commit(sha="new", message="late fix", author_name="newcomer", repository_id=repo.id,
+                          committed_date=datetime.utcnow(), additions=5, deletions=0))
+    db_session.commit()
+    frame = snapshot.refresh(db_session)
+    assert len(frame) == len(commits) + 1
+    assert "newcomer" in frame.author_names
+    assert frame.distinct_identities() == 3
+
+    # The stored watermark follows the database
+    assert snapshot.read_meta()["watermark"][str(repo.id)][1] == len(commits) + 1
+
+    _resync_without(db_session, repo, "sha000")
+    assert len(snapshot.refresh(db_session)) == len(commits)
+
+    other = Repository(github_id="r2", name="other", full_name="o/other", user_id=repo.user_id, space_id=repo.space_id)
+    db_session.add(other)
+    db_session.flush()
+    db_session.add(Commit(sha="o1", message="init", author_name="day", repository_id=other.id,
+                          committed_date=datetime.utcnow(), additions=1, deletions=0))
+    db_session.commit()
+    frame = snapshot.refresh(db_session)
+    assert len(frame) == len(commits) + 1
+    assert int((frame.repository == other.id).sum()) == 1
+
+
+def test_unchanged_snapshot_skips_the_commit_count(db_session, repo_commits, tmp_path):
+    repo, commits = repo_commits
+    snapshot = CommitSnapshot(str(tmp_path / "space"), repo.space_id)
+    snapshot.refresh(db_session)
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        assert len(snapshot.refresh(db_session)) == len(commits)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    assert not any("count(" in statement.lower() for statement in statements)
+
+
+def test_rebuild_keeps_the_published_generation_readable(db_session, repo_commits, tmp_path):
+    repo, commits = repo_commits
+    snapshot = CommitSnapshot(str(tmp_path / "space"), repo.space_id)
+    snapshot.refresh(db_session)
+    old_meta = snapshot.read_meta()
+
+    _resync_without(db_session, repo, "sha000")
+    snapshot.refresh(db_session)
+    new_meta = snapshot.read_meta()
+
+    assert new_meta["generation"] != old_meta["generation"]
+    # A reader that read the old meta before the switch still maps consistent columns
+    old_frame = snapshot.frame(old_meta)
+    assert len(old_frame) == len(commits)
+    assert old_frame.hour_histogram().sum() == len(commits)
+    assert len(snapshot.frame(new_meta)) == len(commits) - 1
+
+
+def test_space_frames_concatenate_with_shared_labels(db_session, repo_commits, tmp_path):
+    repo, commits = repo_commits
+    second_space = Space(name="second", owner_id=repo.user_id)
+    db_session.add(second_space)
+    db_session.flush()
+    other = Repository(github_id="r2", name="other", full_name="o/other", user_id=repo.user_id, space_id=second_space.id)
+    db_session.add(other)
+    db_session.flush()
+    db_session.add(Commit(sha="o1", message="init", author_name="day", repository_id=other.id,
+                          committed_date=datetime.utcnow(), additions=1, deletions=0))
+    db_session.commit()
+
+    frame = load_space_frame(db_session, str(tmp_path), [repo.space_id, second_space.id])
+    assert len(frame) == len(commits) + 1
+    assert dict(zip(frame.author_names, frame.count_by_author().tolist()))["day"] == 21
+    assert frame.distinct_identities() == 2
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.modules.github.repository import GitHubRepository
+from app.modules.timeline.service import TimelineService
+from app.shared.models import Activity, Commit, PullRequest, Repository, Space, TimelineEvent, User
+
+
+@pytest.fixture
+def project(db_session):
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    space = Space(name="team", owner_id=user.id)
+    db_session.add(space)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="repo", full_name="o/repo", user_id=user.id, space_id=space.id)
+    db_session.add(repo)
+    db_session.commit()
+    return space, repo
+
+
+def test_timeline_pages_newest_first_with_type_filter(db_session, project):
+    space, repo = project
+    now = datetime.utcnow()
+    commits = [
+        Commit(sha=f"sha{i:04d}", message=f"commit {i}\nbody", author_name="dev",
+               repository_id=repo.id, committed_date=now - timedelta(hours=i))
+        for i in range(5)
+    ]
+    pr = PullRequest(github_id="p1", number=7, title="Feature", state="closed", author="dev",
+                     repository_id=repo.id, created_at=now - timedelta(minutes=30), merged_at=now)
+    activity = Activity(github_id="e1", type="PullRequestReviewEvent", action="created", title="Review",
+                        user_login="dev", repository_id=repo.id, created_at=now - timedelta(days=2))
+    db_session.add_all(commits + [pr, activity])
+    db_session.commit()
+
+    timeline = TimelineService(db_session)
+    timeline.record_commits(repo, commits)
+    timeline.record_pull_requests(repo, [pr])
+    timeline.record_activities(repo, [activity])
+    # Re-recording is an update, not a duplicate
+    timeline.record_commits(repo, commits[:2])
+    assert db_session.query(TimelineEvent).count() == 7
+
+    first, cursor = timeline.get_activity_page([space.id], limit=3)
+    assert [e["type"] for e in first] == ["commit", "pr", "commit"]
+    assert first[0]["metadata"]["description"] == "commit 0"
+
+    rest, last_cursor = timeline.get_activity_page([space.id], cursor=cursor, limit=10)
+    assert len(rest) == 4 and last_cursor is None
+
+    merged, _ = timeline.get_activity_page([space.id], type_filter="merge")
+    assert [e["target"] for e in merged] == ["#7"]
+
+    reviews, _ = timeline.get_activity_page([space.id], type_filter="review")
+    assert [e["actor"]["name"] for e in reviews] == ["dev"]
+    assert timeline.get_activity_page([space.id], type_filter="review", date_range="today")[0] == []
+
+
+def test_linking_repository_moves_its_events(db_session, project):
+    space, repo = project
+    commit = Commit(sha="abc", message="init", repository_id=repo.id, committed_date=datetime.utcnow())
+    db_session.add(commit)
+    db_session.commit()
+    TimelineService(db_session).record_commits(repo, [commit])
+
+    other = Space(name="other", owner_id=space.owner_id)
+    db_session.add(other)
+    db_session.commit()
+    GitHubRepository(db_session).update_repository(repo, space_id=other.id)
+
+    timeline = TimelineService(db_session)
+    assert timeline.get_activity_page([space.id])[0] == []
+    assert len(timeline.get_activity_page([other.id])[0]) == 1
@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.modules.github.service import GitHubService
+from app.modules.github.tree_index import clear_tree_indexes
+from app.shared.models import Repository, User
+
+HEAD = "c" * 40
+# tree sha -> (entries, truncated when read recursively)
+TREES = {
+    HEAD: ([("README.md", "blob", 10, "r1"), ("src", "tree", 0, "t-src"), ("docs", "tree", 0, "t-docs")], True),
+    "t-src": ([("app.py", "blob", 300, "s1"), ("util", "tree", 0, "t-util")], False),
+    "t-util": ([("strings.py", "blob", 40, "s2")], False),
+    "t-docs": ([("guide.md", "blob", 25, "d1"), ("vendor", "commit", 0, "m1")], False),
+}
+
+
+def flatten(tree_sha, prefix=""):
+    entries = []
+    for path, kind, size, sha in TREES[tree_sha][0]:
+        entries.append({"path": prefix + path, "type": kind, "size": size, "sha": sha})
+        if kind == "tree":
+            entries += flatten(sha, prefix + path + "/")
+    return entries
+
+
+def test_tree_snapshot_serves_listing_search_and_stats(db_session, monkeypatch):
+    calls = []
+
+    async def github_get(service, url, access_token, params=None, accept=None):
+        calls.append((url.rsplit("/o/api/", 1)[1], bool(params)))
+        if url.endswith("/commits/HEAD"):
+            return httpx.Response(200, text=HEAD)
+        tree_sha = url.rsplit("/", 1)[1]
+        entries, truncated = TREES[tree_sha]
+        if params:  # recursive
+            return httpx.Response(200, json={"tree": flatten(tree_sha), "truncated": truncated})
+        return httpx.Response(200, json={"tree": [
+            {"path": path, "type": kind, "size": size, "sha": sha} for path, kind, size, sha in entries
+        ], "truncated": False})
+
+    monkeypatch.setattr(GitHubService, "_github_get", github_get)
+    user = User(github_id="1", username="dev")
+    db_session.add(user)
+    db_session.flush()
+    repo = Repository(github_id="r1", name="api", full_name="o/api", user_id=user.id)
+    db_session.add(repo)
+    db_session.commit()
+    service = GitHubService(db_session)
+
+    root = asyncio.run(service.get_repository_tree(repo.id, "token"))
+    assert [(e["name"], e["type"]) for e in root] == [("README.md", "file"), ("docs", "dir"), ("src", "dir")]
+    # The truncated root was re-read flat, then each subtree recursively
+    assert calls == [("commits/HEAD", False), (f"git/trees/{HEAD}", True), (f"git/trees/{HEAD}", False),
+                     ("git/trees/t-src", True), ("git/trees/t-docs", True)]
+
+    calls.clear()
+    assert [e["path"] for e in asyncio.run(service.get_repository_tree(repo.id, "token", "src/util/"))] == \
+        ["src/util/strings.py"]
+    assert asyncio.run(service.get_repository_tree(repo.id, "token", "missing")) == []
+    # Name prefix matches, then name matches, then path matches; shorter paths first
+    assert [e["path"] for e in asyncio.run(service.search_repository_tree(repo.id, "token", "S"))] == \
+        ["src", "src/util/strings.py", "docs", "src/util", "src/app.py", "docs/vendor", "docs/guide.md"]
+    assert [e["path"] for e in asyncio.run(service.search_repository_tree(repo.id, "token", "doc", limit=2))] == \
+        ["docs", "docs/vendor"]
+    assert asyncio.run(service.get_repository_tree_stats(repo.id, "token")) == {
+        "sha": HEAD, "files": 4, "directories": 3, "total_size": 375,
+        "extensions": [
+            {"extension": ".md", "files": 2, "bytes": 35},
+            {"extension": ".py", "files": 2, "bytes": 340},
+        ],
+    }
+    assert calls == []
+
+    # The snapshot outlives the parsed index: it is read back from the proxy cache
+    clear_tree_indexes()
+    assert len(asyncio.run(service.get_repository_tree(repo.id, "token", "docs"))) == 2
+    assert calls == []
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.modules.users.service import UserService
+from app.shared.models import Commit, PullRequest, Repository, User
+
+
+def test_dashboard_shares_one_daily_query(db_session):
+    user = User(github_id="1", username="dev", email="dev@example.com", name="Dev")
+    db_session.add(user)
+    db_session.flush()
+    api = Repository(github_id="r1", name="api", full_name="o/api", user_id=user.id, stargazers_count=5, language="Python")
+    web = Repository(github_id="r2", name="web", full_name="o/web", user_id=user.id, stargazers_count=1)
+    db_session.add_all([api, web])
+    db_session.flush()
+
+    now = datetime.utcnow().replace(hour=12)
+    rows = [
+        ("a1", api, "dev@example.com", "dev", 0),
+        ("a2", api, None, "Dev", 0),
+        ("a3", api, None, "teammate", 1),      # counts toward the repository trend only
+        ("a4", web, "dev@example.com", "dev", 3),
+        ("a5", web, "dev@example.com", "dev", 30),
+        ("a6", web, "dev@example.com", "dev", 400),  # outside the heatmap
+    ]
+    for sha, repo, email, name, days_ago in rows:
+        db_session.add(Commit(sha=sha, message=sha, author_email=email, author_name=name, additions=1, deletions=0,
+                              repository_id=repo.id, committed_date=now - timedelta(days=days_ago)))
+    db_session.add_all([
+        PullRequest(github_id="p1", number=1, title="a", state="open", author="dev", repository_id=api.id),
+        PullRequest(github_id="p2", number=2, title="b", state="closed", author="dev", repository_id=api.id,
+                    merged_at=now),
+    ])
+    db_session.commit()
+
+    service = UserService(db_session)
+    user_id = user.id
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        full = service.get_user_dashboard_stats(user_id)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    assert len(statements) == 6
+
+    assert len(full.heatmap_data) == 366
+    assert full.heatmap_data[-1].count == 2 and full.heatmap_data[-1].level == 1
+    assert sum(day.count for day in full.heatmap_data) == 4
+    assert full.weekly_activity == [0, 0, 0, 1, 0, 0, 2]
+    assert [(r.name, r.trend) for r in full.top_repos] == [("api", "+3"), ("web", "+1")]
+    assert [(p.label, p.count) for p in full.pr_status] == [("Open", 1), ("Merged", 1), ("Closed", 0)]
+    assert full.heatmap is None
+
+    compact = service.get_user_dashboard_stats(user_id, compact_heatmap=True)
+    assert compact.heatmap_data == []
+    assert compact.heatmap.start == full.heatmap_data[0].date
+    assert compact.heatmap.counts == [day.count for day in full.heatmap_data]
+    assert compact.weekly_activity == full.weekly_activity
+    assert len(compact.model_dump_json()) < len(full.model_dump_json()) / 5
@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.modules.gamification.ledger import XpLedger, current_streak
+from app.modules.gamification.service import GamificationService
+from app.shared.models import Commit, PullRequest, Repository, Review, User, XpEvent
+
+
+def test_stats_are_folded_from_the_ledger(db_session):
+    dev = User(github_id="1", username="dev", email="dev@example.com", name="Dev Person")
+    rev = User(github_id="2", username="rev")
+    db_session.add_all([dev, rev])
+    db_session.flush()
+    repo = Repository(github_id="r1", name="api", full_name="o/api", user_id=dev.id)
+    db_session.add(repo)
+    db_session.flush()
+
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+
+    def commit(sha, when, email=None, name=None):
+        row = Commit(sha=sha, message="change", author_email=email, author_name=name,
+                     committed_date=when, repository_id=repo.id)
+        db_session.add(row)
+        db_session.commit()
+        return row
+
+    # History ingested before the user's stats row exists
+    commit("a1", today - timedelta(days=2), email="dev@example.com", name="dev")
+    commit("a2", today - timedelta(days=1), name="Dev Person")
+    commit("a3", today - timedelta(days=1), name="someone else")
+
+    service = GamificationService(db_session)
+    stats = service.get_user_stats(dev.id)
+    assert (stats.xp, stats.level, stats.streak) == (20, 1, 2)
+
+    dev_id = dev.id
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", count)
+    try:
+        service.get_user_stats(dev_id)
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", count)
+    assert len(statements) == 1 and statements[0].lstrip().upper().startswith("SELECT")
+
+    ledger = XpLedger(db_session)
+    latest = commit("a4", today, email="dev@example.com")
+    assert ledger.record_commits(repo, [latest]) == 1
+    assert ledger.record_commits(repo, [latest]) == 0  # one event per source row
+    db_session.refresh(stats)
+    assert (stats.xp, stats.streak) == (30, 3)
+
+    pr = PullRequest(github_id="p1", number=1, title="feature", state="open", author="dev",
+                     repository_id=repo.id, created_at=today)
+    db_session.add(pr)
+    db_session.flush()
+    db_session.add(Review(github_id="v1", pull_request_id=pr.id, reviewer="rev", state="approved", submitted_at=today))
+    db_session.commit()
+    assert ledger.record_pull_requests(repo, [pr]) == 2
+    db_session.refresh(stats)
+    assert stats.xp == 80
+    assert db_session.query(XpEvent).filter(XpEvent.user_id == rev.id).one().xp == 30
+
+    # An older day recounts the streak instead of extending it
+    old = commit("a5", today - timedelta(days=10), email="dev@example.com")
+    ledger.record_commits(repo, [old])
+    db_session.refresh(stats)
+    assert (stats.xp, stats.streak, stats.last_activity_date) == (90, 3, today)
+
+    assert current_streak(stats, today.date() + timedelta(days=1)) == 3
+    assert current_streak(stats, today.date() + timedelta(days=2)) == 0
+
+    # A rebuild derives the same ledger
+    ledger.rebuild()
+    db_session.refresh(stats)
+    assert (stats.xp, stats.streak) == (90, 3)
+    assert db_session.query(XpEvent).count() == 6
@@ -4,6 +4,8 @@ export interface AIFeedbackQuery {
     userId?: number;
     repositoryId?: number;
     limit?: number;
+    cursor?: string;
+    includeContent?: boolean;
 }
 
 export interface AIAnalysisResult {
@@ -55,6 +57,8 @@ export const aiApi = {
         if (params.userId) queryParams.append('user_id', params.userId.toString());
         if (params.repositoryId) queryParams.append('repository_id', params.repositoryId.toString());
         if (params.limit) queryParams.append('limit', params.limit.toString());
+        if (params.cursor) queryParams.append('cursor', params.cursor);
+        if (params.includeContent) queryParams.append('include_content', 'true');
 
         const response = await apiClient.get(`/ai/feedback/history?${queryParams.toString()}`);
         return response.data;
@@ -42,8 +42,12 @@ export const authApi = {
     },
 
     getUserDashboard: async (): Promise<UserDashboardResponse> => {
-        const response = await apiClient.get('/users/dashboard/stats');
-        return response.data;
+        const response = await apiClient.get('/users/dashboard/stats', { params: { compact_heatmap: true } });
+        const data: UserDashboardResponse = response.data;
+        if (data.heatmap) {
+            data.heatmap_data = expandHeatmap(data.heatmap);
+        }
+        return data;
     },
 
     logout: () => {
@@ -85,6 +89,12 @@ export interface ActivityStats {
     level: 0 | 1 | 2 | 3 | 4;
 }
 
+export interface CompactHeatmap {
+    start: string;
+    counts: number[];
+    thresholds: number[];
+}
+
 export interface UserDashboardResponse {
     languages: LanguageStats[];
     recent_commits: CommitStats[];
@@ -92,4 +102,18 @@ export interface UserDashboardResponse {
     top_repos: RepoStats[];
     weekly_activity: number[];
     heatmap_data: ActivityStats[];
+    heatmap?: CompactHeatmap | null;
 }
+
+// counts[i] is the day start + i; the level is the number of thresholds reached
+export const expandHeatmap = ({ start, counts, thresholds }: CompactHeatmap): ActivityStats[] => {
+    const first = new Date(`${start}T00:00:00Z`);
+    return counts.map((count, i) => {
+        const day = new Date(first.getTime() + i * 86400000);
+        return {
+            date: day.toISOString().slice(0, 10),
+            count,
+            level: thresholds.filter(t => count >= t).length as ActivityStats['level'],
+        };
+    });
+};
@@ -35,6 +35,9 @@ export const analytics = {
     },
     getBurnoutMetrics: (projectId?: number) => {
         return apiClient.get(`/analytics/burnout`, { params: { project_id: projectId } });
+    },
+    getDashboardBundle: (widgets: string[], projectId?: number, period?: string) => {
+        return apiClient.get(`/analytics/bundle`, { params: { widgets: widgets.join(','), project_id: projectId, period } });
     }
 };
 
@@ -134,6 +134,24 @@ export const githubApi = {
         return response.data;
     },
 
+    searchRepositoryTree: async (repoId: number, q: string, limit: number = 50): Promise<any[]> => {
+        const response = await apiClient.get(`/github/repos/${repoId}/tree/search`, {
+            params: { q, limit }
+        });
+        return response.data;
+    },
+
+    getRepositoryTreeStats: async (repoId: number): Promise<{
+        sha: string | null;
+        files: number;
+        directories: number;
+        total_size: number;
+        extensions: { extension: string; files: number; bytes: number }[];
+    }> => {
+        const response = await apiClient.get(`/github/repos/${repoId}/tree/stats`);
+        return response.data;
+    },
+
     getCommitForPath: async (repoId: number, path: string): Promise<any> => {
         const response = await apiClient.get(`/github/repos/${repoId}/commits/path`, {
             params: { path }
@@ -141,6 +159,14 @@ export const githubApi = {
         return response.data;
     },
 
+    getLastCommits: async (repoId: number, directory?: string, paths: string[] = []): Promise<Record<string, any | null>> => {
+        const response = await apiClient.post(`/github/repos/${repoId}/commits/paths`, {
+            directory,
+            paths
+        });
+        return response.data;
+    },
+
     // New methods for advanced features
     getPullRequests: async (repoId: number): Promise<PullRequest[]> => {
         const response = await apiClient.get(`/github/repos/${repoId}/pulls`);
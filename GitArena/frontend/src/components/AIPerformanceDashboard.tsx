@@ -63,7 +63,7 @@ interface AIPerformanceDashboardProps {
 const AIPerformanceDashboard: React.FC<AIPerformanceDashboardProps> = ({ userId, repositoryId }) => {
     const { data: feedbackHistory, isLoading } = useQuery({
         queryKey: ['aiFeedbackHistory', userId, repositoryId],
-        queryFn: () => aiApi.getFeedbackHistory({ userId, repositoryId, limit: 1 }),
+        queryFn: () => aiApi.getFeedbackHistory({ userId, repositoryId, limit: 1, includeContent: true }),
         enabled: !!userId || !!repositoryId,
     });
 
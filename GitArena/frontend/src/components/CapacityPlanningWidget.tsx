@@ -3,11 +3,13 @@ import { useQuery } from '@tanstack/react-query';
 import apiClient from '../api/client';
 
 interface MemberLoad {
-    user_id: number;
+    user_id: number | null;
     username: string;
     avatar_url: string | null;
     velocity: number;
     status: 'Overloaded' | 'Optimal' | 'Underutilized';
+    trend?: 'rising' | 'steady' | 'falling';
+    weekly_load?: number[];
 }
 
 interface TeamCapacityResponse {
@@ -17,8 +19,26 @@ interface TeamCapacityResponse {
     predicted_sprint_output: number;
     sprint_risk: 'Low' | 'Medium' | 'High';
     member_loads: MemberLoad[];
+    weeks?: string[];
 }
 
+const TREND_ICONS: Record<string, string> = { rising: '↗', steady: '→', falling: '↘' };
+
+const LoadSparkline: React.FC<{ values: number[] }> = ({ values }) => {
+    const max = Math.max(...values, 1);
+    return (
+        <div className="flex items-end gap-0.5 h-6">
+            {values.map((value, i) => (
+                <div
+                    key={i}
+                    className="w-1 rounded-sm bg-blue-400/60"
+                    style={{ height: `${Math.max((value / max) * 100, 4)}%` }}
+                />
+            ))}
+        </div>
+    );
+};
+
 interface CapacityPlanningWidgetProps {
     projectId?: number;
 }
@@ -110,7 +130,7 @@ export const CapacityPlanningWidget: React.FC<CapacityPlanningWidgetProps> = ({
 
                 <div className="space-y-3">
                     {data.member_loads.map((member) => (
-                        <div key={member.user_id} className="flex items-center justify-between p-3 bg-slate-800/30 rounded-xl hover:bg-slate-800/50 transition-colors">
+                        <div key={member.user_id ?? member.username} className="flex items-center justify-between p-3 bg-slate-800/30 rounded-xl hover:bg-slate-800/50 transition-colors">
                             <div className="flex items-center gap-3">
                                 <div className="w-10 h-10 rounded-full bg-slate-700 overflow-hidden ring-2 ring-slate-700/50">
                                     {member.avatar_url ? (
@@ -125,10 +145,15 @@ export const CapacityPlanningWidget: React.FC<CapacityPlanningWidgetProps> = ({
                                     <div className="font-medium text-white">{member.username}</div>
                                     <div className="text-xs text-slate-500">
                                         Velocity: {member.velocity} / day
+                                        {member.trend && ` ${TREND_ICONS[member.trend]}`}
                                     </div>
                                 </div>
                             </div>
 
+                            {member.weekly_load && member.weekly_load.length > 0 && (
+                                <LoadSparkline values={member.weekly_load} />
+                            )}
+
                             <div className={`px-3 py-1 rounded-full text-xs font-bold ${getStatusColor(member.status)}`}>
                                 {member.status}
                             </div>
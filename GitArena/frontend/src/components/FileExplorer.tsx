@@ -24,6 +24,15 @@ const FileExplorer: React.FC<FileExplorerProps> = ({ repoId, path = '', level =
     const { data: files, isLoading } = useQuery<FileNode[]>({
         queryKey: ['repoTree', repoId, path],
         queryFn: () => githubApi.getRepositoryTree(repoId, path),
+        // The server caches trees by commit SHA; re-opening a folder within the head TTL needs no request
+        staleTime: 30_000,
+    });
+
+    // Last commit of every entry in this directory, in one request (null for entries without ingested history)
+    const { data: lastCommits } = useQuery({
+        queryKey: ['lastCommits', repoId, path],
+        queryFn: () => githubApi.getLastCommits(repoId, path),
+        staleTime: 1000 * 60 * 5, // Cache for 5 minutes
     });
 
     const toggleFolder = (folderPath: string) => {
@@ -83,7 +92,7 @@ const FileExplorer: React.FC<FileExplorerProps> = ({ repoId, path = '', level =
 
                         {/* Hover Card for Files */}
                         {hoveredFile === file.path && file.type === 'file' && (
-                            <CommitHoverCard repoId={repoId} path={file.path} />
+                            <CommitHoverCard repoId={repoId} path={file.path} batched={lastCommits?.[file.path]} />
                         )}
                     </div>
 
@@ -97,14 +106,17 @@ const FileExplorer: React.FC<FileExplorerProps> = ({ repoId, path = '', level =
     );
 };
 
-const CommitHoverCard: React.FC<{ repoId: number; path: string }> = ({ repoId, path }) => {
-    const { data: commit, isLoading } = useQuery({
+const CommitHoverCard: React.FC<{ repoId: number; path: string; batched?: any | null }> = ({ repoId, path, batched }) => {
+    // Entries the directory batch could not answer are asked from GitHub on hover only
+    const { data: fetched } = useQuery({
         queryKey: ['lastCommit', repoId, path],
         queryFn: () => githubApi.getCommitForPath(repoId, path),
+        enabled: batched === null,
         staleTime: 1000 * 60 * 5, // Cache for 5 minutes
     });
 
-    if (isLoading) return null;
+    const commit = batched ?? fetched;
+    if (!commit) return null;
 
     return (
         <div className="absolute left-full top-0 ml-4 z-50 w-80 bg-gray-900/95 backdrop-blur-xl border border-cyan-500/30 rounded-xl shadow-2xl shadow-cyan-500/20 p-4 animate-fade-in-up">
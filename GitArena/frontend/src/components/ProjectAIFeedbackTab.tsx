@@ -48,7 +48,7 @@ const ProjectAIFeedbackTab: React.FC = () => {
             const allFeedback = [];
             for (const repo of repositories) {
                 try {
-                    const response = await apiClient.get(`/ai/feedback/history?repository_id=${repo.id}&limit=50`);
+                    const response = await apiClient.get(`/ai/feedback/history?repository_id=${repo.id}&limit=50&include_content=true`);
                     if (response.data.analyses) {
                         allFeedback.push(...response.data.analyses);
                     }
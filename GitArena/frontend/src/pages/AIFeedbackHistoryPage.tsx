@@ -39,8 +39,8 @@ const AIFeedbackHistoryPage: React.FC = () => {
     const { data, isLoading, error, refetch } = useQuery({
         queryKey: ['ai-feedback-history', selectedRepo],
         queryFn: async () => {
-            const params = selectedRepo ? `?repository_id=${selectedRepo}` : '';
-            const response = await apiClient.get(`/ai/feedback/history${params}&limit=50`);
+            const params = selectedRepo ? `repository_id=${selectedRepo}&` : '';
+            const response = await apiClient.get(`/ai/feedback/history?${params}limit=50&include_content=true`);
             return response.data;
         }
     });
@@ -1,10 +1,28 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
+import { useQuery } from '@tanstack/react-query';
 import FileExplorer from '../components/FileExplorer';
+import { githubApi } from '../api/github';
 
 const RepositoryCodePage: React.FC = () => {
     const { repoId } = useParams<{ repoId: string }>();
     const navigate = useNavigate();
+    const [search, setSearch] = useState('');
+    const query = search.trim();
+
+    // Both are answered from the server's tree snapshot of the head commit
+    const { data: stats } = useQuery({
+        queryKey: ['repoTreeStats', repoId],
+        queryFn: () => githubApi.getRepositoryTreeStats(Number(repoId)),
+        enabled: !!repoId,
+        staleTime: 30_000,
+    });
+    const { data: matches } = useQuery({
+        queryKey: ['repoTreeSearch', repoId, query],
+        queryFn: () => githubApi.searchRepositoryTree(Number(repoId), query),
+        enabled: !!repoId && query.length > 0,
+        staleTime: 30_000,
+    });
 
     return (
         <div className="max-w-6xl mx-auto space-y-6">
@@ -32,10 +50,30 @@ const RepositoryCodePage: React.FC = () => {
                         <div className="w-3 h-3 rounded-full bg-green-500/20 border border-green-500/50"></div>
                     </div>
                     <div className="ml-4 text-xs text-gray-500 font-mono">root/</div>
+                    {stats && stats.sha && (
+                        <div className="text-xs text-gray-500 font-mono">
+                            {stats.files} files · {stats.directories} folders
+                        </div>
+                    )}
+                    <input
+                        value={search}
+                        onChange={(e) => setSearch(e.target.value)}
+                        placeholder="Go to file..."
+                        className="ml-auto w-56 bg-gray-900 border border-gray-700 rounded-md px-2 py-1 text-xs text-gray-300 font-mono focus:outline-none focus:border-cyan-500"
+                    />
                 </div>
 
                 <div className="p-4 min-h-[500px]">
-                    {repoId ? (
+                    {repoId && query ? (
+                        <div className="font-mono text-sm">
+                            {matches?.length === 0 && <div className="text-gray-500 text-xs">No matching files</div>}
+                            {matches?.map((file) => (
+                                <div key={file.path} className="py-1 px-2 rounded-lg text-gray-400 hover:bg-gray-800/50">
+                                    <span className={file.type === 'dir' ? 'font-bold text-gray-300' : ''}>{file.path}</span>
+                                </div>
+                            ))}
+                        </div>
+                    ) : repoId ? (
                         <FileExplorer repoId={Number(repoId)} />
                     ) : (
                         <div className="text-red-400">Invalid Repository ID</div>